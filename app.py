@@ -1,4 +1,6 @@
-from realapp import app
+from realapp import create_app
+
+app = create_app()
 
 if __name__ == "__main__":
     app.run()
@@ -0,0 +1,80 @@
+# benchmarks/bench_boot.py
+"""
+Benchmark do boot de um worker: importar o módulo do app (o alvo do Procfile),
+servir a primeira requisição e a primeira requisição de uma ferramenta. Cada
+repetição roda num processo novo, como um worker gunicorn recém-criado.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_boot [--alvo app:app] [--repeticoes 5] [--preload]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Roda no processo filho: mede import + app, GET / e GET de uma ferramenta
+CODIGO_FILHO = r"""
+import contextlib, importlib, io, json, resource, sys, time
+inicio = time.perf_counter()
+modulo, atributo = sys.argv[1].split(":")
+with contextlib.redirect_stdout(io.StringIO()):
+    app = getattr(importlib.import_module(modulo), atributo)
+t_import = time.perf_counter()
+cliente = app.test_client()
+cliente.get("/")
+t_home = time.perf_counter()
+cliente.get("/formatador-lote")
+t_ferramenta = time.perf_counter()
+print(json.dumps({
+    "import_app": t_import - inicio,
+    "primeira_requisicao": t_home - t_import,
+    "pagina_ferramenta": t_ferramenta - t_home,
+    "pandas_carregado": "pandas" in sys.modules,
+    "modulos": len(sys.modules),
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def medir(alvo, preload):
+    env = dict(os.environ)
+    if preload:
+        env["PRELOAD_FORMATADORES"] = "1"
+    inicio = time.perf_counter()
+    saida = subprocess.run(
+        [sys.executable, "-c", CODIGO_FILHO, alvo],
+        capture_output=True, text=True, check=True, env=env,
+    ).stdout
+    resultado = json.loads(saida.strip().splitlines()[-1])
+    resultado["processo_total"] = time.perf_counter() - inicio
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--alvo", default="app:app", help="módulo:atributo do app (padrão: app:app)")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--preload", action="store_true", help="Define PRELOAD_FORMATADORES=1 no filho")
+    args = parser.parse_args()
+
+    medicoes = [medir(args.alvo, args.preload) for _ in range(args.repeticoes)]
+    print(f"Boot de {args.alvo} ({args.repeticoes} processos{', preload' if args.preload else ''}), mediana:")
+    for chave, rotulo in [
+        ("import_app", "import do app"),
+        ("primeira_requisicao", "primeira requisição (GET /)"),
+        ("pagina_ferramenta", "GET /formatador-lote"),
+        ("processo_total", "processo inteiro"),
+    ]:
+        print(f"  {rotulo:<28} {statistics.median(m[chave] for m in medicoes) * 1000:9.1f} ms")
+    ultima = medicoes[-1]
+    print(f"  {'módulos carregados':<28} {ultima['modulos']:9d}")
+    print(f"  {'pandas carregado':<28} {'sim' if ultima['pandas_carregado'] else 'não':>9}")
+    print(f"  {'RSS máximo':<28} {statistics.median(m['rss_mb'] for m in medicoes):9.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
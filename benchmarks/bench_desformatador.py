@@ -0,0 +1,87 @@
+# benchmarks/bench_desformatador.py
+"""
+Benchmark do desformatar_tabela_precos em uma tabela formatada sintética
+(ETAPA > BLOCO > cabeçalho > unidades), separando o tempo de leitura do Excel.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_desformatador [--linhas 10000] [--repeticoes 3]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import openpyxl
+import pandas as pd
+
+from formatadores.tabela_desformatador import desformatar_tabela_precos
+
+CABECALHO = ["UNIDADE", "TIPOLOGIA", "ÁREA PRIVATIVA", "VALOR DO IMÓVEL", "SINAL", "MENSAL", "DESCONTO"]
+
+
+def gerar_tabela_formatada(n_linhas, unidades_por_bloco=40, seed=42):
+    """Gera o Excel (bytes) no layout produzido pelo formatador de tabela de preços."""
+    rnd = random.Random(seed)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["TABELA DE PREÇOS"])
+    linhas, bloco = 1, 0
+    while linhas < n_linhas:
+        if bloco % 10 == 0:
+            ws.append([f"ETAPA {bloco // 10 + 1:02d}"])
+            linhas += 1
+        bloco += 1
+        ws.append([f"BLOCO {bloco:02d}"])
+        ws.append(CABECALHO)
+        linhas += 2
+        for apt in range(1, unidades_por_bloco + 1):
+            valor = rnd.uniform(150000, 450000)
+            ws.append([
+                f"BL{bloco:02d} - APT {apt:02d}",
+                rnd.choice(["2 QUARTOS", "3 QUARTOS", "2 QUARTOS PCD"]),
+                f"{rnd.uniform(40, 80):.2f}".replace(".", ","),
+                f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."),
+                f"{valor * 0.05:.2f}",
+                f"{valor * 0.01:.4f}".replace(".", ","),
+                rnd.choice(["", "--", "R$ 5.000,00"]),
+            ])
+            linhas += 1
+        ws.append([])
+        linhas += 1
+    stream = io.BytesIO()
+    wb.save(stream)
+    return stream.getvalue()
+
+
+def _melhor_tempo(func, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            resultado = func()
+            melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=10000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    dados = gerar_tabela_formatada(args.linhas)
+    t_leitura, _ = _melhor_tempo(
+        lambda: pd.read_excel(io.BytesIO(dados), engine="openpyxl", header=None, dtype=str),
+        args.repeticoes,
+    )
+    t_total, df = _melhor_tempo(lambda: desformatar_tabela_precos(io.BytesIO(dados)), args.repeticoes)
+    print(f"Tabela com {args.linhas} linhas ({len(df)} unidades extraídas):")
+    print(f"  leitura do Excel      {t_leitura * 1000:9.1f} ms")
+    print(f"  desformatar (total)   {t_total * 1000:9.1f} ms")
+    print(f"  processamento         {(t_total - t_leitura) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+# benchmarks/bench_ferramentas.py
+"""
+Benchmark de todas as ferramentas sobre as cargas sintéticas de
+benchmarks.cargas: tempo (melhor e mediana de N execuções), pico de memória
+Python (tracemalloc, numa execução à parte para não distorcer o tempo) e o
+tempo de cada etapa (formatadores.metricas). Os resultados vão para um JSON
+com o commit atual; --comparar mostra a variação em relação a um JSON
+gravado em outro commit.
+
+As importações CV, CV Lote e SIENGE são medidas como a SIENGE Lote: a
+leitura da planilha (ler_planilha_*) e a geração (gerar_importacao_*, em
+formatadores/importacao_cv.py, importacao_cv_lote.py e importacao_sienge.py)
+entram no tempo.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_ferramentas [--tamanhos 1k 10k] [--ferramentas lote ...]
+        [--repeticoes 3] [--json resultados.json] [--comparar anterior.json]
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.cargas import GERADORES, gerar_carga, tamanho_linhas
+from formatadores.metricas import coletar_etapas, resumir_etapas, tamanho_bytes
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIMIAR_REGRESSAO = 0.10  # +10% no melhor tempo
+
+
+# --- Preparação: (caminho, parametros) -> função sem argumentos que processa ---
+# Tudo o que não é da ferramenta (imports, leitura do arquivo em bytes) fica
+# na preparação, fora do tempo medido.
+def _ler_bytes(caminho):
+    with open(caminho, "rb") as f:
+        return f.read()
+
+
+def _incorporacao(caminho, parametros):
+    from formatadores.incorporacao_formatador import processar_incorporacao_web
+
+    dados = _ler_bytes(caminho)
+    return lambda: processar_incorporacao_web(io.BytesIO(dados))
+
+
+def _lote(caminho, parametros):
+    from formatadores.lote_formatador import processar_formatador_lote_web
+
+    return lambda: processar_formatador_lote_web(caminho)
+
+
+def _tabela_precos(caminho, parametros):
+    from formatadores.tabela_preco_formatador import processar_tabela_precos_web
+
+    return lambda: processar_tabela_precos_web(
+        caminho, parametros["etapas"], parametros["colunas"], parametros["formatos"]
+    )
+
+
+def _desformatar(caminho, parametros):
+    from formatadores.tabela_desformatador import (
+        calcular_vgv,
+        desformatar_tabela_precos,
+        exportar_csv_desformatado,
+    )
+
+    dados = _ler_bytes(caminho)
+
+    def executar():
+        df_limpo, df_resumo_vgv = calcular_vgv(desformatar_tabela_precos(io.BytesIO(dados)))
+        return exportar_csv_desformatado(df_limpo, df_resumo_vgv)
+
+    return executar
+
+
+def _preco_incorporacao(caminho, parametros):
+    from formatadores.tabela_preco_importador import processar_preco_incorporacao
+
+    return lambda: processar_preco_incorporacao(caminho, parametros["coluna_valor"])
+
+
+def _preco_lote_avista(caminho, parametros):
+    from formatadores.tabela_preco_importador import processar_preco_lote_avista
+
+    dados = _ler_bytes(caminho)
+    return lambda: processar_preco_lote_avista(io.BytesIO(dados))
+
+
+def _preco_lote_parcelado(caminho, parametros):
+    from formatadores.tabela_preco_importador import processar_preco_lote_parcelado
+
+    dados = _ler_bytes(caminho)
+    return lambda: processar_preco_lote_parcelado(
+        io.BytesIO(dados), parametros["meses"], parametros["juros"], parametros["anos"]
+    )
+
+
+def _sienge_lote(caminho, parametros):
+    from formatadores.sienge_lote import gerar_importacao_sienge_lote, ler_planilha_sienge_lote
+
+    def executar():
+        df = ler_planilha_sienge_lote(caminho)
+        return gerar_importacao_sienge_lote(df, parametros["etapas"], parametros["formato"])[0]
+
+    return executar
+
+
+def _unidades_bloqueadas(caminho, parametros):
+    from formatadores.tabela_unidades_bloqueadas import (
+        ler_csv_e_extrair_filtros,
+        processar_unidades_bloqueadas_na_base,
+    )
+
+    def executar():
+        df_input, _, _, col_emp, col_mot, placeholder_vazio = ler_csv_e_extrair_filtros(caminho)
+        return processar_unidades_bloqueadas_na_base(
+            parametros["base"],
+            df_input,
+            col_emp,
+            col_mot,
+            placeholder_vazio,
+            parametros["ignorar_empreendimento"],
+            parametros["ignorar_motivo"],
+            buscar_precos=parametros["buscar_precos"],
+        )
+
+    return executar
+
+
+def _importacao_cv(caminho, parametros):
+    from formatadores.importacao_cv import (
+        gerar_importacao_cv,
+        ler_planilha_cv,
+        mapear_escolhas_tipologias_cv,
+    )
+
+    def executar():
+        tip_map = mapear_escolhas_tipologias_cv(parametros["tipologias"])
+        return gerar_importacao_cv(ler_planilha_cv(caminho), tip_map, parametros["empreendimento"])
+
+    return executar
+
+
+def _importacao_cv_lote(caminho, parametros):
+    from formatadores.importacao_cv_lote import gerar_importacao_cv_lote, ler_planilha_cv_lote
+
+    return lambda: gerar_importacao_cv_lote(ler_planilha_cv_lote(caminho), parametros["empreendimento"])
+
+
+def _importacao_sienge(caminho, parametros):
+    from formatadores.importacao_sienge import gerar_importacao_sienge, ler_planilha_sienge
+
+    def executar():
+        df = ler_planilha_sienge(caminho)
+        return gerar_importacao_sienge(df, parametros["etapas"], parametros["formato"])[0]
+
+    return executar
+
+
+PREPARADORES = {
+    "importacao-cv": _importacao_cv,
+    "importacao-cv-lote": _importacao_cv_lote,
+    "importacao-sienge": _importacao_sienge,
+    "sienge-lote": _sienge_lote,
+    "incorporacao": _incorporacao,
+    "lote": _lote,
+    "tabela-precos": _tabela_precos,
+    "desformatar": _desformatar,
+    "preco-incorporacao": _preco_incorporacao,
+    "preco-lote-avista": _preco_lote_avista,
+    "preco-lote-parcelado": _preco_lote_parcelado,
+    "unidades-bloqueadas": _unidades_bloqueadas,
+}
+
+# --- Medição ---
+@contextlib.contextmanager
+def _silencio():
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+
+def medir(ferramenta, caminho, parametros, repeticoes):
+    """
+    Mede uma ferramenta sobre um arquivo: repeticoes execuções cronometradas
+    e uma com tracemalloc. Retorna o dict do resultado (sem ferramenta/tamanho).
+    """
+    preparar = PREPARADORES[ferramenta]
+    tempos, etapas_melhor, saida = [], [], None
+    for _ in range(repeticoes):
+        with _silencio():
+            executar = preparar(caminho, parametros)
+            with coletar_etapas() as etapas:
+                inicio = time.perf_counter()
+                saida = executar()
+                segundos = time.perf_counter() - inicio
+        if not tempos or segundos < min(tempos):
+            etapas_melhor = etapas
+        tempos.append(segundos)
+
+    with _silencio():
+        executar = preparar(caminho, parametros)
+        tracemalloc.start()
+        try:
+            executar()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "segundos_min": min(tempos),
+        "segundos_mediana": statistics.median(tempos),
+        "segundos": tempos,
+        "pico_memoria_mb": pico / 1024 / 1024,
+        "bytes_entrada": os.path.getsize(caminho),
+        "bytes_saida": tamanho_bytes(saida),
+        "etapas": resumir_etapas(etapas_melhor),
+    }
+
+
+def _git(*args):
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ambiente(args):
+    import pandas as pd
+
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "alteracoes_locais": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "maquina": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeticoes": args.repeticoes,
+        "blocos": args.blocos,
+        "etapas": args.etapas,
+        "seed": args.seed,
+    }
+
+
+# --- Relatórios ---
+def _imprimir_resultado(r):
+    if r.get("erro"):
+        print(f"  {r['ferramenta']:<22} {r['tamanho']:>5}  ERRO: {r['erro']}")
+        return
+    print(
+        f"  {r['ferramenta']:<22} {r['tamanho']:>5} {r['linhas']:>8} "
+        f"{r['segundos_min'] * 1000:>11.1f} {r['segundos_mediana'] * 1000:>11.1f} "
+        f"{r['pico_memoria_mb']:>10.1f}"
+    )
+
+
+def comparar(anterior, atual, limiar=LIMIAR_REGRESSAO):
+    """Imprime a variação do melhor tempo e do pico de memória; retorna as regressões."""
+    antes = {(r["ferramenta"], r["tamanho"]): r for r in anterior["resultados"] if not r.get("erro")}
+    print(f"\nComparação com {str(anterior.get('commit'))[:10]} (melhor tempo; regressão acima de +{limiar:.0%}):")
+    print(f"  {'ferramenta':<22} {'tam.':>5} {'antes ms':>11} {'agora ms':>11} {'razão':>7} {'mem. MB':>15}")
+    regressoes = []
+    for r in atual["resultados"]:
+        a = antes.get((r["ferramenta"], r["tamanho"]))
+        if a is None or r.get("erro"):
+            continue
+        razao = r["segundos_min"] / a["segundos_min"] if a["segundos_min"] else float("inf")
+        marca = ""
+        if razao > 1 + limiar:
+            marca = "  REGRESSÃO"
+            regressoes.append(r)
+        memoria = f"{a['pico_memoria_mb']:.1f}->{r['pico_memoria_mb']:.1f}"
+        print(
+            f"  {r['ferramenta']:<22} {r['tamanho']:>5} {a['segundos_min'] * 1000:>11.1f} "
+            f"{r['segundos_min'] * 1000:>11.1f} {razao:>7.2f} {memoria:>15}{marca}"
+        )
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanhos", nargs="+", default=["1k", "10k"], help="1k, 10k, 100k ou número de linhas")
+    parser.add_argument("--ferramentas", nargs="+", default=list(GERADORES), choices=list(GERADORES), metavar="FERRAMENTA")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--blocos", type=int, default=None, help="Blocos/quadras (padrão: ~40 unidades por bloco)")
+    parser.add_argument("--etapas", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, help="Arquivo de resultados (padrão: benchmarks/resultados/<commit>.json)")
+    parser.add_argument("--comparar", default=None, help="JSON de outro commit para comparar")
+    args = parser.parse_args()
+
+    resultado = {**_ambiente(args), "resultados": []}
+    print(f"Ferramentas em {', '.join(args.tamanhos)} ({args.repeticoes} repetições; commit {str(resultado['commit'])[:10]}):")
+    print(f"  {'ferramenta':<22} {'tam.':>5} {'linhas':>8} {'melhor ms':>11} {'mediana ms':>11} {'pico MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for tamanho in args.tamanhos:
+            for ferramenta in args.ferramentas:
+                carga = gerar_carga(ferramenta, tamanho_linhas(tamanho), args.blocos, args.etapas, args.seed)
+                caminho = os.path.join(tmp, carga["arquivo"])
+                with open(caminho, "wb") as f:
+                    f.write(carga["dados"])
+                item = {"ferramenta": ferramenta, "tamanho": tamanho, "linhas": carga["linhas"]}
+                try:
+                    item.update(medir(ferramenta, caminho, carga["parametros"], args.repeticoes))
+                except Exception as e:
+                    item["erro"] = f"{type(e).__name__}: {e}"
+                resultado["resultados"].append(item)
+                _imprimir_resultado(item)
+
+    caminho_json = args.json or os.path.join(
+        RAIZ, "benchmarks", "resultados", f"{str(resultado['commit'] or 'sem_commit')[:10]}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(caminho_json)), exist_ok=True)
+    with open(caminho_json, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados em {caminho_json}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(json.load(f), resultado)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_formatador_lote.py
+"""
+Benchmark do processar_formatador_lote_web em um loteamento sintético
+(QUADRA > cabeçalho 'Lote' > lotes), separando o tempo de leitura do Excel.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_formatador_lote [--lotes 5000] [--repeticoes 3]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import openpyxl
+import pandas as pd
+
+from formatadores.lote_formatador import processar_formatador_lote_web
+
+CABECALHO = [
+    "Lote", "Tipo", "Área(m²)", "Testada(m)", "Fundo(m)", "Lat. Direita(m)",
+    "Lat. Esquerda(m)", "Frente", "Fundo", "Direita", "Esquerda",
+]
+
+
+def gerar_loteamento(n_lotes, lotes_por_quadra=24, seed=42):
+    """Gera o Excel (bytes) no layout de entrada do formatador de lotes."""
+    rnd = random.Random(seed)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    lotes, quadra = 0, 0
+    while lotes < n_lotes:
+        quadra += 1
+        ws.append([f"QUADRA {quadra:02d}"])
+        ws.append(CABECALHO)
+        for lote in range(1, lotes_por_quadra + 1):
+            testada = rnd.choice([10, 12, 15])
+            ws.append([
+                str(lote),
+                rnd.choice(["Residencial", "Comercial"]),
+                f"{testada * rnd.uniform(20, 30):.2f}".replace(".", ","),
+                f"{testada:.2f}",
+                rnd.choice(["25,00", "30,00m"]),
+                rnd.choice(["25,00", "30,00"]),
+                rnd.choice(["25,00", "30,00"]),
+                rnd.choice(["Rua A", "Rua B", "Avenida Central"]),
+                f"LT{lote + 20}",
+                str(lote + 1) if lote < lotes_por_quadra else "Área Verde",
+                str(lote - 1) if lote > 1 else "-",
+            ])
+            lotes += 1
+        ws.append([])
+    stream = io.BytesIO()
+    wb.save(stream)
+    return stream.getvalue()
+
+
+def _melhor_tempo(func, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            resultado = func()
+            melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lotes", type=int, default=5000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    dados = gerar_loteamento(args.lotes)
+    t_leitura, df_raw = _melhor_tempo(
+        lambda: pd.read_excel(io.BytesIO(dados), header=None, engine="openpyxl", dtype=str),
+        args.repeticoes,
+    )
+    t_total, saida = _melhor_tempo(
+        lambda: processar_formatador_lote_web(io.BytesIO(dados)), args.repeticoes
+    )
+    df_saida = pd.read_excel(saida)
+    t_escrita, _ = _melhor_tempo(
+        lambda: df_saida.to_excel(io.BytesIO(), index=False, engine="openpyxl"),
+        args.repeticoes,
+    )
+    print(f"Loteamento com {args.lotes} lotes ({len(df_raw)} linhas, {len(df_saida)} lotes na saída):")
+    print(f"  leitura do Excel      {t_leitura * 1000:9.1f} ms")
+    print(f"  escrita do Excel      {t_escrita * 1000:9.1f} ms")
+    print(f"  formatador (total)    {t_total * 1000:9.1f} ms")
+    print(f"  processamento         {(t_total - t_leitura - t_escrita) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
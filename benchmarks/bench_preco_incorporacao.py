@@ -0,0 +1,131 @@
+# benchmarks/bench_preco_incorporacao.py
+"""
+Benchmark da nomenclatura de unidades em processar_preco_incorporacao:
+caminho antigo (DataFrame.apply por linha) x caminho vetorizado (str.extract).
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_preco_incorporacao [--unidades 10000] [--repeticoes 3]
+"""
+
+import argparse
+import io
+import random
+import time
+
+import pandas as pd
+
+from formatadores.tabela_preco_importador import (
+    format_brl,
+    formatar_nome_bloco_saida,
+    formatar_nome_unidade_composto,
+    formatar_nome_unidade_generico,
+    format_brl_serie,
+    formatar_nome_bloco_saida_serie,
+    formatar_nome_unidade_composto_serie,
+    formatar_nome_unidade_generico_serie,
+    processar_preco_incorporacao,
+)
+
+
+def gerar_planilha_padrao(n_unidades, seed=42):
+    """Gera DataFrame no formato padrão (BLOCO / APT / TIPOLOGIA / VALOR)."""
+    rnd = random.Random(seed)
+    linhas = []
+    for i in range(n_unidades):
+        bloco = f"BLOCO {i // 32 + 1}" if i % 32 == 0 else None  # ffill no processamento
+        apt = rnd.choice([f"{i % 32 + 1}", f"APT {i % 32 + 101}", f"{i % 32 + 1} (PCD)", "GARAGEM"])
+        tipologia = rnd.choice(["2 quartos", "3 QUARTOS", "2 quartos PCD", "Térreo pcd", None])
+        valor = rnd.choice([f"{rnd.uniform(1e5, 9e5):.2f}", f"R$ {rnd.randint(100, 999)}.{rnd.randint(100, 999)},00", "", "sob consulta"])
+        linhas.append({"BLOCO": bloco, "APT": apt, "TIPOLOGIA": tipologia, "Valor do imóvel padrão": valor})
+    return pd.DataFrame(linhas)
+
+
+def gerar_planilha_composta(n_unidades, seed=42):
+    """Gera DataFrame no modo composto (BLOCO / QUADRA / CASA)."""
+    rnd = random.Random(seed)
+    linhas = []
+    for i in range(n_unidades):
+        bloco = rnd.choice([str(i // 40 + 1), "US", " us ", "BL 7", None])
+        quadra = f"QD {i // 200 + 1}" if i % 200 == 0 else None
+        casa = rnd.choice([f"{i % 40 + 1}", f"CS{i % 40 + 1:03d}", "sem número"])
+        valor = f"{rnd.uniform(1e5, 9e5):.2f}"
+        linhas.append({"BLOCO": bloco, "QUADRA": quadra, "CASA": casa, "Valor do imóvel padrão": valor})
+    return pd.DataFrame(linhas)
+
+
+def _cronometrar(func, repeticoes):
+    melhor = float("inf")
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def _salvar_excel(df):
+    """Salva o DataFrame com 2 linhas de título (cabeçalho na linha 3), como a ferramenta espera."""
+    stream = io.BytesIO()
+    with pd.ExcelWriter(stream, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False, startrow=2)
+    stream.seek(0)
+    return stream
+
+
+def comparar(nome, func_antiga, func_nova, repeticoes):
+    t_antigo, r_antigo = _cronometrar(func_antiga, repeticoes)
+    t_novo, r_novo = _cronometrar(func_nova, repeticoes)
+    pd.testing.assert_series_equal(r_antigo, r_novo, check_names=False, check_dtype=False)
+    print(f"  {nome:<28} antigo={t_antigo * 1000:9.1f} ms  vetorizado={t_novo * 1000:8.1f} ms  ({t_antigo / t_novo:5.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--unidades", type=int, default=10000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Modo padrão ({args.unidades} unidades):")
+    df = gerar_planilha_padrao(args.unidades)
+    df["BLOCO"] = df["BLOCO"].ffill()
+    comparar(
+        "UNIDADE",
+        lambda: df.apply(formatar_nome_unidade_generico, axis=1, args=("BLOCO", "APT", "TIPOLOGIA", "BL", "APT")),
+        lambda: formatar_nome_unidade_generico_serie(df, "BLOCO", "APT", "TIPOLOGIA", "BL", "APT"),
+        args.repeticoes,
+    )
+    comparar(
+        "BLOCO",
+        lambda: df["BLOCO"].apply(formatar_nome_bloco_saida, prefixo_completo="BLOCO"),
+        lambda: formatar_nome_bloco_saida_serie(df["BLOCO"], "BLOCO"),
+        args.repeticoes,
+    )
+    comparar(
+        "VALOR DO IMOVEL",
+        lambda: df["Valor do imóvel padrão"].apply(format_brl),
+        lambda: format_brl_serie(df["Valor do imóvel padrão"]),
+        args.repeticoes,
+    )
+
+    print(f"Modo composto ({args.unidades} unidades):")
+    df = gerar_planilha_composta(args.unidades)
+    df["QUADRA"] = df["QUADRA"].ffill()
+    comparar(
+        "UNIDADE",
+        lambda: df.apply(formatar_nome_unidade_composto, axis=1, args=("BLOCO", "QUADRA", "CASA")),
+        lambda: formatar_nome_unidade_composto_serie(df, "BLOCO", "QUADRA", "CASA"),
+        args.repeticoes,
+    )
+
+    print("Ponta a ponta (processar_preco_incorporacao, inclui leitura do Excel):")
+    for nome, gerador in (("padrão", gerar_planilha_padrao), ("composto", gerar_planilha_composta)):
+        planilha = _salvar_excel(gerador(args.unidades)).getvalue()
+        t, _ = _cronometrar(
+            lambda: processar_preco_incorporacao(io.BytesIO(planilha), "Valor do imóvel padrão"),
+            1,
+        )
+        print(f"  {nome:<28} {t * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
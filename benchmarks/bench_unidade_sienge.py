@@ -0,0 +1,90 @@
+# benchmarks/bench_unidade_sienge.py
+"""
+Benchmark da coluna UNIDADE das importações SIENGE (incorporação legado e lote):
+caminho antigo (DataFrame.apply por linha) x caminho colunar, conferindo que
+as duas saídas são idênticas.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_unidade_sienge [--unidades 20000] [--repeticoes 3]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import pandas as pd
+
+from formatadores.importacao_sienge import formatar_unidade_sienge, formatar_unidade_sienge_colunar
+from formatadores.sienge_lote import (
+    formatar_unidade_sienge_lote,
+    formatar_unidade_sienge_lote_colunar,
+)
+
+
+def gerar_planilha_legado(n_unidades, seed=42):
+    """Gera DataFrame no formato legado (ETAPA / BLOCO / APT / TIPO)."""
+    rnd = random.Random(seed)
+    linhas = []
+    for i in range(n_unidades):
+        bloco = rnd.choice([i // 32 + 1, float(i // 32 + 1), f"{i // 32 + 1}", "A", None])
+        apt = rnd.choice([i % 32 + 101, f"{i % 32 + 101}", f"APT {i % 32 + 1}", f"{i % 32 + 1} PCD", "GARAGEM", None])
+        tipo = rnd.choice(["2 QUARTOS", "2 QUARTOS PCD", "P.N.E", None])
+        linhas.append({"ETAPA": f"ETAPA {i // 5000 + 1}", "BLOCO": bloco, "APT": apt, "TIPO": tipo})
+    return pd.DataFrame(linhas)
+
+
+def gerar_planilha_lote(n_unidades, seed=42):
+    """Gera DataFrame no formato de loteamento (ETAPA / QUADRA / LOTE)."""
+    rnd = random.Random(seed)
+    linhas = []
+    for i in range(n_unidades):
+        quadra = rnd.choice([i // 40 + 1, f"QD {i // 40 + 1}", f"Q{i // 40 + 1:02d}", None])
+        lote = rnd.choice([i % 40 + 1, f"LT {i % 40 + 1}", f"LOTE {i % 40:02d}", "", None])
+        linhas.append({"ETAPA": f"ETAPA {i // 5000 + 1}", "QUADRA": quadra, "LOTE": lote})
+    return pd.DataFrame(linhas)
+
+
+def _melhor_tempo(func, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            resultado = func()
+            melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def _comparar(nome, func_linha, func_colunar, repeticoes):
+    t_linha, antigo = _melhor_tempo(func_linha, repeticoes)
+    t_colunar, novo = _melhor_tempo(func_colunar, repeticoes)
+    pd.testing.assert_series_equal(antigo, novo, check_names=False)
+    print(f"  {nome:<22} {t_linha * 1000:9.1f} ms -> {t_colunar * 1000:7.1f} ms  ({t_linha / t_colunar:5.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--unidades", type=int, default=20000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    df = gerar_planilha_legado(args.unidades)
+    df_lote = gerar_planilha_lote(args.unidades)
+    print(f"{args.unidades} unidades (apply por linha -> colunar), saídas idênticas:")
+    _comparar(
+        "UNIDADE (BLOCO/APT)",
+        lambda: df.apply(lambda r: formatar_unidade_sienge(r, "BLOCO", "APT", r.get("TIPO")), axis=1),
+        lambda: formatar_unidade_sienge_colunar(df, "BLOCO", "APT", "TIPO"),
+        args.repeticoes,
+    )
+    _comparar(
+        "UNIDADE (QUADRA/LOTE)",
+        lambda: df_lote.apply(lambda r: formatar_unidade_sienge_lote(r, "QUADRA", "LOTE"), axis=1),
+        lambda: formatar_unidade_sienge_lote_colunar(df_lote, "QUADRA", "LOTE"),
+        args.repeticoes,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+# benchmarks/cargas.py
+"""
+Gerador de cargas sintéticas: uma planilha de entrada realista por
+ferramenta, no layout que a ferramenta espera, com tamanho parametrizado
+(linhas, blocos/quadras e etapas) e semente fixa, para que o mesmo comando
+gere sempre os mesmos bytes e os benchmarks sejam comparáveis entre commits.
+
+Cada gerador devolve um dict com:
+    arquivo     nome do arquivo (a extensão importa para as ferramentas)
+    dados       conteúdo (bytes)
+    linhas      linhas de dados geradas (sem títulos e cabeçalhos)
+    parametros  os parâmetros que a ferramenta recebe além da planilha
+                (mapeamento de etapas e de tipologias, coluna de valor, dados
+                do empreendimento...)
+
+Uso (na raiz do repositório):
+    python -m benchmarks.cargas --saida /tmp/cargas [--tamanhos 1k 10k 100k]
+        [--ferramentas lote sienge-lote ...] [--blocos 50] [--etapas 3]
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import random
+
+import openpyxl
+
+# Nomes dos tamanhos usados na linha de comando e nos resultados
+TAMANHOS = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+UNIDADES_POR_BLOCO = 40
+
+TIPOLOGIAS = ["2 QUARTOS", "2 QUARTOS SUITE", "3 QUARTOS", "2 QUARTOS PCD", "CASA 2Q"]
+EMPREENDIMENTOS = ["RESIDENCIAL AURORA", "JARDIM DAS FLORES", "VILA ESPERANÇA", "PARQUE DOS IPÊS", "RECANTO SOL"]
+MOTIVOS = ["Diretoria", "Permuta", "Obra", "Jurídico", ""]
+
+
+# --- Auxiliares ---
+def tamanho_linhas(tamanho):
+    """'10k' -> 10000; aceita também o número direto."""
+    return TAMANHOS[tamanho] if tamanho in TAMANHOS else int(tamanho)
+
+
+def _distribuir(linhas, blocos, etapas):
+    """
+    (etapa, bloco, n) de cada linha de dados: as linhas são repartidas
+    igualmente entre os blocos (n é a posição da unidade no bloco, a partir
+    de 1) e os blocos, em ordem, entre as etapas.
+    """
+    blocos = blocos or max(1, math.ceil(linhas / UNIDADES_POR_BLOCO))
+    etapas = max(1, min(etapas, blocos))
+    por_bloco = math.ceil(linhas / blocos)
+    for i in range(linhas):
+        bloco = i // por_bloco + 1
+        yield (bloco - 1) * etapas // blocos + 1, bloco, i % por_bloco + 1
+
+
+def _excel(linhas):
+    """Linhas (listas de células) -> bytes de um .xlsx (write_only: rápido para 100k linhas)."""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    for linha in linhas:
+        ws.append(linha)
+    stream = io.BytesIO()
+    wb.save(stream)
+    return stream.getvalue()
+
+
+def _decimal_br(valor, casas=2):
+    return f"{valor:.{casas}f}".replace(".", ",")
+
+
+def _moeda_br(valor):
+    return "R$ " + f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _area(rnd, minimo, maximo):
+    """Área como as planilhas trazem: número, texto com vírgula ou com sufixo m²."""
+    valor = rnd.uniform(minimo, maximo)
+    return rnd.choice([round(valor, 2), _decimal_br(valor), f"{_decimal_br(valor)} m²"])
+
+
+def _etapas_usadas(linhas, blocos, etapas):
+    return sorted({etapa for etapa, _, _ in _distribuir(linhas, blocos, etapas)})
+
+
+def _blocos_por_etapa(linhas, blocos, etapas):
+    mapa = {}
+    for etapa, bloco, _ in _distribuir(linhas, blocos, etapas):
+        mapa[bloco] = etapa
+    return mapa
+
+
+# --- Geradores: (linhas, blocos, etapas, rnd) -> dict ---
+def _importacao_cv(linhas, blocos, etapas, rnd):
+    cabecalho = ["BLOCO", "APTO", "TIPO", "ÁREA CONSTRUÍDA", "GARAGEM", "QUINTAL", "FRAÇÃO IDEAL"]
+    dados = [cabecalho]
+    for _, bloco, n in _distribuir(linhas, blocos, etapas):
+        dados.append([
+            bloco,
+            100 * (1 + (n - 1) // 4) + (n - 1) % 4 + 1,
+            rnd.choice(TIPOLOGIAS),
+            _area(rnd, 40, 80),
+            rnd.choice(["", "12,50", "1", "2"]),
+            rnd.choice(["", "", _decimal_br(rnd.uniform(5, 30))]),
+            _decimal_br(rnd.uniform(0.0005, 0.003), 6),
+        ])
+    empreendimento = {"Nome do Empreendimento": "RESIDENCIAL SINTÉTICO", "Sigla": "RSI"}
+    tipologias = {tipo: {"pcd": "88"} if "PCD" in tipo else {"padrao": "51"} for tipo in TIPOLOGIAS}
+    return {
+        "arquivo": "importacao_cv.xlsx",
+        "dados": _excel(dados),
+        "parametros": {"tipologias": tipologias, "empreendimento": empreendimento},
+    }
+
+
+def _importacao_cv_lote(linhas, blocos, etapas, rnd):
+    cabecalho = ["QUADRA", "LOTE", "ÁREA(M2)", "FRAÇÃO IDEAL", "TIPO", "CONFRONTANTES"]
+    dados = [cabecalho]
+    for _, quadra, n in _distribuir(linhas, blocos, etapas):
+        dados.append([
+            f"QUADRA {quadra:02d}",
+            f"LT {n:02d}",
+            _area(rnd, 200, 450),
+            _decimal_br(rnd.uniform(0.0005, 0.003), 6),
+            rnd.choice(["Residencial", "Comercial"]),
+            f"Frente: Rua {rnd.randint(1, 30)}; Fundo: LT {n + 20:02d}",
+        ])
+    empreendimento = {"Nome do Empreendimento": "LOTEAMENTO SINTÉTICO", "Sigla": "LSI", "Empresa": "SPE"}
+    return {
+        "arquivo": "importacao_cv_lote.xlsx",
+        "dados": _excel(dados),
+        "parametros": {"empreendimento": empreendimento},
+    }
+
+
+def _importacao_sienge(linhas, blocos, etapas, rnd):
+    cabecalho = ["ETAPA", "BLOCO", "APT", "TIPO", "ÁREA CONSTRUIDA", "FRAÇÃO IDEAL"]
+    dados = [cabecalho]
+    for etapa, bloco, n in _distribuir(linhas, blocos, etapas):
+        dados.append([
+            f"ETAPA {etapa:02d}",
+            bloco,
+            100 * (1 + (n - 1) // 4) + (n - 1) % 4 + 1,
+            rnd.choice(TIPOLOGIAS),
+            round(rnd.uniform(40, 80), 2),
+            round(rnd.uniform(0.0005, 0.003), 6),
+        ])
+    etapas_map = {f"{e:02d}": str(100 + e) for e in _etapas_usadas(linhas, blocos, etapas)}
+    return {
+        "arquivo": "importacao_sienge.xlsx",
+        "dados": _excel(dados),
+        "parametros": {"etapas": etapas_map, "formato": "csv"},
+    }
+
+
+def _sienge_lote(linhas, blocos, etapas, rnd):
+    cabecalho = ["ETAPA", "QUADRA", "LOTE", "ÁREA(M2)", "FRAÇÃO IDEAL"]
+    dados = [cabecalho]
+    for etapa, quadra, n in _distribuir(linhas, blocos, etapas):
+        dados.append([
+            f"ETAPA {etapa:02d}",
+            f"Q{quadra}",
+            f"LT {n}",
+            _area(rnd, 200, 450),
+            round(rnd.uniform(0.0005, 0.003), 6),
+        ])
+    etapas_map = {f"{e:02d}": str(100 + e) for e in _etapas_usadas(linhas, blocos, etapas)}
+    return {
+        "arquivo": "sienge_lote.xlsx",
+        "dados": _excel(dados),
+        "parametros": {"etapas": etapas_map, "formato": "csv"},
+    }
+
+
+def _incorporacao(linhas, blocos, etapas, rnd):
+    """Formatador Incorporação no formato padrão: títulos de seção 'QUADRA NN' na coluna A."""
+    dados = [
+        ["MEMORIAL DE INCORPORAÇÃO"],
+        [],
+        ["Casa", "Tipo", "Área Construída", "Quintal", "Garagem", "Área Privativa", "Fração Ideal"],
+    ]
+    quadra_atual = None
+    for _, quadra, n in _distribuir(linhas, blocos, etapas):
+        if quadra != quadra_atual:
+            dados.append([f"QUADRA {quadra:02d}"])
+            quadra_atual = quadra
+        dados.append([
+            n,
+            rnd.choice(["21", "22", "20", "88 PCD"]),
+            _area(rnd, 45, 90),
+            rnd.choice(["", "12,5", round(rnd.uniform(5, 30), 2)]),
+            rnd.choice(["", "12,50", "25,00"]),
+            _area(rnd, 45, 90),
+            round(rnd.uniform(0.0005, 0.003), 8),
+        ])
+    return {"arquivo": "incorporacao.xlsx", "dados": _excel(dados), "parametros": {}}
+
+
+def _lote(linhas, blocos, etapas, rnd):
+    """Formatador Lote: 'QUADRA NN' > cabeçalho 'Lote' > lotes."""
+    cabecalho = [
+        "Lote", "Tipo", "Área(m²)", "Testada(m)", "Fundo(m)", "Lat. Direita(m)",
+        "Lat. Esquerda(m)", "Frente", "Fundo", "Direita", "Esquerda",
+    ]
+    dados = []
+    quadra_atual = None
+    for _, quadra, n in _distribuir(linhas, blocos, etapas):
+        if quadra != quadra_atual:
+            if quadra_atual is not None:
+                dados.append([])
+            dados.append([f"QUADRA {quadra:02d}"])
+            dados.append(cabecalho)
+            quadra_atual = quadra
+        testada = rnd.choice([10, 12, 15])
+        dados.append([
+            str(n),
+            rnd.choice(["Residencial", "Comercial"]),
+            _decimal_br(testada * rnd.uniform(20, 30)),
+            _decimal_br(testada),
+            rnd.choice(["25,00", "30,00m"]),
+            rnd.choice(["25,00", "30,00"]),
+            rnd.choice(["25,00", "30,00"]),
+            rnd.choice(["Rua A", "Rua B", "Avenida Central"]),
+            f"LT{n + 20}",
+            str(n + 1),
+            str(n - 1) if n > 1 else "-",
+        ])
+    return {"arquivo": "lote.xlsx", "dados": _excel(dados), "parametros": {}}
+
+
+def _tabela_precos(linhas, blocos, etapas, rnd):
+    """Tabela de preços bruta (entrada do formatador): título, linha vazia e cabeçalho na linha 3."""
+    dados = [
+        ["TABELA DE PREÇOS"],
+        [],
+        ["BLOCO", "UNIDADE", "TIPOLOGIA", "ÁREA PRIVATIVA", "VALOR", "GARAGEM"],
+    ]
+    for _, bloco, n in _distribuir(linhas, blocos, etapas):
+        dados.append([
+            f"BLOCO {bloco:02d}",
+            str(100 * (1 + (n - 1) // 4) + (n - 1) % 4 + 1),
+            rnd.choice(TIPOLOGIAS),
+            _decimal_br(rnd.uniform(40, 80)),
+            rnd.choice([_moeda_br(rnd.uniform(150_000, 450_000)), round(rnd.uniform(150_000, 450_000), 2)]),
+            rnd.choice(["1", "2", ""]),
+        ])
+    etapas_map = {
+        f"BLOCO {bloco:02d}": f"ETAPA {etapa:02d}"
+        for bloco, etapa in _blocos_por_etapa(linhas, blocos, etapas).items()
+    }
+    parametros = {
+        "etapas": etapas_map,
+        "colunas": ["BLOCO", "UNIDADE", "TIPOLOGIA", "ÁREA PRIVATIVA", "VALOR", "GARAGEM"],
+        "formatos": None,
+    }
+    return {"arquivo": "tabela_precos.xlsx", "dados": _excel(dados), "parametros": parametros}
+
+
+def _desformatar(linhas, blocos, etapas, rnd):
+    """Tabela de preços formatada (saída do formatador): ETAPA > BLOCO > cabeçalho > unidades."""
+    cabecalho = ["UNIDADE", "TIPOLOGIA", "ÁREA PRIVATIVA", "VALOR DO IMÓVEL", "SINAL", "MENSAL", "DESCONTO"]
+    dados = [["TABELA DE PREÇOS"]]
+    etapa_atual = bloco_atual = None
+    for etapa, bloco, n in _distribuir(linhas, blocos, etapas):
+        if etapa != etapa_atual:
+            dados.append([f"ETAPA {etapa:02d}"])
+            etapa_atual = etapa
+        if bloco != bloco_atual:
+            if bloco_atual is not None:
+                dados.append([])
+            dados.append([f"BLOCO {bloco:02d}"])
+            dados.append(cabecalho)
+            bloco_atual = bloco
+        valor = rnd.uniform(150_000, 450_000)
+        dados.append([
+            f"BL{bloco:02d} - APT {n:02d}",
+            rnd.choice(TIPOLOGIAS),
+            _decimal_br(rnd.uniform(40, 80)),
+            _moeda_br(valor),
+            f"{valor * 0.05:.2f}",
+            _decimal_br(valor * 0.01, 4),
+            rnd.choice(["", "--", "R$ 5.000,00"]),
+        ])
+    return {"arquivo": "desformatar.xlsx", "dados": _excel(dados), "parametros": {}}
+
+
+def _preco_incorporacao(linhas, blocos, etapas, rnd):
+    dados = [
+        ["TABELA DE PREÇOS INCORPORAÇÃO"],
+        [],
+        ["BLOCO", "UNIDADE", "TIPOLOGIA", "VALOR", "VALOR PROMOCIONAL"],
+    ]
+    for _, bloco, n in _distribuir(linhas, blocos, etapas):
+        valor = rnd.uniform(150_000, 450_000)
+        dados.append([
+            bloco,
+            100 * (1 + (n - 1) // 4) + (n - 1) % 4 + 1,
+            rnd.choice(TIPOLOGIAS),
+            rnd.choice([round(valor, 2), _moeda_br(valor)]),
+            round(valor * 0.95, 2),
+        ])
+    return {"arquivo": "preco_incorporacao.xlsx", "dados": _excel(dados), "parametros": {"coluna_valor": "VALOR"}}
+
+
+def _tabela_lotes(linhas, blocos, etapas, rnd):
+    """Tabela de preços de lotes: cabeçalho na linha 3 e QUADRA só na primeira linha de cada quadra."""
+    dados = [
+        [None, "TABELA DE PREÇOS"],
+        [],
+        ["QUADRA", "LOTE", "Tipo", "Área", "Valor à vista", "Entrada"],
+    ]
+    for _, quadra, n in _distribuir(linhas, blocos, etapas):
+        valor = rnd.uniform(80_000, 250_000)
+        dados.append([
+            f"QUADRA {quadra}" if n == 1 else None,
+            rnd.choice([n, f"LT {n}"]),
+            rnd.choice(["Residencial", "Comercial"]),
+            rnd.choice([round(rnd.uniform(200, 450), 2), _decimal_br(rnd.uniform(200, 450))]),
+            rnd.choice([round(valor, 2), _moeda_br(valor)]),
+            rnd.choice([round(valor * 0.1), _moeda_br(valor * 0.1)]),
+        ])
+    return _excel(dados)
+
+
+def _preco_lote_avista(linhas, blocos, etapas, rnd):
+    return {"arquivo": "preco_lote.xlsx", "dados": _tabela_lotes(linhas, blocos, etapas, rnd), "parametros": {}}
+
+
+def _preco_lote_parcelado(linhas, blocos, etapas, rnd):
+    return {
+        "arquivo": "preco_lote.xlsx",
+        "dados": _tabela_lotes(linhas, blocos, etapas, rnd),
+        "parametros": {"meses": 12, "juros": 8.5, "anos": 5},
+    }
+
+
+def _unidades_bloqueadas(linhas, blocos, etapas, rnd):
+    """CSV (;) exportado do CV: blocos repartidos entre os empreendimentos."""
+    texto = io.StringIO()
+    texto.write("Empreendimento;Etapa;Bloco;Unidade;Motivo do Bloqueio;Descrição;Data do Bloqueio\n")
+    for etapa, bloco, n in _distribuir(linhas, blocos, etapas):
+        texto.write(";".join([
+            EMPREENDIMENTOS[bloco % len(EMPREENDIMENTOS)],
+            f"ETAPA {etapa:02d}",
+            f"BLOCO {bloco:02d}",
+            f"APT {n:02d}",
+            rnd.choice(MOTIVOS),
+            rnd.choice(["", "Reservada para diretoria", "Aguardando documentação"]),
+            f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/2024",
+        ]) + "\n")
+    parametros = {
+        "base": "VCA",
+        "ignorar_empreendimento": [EMPREENDIMENTOS[-1]],
+        "ignorar_motivo": [],
+        "buscar_precos": False,  # sem rede: o benchmark mede só o processamento local
+    }
+    return {"arquivo": "unidades_bloqueadas.csv", "dados": texto.getvalue().encode("utf-8"), "parametros": parametros}
+
+
+# Mesmos nomes dos subcomandos de python -m formatadores (mais as três importações web)
+GERADORES = {
+    "importacao-cv": _importacao_cv,
+    "importacao-cv-lote": _importacao_cv_lote,
+    "importacao-sienge": _importacao_sienge,
+    "sienge-lote": _sienge_lote,
+    "incorporacao": _incorporacao,
+    "lote": _lote,
+    "tabela-precos": _tabela_precos,
+    "desformatar": _desformatar,
+    "preco-incorporacao": _preco_incorporacao,
+    "preco-lote-avista": _preco_lote_avista,
+    "preco-lote-parcelado": _preco_lote_parcelado,
+    "unidades-bloqueadas": _unidades_bloqueadas,
+}
+
+
+def gerar_carga(ferramenta, linhas, blocos=None, etapas=3, seed=42):
+    """
+    Carga sintética de uma ferramenta. blocos=None usa ~40 unidades por
+    bloco/quadra; as etapas são limitadas ao número de blocos.
+    """
+    if ferramenta not in GERADORES:
+        raise ValueError(f"Ferramenta desconhecida: {ferramenta}. Opções: {', '.join(GERADORES)}")
+    carga = GERADORES[ferramenta](linhas, blocos, etapas, random.Random(seed))
+    carga["linhas"] = linhas
+    return carga
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--saida", required=True, help="Diretório onde gravar as planilhas")
+    parser.add_argument("--tamanhos", nargs="+", default=list(TAMANHOS), help="1k, 10k, 100k ou número de linhas")
+    parser.add_argument("--ferramentas", nargs="+", default=list(GERADORES), choices=list(GERADORES), metavar="FERRAMENTA")
+    parser.add_argument("--blocos", type=int, default=None, help="Blocos/quadras (padrão: ~40 unidades por bloco)")
+    parser.add_argument("--etapas", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for tamanho in args.tamanhos:
+        pasta = os.path.join(args.saida, tamanho)
+        os.makedirs(pasta, exist_ok=True)
+        for ferramenta in args.ferramentas:
+            carga = gerar_carga(ferramenta, tamanho_linhas(tamanho), args.blocos, args.etapas, args.seed)
+            extensao = os.path.splitext(carga["arquivo"])[1]
+            caminho = os.path.join(pasta, f"{ferramenta}{extensao}")
+            with open(caminho, "wb") as f:
+                f.write(carga["dados"])
+            with open(os.path.join(pasta, f"{ferramenta}.parametros.json"), "w", encoding="utf-8") as f:
+                json.dump(carga["parametros"], f, ensure_ascii=False, indent=2)
+            print(f"  {caminho:<60} {len(carga['dados']) / 1024:9.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
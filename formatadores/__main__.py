@@ -0,0 +1,326 @@
+# formatadores/__main__.py
+"""
+Linha de comando das ferramentas, sem servidor web nem sessão: cada
+subcomando lê a planilha de um arquivo ("-" para stdin), recebe os mesmos
+parâmetros que os formulários coletam e grava o resultado em -o ("-", o
+padrão, é stdout). Os logs das ferramentas vão para stderr (ou somem com
+--silencioso), então stdout leva só o arquivo gerado.
+
+Uso (na raiz do repositório):
+    python -m formatadores tabela-precos tabela.xlsx -o saida.xlsx \\
+        --etapas '{"BLOCO 01": "ETAPA 1", "BLOCO 02": "ETAPA 2"}' \\
+        --colunas BLOCO UNIDADE VALOR --formatos '{"VALOR": "moeda"}'
+    python -m formatadores preco-lote-parcelado - --meses 12 --juros 8,5 \\
+        --anos 10 < lotes.xlsx > lotes.csv
+    python -m formatadores sienge-lote lotes.xlsx -o lotes.xls --etapas @etapas.json
+    python -m formatadores importacao-cv unidades.xlsx -o cv.csv --sigla RSI \\
+        --tipologias '{"2 QUARTOS": {"padrao": "51", "superior": "52"}}'
+
+Parâmetros JSON aceitam o texto direto ou @arquivo.json.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+from formatadores.metricas import coletar_etapas, resumir_etapas
+
+
+# --- Subcomandos: (caminho, args) -> BytesIO/StringIO ---
+# Os imports ficam dentro das funções: cada subcomando só carrega a ferramenta que usa.
+def _ler_bytes(caminho):
+    with open(caminho, "rb") as f:
+        return io.BytesIO(f.read())
+
+
+def _incorporacao(caminho, args):
+    from formatadores.incorporacao_formatador import processar_incorporacao_web
+
+    return processar_incorporacao_web(_ler_bytes(caminho))
+
+
+def _incorporacao_avancado(caminho, args):
+    from formatadores.incorporacao_avancado import processar_formatador_incorporacao_avancado
+
+    return processar_formatador_incorporacao_avancado(caminho)
+
+
+def _lote(caminho, args):
+    from formatadores.lote_formatador import processar_formatador_lote_web
+
+    return processar_formatador_lote_web(caminho)
+
+
+def _tabela_precos(caminho, args):
+    from formatadores.tabela_preco_formatador import processar_tabela_precos_web
+
+    # Como no formulário de mapeamento: etapa sem espaços nas pontas e em maiúsculas
+    block_mapping = {
+        str(bloco): str(etapa).strip().upper() for bloco, etapa in args.etapas.items()
+    }
+    return processar_tabela_precos_web(caminho, block_mapping, args.colunas, args.formatos)
+
+
+def _desformatar(caminho, args):
+    from formatadores.tabela_desformatador import (
+        calcular_vgv,
+        desformatar_tabela_precos,
+        exportar_csv_desformatado,
+    )
+
+    df_limpo = desformatar_tabela_precos(_ler_bytes(caminho))
+    df_limpo, df_resumo_vgv = calcular_vgv(df_limpo)
+    return exportar_csv_desformatado(df_limpo, df_resumo_vgv)
+
+
+def _preco_incorporacao(caminho, args):
+    from formatadores.tabela_preco_importador import processar_preco_incorporacao
+
+    return processar_preco_incorporacao(caminho, args.coluna_valor)
+
+
+def _preco_lote_avista(caminho, args):
+    from formatadores.tabela_preco_importador import processar_preco_lote_avista
+
+    return processar_preco_lote_avista(_ler_bytes(caminho))
+
+
+def _preco_lote_parcelado(caminho, args):
+    from formatadores.tabela_preco_importador import processar_preco_lote_parcelado
+
+    juros_anual_perc = float(args.juros.replace(",", "."))
+    if args.meses <= 0:
+        raise ValueError("Quantidade de meses inválida.")
+    if juros_anual_perc < 0:
+        raise ValueError("Porcentagem de juros anual inválida.")
+    if args.anos <= 0:
+        raise ValueError("Número de anos das parcelas inválido.")
+    return processar_preco_lote_parcelado(
+        _ler_bytes(caminho), args.meses, juros_anual_perc, args.anos
+    )
+
+
+def _sienge_lote(caminho, args):
+    from formatadores.sienge_lote import gerar_importacao_sienge_lote, ler_planilha_sienge_lote
+
+    df = ler_planilha_sienge_lote(caminho)
+    output, _, _ = gerar_importacao_sienge_lote(df, args.etapas, args.formato)
+    return output
+
+
+def _dados_empreendimento(args):
+    """Campos do formulário de empreendimento das importações CV (só os informados)."""
+    campos = {
+        "Nome do Empreendimento": args.nome,
+        "Sigla": args.sigla,
+        "Empresa": args.empresa,
+        "Tipo": args.tipo,
+        "Segmento": args.segmento,
+    }
+    return {campo: valor for campo, valor in campos.items() if valor is not None}
+
+
+def _importacao_cv(caminho, args):
+    from formatadores.importacao_cv import (
+        gerar_importacao_cv,
+        ler_planilha_cv,
+        mapear_escolhas_tipologias_cv,
+    )
+
+    if not all(isinstance(escolha, dict) for escolha in args.tipologias.values()):
+        raise ValueError('Tipologias: esperado TIPO -> {"padrao": ..., "pcd": ..., "superior": ...}.')
+    tip_map = mapear_escolhas_tipologias_cv(args.tipologias)
+    return gerar_importacao_cv(ler_planilha_cv(caminho), tip_map, _dados_empreendimento(args))
+
+
+def _importacao_cv_lote(caminho, args):
+    from formatadores.importacao_cv_lote import gerar_importacao_cv_lote, ler_planilha_cv_lote
+
+    return gerar_importacao_cv_lote(ler_planilha_cv_lote(caminho), _dados_empreendimento(args))
+
+
+def _importacao_sienge(caminho, args):
+    from formatadores.importacao_sienge import gerar_importacao_sienge, ler_planilha_sienge
+
+    df = ler_planilha_sienge(caminho)
+    output, _, _ = gerar_importacao_sienge(df, args.etapas, args.formato)
+    return output
+
+
+def _unidades_bloqueadas(caminho, args):
+    from formatadores.tabela_unidades_bloqueadas import (
+        ler_csv_e_extrair_filtros,
+        processar_unidades_bloqueadas_na_base,
+    )
+
+    df_input, _, _, col_emp, col_mot, placeholder_vazio = ler_csv_e_extrair_filtros(caminho)
+    return processar_unidades_bloqueadas_na_base(
+        args.base,
+        df_input,
+        col_emp,
+        col_mot,
+        placeholder_vazio,
+        args.ignorar_empreendimento,
+        args.ignorar_motivo,
+        buscar_precos=not args.sem_precos,
+    )
+
+
+# --- Argumentos ---
+def _json(valor):
+    """Tipo argparse: JSON no próprio argumento ou, com @, num arquivo."""
+    try:
+        if valor.startswith("@"):
+            with open(valor[1:], encoding="utf-8") as f:
+                return json.load(f)
+        return json.loads(valor)
+    except (OSError, ValueError) as e:
+        raise argparse.ArgumentTypeError(f"JSON inválido ({valor}): {e}")
+
+
+def _json_objeto(valor):
+    dados = _json(valor)
+    if not isinstance(dados, dict):
+        raise argparse.ArgumentTypeError(f"Esperado um objeto JSON: {valor}")
+    return dados
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m formatadores",
+        description="Ferramentas de planilhas pela linha de comando (sem o servidor web).",
+    )
+    parser.add_argument(
+        "--silencioso", action="store_true", help="Descarta os logs das ferramentas (padrão: stderr)"
+    )
+    parser.add_argument(
+        "--tempos", action="store_true", help="Mostra no stderr o tempo de cada etapa do processamento"
+    )
+    subparsers = parser.add_subparsers(dest="subcomando", required=True, metavar="SUBCOMANDO")
+
+    def subcomando(nome, funcao, ajuda, sufixo=".xlsx"):
+        sub = subparsers.add_parser(nome, help=ajuda, description=ajuda)
+        sub.add_argument("entrada", help='Planilha de entrada ("-" para stdin)')
+        sub.add_argument("-o", "--saida", default="-", help='Arquivo de saída ("-" para stdout, padrão)')
+        sub.set_defaults(funcao=funcao, sufixo=sufixo)
+        return sub
+
+    def dados_empreendimento(sub):
+        sub.add_argument("--nome", help="Nome do Empreendimento")
+        sub.add_argument("--sigla", help="Sigla do empreendimento")
+        sub.add_argument("--empresa", help="Empresa")
+        sub.add_argument("--tipo", help="Tipo do empreendimento")
+        sub.add_argument("--segmento", help="Segmento")
+
+    subcomando("incorporacao", _incorporacao, "Formatador Incorporação (.xlsx)")
+    subcomando(
+        "incorporacao-avancado", _incorporacao_avancado,
+        "Formatador Incorporação reestruturado, cabeçalho na linha 3 (.xlsx)",
+    )
+    subcomando("lote", _lote, "Formatador Lote (.xlsx)")
+
+    sub = subcomando("tabela-precos", _tabela_precos, "Formatador Tabela de Preços (.xlsx)")
+    sub.add_argument("--etapas", type=_json_objeto, required=True, help='Bloco -> etapa, ex.: \'{"BLOCO 01": "ETAPA 1"}\'')
+    sub.add_argument("--colunas", nargs="+", default=None, help="Colunas da saída, na ordem (padrão: todas)")
+    sub.add_argument("--formatos", type=_json_objeto, default=None, help="Coluna -> formatação manual")
+
+    subcomando("desformatar", _desformatar, "Desformatador da Tabela de Preços, com resumo de VGV (.csv)")
+
+    sub = subcomando("preco-incorporacao", _preco_incorporacao, "Tabela de preços Incorporação (.csv)")
+    sub.add_argument("--coluna-valor", required=True, help="Coluna de valor (cabeçalho na linha 3)")
+
+    subcomando("preco-lote-avista", _preco_lote_avista, "Tabela de preços Lote à Vista (.csv)")
+
+    sub = subcomando("preco-lote-parcelado", _preco_lote_parcelado, "Tabela de preços Lote Parcelado (.csv)")
+    sub.add_argument("--meses", type=int, required=True, help="Quantidade de meses")
+    sub.add_argument("--juros", required=True, help="Juros anual em %% (aceita vírgula)")
+    sub.add_argument("--anos", type=int, required=True, help="Número de anos das parcelas")
+
+    sub = subcomando("sienge-lote", _sienge_lote, "Importação SIENGE Lote (.xls/.xlsx/.csv)")
+    sub.add_argument("--etapas", type=_json_objeto, required=True, help='Dígitos da etapa -> empreendimento, ex.: \'{"01": "101"}\'')
+    sub.add_argument("--formato", choices=["xls", "xlsx", "csv"], default="xls", help="Formato de saída (padrão: xls)")
+
+    sub = subcomando("importacao-cv", _importacao_cv, "Importação CV (.csv)")
+    sub.add_argument(
+        "--tipologias", type=_json_objeto, required=True,
+        help='TIPO -> {"padrao", "pcd", "superior"} (opção da lista ou código), ex.: \'{"2Q": {"padrao": "51"}}\'',
+    )
+    dados_empreendimento(sub)
+
+    sub = subcomando("importacao-cv-lote", _importacao_cv_lote, "Importação CV Lote (.csv)")
+    dados_empreendimento(sub)
+
+    sub = subcomando("importacao-sienge", _importacao_sienge, "Importação SIENGE (.xls/.xlsx/.csv)")
+    sub.add_argument("--etapas", type=_json_objeto, required=True, help='Dígitos da etapa -> empreendimento, ex.: \'{"01": "101"}\'')
+    sub.add_argument("--formato", choices=["xls", "xlsx", "csv"], default="xls", help="Formato de saída (padrão: xls)")
+
+    sub = subcomando("unidades-bloqueadas", _unidades_bloqueadas, "Unidades Bloqueadas (.csv -> .xlsx)", sufixo=".csv")
+    sub.add_argument("--base", default="VCA", help="Base da API (padrão: VCA)")
+    sub.add_argument("--ignorar-empreendimento", action="append", default=[], metavar="NOME", help="Pode repetir")
+    sub.add_argument("--ignorar-motivo", action="append", default=[], metavar="MOTIVO", help="Pode repetir")
+    sub.add_argument("--sem-precos", action="store_true", help="Não busca valores na API")
+    return parser
+
+
+# --- Execução ---
+@contextlib.contextmanager
+def _caminho_entrada(entrada, sufixo):
+    """Caminho da planilha; stdin é gravado num arquivo temporário (algumas ferramentas releem a entrada)."""
+    if entrada != "-":
+        yield entrada
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, f"entrada{sufixo}")
+        with open(caminho, "wb") as f:
+            f.write(sys.stdin.buffer.read())
+        yield caminho
+
+
+def _conteudo(resultado):
+    """BytesIO/StringIO -> bytes; CSV em texto sai em utf-8-sig, como nos downloads."""
+    if hasattr(resultado, "getvalue"):
+        resultado = resultado.getvalue()
+    if isinstance(resultado, str):
+        resultado = resultado.encode("utf-8-sig")
+    return resultado
+
+
+def _imprimir_etapas(etapas):
+    for item in resumir_etapas(etapas):
+        detalhes = [f"{campo}={item[campo]}" for campo in ("linhas", "bytes_entrada", "bytes_saida")
+                    if item[campo] is not None]
+        if item["execucoes"] > 1:
+            detalhes.insert(0, f"n={item['execucoes']}")
+        print(f"  {item['etapa']:<40} {item['segundos'] * 1000:9.1f} ms  {' '.join(detalhes)}".rstrip(),
+              file=sys.stderr)
+
+
+def main(argv=None):
+    args = _criar_parser().parse_args(argv)
+    logs = io.StringIO() if args.silencioso else sys.stderr
+    try:
+        with contextlib.redirect_stdout(logs), contextlib.redirect_stderr(logs), _caminho_entrada(
+            args.entrada, args.sufixo
+        ) as caminho, coletar_etapas() as etapas:
+            conteudo = _conteudo(args.funcao(caminho, args))
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"Erro ({args.subcomando}): {e}", file=sys.stderr)
+        return 1
+    if args.tempos:
+        _imprimir_etapas(etapas)
+
+    if args.saida == "-":
+        sys.stdout.buffer.write(conteudo)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.saida, "wb") as f:
+            f.write(conteudo)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
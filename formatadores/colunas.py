@@ -0,0 +1,160 @@
+# formatadores/colunas.py
+"""
+Localização de colunas por conceito (find_column_flexible), compartilhada
+pelos formatadores.
+
+Os nomes das colunas são normalizados (normalizar_para_busca) uma vez por
+conjunto de colunas e indexados num ResolvedorColunas, guardado em cache
+pela tupla de nomes; as palavras-chave de cada conceito também são
+normalizadas uma vez por lista. Regras, na ordem:
+  1. nome normalizado igual a uma palavra-chave (na ordem das palavras);
+  2. palavra-chave contida no nome normalizado, preferindo nomes que começam
+     com ela e, no empate, o menor nome original em ordem alfabética (com
+     desempate_por_tamanho=True, antes disso o nome normalizado mais curto).
+Colunas cujo nome normalizado se repete ficam com a última; palavras-chave e
+nomes que ficam vazios depois de normalizados são ignorados no match parcial.
+
+resolver_colunas() localiza vários conceitos de uma vez e devolve, além do
+mapa conceito -> coluna, o relatório de cada correspondência (Correspondencia).
+"""
+
+import functools
+from collections import namedtuple
+
+from formatadores.logs import obter_logger
+from formatadores.normalizacao import normalizar_para_busca
+
+logger = obter_logger(__name__)
+
+TAMANHO_CACHE_RESOLVEDORES = 64
+
+
+class Correspondencia(
+    namedtuple("Correspondencia", "conceito coluna tipo palavra_chave")
+):
+    """
+    Resultado da busca de um conceito: coluna original encontrada (ou None),
+    tipo do match ('exato', 'parcial' ou None) e a palavra-chave que casou.
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        if self.coluna is None:
+            return f"{self.conceito}: não encontrada"
+        return f"{self.conceito}: '{self.coluna}' ({self.tipo}, '{self.palavra_chave}')"
+
+
+@functools.lru_cache(maxsize=256)
+def _palavras_normalizadas(palavras_chave, manter_espacos):
+    """Pares (palavra, palavra normalizada) de um conceito."""
+    return tuple((p, normalizar_para_busca(p, manter_espacos)) for p in palavras_chave)
+
+
+class ResolvedorColunas:
+    """
+    Índice dos nomes normalizados de um conjunto de colunas. Não muda depois
+    de criado (pode ser compartilhado entre requisições); os resultados por
+    lista de palavras-chave ficam guardados.
+    """
+
+    def __init__(self, colunas, manter_espacos=False, desempate_por_tamanho=False):
+        self.colunas = list(colunas)
+        self.manter_espacos = manter_espacos
+        self.desempate_por_tamanho = desempate_por_tamanho
+        self._indice = {normalizar_para_busca(c, manter_espacos): c for c in self.colunas}
+        self._nao_vazios = [(n, c) for n, c in self._indice.items() if n]
+        self._resultados = {}
+
+    def localizar(self, palavras_chave, conceito):
+        """Correspondencia do conceito (coluna None se nenhuma palavra casar)."""
+        palavras_chave = tuple(palavras_chave)
+        achado = self._resultados.get(palavras_chave)
+        if achado is None:
+            achado = self._resultados[palavras_chave] = self._buscar(palavras_chave)
+        correspondencia = Correspondencia(conceito, *achado)
+        logger.debug("Coluna %s", correspondencia)
+        return correspondencia
+
+    def _buscar(self, palavras_chave):
+        palavras = _palavras_normalizadas(palavras_chave, self.manter_espacos)
+        for palavra, normalizada in palavras:
+            if normalizada in self._indice:
+                return self._indice[normalizada], "exato", palavra
+
+        melhor = None
+        for palavra, normalizada in palavras:
+            if not normalizada:
+                continue
+            for nome, coluna in self._nao_vazios:
+                if normalizada in nome:
+                    chave = (
+                        0 if nome.startswith(normalizada) else 1,
+                        len(nome) if self.desempate_por_tamanho else 0,
+                        str(coluna),
+                    )
+                    if melhor is None or chave < melhor[0]:
+                        melhor = (chave, coluna, palavra)
+        if melhor is not None:
+            return melhor[1], "parcial", melhor[2]
+        return None, None, None
+
+    def encontrar(self, palavras_chave, conceito, required=True):
+        """Nome original da coluna do conceito; ValueError se obrigatória e ausente."""
+        return self._exigir(self.localizar(palavras_chave, conceito), palavras_chave, required)
+
+    def _exigir(self, correspondencia, palavras_chave, obrigatoria):
+        if correspondencia.coluna is None and obrigatoria:
+            raise ValueError(
+                f"Coluna obrigatória '{correspondencia.conceito}' não encontrada. Keywords "
+                f"usadas: {list(palavras_chave)}. Colunas disponíveis: {self.colunas}"
+            )
+        return correspondencia.coluna
+
+    def resolver(self, conceitos):
+        """
+        Localiza os conceitos {nome: (palavras_chave, obrigatória)} na ordem
+        do dicionário. Retorna ({nome: coluna ou None}, [Correspondencia]);
+        ValueError no primeiro conceito obrigatório não encontrado.
+        """
+        mapa = {}
+        relatorio = []
+        for conceito, (palavras_chave, obrigatoria) in conceitos.items():
+            correspondencia = self.localizar(palavras_chave, conceito)
+            mapa[conceito] = self._exigir(correspondencia, palavras_chave, obrigatoria)
+            relatorio.append(correspondencia)
+        return mapa, relatorio
+
+
+@functools.lru_cache(maxsize=TAMANHO_CACHE_RESOLVEDORES)
+def _resolvedor_em_cache(colunas, manter_espacos, desempate_por_tamanho):
+    return ResolvedorColunas(colunas, manter_espacos, desempate_por_tamanho)
+
+
+def resolvedor_colunas(colunas, manter_espacos=False, desempate_por_tamanho=False):
+    """ResolvedorColunas das colunas (Index, Series ou lista), reaproveitado entre chamadas."""
+    chave = tuple(colunas)
+    try:
+        return _resolvedor_em_cache(chave, manter_espacos, desempate_por_tamanho)
+    except TypeError:  # rótulos não hasheáveis
+        return ResolvedorColunas(chave, manter_espacos, desempate_por_tamanho)
+
+
+def find_column_flexible(df_columns, concept_keywords, concept_name, required=True,
+                         manter_espacos=False, desempate_por_tamanho=False):
+    """
+    Encontra a coluna de forma flexível (sem diferenciar maiúsculas, acentos,
+    espaços e pontuação; aceita match parcial). Retorna o nome original, None
+    se não encontrada e opcional, ou ValueError se obrigatória.
+    """
+    return resolvedor_colunas(
+        df_columns, manter_espacos, desempate_por_tamanho
+    ).encontrar(concept_keywords, concept_name, required)
+
+
+def resolver_colunas(colunas, conceitos, manter_espacos=False, desempate_por_tamanho=False):
+    """
+    Localiza todos os conceitos {nome: (palavras_chave, obrigatória)} nas
+    colunas de uma vez. Retorna ({nome: coluna ou None}, [Correspondencia]).
+    """
+    return resolvedor_colunas(colunas, manter_espacos, desempate_por_tamanho).resolver(conceitos)
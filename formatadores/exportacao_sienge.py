@@ -0,0 +1,258 @@
+# formatadores/exportacao_sienge.py
+
+import io
+import csv
+import datetime
+
+import numpy as np
+import pandas as pd
+import xlwt
+import xlsxwriter
+
+from formatadores.metricas import cronometrar
+
+# --- Limites do formato .xls (BIFF8) ---
+LIMITE_LINHAS_XLS = 65536  # Linhas por planilha, incluindo o cabeçalho
+LIMITE_TEXTO_XLS = 32767  # Caracteres por célula
+
+# Tipagem das colunas da importação SIENGE: coluna -> formato numérico.
+# "0" converte para inteiro; os demais só formatam valores já numéricos.
+FORMATOS_COLUNAS_SIENGE = {
+    "EMPREENDIMENTO": "0",
+    "ÁREA PRIVATIVA": "0.00",
+    "FRAÇÃO IDEAL": "0.000000",
+}
+
+TIPOS_ACEITOS_XLS = (str, int, float, bool, datetime.date, datetime.datetime)
+
+
+# --- Etapas -> EMPREENDIMENTO ---
+
+
+def resumir_coluna_etapa(serie_etapa):
+    """
+    Percorre a coluna ETAPA uma única vez (factorize). Retorna (codigos, etapas):
+    etapas são os valores únicos como texto e codigos[i] é a posição da etapa
+    da linha i em etapas (-1 para vazio).
+    """
+    texto = serie_etapa.astype(str).where(serie_etapa.notna())
+    codigos, etapas = pd.factorize(texto)
+    return codigos, etapas
+
+
+def extrair_digitos_etapa(etapas):
+    """Dígitos de cada etapa concatenados ('ETAPA 01' -> '01'), usados como chave do mapeamento."""
+    return pd.Series(etapas, dtype=object).astype(str).str.replace(r"\D", "", regex=True)
+
+
+def listar_etapas_unicas(serie_etapa):
+    """Etapas únicas (texto, ordenadas) para a tela de mapeamento."""
+    _, etapas = resumir_coluna_etapa(serie_etapa)
+    return sorted(etapas)
+
+
+def mapear_empreendimento(serie_etapa, etapas_map):
+    """
+    Código do EMPREENDIMENTO de cada linha: dígitos da etapa -> etapas_map.
+    A extração e o map são feitos só sobre as etapas únicas e depois
+    distribuídos para as linhas; etapas sem mapeamento ficam None.
+    """
+    codigos, etapas = resumir_coluna_etapa(serie_etapa)
+    por_etapa = extrair_digitos_etapa(etapas).map(etapas_map)
+    por_etapa = por_etapa.astype(object).where(por_etapa.notna(), None).tolist()
+    valores = np.array(por_etapa + [None], dtype=object)[codigos]  # -1 (vazio) -> None
+    return pd.Series(valores, index=serie_etapa.index, dtype=object)
+
+
+def preparar_colunas_exportacao(df_out, formatos_colunas=None):
+    """
+    Converte cada coluna de df_out uma única vez para valores Python prontos
+    para escrita (None para vazios) e decide o formato numérico de cada célula.
+    Retorna lista de (nome_coluna, valores, formatos), com formatos[i] = None
+    quando a célula não recebe formato.
+    """
+    formatos_colunas = formatos_colunas or {}
+    colunas = []
+    for nome in df_out.columns:
+        serie = df_out[nome]
+        vazio = serie.isna()
+        formato = formatos_colunas.get(nome)
+
+        if formato == "0":
+            # Inteiro quando converter (como int(float(v))), senão mantém o valor original
+            numeros = pd.to_numeric(serie, errors="coerce")
+            converte = (numeros.notna() & np.isfinite(numeros)).tolist()
+            inteiros = numeros.where(converte, 0).astype("int64").tolist()
+            originais = serie.astype(object).where(~vazio, None).tolist()
+            valores = [i if ok else v for i, ok, v in zip(inteiros, converte, originais)]
+            formatos = [formato if ok else None for ok in converte]
+        else:
+            valores = serie.astype(object).where(~vazio, None).tolist()
+            if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+                numerico = ~vazio
+            else:
+                numerico = serie.map(lambda v: isinstance(v, (int, float, np.number))) & ~vazio
+            if formato:
+                formatos = pd.Series(formato, index=serie.index).where(numerico, None).tolist()
+            else:
+                formatos = [None] * len(serie)
+
+        if serie.dtype == object:
+            # Textos longos são cortados no limite da célula; tipos que o xlwt
+            # não escreve (ex.: numpy escalares em colunas object) viram texto
+            valores = [
+                v if v is None or type(v) in (int, float, bool) else
+                v[:LIMITE_TEXTO_XLS] if isinstance(v, str) else
+                v.item() if isinstance(v, np.generic) else
+                v if isinstance(v, TIPOS_ACEITOS_XLS) else str(v)
+                for v in valores
+            ]
+        colunas.append((nome, valores, formatos))
+    return colunas
+
+
+def escrever_xls_tipado(df_out, formatos_colunas=None, nome_planilha="Dados"):
+    """
+    Gera um .xls (xlwt) a partir de df_out com a tipagem de formatos_colunas.
+    Estilos são criados uma vez por formato; acima de 65.536 linhas os dados
+    continuam em novas planilhas ("Dados 2", "Dados 3", ...), cada uma com cabeçalho.
+    Retorna BytesIO posicionado no início.
+    """
+    colunas = preparar_colunas_exportacao(df_out, formatos_colunas)
+    estilos = {None: xlwt.Style.default_style}
+    for _, _, formatos in colunas:
+        for formato in set(formatos):
+            if formato not in estilos:
+                estilo = xlwt.XFStyle()
+                estilo.num_format_str = formato
+                estilos[formato] = estilo
+    colunas_escrita = [
+        (c, valores, [estilos[f] for f in formatos])
+        for c, (_, valores, formatos) in enumerate(colunas)
+    ]
+
+    wb = xlwt.Workbook(encoding="utf-8")
+    total_linhas = len(df_out)
+    linhas_por_planilha = LIMITE_LINHAS_XLS - 1
+    n_planilhas = max(1, -(-total_linhas // linhas_por_planilha))
+    for n in range(n_planilhas):
+        sheet = wb.add_sheet(nome_planilha if n == 0 else f"{nome_planilha} {n + 1}")
+        cabecalho = sheet.row(0)
+        for c, (nome, _, _) in enumerate(colunas):
+            cabecalho.write(c, nome)
+        inicio = n * linhas_por_planilha
+        fim = min(inicio + linhas_por_planilha, total_linhas)
+        for r in range(inicio, fim):
+            row = sheet.row(r - inicio + 1)
+            for c, valores, estilos_coluna in colunas_escrita:
+                row.write(c, valores[r], estilos_coluna[r])
+    if n_planilhas > 1:
+        print(f"(Exportação XLS) {total_linhas} linhas divididas em {n_planilhas} planilhas.")
+
+    output = io.BytesIO()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+def escrever_xlsx_tipado(df_out, formatos_colunas=None, nome_planilha="Dados"):
+    """
+    Gera um .xlsx em modo streaming (XlsxWriter com constant_memory: cada linha
+    é gravada e liberada), com a mesma tipagem de escrever_xls_tipado e sem
+    o limite de 65.536 linhas. Retorna BytesIO posicionado no início.
+    """
+    colunas = preparar_colunas_exportacao(df_out, formatos_colunas)
+    output = io.BytesIO()
+    wb = xlsxwriter.Workbook(output, {"constant_memory": True, "nan_inf_to_errors": True})
+    ws = wb.add_worksheet(nome_planilha)
+    formatos_xlsx = {None: None}
+    for _, _, formatos in colunas:
+        for formato in set(formatos):
+            if formato not in formatos_xlsx:
+                formatos_xlsx[formato] = wb.add_format({"num_format": formato})
+    colunas_escrita = [
+        (c, valores, [formatos_xlsx[f] for f in formatos])
+        for c, (_, valores, formatos) in enumerate(colunas)
+    ]
+    # Escrita por tipo (write() genérico interpretaria textos como '=...' como fórmula)
+    escrita_por_tipo = {
+        str: ws.write_string,
+        int: ws.write_number,
+        float: ws.write_number,
+        bool: ws.write_boolean,
+        datetime.date: ws.write_datetime,
+        datetime.datetime: ws.write_datetime,
+    }
+
+    for c, (nome, _, _) in enumerate(colunas):
+        ws.write_string(0, c, str(nome))
+    for r in range(len(df_out)):
+        for c, valores, formatos_coluna in colunas_escrita:
+            v = valores[r]
+            if v is None:
+                continue
+            escrever = escrita_por_tipo.get(type(v))
+            if escrever is None:
+                ws.write_string(r + 1, c, str(v), formatos_coluna[r])
+            else:
+                escrever(r + 1, c, v, formatos_coluna[r])
+    wb.close()
+    output.seek(0)
+    return output
+
+
+def escrever_csv_tipado(df_out, formatos_colunas=None, sep=";"):
+    """
+    Gera um CSV (utf-8-sig, decimal ',') com a mesma tipagem dos .xls/.xlsx:
+    o formato numérico de cada coluna define as casas decimais do texto
+    ("0" -> inteiro, "0.00" -> 2 casas, "0.000000" -> 6 casas).
+    Retorna BytesIO posicionado no início.
+    """
+    colunas = preparar_colunas_exportacao(df_out, formatos_colunas)
+    textos_colunas = []
+    for _, valores, formatos in colunas:
+        textos = []
+        for v, formato in zip(valores, formatos):
+            if v is None:
+                textos.append("")
+            elif formato is not None:
+                casas = len(formato.split(".", 1)[1]) if "." in formato else 0
+                textos.append(f"{v:.{casas}f}".replace(".", ","))
+            elif isinstance(v, float):
+                textos.append(str(v).replace(".", ","))
+            else:
+                textos.append(str(v))
+        textos_colunas.append(textos)
+
+    output_csv = io.StringIO()
+    writer = csv.writer(output_csv, delimiter=sep, quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+    writer.writerow([nome for nome, _, _ in colunas])
+    writer.writerows(zip(*textos_colunas))
+    return io.BytesIO(output_csv.getvalue().encode("utf-8-sig"))
+
+
+# Formato de saída -> (função de escrita, mimetype, extensão do arquivo)
+FORMATOS_SAIDA_SIENGE = {
+    "xls": (escrever_xls_tipado, "application/vnd.ms-excel", "xls"),
+    "xlsx": (
+        escrever_xlsx_tipado,
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "xlsx",
+    ),
+    "csv": (escrever_csv_tipado, "text/csv", "csv"),
+}
+
+
+@cronometrar("saida_sienge")
+def gerar_saida_sienge(df_out, formato_saida="xls"):
+    """
+    Gera o arquivo de importação SIENGE no formato pedido (xls padrão, xlsx ou csv).
+    Retorna (BytesIO, mimetype, extensão).
+    """
+    formato_saida = (formato_saida or "xls").strip().lower()
+    if formato_saida not in FORMATOS_SAIDA_SIENGE:
+        raise ValueError(
+            f"Formato de saída inválido: '{formato_saida}'. Use: {', '.join(FORMATOS_SAIDA_SIENGE)}."
+        )
+    escrever, mimetype, extensao = FORMATOS_SAIDA_SIENGE[formato_saida]
+    return escrever(df_out, FORMATOS_COLUNAS_SIENGE), mimetype, extensao
@@ -0,0 +1,754 @@
+# formatadores/importacao_cv.py
+
+import csv
+import io
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from formatadores.colunas import find_column_flexible, resolver_colunas
+from formatadores.logs import agrupar_avisos, avisar, obter_logger
+from formatadores.metricas import cronometrar, marcar_etapa
+from formatadores.normalizacao import (
+    normalizar_para_busca as normalize_text_for_match,
+    normalizar_texto as normalize_text,
+)
+from formatadores.tabela_preco_formatador import parse_flexible_float
+from formatadores.vetorizacao import (
+    extrair_primeiro_numero,
+    formatar_numero_dois_digitos,
+    mapear_valores_unicos,
+    verificar_vaga_serie,
+)
+
+logger = obter_logger(__name__)
+
+
+# --- Constantes ---
+TIPOLOGIAS_PADRAO = {
+    "51 - 2 quartos sem suíte": "51",
+    "36 - 2 quartos sendo 1 suíte térreo": "36",
+    "34 - 3 quartos sendo 1 suíte térreo": "34",
+    "21 - 2 quartos sendo 1 suíte casa": "21",
+    "20 - 3 quartos sendo 1 suíte casa": "20",
+    "22 - 2 quartos sem suíte casa": "22",
+    "88 PCD - 2 quartos sendo 1 suíte casa (PCD)": "88",
+}
+TIPOLOGIAS_SUPERIOR = {
+    "52 - 2 quartos sem suíte": "52",
+    "35 - 2 quartos sendo 1 suíte superior": "35",
+    "33 - 3 quartos sendo 1 suíte superior": "33",
+}
+TIPOLOGIAS_PCD = {
+    "50 PCD - 2 QUARTOS SENDO UMA SUÍTE - TÉRREO (PCD)": "50",
+    "88 PCD - 2 quartos sendo 1 suíte casa (PCD)": "88",
+    "19 PCD - 2 quartos sem suíte": "19",
+}
+ENDERECO_FIXO = {
+    "Endereço": "Av. Olívia Flores",
+    "Bairro": "Candeias",
+    "Número": "1265",
+    "Estado": "Bahia",
+    "Cidade": "Vitória da Conquista",
+    "CEP": "45028610",
+    "Região": "Nordeste",
+    "Data da Entrega (Empreendimento)": "01/01/2028",
+}
+
+
+def formatar_bloco_cv(bloco_bruto_valor, nome_coluna_bloco=None):
+    """
+    Formata o nome do bloco para a saída (ex: 'BLOCO 01' ou 'QUADRA 02').
+    - Extrai o número do bloco/quadra.
+    - Determina o prefixo 'BLOCO' ou 'QUADRA' com base no nome da coluna.
+    """
+    valor_str = str(bloco_bruto_valor).strip()
+
+    # Determinar o prefixo (BLOCO ou QUADRA)
+    prefixo = "BLOCO"  # Padrão
+    if "QD" in valor_str.upper():
+        prefixo = "QUADRA"
+    elif nome_coluna_bloco and "quadra" in str(nome_coluna_bloco).lower():
+        prefixo = "QUADRA"
+
+    # Extrair número e formatar
+    match = re.search(r"\d+", valor_str)
+    if match:
+        numero = int(match.group(0))
+        return f"{prefixo} {numero:02d}"
+    else:
+        # Se não encontrar número, retorna o valor original em maiúsculas
+        return valor_str.upper() if valor_str else "BLOCO INDEFINIDO"
+
+
+# --- Nomenclatura CV (colunar) ---
+
+
+def formatar_unidade_consolidada_cv(serie_unidade, nome_coluna, serie_tipo=None):
+    """
+    Nome (Unidade) da importação CV a partir da coluna de unidade consolidada.
+    - 'US...' -> 'US 01'.
+    - Dois números -> 'QD01 - CASA 02' (contexto de casa) ou 'BL01 - APT 02'.
+    - Um número sem letras (ou coluna de apt/casa) -> bloco/quadra 01.
+    - Demais valores ficam como estão (maiúsculos).
+    Sufixo ' (PCD)' quando a unidade ou o TIPO contém PCD/PNE.
+    """
+    val = serie_unidade.astype(str).str.strip().str.upper()
+    is_pcd = val.str.contains("PCD|PNE", regex=True)
+    if serie_tipo is not None:
+        is_pcd |= serie_tipo.astype(str).str.upper().str.contains("PCD|PNE", regex=True)
+    pcd_sufixo = pd.Series("", index=val.index, dtype=object).mask(is_pcd, " (PCD)")
+
+    norm_col = normalize_text_for_match(str(nome_coluna))
+    is_apt_col = any(k in norm_col for k in ["apt", "apto", "apartamento"])
+    is_casa_col = "casa" in norm_col
+
+    nums = val.str.extract(r"(\d+)\D*(\d+)?")
+    num_1 = formatar_numero_dois_digitos(nums[0])
+    num_2 = formatar_numero_dois_digitos(nums[1])
+    dois_numeros = nums[1].notna()
+    um_numero = nums[0].notna() & ~dois_numeros
+    if not (is_apt_col or is_casa_col):
+        um_numero &= ~val.str.contains("[A-Z]", regex=True)
+
+    is_casa_context = val.str.contains("CASA|CS|QD", regex=True) | is_casa_col
+    prefixo_bloco = pd.Series(np.where(is_casa_context, "QD", "BL"), index=val.index)
+    prefixo_unidade = pd.Series(
+        np.where(is_casa_context, " - CASA ", " - APT "), index=val.index
+    )
+    sem_padrao = val.mask(is_pcd & ~val.str.endswith("(PCD)"), val + pcd_sufixo)
+
+    return pd.Series(
+        np.select(
+            [val == "", val.str.startswith("US"), dois_numeros, um_numero],
+            [
+                "",
+                "US " + num_1.fillna("00") + pcd_sufixo,
+                prefixo_bloco + num_1 + prefixo_unidade + num_2 + pcd_sufixo,
+                prefixo_bloco + "01" + prefixo_unidade + num_1 + pcd_sufixo,
+            ],
+            default=sem_padrao,
+        ),
+        index=val.index,
+        dtype=object,
+    )
+
+
+def formatar_unidade_composta_cv(serie_bloco, serie_unidade, is_casa, serie_tipo=None):
+    """
+    Nome (Unidade) da importação CV composto das colunas separadas:
+    'QD01 - CASA 02' (coluna CASA) ou 'BL01 - APT 02', com ' (PCD)'.
+    """
+    b_val = serie_bloco.astype(str).str.strip()
+    u_val = serie_unidade.astype(str).str.strip()
+    b_num = formatar_numero_dois_digitos(extrair_primeiro_numero(b_val), padrao="00")
+    u_num = formatar_numero_dois_digitos(extrair_primeiro_numero(u_val), padrao="00")
+
+    is_pcd = b_val.str.upper().str.contains("PCD", regex=False) | u_val.str.upper().str.contains(
+        "PCD", regex=False
+    )
+    if serie_tipo is not None:
+        is_pcd |= serie_tipo.astype(str).str.upper().str.contains("PCD|PNE", regex=True)
+    pcd_sufixo = pd.Series("", index=b_val.index, dtype=object).mask(is_pcd, " (PCD)")
+
+    if is_casa:
+        return "QD" + b_num + " - CASA " + u_num + pcd_sufixo
+    return "BL" + b_num + " - APT " + u_num + pcd_sufixo
+
+
+def formatar_bloco_composto_cv(serie_bloco, nome_coluna_bloco, is_casa):
+    """Nome (Bloco) da importação CV composta: 'QUADRA 01' ou 'BLOCO 01'."""
+    val = serie_bloco.astype(str).str.strip()
+    num = formatar_numero_dois_digitos(extrair_primeiro_numero(val), padrao="00")
+    if is_casa or "quadra" in str(nome_coluna_bloco).lower():
+        return "QUADRA " + num
+    is_quadra = val.str.upper().str.contains("QD", regex=False)
+    return pd.Series(np.where(is_quadra, "QUADRA ", "BLOCO "), index=val.index) + num
+
+
+def nome_bloco_a_partir_da_unidade_cv(serie_unidade):
+    """
+    Nome (Bloco) a partir do Nome (Unidade): 'UNID. SOLTAS' para US, senão o
+    formatar_bloco_cv da parte antes do primeiro '-' (avaliado por valor único).
+    """
+    valor_unidade = serie_unidade.astype(str).str.strip().str.upper()
+    primeira_parte = valor_unidade.str.split("-", n=1).str[0]
+    nome_bloco = mapear_valores_unicos(
+        primeira_parte, lambda p: formatar_bloco_cv(p, nome_coluna_bloco=p)
+    )
+    nome_bloco = nome_bloco.mask(valor_unidade.str.startswith("US"), "UNID. SOLTAS")
+    return nome_bloco.mask(valor_unidade == "", "BLOCO INDEFINIDO")
+
+
+def format_decimal_br(value, precision):
+    if pd.isna(value):
+        return ""  # Ou talvez '--' ou 0.0? Depende do que prefere para vazios
+    try:
+        num = float(value)  # Tenta converter direto
+        format_string = f"{{:.{precision}f}}"
+        return format_string.format(num).replace(".", ",")
+    except (ValueError, TypeError):
+        # Se falhar, tenta limpar como número BR e converter
+        s_val = str(value).strip()
+        s_val = re.sub(r"[^\d,.-]", "", s_val)
+        if "," in s_val and "." in s_val:
+            s_val = s_val.replace(".", "").replace(",", ".")
+        elif "," in s_val:
+            s_val = s_val.replace(",", ".")
+        try:
+            num = float(s_val)
+            format_string = f"{{:.{precision}f}}"
+            return format_string.format(num).replace(".", ",")
+        except (ValueError, TypeError):
+            avisar(logger, "valores não formatados com precisão %s (format_decimal_br)",
+                   precision, exemplo=repr(value))
+            return str(value)  # Retorna original se tudo falhar
+
+
+def format_decimal_br_cv(value, precision=2):
+    """
+    Tenta converter valor para float e formata como string com vírgula decimal.
+    Tenta substituir ponto por vírgula mesmo se a conversão falhar,
+    se o valor original parecer um número com ponto.
+    Retorna string vazia para nulos/vazios, ou original em último caso.
+    """
+    if pd.isna(value) or str(value).strip() == "":
+        return ""
+
+    original_str = str(value).strip()
+    numeric_value = parse_flexible_float(original_str)  # Tenta converter
+
+    if numeric_value is not None:
+        # CONVERSÃO OK: Formata o número
+        try:
+            format_string = f"{{:.{precision}f}}"
+            # Formata para garantir a precisão correta
+            formatted_num_str = format_string.format(numeric_value)
+            # Substitui o ponto pela vírgula no resultado formatado
+            return formatted_num_str.replace(".", ",")
+        except (ValueError, TypeError):
+            # Erro inesperado na formatação do número já convertido
+            avisar(logger, "números com falha inesperada de formatação (format_decimal_br_cv)",
+                   exemplo=repr(numeric_value))
+            # Como último recurso, tenta a substituição no original se tiver ponto
+            if "." in original_str and "," not in original_str:
+                # Verifica se parece um número antes de substituir cegamente
+                if re.fullmatch(r"-?\s*\d+(\.\d+)?\s*$", original_str):
+                    logger.debug("Fallback format: substituindo ponto no original %r", original_str)
+                    return original_str.replace(".", ",")
+            return original_str  # Retorna original se tudo falhar
+    else:
+        # CONVERSÃO FALHOU: Verifica o formato da string original
+        # Já tem vírgula? Provavelmente já está correto (ou é texto inválido)
+        if "," in original_str:
+            # Pode ser que já esteja formatado ou seja "1,2,3" - retorna como está
+            return original_str
+        # Não tem vírgula, mas tem ponto? Tenta substituir.
+        elif "." in original_str:
+            # Verifica se parece um número ANTES de substituir
+            # Permite espaços no início/fim, mas o miolo deve ser numérico com ponto
+            if re.fullmatch(r"-?\s*\d+(\.\d+)?\s*$", original_str):
+                avisar(logger, "valores com parse falho mas numéricos com ponto; ponto substituído (format_decimal_br_cv)",
+                       exemplo=repr(original_str))
+                # Tenta formatar para garantir a precisão, se possível (menos provável de funcionar)
+                try:
+                    num_from_dot = float(original_str)
+                    format_string = f"{{:.{precision}f}}"
+                    formatted_num_str = format_string.format(num_from_dot)
+                    return formatted_num_str.replace(".", ",")
+                except (ValueError, TypeError):
+                    # Se formatar falhar, apenas substitui o ponto
+                    return original_str.replace(".", ",")
+            else:
+                # Tem ponto, mas não parece um número (ex: "Texto.com")
+                return original_str
+        else:
+            # Não tem vírgula nem ponto, conversão falhou (provavelmente inteiro ou texto)
+            # Verifica se é um inteiro para adicionar casas decimais ",00"
+            if original_str.isdigit() or (
+                original_str.startswith("-") and original_str[1:].isdigit()
+            ):
+                try:
+                    num_int = int(original_str)
+                    format_string = f"{{:.{precision}f}}"
+                    formatted_num_str = format_string.format(num_int)
+                    return formatted_num_str.replace(".", ",")
+                except ValueError:
+                    return original_str  # Retorna se não for inteiro válido
+            else:
+                # É apenas texto sem separadores numéricos
+                return original_str  # Retorna original
+
+
+# --- Funções Auxiliares CV ---
+# (normalize_text vem de formatadores.normalizacao)
+def normalize_column_name(column_name):
+    if not isinstance(column_name, str):
+        column_name = str(column_name)
+    normalized = (
+        unicodedata.normalize("NFKD", column_name)
+        .encode("ASCII", "ignore")
+        .decode("ASCII")
+    )
+    return normalized.lower().replace(" ", "").strip()
+
+
+def encontrar_coluna_garagem(df_columns):
+    normalized_columns = {normalize_column_name(col): col for col in df_columns}
+    for norm_name, orig_name in normalized_columns.items():
+        if "garagem" in norm_name:
+            return orig_name
+    return None
+
+
+def formatar_nome_unidade(row, bq_col_name, ca_col_name):
+    """
+    Formata o nome da unidade combinando Bloco/Quadra e Casa/Apto.
+    Ex: BL01 - CASA 05, QD10 - APT 101
+    """
+    # Pega os valores das colunas corretas
+    bq_val = row.get(bq_col_name, "")
+    ca_val = row.get(ca_col_name, "")
+
+    # Formata número do Bloco/Quadra com zero à esquerda
+    bq_num_str = "??"
+    bq_prefix = "BL"  # Default prefix
+    if pd.notna(bq_val) and str(bq_val).strip():
+        s_bq = str(bq_val).strip()
+        match = re.search(r"\d+", s_bq)
+        if match:
+            try:
+                bq_num_str = f"{int(match.group(0)):02d}"
+            except ValueError:
+                bq_num_str = "??"  # Mantém ?? se não for número
+        else:
+            bq_num_str = "??"  # Mantém ?? se não achar número
+        # Determina prefixo baseado no NOME da coluna
+        if "quadra" in str(bq_col_name).lower():
+            bq_prefix = "QD"
+        else:
+            bq_prefix = "BL"  # Default para bloco ou outros nomes
+    else:
+        # Caso não encontre valor na coluna Bloco/Quadra
+        avisar(logger, "linhas sem valor de Bloco/Quadra na coluna '%s'", bq_col_name,
+               exemplo=getattr(row, "name", "desconhecida"))
+        # Poderia retornar um erro ou um nome padrão
+        # return "ERRO_BLOCO_QUADRA_AUSENTE"
+
+    # Formata número da Casa/Apto com zero à esquerda
+    ca_num_str = "??"
+    ca_prefix = "UNID"  # Default prefix
+    if pd.notna(ca_val) and str(ca_val).strip():
+        s_ca = str(ca_val).strip()
+        # Extrai todos os dígitos
+        digits = "".join(filter(str.isdigit, s_ca))
+        if digits:
+            try:
+                ca_num_str = f"{int(digits):02d}"  # Formata com zero à esquerda
+            except ValueError:
+                ca_num_str = (
+                    s_ca  # Usa a string original se a conversão falhar (improvável)
+                )
+        else:
+            ca_num_str = s_ca  # Usa a string original se não houver dígitos
+        # Determina prefixo baseado no NOME da coluna
+        if "casa" in str(ca_col_name).lower():
+            ca_prefix = "CASA"
+        elif (
+            "apt" in str(ca_col_name).lower()
+            or "apartamento" in str(ca_col_name).lower()
+        ):
+            ca_prefix = "APT"
+        else:
+            ca_prefix = "UNID"  # Default para 'unidade' ou outros nomes
+    else:
+        # Caso não encontre valor na coluna Casa/Apto
+        avisar(logger, "linhas sem valor de Casa/Apto na coluna '%s'", ca_col_name,
+               exemplo=getattr(row, "name", "desconhecida"))
+    # return "ERRO_CASA_APTO_AUSENTE"
+
+    # Lógica PCD (mantida)
+    # Verifica TIPO e a coluna original de Casa/Apto para PCD
+    tipo_val_pcd = row.get("TIPO", "")  # Assume que TIPO foi encontrada e renomeada
+    pcd = (
+        " (PCD)"
+        if any("PCD" in normalize_text(str(v)) for v in [ca_val, tipo_val_pcd])
+        else ""
+    )
+
+    # Combina tudo - Só retorna se ambos os números foram minimamente definidos
+    if bq_num_str != "??" and ca_num_str != "??":
+        return f"{bq_prefix}{bq_num_str} - {ca_prefix} {ca_num_str}{pcd}"
+    elif bq_num_str != "??":  # Retorna só o bloco/quadra se a unidade falhou
+        avisar(logger, "nomes de unidade incompletos (faltou Casa/Apto?)",
+               exemplo=f"{bq_prefix}{bq_num_str} na linha {getattr(row, 'name', 'desconhecida')}")
+        return f"{bq_prefix}{bq_num_str}{pcd}"  # Adiciona PCD mesmo se incompleto
+    elif ca_num_str != "??":  # Retorna só a unidade se o bloco falhou
+        avisar(logger, "nomes de unidade incompletos (faltou Bloco/Quadra?)",
+               exemplo=f"{ca_prefix} {ca_num_str} na linha {getattr(row, 'name', 'desconhecida')}")
+        return f"{ca_prefix} {ca_num_str}{pcd}"
+    else:
+        avisar(logger, "linhas sem nome de unidade possível (NOME_UNIDADE_INVALIDO)",
+               exemplo=getattr(row, "name", "desconhecida"))
+        return "NOME_UNIDADE_INVALIDO"  # Ou retorna ""
+
+
+def formatar_jardim(v):
+    if pd.isna(v):
+        return ""
+    try:
+        vf = float(str(v).replace(",", "."))
+        return f"{vf:.2f}".replace(".", ",") + " m²" if vf != 0 else ""
+    except:
+        return ""
+
+
+def mapear_tipologia_web(row, tip_map, is_casa):
+    t_orig = str(row.get("TIPO", "")).strip()
+    map_i = tip_map.get(t_orig, {})
+
+    # Tenta pegar de colunas específicas ou extrair de Nome (Unidade)
+    unit = str(row.get("APT", "") or row.get("CASA", "")).strip().upper()
+    if not unit and "Nome (Unidade)" in row:
+        parts = str(row["Nome (Unidade)"]).split("-")
+        if len(parts) > 1:
+            unit = parts[-1].strip().upper()
+        else:
+            unit = str(row["Nome (Unidade)"]).strip().upper()
+
+    if not t_orig or not map_i:
+        return None
+    is_pcd = "PCD" in unit or "PCD" in normalize_text(t_orig)
+    if is_pcd:
+        return map_i.get("pcd")
+    if is_casa:
+        return map_i.get("padrao")
+    try:
+        apt_n = int("".join(filter(str.isdigit, unit)))
+        return map_i.get("padrao") if apt_n <= 6 else map_i.get("superior")
+    except:
+        return map_i.get("padrao")
+
+
+def mapear_tipologia_web_colunar(df, tip_map, is_casa):
+    """
+    Versão colunar de mapear_tipologia_web: tip_map vira uma tabela
+    TIPO x {padrao, pcd, superior} alinhada às linhas pelo TIPO, e a escolha
+    é feita por máscaras (PCD na unidade/TIPO, casa, número do apto <= 6).
+    Linhas com caracteres não-ASCII na unidade usam a função por linha
+    (str.isdigit aceita dígitos Unicode).
+    """
+    vazio = pd.Series("", index=df.index, dtype=object)
+    t_orig = df.get("TIPO", vazio).astype(str).str.strip()
+    tabela = pd.DataFrame.from_dict(
+        tip_map, orient="index", columns=["padrao", "pcd", "superior"]
+    )
+    opcoes = tabela.reindex(t_orig.to_numpy())
+    sem_map = (t_orig == "").to_numpy() | ~t_orig.isin(tabela.index).to_numpy()
+
+    # Unidade: APT (se preenchido) ou CASA; senão o fim do Nome (Unidade)
+    apt = df.get("APT", vazio)
+    unit = apt.where(apt.astype(bool), df.get("CASA", vazio))
+    unit = unit.astype(str).str.strip().str.upper()
+    if "Nome (Unidade)" in df.columns:
+        fim_nome = df["Nome (Unidade)"].astype(str).str.rsplit("-", n=1).str[-1]
+        unit = unit.mask(unit == "", fim_nome.str.strip().str.upper())
+
+    pcd_tipo = mapear_valores_unicos(t_orig, lambda t: "PCD" in normalize_text(t))
+    is_pcd = unit.str.contains("PCD", regex=False) | pcd_tipo.astype(bool)
+    digitos = unit.str.replace(r"[^0-9]", "", regex=True)
+    sem_zeros = digitos.str.lstrip("0")
+    ate_6 = (digitos == "") | ((sem_zeros.str.len() <= 1) & (sem_zeros <= "6"))
+
+    tipologia = np.select(
+        [sem_map, is_pcd.to_numpy(), is_casa | ate_6.to_numpy()],
+        [None, opcoes["pcd"].to_numpy(), opcoes["padrao"].to_numpy()],
+        default=opcoes["superior"].to_numpy(),
+    )
+    tipologia = pd.Series(tipologia, index=df.index, dtype=object)
+    tipologia = tipologia.where(tipologia.notna(), None)
+
+    linha_a_linha = unit.str.contains(r"[^\x00-\x7f]", regex=True)
+    if linha_a_linha.any():
+        tipologia[linha_a_linha] = df[linha_a_linha].apply(
+            lambda r: mapear_tipologia_web(r, tip_map, is_casa), axis=1
+        )
+    return tipologia
+
+
+# --- Geração da planilha de importação CV ---
+COLUNAS_SAIDA_CV = [
+    "Nome (Empreendimento)",
+    "Sigla (Empreendimento)",
+    "Matrícula (Empreendimento)",
+    "Empresa (Empreendimento)",
+    "Tipo (Empreendimento)",
+    "Segmento (Empreendimento)",
+    "Ativo no painel (Empreendimento)",
+    "Região (Empreendimento)",
+    "CEP (Empreendimento)",
+    "Endereço (Empreendimento)",
+    "Bairro (Empreendimento)",
+    "Número (Empreendimento)",
+    "Estado (Empreendimento)",
+    "Cidade (Empreendimento)",
+    "Data da Entrega (Empreendimento)",
+    "Nome (Etapa)",
+    "Nome (Bloco)",
+    "Nome (Unidade)",
+    "Tipologia (Unidade)",
+    "Tipo (Unidade)",
+    "Área privativa m² (Unidade)",
+    "Jardim (Unidade)",
+    "Área de Garagem (Unidade)",
+    "Vagas de garagem (Unidade)",
+    "Fração Ideal (Unidade)",
+    "Ativo no painel (Unidade)",
+]
+
+
+def mapear_escolhas_tipologias_cv(escolhas):
+    """
+    Mapa de tipologias de mapear_tipologia_web a partir das escolhas do
+    formulário: {TIPO: {"padrao": ..., "pcd": ..., "superior": ...}}. Cada
+    escolha pode ser a opção das listas TIPOLOGIAS_* (vira o código) ou o
+    próprio código; "superior" ausente ou None (projetos de casas) fica None.
+    """
+    tip_map = {}
+    for t, escolha in escolhas.items():
+        p = (escolha.get("padrao") or "").strip()
+        pc = (escolha.get("pcd") or "").strip()
+        s = escolha.get("superior")
+        s = s.strip() if s is not None else None
+        tip_map[t] = {
+            "padrao": TIPOLOGIAS_PADRAO.get(p, p or None),
+            "pcd": TIPOLOGIAS_PCD.get(pc, pc or None),
+            "superior": TIPOLOGIAS_SUPERIOR.get(s, s or None) if s is not None else None,
+        }
+    return tip_map
+
+
+@cronometrar("importacao_cv_leitura")
+def ler_planilha_cv(caminho):
+    """Lê a planilha da Importação CV como texto (vazios viram ''), com os nomes das colunas sem espaços nas pontas."""
+    df = pd.read_excel(caminho, engine="openpyxl", dtype=str)
+    df.columns = df.columns.str.strip()
+    df = df.fillna("")
+    marcar_etapa("leitura", linhas=len(df), bytes_entrada=os.path.getsize(caminho))
+    return df
+
+
+@cronometrar("importacao_cv")
+@agrupar_avisos()
+def gerar_importacao_cv(df, tip_map, dados_empreendimento):
+    """
+    Monta a planilha de importação CV (CSV ';' em utf-8-sig) a partir da
+    planilha lida por ler_planilha_cv. tip_map: TIPO -> {padrao, pcd,
+    superior} (mapear_escolhas_tipologias_cv); dados_empreendimento: campos
+    do formulário (Nome do Empreendimento, Sigla, Empresa, Tipo, Segmento).
+    Retorna BytesIO.
+    """
+    basic = dados_empreendimento
+    df = df.copy()
+
+    # ### INÍCIO DA NOVA LÓGICA CORRIGIDA ###
+
+    # 1. Tenta encontrar a coluna 'UNIDADE' consolidada e
+    # 2. as colunas separadas para composição.
+    print("Buscando a coluna de Unidade consolidada...")
+    colunas_unidade, relatorio_colunas = resolver_colunas(
+        df.columns,
+        {
+            "Unidade Consolidada": (["unidade", "unid", "apt", "apto", "apartamento", "casa"], False),
+            "Bloco/Quadra": (["bloco", "quadra", "qd", "blk"], False),
+            "Casa": (["casa"], False),
+            "Apartamento": (["apt", "apto", "apartamento"], False),
+        },
+    )
+    for correspondencia in relatorio_colunas:
+        print(f"  {correspondencia}")
+    unidade_col_orig, bloco_col_orig, casa_col_orig, apt_col_orig = colunas_unidade.values()
+    unidade_sep_col = casa_col_orig or apt_col_orig
+
+    serie_tipo = df["TIPO"] if "TIPO" in df.columns else None
+
+    if unidade_col_orig and not (bloco_col_orig and unidade_sep_col):
+        # CASO 1: Unidade Consolidada encontrada
+        print(f"-> Coluna de Unidade encontrada: '{unidade_col_orig}'")
+        df["Nome (Unidade)"] = formatar_unidade_consolidada_cv(
+            df[unidade_col_orig], unidade_col_orig, serie_tipo
+        )
+        df["Nome (Bloco)"] = nome_bloco_a_partir_da_unidade_cv(df["Nome (Unidade)"])
+
+    elif bloco_col_orig and unidade_sep_col:
+        # CASO 2: Colunas separadas encontradas (Composição)
+        print(
+            f"-> Colunas separadas encontradas: '{bloco_col_orig}' e '{unidade_sep_col}'"
+        )
+        df["Nome (Unidade)"] = formatar_unidade_composta_cv(
+            df[bloco_col_orig], df[unidade_sep_col], bool(casa_col_orig), serie_tipo
+        )
+        df["Nome (Bloco)"] = formatar_bloco_composto_cv(
+            df[bloco_col_orig], bloco_col_orig, bool(casa_col_orig)
+        )
+
+    elif unidade_col_orig:
+        # Fallback para consolidada se separadas falharem
+        print(f"-> Coluna de Unidade encontrada (fallback): '{unidade_col_orig}'")
+        df["Nome (Unidade)"] = df[unidade_col_orig]
+        df["Nome (Bloco)"] = nome_bloco_a_partir_da_unidade_cv(df["Nome (Unidade)"])
+    else:
+        raise ValueError(
+            "Não foi possível encontrar colunas de unidade (Unidade Consolidada ou Bloco/Quadra + Casa/Apt)."
+        )
+
+    # 4. Determinar se é um projeto de casa para o mapeamento de tipologia.
+    is_casa_project = (
+        df["Nome (Unidade)"].str.contains("-CS", case=False, na=False).any()
+        or df["Nome (Unidade)"].str.contains("CASA", case=False, na=False).any()
+    )
+    print(f"Projeto detectado como de CASAS: {is_casa_project}")
+
+    # ### FIM DA NOVA LÓGICA CORRIGIDA ###
+
+    # O resto do processamento continua normalmente...
+    n_cols = {normalize_text(c): c for c in df.columns}
+    t_col = n_cols.get("TIPO")
+    if t_col and t_col.upper() != "TIPO":
+        df.rename(columns={t_col: "TIPO"}, inplace=True)
+    elif "TIPO" not in df.columns:
+        raise ValueError("Coluna TIPO sumiu.")
+
+    # --- LÓGICA DE VAGAS DE GARAGEM (Atualizada) ---
+    col_vagas_qtd = find_column_flexible(
+        df.columns,
+        ["vagas de garagem", "vagas", "n vagas", "numero de vagas", "qtd vagas"],
+        "VAGAS_QTD",
+        required=False,
+    )
+    col_garagem_area = find_column_flexible(
+        df.columns,
+        ["garagem", "area de garagem", "box", "garagem e frontal", "area garagem"],
+        "GARAGEM_AREA",
+        required=False,
+    )
+
+    # Resolução de conflito: se ambas encontraram a mesma coluna
+    if col_vagas_qtd and col_garagem_area and col_vagas_qtd == col_garagem_area:
+        norm_col = normalize_text_for_match(col_vagas_qtd)
+        if "vaga" in norm_col or "numero" in norm_col or "qtd" in norm_col:
+            col_garagem_area = None  # É quantidade
+        else:
+            col_vagas_qtd = None  # É área
+
+    if col_vagas_qtd:
+        df.rename(columns={col_vagas_qtd: "VAGAS_QTD_ORIG"}, inplace=True)
+        col_vagas_qtd = "VAGAS_QTD_ORIG"
+
+    if col_garagem_area:
+        # Se eram colunas diferentes, renomeia a de área também
+        df.rename(columns={col_garagem_area: "GARAGEM_AREA_ORIG"}, inplace=True)
+        col_garagem_area = "GARAGEM_AREA_ORIG"
+
+    col_map_ui = {
+        "Nome do Empreendimento": "Nome (Empreendimento)",
+        "Sigla": "Sigla (Empreendimento)",
+        "Empresa": "Empresa (Empreendimento)",
+        "Tipo": "Tipo (Empreendimento)",
+        "Segmento": "Segmento (Empreendimento)",
+    }
+    for k, v in col_map_ui.items():
+        df[v] = basic.get(k, "")
+    col_map_fix = {
+        "Endereço": "Endereço (Empreendimento)",
+        "CEP": "CEP (Empreendimento)",
+        "Região": "Região (Empreendimento)",
+        "Bairro": "Bairro (Empreendimento)",
+        "Número": "Número (Empreendimento)",
+        "Estado": "Estado (Empreendimento)",
+        "Cidade": "Cidade (Empreendimento)",
+        "Data da Entrega (Empreendimento)": "Data da Entrega (Empreendimento)",
+    }
+    for k, v in ENDERECO_FIXO.items():
+        if k in col_map_fix:
+            df[col_map_fix[k]] = v
+
+    df["Matrícula (Empreendimento)"] = "XXXXX"
+    df["Ativo no painel (Empreendimento)"] = "Ativo"
+    df["Nome (Etapa)"] = "ETAPA 01"
+    df["Ativo no painel (Unidade)"] = "Ativo"
+
+    # Prioridade: VAGAS_QTD > GARAGEM_AREA (calculado)
+    if col_vagas_qtd:
+        df["Vagas de garagem (Unidade)"] = verificar_vaga_serie(df[col_vagas_qtd])
+    elif col_garagem_area:
+        df["Vagas de garagem (Unidade)"] = verificar_vaga_serie(df[col_garagem_area])
+    else:
+        df["Vagas de garagem (Unidade)"] = "01 VAGA"
+
+    if col_garagem_area:
+        df["Área de Garagem (Unidade)"] = df[col_garagem_area].apply(
+            lambda x: format_decimal_br_cv(x, precision=2)
+        )
+    else:
+        df["Área de Garagem (Unidade)"] = ""
+
+    quintal_col_name = find_column_flexible(
+        df.columns, ["quintal", "jardim"], "Quintal/Jardim", required=False
+    )
+    df["Jardim (Unidade)"] = (
+        df[quintal_col_name].apply(formatar_jardim) if quintal_col_name else ""
+    )
+
+    area_const_col_name = find_column_flexible(
+        df.columns,
+        ["areaconstruida", "área construída", "area privativa"],
+        "Área Construída/Privativa",
+        required=False,
+    )
+    df["Área privativa m² (Unidade)"] = (
+        df[area_const_col_name].apply(
+            lambda x: format_decimal_br_cv(x, precision=2)
+        )
+        if area_const_col_name
+        else ""
+    )
+
+    fracao_col_name = find_column_flexible(
+        df.columns, ["fracaoideal", "fração ideal"], "Fração Ideal", required=False
+    )
+    if fracao_col_name:
+        def format_unrestricted_fraction(x):
+            if pd.isna(x): return ""
+            try:
+                fmt = f"{float(x):.12f}".rstrip("0").rstrip(".") if "." in f"{float(x):.12f}" else f"{float(x):.12f}"
+                return fmt.replace(".", ",")
+            except:
+                return str(x)
+
+        numeric_fracao = df[fracao_col_name].apply(parse_flexible_float)
+        df["Fração Ideal (Unidade)"] = numeric_fracao.apply(format_unrestricted_fraction)
+    else:
+        df["Fração Ideal (Unidade)"] = ""
+
+    df["Tipo (Unidade)"] = df["TIPO"].astype(str).fillna("")
+    df["Tipologia (Unidade)"] = mapear_tipologia_web_colunar(
+        df, tip_map, is_casa_project
+    )
+
+    df_final = df[[c for c in COLUNAS_SAIDA_CV if c in df.columns]]
+    marcar_etapa("transformacao", linhas=len(df_final))
+    output = io.StringIO()
+    df_final.to_csv(
+        output,
+        index=False,
+        encoding="utf-8-sig",
+        sep=";",
+        quoting=csv.QUOTE_MINIMAL,
+        decimal=",",
+    )
+    marcar_etapa("escrita")
+    return io.BytesIO(output.getvalue().encode("utf-8-sig"))
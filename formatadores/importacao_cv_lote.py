@@ -0,0 +1,224 @@
+# formatadores/importacao_cv_lote.py
+
+import csv
+import io
+import os
+
+import pandas as pd
+
+from formatadores.importacao_cv import ENDERECO_FIXO
+from formatadores.metricas import etapa
+from formatadores.normalizacao import normalizar_texto_lote as normalize_text_lote
+from formatadores.sienge_lote import limpar_converter_numerico_lote
+
+
+# --- Funções Auxiliares CV Lote ---
+def normalize_column_name_lote(c):
+    # normalize_text_lote (cacheado) já tira acentos e pontas; aqui só minúsculo e sem espaços
+    return normalize_text_lote(c).lower().replace(" ", "")
+
+
+def encontrar_coluna_similar_lote(cols, target):
+    t = target.lower().strip()
+    norm_c = {normalize_column_name_lote(col): col for col in cols}
+    for n, o in norm_c.items():
+        if t in n:
+            print(f"(Lote) Found '{t}': '{o}'")
+            return o
+    print(f"(Lote) Warn: Col '{t}' not found.")
+    return None
+
+
+def formatar_nome_bloco_lote(row, col_q):
+    try:
+        if col_q in row.index and pd.notna(row[col_q]):
+            try:
+                n = int(row[col_q])
+            except ValueError:
+                n = int(float(row[col_q]))
+            return f"QUADRA {n:02d}"
+        else:
+            return "QUADRA_NA"
+    except:
+        return "QUADRA_ERR"
+
+
+def formatar_nome_unidade_lote(row, col_q, col_l):
+    qd_s, lt_s = "QD??", "LOTE ??"
+    try:
+        if col_q in row.index and pd.notna(row[col_q]):
+            try:
+                qd_s = f"QD{int(float(row[col_q])):02d}"
+            except:
+                qd_s = "QD_INV"
+        else:
+            qd_s = "QD_NA"
+        if col_l in row.index and pd.notna(row[col_l]):
+            lv = str(row[col_l]).strip()
+            ln = "".join(filter(str.isdigit, lv))
+            if ln:
+                try:
+                    lt_s = f"LOTE {int(ln):02d}"
+                except:
+                    lt_s = "LOTE_INV"
+            else:
+                lt_s = f"LOTE_{lv}" if lv else "LOTE_S/N"
+        else:
+            lt_s = "LOTE_NA"
+        return f"{qd_s} - {lt_s}"
+    except:
+        return "ERRO_NOME_UNIDADE"
+
+
+def formatar_fracao_ideal_lote(v_num):
+    try:
+        if pd.isna(v_num) or str(v_num).strip() == "":
+            return ""
+        # Formata o número preservando a precisão sem restringir a 6 casas, limpa zeros à direita
+        formatted = f"{float(v_num):.12f}".rstrip("0").rstrip(".") if "." in f"{float(v_num):.12f}" else f"{float(v_num):.12f}"
+        return formatted.replace(".", ",")
+    except (ValueError, TypeError):
+        # Retorna o valor original em caso de erro de conversão
+        return str(v_num) if pd.notna(v_num) else "ERRO_FRAC"
+
+
+def formatar_area_privativa_lote(v_num):
+    try:
+        return "" if pd.isna(v_num) else f"{float(v_num):.2f}".replace(".", ",") + " m²"
+    except:
+        return "ERRO m²"
+
+
+# --- Geração da planilha de importação CV Lote ---
+COLUNAS_NORMALIZADAS_CV_LOTE = {
+    "QUADRA": "QUADRA",
+    "LOTE": "LOTE",
+    "AREACONSTRUIDA": "ÁREA(M2)",
+    "AREA CONSTRUIDA": "ÁREA(M2)",
+    "AREACONSTRUIDAM2": "ÁREA(M2)",
+    "AREA CONSTRUIDA M2": "ÁREA(M2)",
+    "AREA(M2)": "ÁREA(M2)",
+    "AREAM2": "ÁREA(M2)",
+    "FRACAOIDEAL": "FRAÇÃO IDEAL",
+    "FRACAO IDEAL": "FRAÇÃO IDEAL",
+    "TIPO": "TIPO",
+    "CONFRONTANTES": "CONFRONTANTES",
+}
+COLUNAS_NECESSARIAS_CV_LOTE = [
+    "QUADRA",
+    "LOTE",
+    "ÁREA(M2)",
+    "FRAÇÃO IDEAL",
+    "TIPO",
+    "CONFRONTANTES",
+]
+COLUNAS_SAIDA_CV_LOTE = [
+    "Nome (Empreendimento)",
+    "Sigla (Empreendimento)",
+    "Matrícula (Empreendimento)",
+    "Empresa (Empreendimento)",
+    "Tipo (Empreendimento)",
+    "Segmento (Empreendimento)",
+    "Ativo no painel (Empreendimento)",
+    "Região (Empreendimento)",
+    "CEP (Empreendimento)",
+    "Endereço (Empreendimento)",
+    "Bairro (Empreendimento)",
+    "Número (Empreendimento)",
+    "Estado (Empreendimento)",
+    "Cidade (Empreendimento)",
+    "Data da Entrega (Empreendimento)",
+    "Nome (Etapa)",
+    "Nome (Bloco)",
+    "Nome (Unidade)",
+    "Área privativa m² (Unidade)",
+    "Ativo no painel (Unidade)",
+    "Fração Ideal (Unidade)",
+    "Tipo (Unidade)",
+    "Descrição do Lote (Unidade)",
+]
+
+
+def ler_planilha_cv_lote(caminho):
+    """Lê a planilha da Importação CV Lote como texto, com os nomes das colunas sem espaços nas pontas."""
+    with etapa("importacao_cv_lote.leitura", bytes_entrada=os.path.getsize(caminho)) as medida:
+        df = pd.read_excel(caminho, engine="openpyxl", dtype=str)
+        medida.linhas = len(df)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def gerar_importacao_cv_lote(df, dados_empreendimento):
+    """
+    Monta a planilha de importação CV Lote (CSV ';' em utf-8-sig) a partir da
+    planilha lida por ler_planilha_cv_lote. dados_empreendimento: campos do
+    formulário (Nome do Empreendimento, Sigla, Empresa, Tipo, Segmento).
+    Retorna BytesIO.
+    """
+    basic = dados_empreendimento
+    df = df.copy()
+    n_cols = {normalize_text_lote(c): c for c in df.columns}
+    cols_found = {}
+    missing = set(COLUNAS_NECESSARIAS_CV_LOTE)
+    for norm, concept in COLUNAS_NORMALIZADAS_CV_LOTE.items():
+        orig = n_cols.get(norm)
+        if orig and orig in df.columns and concept not in cols_found:
+            cols_found[concept] = orig
+        if concept in missing:
+            missing.remove(concept)
+    if missing:
+        raise ValueError(f"Colunas Lote faltando: {', '.join(missing)}")
+    print(f"(Lote) Colunas: {cols_found}")
+    df["Nome (Empreendimento)"] = basic.get("Nome do Empreendimento", "")
+    df["Sigla (Empreendimento)"] = basic.get("Sigla", "")
+    df["Empresa (Empreendimento)"] = basic.get("Empresa", "")
+    df["Tipo (Empreendimento)"] = basic.get("Tipo", "Loteamento")
+    df["Segmento (Empreendimento)"] = basic.get("Segmento", "Residencial")
+    df["Matrícula (Empreendimento)"] = "XXXXX"
+    df["Ativo no painel (Empreendimento)"] = "Ativo"
+    df["Região (Empreendimento)"] = ENDERECO_FIXO["Região"]
+    df["CEP (Empreendimento)"] = ENDERECO_FIXO["CEP"]
+    df["Endereço (Empreendimento)"] = ENDERECO_FIXO["Endereço"]
+    df["Bairro (Empreendimento)"] = ENDERECO_FIXO["Bairro"]
+    df["Número (Empreendimento)"] = ENDERECO_FIXO["Número"]
+    df["Estado (Empreendimento)"] = ENDERECO_FIXO["Estado"]
+    df["Cidade (Empreendimento)"] = ENDERECO_FIXO["Cidade"]
+    df["Data da Entrega (Empreendimento)"] = ENDERECO_FIXO[
+        "Data da Entrega (Empreendimento)"
+    ]
+    df["Nome (Etapa)"] = "ETAPA ÚNICA"
+    df["Ativo no painel (Unidade)"] = "Ativo"
+    df["Nome (Bloco)"] = df.apply(
+        lambda r: formatar_nome_bloco_lote(r, col_q=cols_found["QUADRA"]),
+        axis=1,
+    )
+    df["Nome (Unidade)"] = df.apply(
+        lambda r: formatar_nome_unidade_lote(
+            r, col_q=cols_found["QUADRA"], col_l=cols_found["LOTE"]
+        ),
+        axis=1,
+    )
+    a_num = df[cols_found["ÁREA(M2)"]].apply(limpar_converter_numerico_lote)
+    df["Área privativa m² (Unidade)"] = a_num.apply(formatar_area_privativa_lote)
+    f_num = df[cols_found["FRAÇÃO IDEAL"]].apply(limpar_converter_numerico_lote)
+    df["Fração Ideal (Unidade)"] = f_num.apply(formatar_fracao_ideal_lote)
+    df["Tipo (Unidade)"] = df[cols_found["TIPO"]].astype(str).fillna("")
+    df["Descrição do Lote (Unidade)"] = (
+        df[cols_found["CONFRONTANTES"]].astype(str).fillna("")
+    )
+    missing_out = [c for c in COLUNAS_SAIDA_CV_LOTE if c not in df.columns]
+    if missing_out:
+        raise ValueError(
+            f"Erro Lote: Colunas finais faltando: {', '.join(missing_out)}"
+        )
+    df_final = df[COLUNAS_SAIDA_CV_LOTE].copy()
+    output = io.StringIO()
+    with etapa("importacao_cv_lote.escrita", linhas=len(df_final)):
+        df_final.astype(str).to_csv(
+            output,
+            index=False,
+            encoding="utf-8-sig",
+            sep=";",
+            quoting=csv.QUOTE_MINIMAL,
+        )
+    return io.BytesIO(output.getvalue().encode("utf-8-sig"))
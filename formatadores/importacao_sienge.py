@@ -0,0 +1,350 @@
+# formatadores/importacao_sienge.py
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from formatadores.colunas import find_column_flexible
+from formatadores.exportacao_sienge import gerar_saida_sienge, mapear_empreendimento
+from formatadores.logs import agrupar_avisos, avisar, obter_logger
+from formatadores.metricas import cronometrar, marcar_etapa
+from formatadores.normalizacao import (
+    normalizar_para_busca as normalize_text_for_match,
+    normalizar_para_busca_serie,
+)
+from formatadores.vetorizacao import formatar_numero_dois_digitos
+
+logger = obter_logger(__name__)
+
+
+# --- Funções Auxiliares SIENGE ---
+def normalize_column_name_sienge(c):
+    if pd.isna(c):
+        return ""
+    return str(c).upper().strip()
+
+
+def determinar_tipo_imovel_sienge(row, apt_col):
+    if apt_col == "APT":
+        return "APARTAMENTO"
+    elif apt_col == "CASA":
+        return "CASA"
+    else:
+        return "INDEFINIDO"
+
+
+def formatar_unidade_sienge(
+    row, bloco_coluna_nome, apt_coluna_nome, tipo_unidade_val=None
+):  # Adiciona tipo_unidade_val
+    """
+    Formata a unidade para o padrão SIENGE (ex: QD01 - CASA 01 (PCD)).
+    Determina o prefixo (QD/BL) baseado no nome da coluna bloco_coluna_nome.
+    Adiciona (PCD) se 'PCD' ou 'PNE' for encontrado no tipo_unidade_val ou no apt_val.
+    """
+    bloco_str = "00"
+    apt_str = "00"
+    bloco_prefix = "??"
+    apt_prefix = "??"
+    pcd_suffix = ""  # Inicializa sufixo PCD
+
+    try:
+        # --- Processa Bloco/Quadra ---
+        if bloco_coluna_nome and pd.notna(row.get(bloco_coluna_nome)):
+            bloco_val = row[bloco_coluna_nome]
+            if "QUADRA" in str(bloco_coluna_nome).upper():
+                bloco_prefix = "QD"
+            else:
+                bloco_prefix = "BL"
+            try:
+                bloco_int = int(float(bloco_val))
+                bloco_str = f"{bloco_int:02d}"
+            except (ValueError, TypeError):
+                bloco_str = str(bloco_val).strip()
+                # print(f"Aviso SIENGE Bloco/Quadra: '{bloco_val}' -> '{bloco_str}'")
+
+        # --- Processa Apartamento/Casa ---
+        apt_val_original = ""  # Para verificação PCD/PNE
+        if apt_coluna_nome and pd.notna(row.get(apt_coluna_nome)):
+            apt_val_original = str(
+                row[apt_coluna_nome]
+            ).strip()  # <<< Pega o valor original
+            apt_prefix = str(apt_coluna_nome).upper()
+            apt_num_str = "".join(filter(str.isdigit, apt_val_original))
+            if apt_num_str:
+                try:
+                    apt_int = int(apt_num_str)
+                    apt_str = f"{apt_int:02d}"
+                except ValueError:
+                    apt_str = (
+                        apt_num_str  # Se for algo como 'A101', apt_num_str seria '101'
+                    )
+            else:
+                apt_str = apt_val_original  # Usa o valor original se não houver dígitos (ex: GARAGEM)
+                # print(f"Aviso SIENGE Apt/Casa: Sem num de '{apt_val_original}' em {apt_coluna_nome}. Usando: '{apt_str}'")
+
+        # --- LÓGICA PCD/PNE ---
+        # Verifica o valor do TIPO passado e o valor original da unidade
+        normalized_tipo_param = (
+            normalize_text_for_match(str(tipo_unidade_val)) if tipo_unidade_val else ""
+        )
+        normalized_apt_val = normalize_text_for_match(apt_val_original)
+
+        if "pcd" in normalized_tipo_param or "pne" in normalized_tipo_param:
+            pcd_suffix = " (PCD)"
+        elif "pcd" in normalized_apt_val or "pne" in normalized_apt_val:
+            pcd_suffix = " (PCD)"
+        # --- FIM DA LÓGICA PCD/PNE ---
+
+        # --- Combina as partes ---
+        unidade_completa = ""
+        if (
+            bloco_coluna_nome
+            and apt_coluna_nome
+            and bloco_prefix != "??"
+            and apt_prefix != "??"
+        ):
+            unidade_completa = f"{bloco_prefix}{bloco_str} - {apt_prefix} {apt_str}"
+        elif bloco_coluna_nome and bloco_prefix != "??":
+            unidade_completa = f"{bloco_prefix}{bloco_str}"
+        elif apt_coluna_nome and apt_prefix != "??":
+            unidade_completa = f"{apt_prefix} {apt_str}"
+        else:
+            return "N/D"
+
+        return f"{unidade_completa}{pcd_suffix}"  # Adiciona o sufixo PCD
+
+    except Exception as e:
+        avisar(logger, "unidades com erro de formatação (ERRO_FORMAT) (%s)", type(e).__name__, exemplo=e)
+        logger.debug("Erro formatar unidade", exc_info=True)
+        return "ERRO_FORMAT"
+
+
+def _bloco_sienge_texto(bloco_val):
+    """Texto do bloco/quadra como em formatar_unidade_sienge (None -> ERRO_FORMAT)."""
+    try:
+        return f"{int(float(bloco_val)):02d}"
+    except (ValueError, TypeError):
+        return str(bloco_val).strip()
+    except OverflowError:  # 'inf': a versão por linha cai no ERRO_FORMAT
+        return None
+
+
+def _contem_pcd_serie(textos):
+    """True onde o texto normalizado contém 'pcd' ou 'pne' (avaliado por valor único)."""
+    codigos, unicos = pd.factorize(textos)
+    pcd_unicos = normalizar_para_busca_serie(pd.Series(unicos, dtype=object))
+    pcd_unicos = pcd_unicos.str.contains(r"pcd|pne", regex=True).to_numpy()
+    return pd.Series(pcd_unicos[codigos], index=textos.index)
+
+
+def formatar_unidade_sienge_colunar(
+    df, bloco_coluna_nome, apt_coluna_nome, tipo_coluna_nome="TIPO"
+):
+    """
+    Versão colunar de formatar_unidade_sienge sobre o DataFrame inteiro, com o
+    mesmo texto de saída linha a linha:
+    - Bloco/Quadra: int(float(v)) calculado só para os valores únicos da coluna.
+    - Apt/Casa: dígitos extraídos por regex e formatados com 2 dígitos.
+    - PCD/PNE: busca nas colunas TIPO e apt normalizadas.
+    Linhas com caracteres não-ASCII na unidade usam a função por linha
+    (str.isdigit aceita dígitos Unicode que a regex não cobre).
+    """
+    indice = df.index
+    sem_valor = pd.Series(False, index=indice)
+
+    # --- Bloco/Quadra ---
+    if bloco_coluna_nome and bloco_coluna_nome in df.columns:
+        bloco = df[bloco_coluna_nome]
+        tem_bloco = bloco.notna()
+        bloco_prefix = "QD" if "QUADRA" in str(bloco_coluna_nome).upper() else "BL"
+        codigos, unicos = pd.factorize(bloco[tem_bloco])
+        textos_unicos = np.array(
+            [_bloco_sienge_texto(v) for v in unicos] + [None], dtype=object
+        )
+        bloco_str = pd.Series(None, index=indice, dtype=object)
+        bloco_str[tem_bloco] = textos_unicos[codigos]
+        erro = tem_bloco & bloco_str.isna()
+    else:
+        tem_bloco = sem_valor
+        bloco_prefix = "??"
+        bloco_str = pd.Series("00", index=indice, dtype=object)
+        erro = sem_valor
+
+    # --- Apartamento/Casa ---
+    if apt_coluna_nome and apt_coluna_nome in df.columns:
+        apt = df[apt_coluna_nome]
+        tem_apt = apt.notna()
+        apt_prefix = str(apt_coluna_nome).upper()
+        apt_val_original = apt.astype(str).str.strip().where(tem_apt, "")
+        apt_num_str = apt_val_original.str.replace(r"[^0-9]", "", regex=True)
+        apt_str = formatar_numero_dois_digitos(
+            apt_num_str.where(apt_num_str != "")
+        ).fillna(apt_val_original)
+        linha_a_linha = tem_apt & apt_val_original.str.contains(
+            r"[^\x00-\x7f]", regex=True
+        )
+    else:
+        tem_apt = sem_valor
+        apt_prefix = "??"
+        apt_val_original = pd.Series("", index=indice, dtype=object)
+        apt_str = pd.Series("00", index=indice, dtype=object)
+        linha_a_linha = sem_valor
+
+    # --- PCD/PNE (normalização só dos valores únicos) ---
+    pcd = _contem_pcd_serie(apt_val_original)
+    if tipo_coluna_nome and tipo_coluna_nome in df.columns:
+        pcd |= _contem_pcd_serie(df[tipo_coluna_nome].astype(str))
+    pcd_suffix = pd.Series("", index=indice, dtype=object).mask(pcd, " (PCD)")
+
+    # --- Combina as partes ---
+    parte_bloco = bloco_prefix + bloco_str.astype(str)
+    parte_apt = apt_prefix + " " + apt_str.astype(str)
+    unidade = pd.Series("N/D", index=indice, dtype=object)
+    unidade = unidade.mask(tem_apt, parte_apt + pcd_suffix)
+    unidade = unidade.mask(tem_bloco, parte_bloco + pcd_suffix)
+    unidade = unidade.mask(
+        tem_bloco & tem_apt, parte_bloco + " - " + parte_apt + pcd_suffix
+    )
+    unidade = unidade.mask(erro, "ERRO_FORMAT")
+
+    if linha_a_linha.any():
+        unidade[linha_a_linha] = df[linha_a_linha].apply(
+            lambda r: formatar_unidade_sienge(
+                r, bloco_coluna_nome, apt_coluna_nome, r.get(tipo_coluna_nome)
+            ),
+            axis=1,
+        )
+    return unidade
+
+
+def parse_and_reformat_composite_unit(unit_string):
+    if pd.isna(unit_string) or not isinstance(unit_string, str):
+        return "N/D"
+
+    unit_string = unit_string.strip()
+
+    # Regex para capturar as partes: (BL ou US)(dígitos) - ignora QD - (CS)(dígitos) (e opcionalmente PCD)
+    match = re.match(
+        r"^(BL|US)(\d+)-QD\d+-(CS)(\d+)(\s*\(PCD\))?$", unit_string, re.IGNORECASE
+    )
+
+    if match:
+        prefixo_bloco = match.group(1).upper()  # BL ou US
+        numero_bloco = match.group(2)
+        prefixo_casa = "CASA"  # Fixo, pois 'CS' foi encontrado
+        numero_casa = match.group(4)
+        sufixo_pcd = (
+            match.group(5) or ""
+        )  # Pega o sufixo PCD se existir, senão string vazia
+
+        # Remonta a string no formato desejado
+        # Ex: "BL01 - CASA 01 (PCD)" ou "US22 - CASA 01"
+        return f"{prefixo_bloco}{numero_bloco} - {prefixo_casa} {numero_casa}{sufixo_pcd.strip()}"
+
+    # Se não der match, retorna a string original como fallback
+    avisar(logger, "unidades fora do formato 'BL/US...-QD...-CS...'; usado o valor original",
+           exemplo=repr(unit_string))
+    return unit_string
+
+
+@cronometrar("importacao_sienge_leitura")
+def ler_planilha_sienge(caminho):
+    """Lê a planilha do SIENGE com as colunas em maiúsculas; ValueError sem ETAPA."""
+    df = pd.read_excel(caminho, engine="openpyxl")
+    marcar_etapa("leitura", linhas=len(df))
+    df.columns = df.columns.str.upper().str.strip()
+    if "ETAPA" not in df.columns:
+        raise ValueError("Coluna 'ETAPA' não encontrada!")
+    return df
+
+
+@cronometrar("importacao_sienge")
+@agrupar_avisos()
+def gerar_importacao_sienge(df, etapas_map, formato_saida="xls"):
+    """
+    Monta a importação SIENGE a partir da planilha lida por
+    ler_planilha_sienge. etapas_map: dígitos da etapa -> código do
+    empreendimento. A unidade vem da coluna UNIDADE consolidada ou, no
+    formato legado, de QUADRA/BLOCO + CASA/APT. Retorna (BytesIO, mimetype,
+    extensão).
+    """
+    df_out = pd.DataFrame()
+
+    # Mapeamento de Etapa (comum a ambos os caminhos): dígitos da ETAPA -> código
+    if "ETAPA" in df.columns:
+        df_out["EMPREENDIMENTO"] = mapear_empreendimento(df["ETAPA"], etapas_map)
+    else:
+        df_out["EMPREENDIMENTO"] = pd.Series(None, index=df.index, dtype=object)
+
+    print("Procurando por coluna 'UNIDADE' consolidada...")
+    composite_unit_col = find_column_flexible(
+        df.columns, ["UNIDADE"], "Unidade Consolidada", required=False
+    )
+
+    if composite_unit_col:
+        # CAMINHO 1: Novo formato encontrado!
+        print(
+            f"Coluna 'UNIDADE' consolidada encontrada: '{composite_unit_col}'. Copiando valores diretamente."
+        )
+
+        # Apenas copia o valor da coluna 'UNIDADE' exatamente como está.
+        df_out["UNIDADE"] = df[composite_unit_col]
+
+        # Determina o tipo de imóvel baseado no conteúdo da string
+        df_out["TIPO DE IMÓVEL"] = df[composite_unit_col].apply(
+            lambda x: "CASA" if "-CS" in str(x).upper() else "APARTAMENTO"
+        )
+
+    else:
+        # CAMINHO 2: Fallback para o formato legado
+        print(
+            "Coluna 'UNIDADE' consolidada não encontrada. Buscando colunas separadas (legado)..."
+        )
+        bloco_col = (
+            "QUADRA"
+            if "QUADRA" in df.columns
+            else "BLOCO" if "BLOCO" in df.columns else None
+        )
+        apt_col = (
+            "CASA"
+            if "CASA" in df.columns
+            else "APT" if "APT" in df.columns else None
+        )
+
+        if not bloco_col or not apt_col:
+            raise ValueError(
+                "Formato legado: Faltando colunas de identificação (QUADRA/BLOCO e CASA/APT)"
+            )
+
+        print(
+            f"Colunas separadas encontradas: Bloco/Quadra='{bloco_col}', Casa/Apto='{apt_col}'"
+        )
+
+        # Usa a função de formatação antiga para criar 'BL01 - CASA 01'
+        # A lógica de PCD está dentro de formatar_unidade_sienge
+        df_out["UNIDADE"] = formatar_unidade_sienge_colunar(
+            df, bloco_col, apt_col, "TIPO"
+        )
+        df_out["TIPO DE IMÓVEL"] = df.apply(
+            lambda r: determinar_tipo_imovel_sienge(r, apt_col), axis=1
+        )
+
+    # O resto do processamento é comum a ambos os caminhos
+    df_out["ÁREA PRIVATIVA"] = pd.to_numeric(
+        df["ÁREA CONSTRUIDA"], errors="coerce"
+    ).fillna(0)
+    df_out["ÁREA COMUM"] = 0
+    df_out["FRAÇÃO IDEAL"] = (
+        pd.to_numeric(df["FRAÇÃO IDEAL"], errors="coerce").fillna(0)
+    )
+    df_out["ESTOQUE COMERCIAL"] = "D"
+    df_out["ESTOQUE LEGAL"] = "L"
+    df_out["ESTOQUE DE OBRA"] = "C"
+    marcar_etapa("transformacao", linhas=len(df_out))
+
+    # Geração do arquivo (xls padrão, xlsx ou csv) com a mesma tipagem por coluna
+    output, mimetype_saida, ext_saida = gerar_saida_sienge(df_out, formato_saida)
+    marcar_etapa("escrita", bytes_saida=output.getbuffer().nbytes)
+    print(f"(SIENGE) Arquivo .{ext_saida} gerado.")
+    return output, mimetype_saida, ext_saida
@@ -0,0 +1,293 @@
+# formatadores/incorporacao_avancado.py
+
+import io
+import traceback
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from formatadores.metricas import cronometrar, marcar_etapa
+from formatadores.colunas import find_column_flexible
+from formatadores.normalizacao import normalizar_para_busca as normalize_text_for_match
+from formatadores.tabela_preco_formatador import parse_flexible_float
+from formatadores.vetorizacao import mapear_valores_unicos, verificar_vaga_serie
+
+
+# --- Funções Auxiliares Formatador Incorporação ---
+def converter_numero_incorporacao(valor):
+    """parse_flexible_float arredondado em 6 casas (None se não for número)."""
+    if pd.isna(valor):
+        return None
+    try:
+        numero = parse_flexible_float(valor)
+    except Exception:
+        return None
+    return round(numero, 6) if numero is not None else None
+
+
+def escrever_xlsx_formatado(
+    df, output, nome_planilha, formatos_colunas=None, larguras=None
+):
+    """
+    Escreve df em output (.xlsx) em modo streaming (XlsxWriter constant_memory).
+    formatos_colunas: índice da coluna -> formato numérico, aplicado uma vez
+    como formato da coluna (set_column), sem passar célula a célula depois.
+    larguras: largura de cada coluna. O cabeçalho segue o estilo do pandas.
+    """
+    formatos_colunas = formatos_colunas or {}
+    wb = xlsxwriter.Workbook(
+        output, {"constant_memory": True, "nan_inf_to_errors": True}
+    )
+    ws = wb.add_worksheet(nome_planilha)
+    fmt_cabecalho = wb.add_format(
+        {"bold": True, "border": 1, "align": "center", "valign": "top"}
+    )
+    fmts = {f: wb.add_format({"num_format": f}) for f in set(formatos_colunas.values())}
+    for c, nome in enumerate(df.columns):
+        largura = larguras[c] if larguras else None
+        ws.set_column(c, c, largura, fmts.get(formatos_colunas.get(c)))
+        ws.write_string(0, c, str(nome), fmt_cabecalho)
+
+    colunas = [
+        df.iloc[:, c].astype(object).where(df.iloc[:, c].notna(), None).tolist()
+        for c in range(df.shape[1])
+    ]
+    for r, linha in enumerate(zip(*colunas), start=1):
+        for c, v in enumerate(linha):
+            if v is None or (isinstance(v, str) and not v):
+                continue
+            if isinstance(v, str):
+                ws.write_string(r, c, v)
+            elif isinstance(v, (int, float, np.number)) and not isinstance(v, bool):
+                ws.write_number(r, c, v)
+            else:
+                ws.write(r, c, v)
+    wb.close()
+    return output
+
+
+@cronometrar("incorporacao_avancado")
+def processar_formatador_incorporacao_avancado(input_filepath):
+    """
+    Processa a planilha de incorporação (versão reestruturada):
+    - Lê o cabeçalho da linha 3.
+    - Usa a coluna 'QUADRA' dos dados para criar 'QUADRA_NUM'.
+    - Remove colunas sem nome no cabeçalho original.
+    - Aplica formatação numérica específica (casas decimais).
+    """
+    print(f"(Incorp Reestruturado) Processando: {input_filepath}")
+    output = io.BytesIO()
+
+    try:
+        # 1. Leitura Direta com Cabeçalho na Linha 3 (índice 2)
+        try:
+            df_input = pd.read_excel(
+                input_filepath, header=2, dtype=str
+            )  # Lê tudo como string inicialmente
+            # Remove linhas que são completamente NA (podem aparecer no final)
+            df_input.dropna(how="all", inplace=True)
+            # Limpa nomes das colunas lidas
+            df_input.columns = [str(col).strip() for col in df_input.columns]
+            print(
+                f"(Incorp Reestruturado) Lidas {len(df_input)} linhas de dados. Colunas lidas: {df_input.columns.tolist()}"
+            )
+        except Exception as e:
+            print(f"(Incorp Reestruturado) ERRO ao ler Excel (header=2): {e}")
+            # Tenta ler sem header específico como fallback, pode não ser ideal
+            try:
+                print("(Incorp Reestruturado) Tentando ler sem header específico...")
+                df_input = pd.read_excel(input_filepath, dtype=str)
+                df_input.dropna(how="all", inplace=True)
+                # Tenta encontrar header manualmente (complexo, melhor avisar usuário)
+                raise ValueError(
+                    f"Falha ao ler o arquivo Excel com header na linha 3. Verifique o arquivo. Erro: {e}"
+                )
+            except Exception as e2:
+                raise ValueError(
+                    f"Falha grave ao ler o arquivo Excel. Verifique o formato. Erros: {e}, {e2}"
+                )
+        marcar_etapa("leitura", linhas=len(df_input))
+
+        # 2. Filtrar Colunas "Unnamed" (geradas por cabeçalhos vazios)
+        original_columns = df_input.columns.tolist()
+        cols_to_keep = [
+            col for col in original_columns if not str(col).startswith("Unnamed:")
+        ]
+        if len(cols_to_keep) < len(original_columns):
+            removed_cols = [col for col in original_columns if col not in cols_to_keep]
+            print(
+                f"(Incorp Reestruturado) Removendo colunas sem nome no cabeçalho: {removed_cols}"
+            )
+        df_proc = df_input[cols_to_keep].copy()  # Cria cópia com colunas válidas
+
+        # 3. Criar Coluna QUADRA_NUM a partir da coluna original 'QUADRA'
+        quadra_col_orig_name = find_column_flexible(
+            df_proc.columns, ["quadra", "bloco"], "QUADRA", required=True
+        )
+        quadra_col_name = "QUADRA"  # Nome da nova coluna a ser criada
+
+        def format_quadra_num(q_val):
+            if pd.isna(q_val) or str(q_val).strip() == "":
+                return ""
+            try:
+                # Converte para float primeiro (caso seja "1.0") depois para int
+                return f"{int(float(str(q_val))):02d}"
+            except (ValueError, TypeError):
+                return str(q_val).strip()  # Retorna original se não converter
+
+        # Aplica a formatação para criar a nova coluna
+        df_proc[quadra_col_name] = df_proc[quadra_col_orig_name].apply(
+            format_quadra_num
+        )
+        print(
+            f"(Incorp Reestruturado) Coluna '{quadra_col_name}' criada a partir de '{quadra_col_orig_name}'."
+        )
+
+        # --- LÓGICA DE VAGAS DE GARAGEM ---
+        col_vagas_qtd = find_column_flexible(
+            df_proc.columns, ["vagas de garagem", "vagas"], "VAGAS_QTD", required=False
+        )
+        col_vagas_area = find_column_flexible(
+            df_proc.columns,
+            ["garagem", "garagem e frontal", "area de garagem"],
+            "VAGAS_AREA",
+            required=False,
+        )
+
+        target_vagas_col = "VAGAS DE GARAGEM"
+        marcar_etapa("colunas")
+
+        if col_vagas_qtd:
+            print(
+                f"(Incorp Reestruturado) Usando coluna explícita de vagas: '{col_vagas_qtd}'"
+            )
+            # Usa a coluna existente para definir a quantidade (formatação inteligente/numérica)
+            df_proc[target_vagas_col] = verificar_vaga_serie(df_proc[col_vagas_qtd])
+        elif col_vagas_area:
+            print(
+                f"(Incorp Reestruturado) Calculando vagas pela área da coluna: '{col_vagas_area}'"
+            )
+            # Usa a coluna de área para calcular a quantidade
+            df_proc[target_vagas_col] = verificar_vaga_serie(df_proc[col_vagas_area])
+
+        # 4. Reordenar Colunas (QUADRA_NUM primeiro)
+        # Garante que a coluna original 'QUADRA' não seja duplicada se tiver o mesmo nome normalizado
+        final_columns_order = [quadra_col_name]
+        for col in df_proc.columns:
+            # Adiciona se não for a nova coluna de quadra e nem a original
+            if col != quadra_col_name and col != quadra_col_orig_name:
+                final_columns_order.append(col)
+        # OU se quiser MANTER a coluna QUADRA original também:
+        # final_columns_order = [quadra_col_name] + [col for col in df_proc.columns if col != quadra_col_name]
+
+        df_proc = df_proc[final_columns_order]
+        print(
+            f"(Incorp Reestruturado) Ordem final das colunas: {df_proc.columns.tolist()}"
+        )
+
+        # 5. Converter colunas numéricas e escrever o Excel (formato por coluna)
+        print("(Incorp Reestruturado) Convertendo colunas numéricas...")
+        # Mapeamento: Nome da coluna NORMALIZADO -> formato Excel
+        col_formats = {
+            "areaconstruida": "0.00",
+            "quintal": "0.00",
+            "areadescobertafrontal": "0.00",  # Precisa ter essa coluna no header da linha 3
+            "areaprivativa": "0.00",  # Formato visual 'XXX,XX' não existe, 0.00 dá 2 casas
+            "fracaoideal": "0.000000",  # 6 casas decimais
+        }
+        # Mapeamento de nome normalizado para nome real no DataFrame FINAL
+        df_cols_normalized = {
+            normalize_text_for_match(col): col for col in df_proc.columns
+        }
+
+        # Encontra os índices (base 0) das colunas a serem formatadas no df_proc
+        col_indices_to_format = {}  # col_index (0-based) -> format_string
+        found_formats_applied = []
+        for norm_name, fmt_str in col_formats.items():
+            real_col_name = df_cols_normalized.get(norm_name)
+            if real_col_name:
+                try:
+                    col_indices_to_format[df_proc.columns.get_loc(real_col_name)] = (
+                        fmt_str
+                    )
+                    found_formats_applied.append(real_col_name)
+                except KeyError:
+                    print(
+                        f"  AVISO INTERNO: Coluna '{real_col_name}' (de '{norm_name}') não encontrada no índice do df_proc."
+                    )
+            else:
+                # Só avisa se a coluna não foi encontrada entre as colunas válidas
+                if norm_name not in [
+                    "areadescobertafrontal"
+                ]:  # Exemplo: não avisa se esta for opcional
+                    print(
+                        f"  AVISO: Coluna para formato '{norm_name}' não encontrada no cabeçalho (linha 3) ou foi filtrada."
+                    )
+
+        print(
+            f"(Incorp Reestruturado) Formatos serão aplicados para: {found_formats_applied}"
+        )
+        if not col_indices_to_format:
+            print(
+                "(Incorp Reestruturado) AVISO: Nenhuma coluna encontrada para aplicar formatação numérica."
+            )
+
+        # Largura das colunas: calculada sobre os textos originais
+        larguras = []
+        for i, column_name in enumerate(df_proc.columns):
+            try:
+                # Lógica simples de largura baseada no conteúdo + cabeçalho
+                max_len_data = 0
+                if not df_proc.iloc[:, i].empty:
+                    max_len_data = df_proc.iloc[:, i].astype(str).map(len).max()
+                max_len_header = len(str(column_name))
+                # Pega o maior entre o dado mais longo e o cabeçalho, adiciona margem
+                larguras.append(min(max(max_len_data, max_len_header) + 3, 60))
+            except Exception as e_width:
+                print(
+                    f"  Aviso: Falha ao calcular largura da coluna '{column_name}': {e_width}"
+                )
+                larguras.append(15)  # Fallback
+
+        # Valores numéricos viram float (arredondados em 6 casas, como o passe
+        # por célula anterior fazia em todas as colunas formatadas); textos
+        # vazios viram células vazias; demais textos ficam como estão.
+        df_saida = df_proc.copy()
+        for col_idx in col_indices_to_format:
+            serie = df_proc.iloc[:, col_idx]
+            numeros = mapear_valores_unicos(serie, converter_numero_incorporacao)
+            vazio = serie.isna() | (serie.astype(str).str.strip() == "")
+            df_saida.isetitem(
+                col_idx,
+                numeros.where(numeros.notna(), serie.where(~vazio, None)),
+            )
+        marcar_etapa("transformacao", linhas=len(df_saida))
+
+        escrever_xlsx_formatado(
+            df_saida,
+            output,
+            "Incorporacao Formatada",
+            formatos_colunas=col_indices_to_format,
+            larguras=larguras,
+        )
+
+        output.seek(0)
+        marcar_etapa("escrita", bytes_saida=output.getbuffer().nbytes)
+        print("(Incorp Reestruturado) Processamento concluído.")
+        return output
+
+    except ValueError as ve:  # Erros de validação (leitura, coluna não encontrada)
+        print(f"(Incorp Reestruturado) ERRO VALIDAÇÃO: {ve}")
+        # Garante que o stream seja fechado se criado antes do erro
+        if output:
+            output.close()
+        raise ve  # Re-lança para o Flask mostrar
+    except Exception as e:
+        print(f"(Incorp Reestruturado) ERRO INESPERADO: {e}")
+        traceback.print_exc()
+        if output:
+            output.close()
+        raise RuntimeError(
+            f"Erro inesperado no processamento do Formatador Incorporação: {e}"
+        ) from e
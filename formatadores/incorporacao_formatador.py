@@ -5,68 +5,22 @@ import io
 import re
 import traceback
 import openpyxl
-import unicodedata
 import numpy as np
 from openpyxl.utils import get_column_letter
-
-
-def normalize_text_for_match(text):
-    """Normaliza texto para busca: minúsculo, sem acentos, sem não-alfanuméricos."""
-    if not isinstance(text, str):
-        text = str(text)
-    try:
-        text = (
-            unicodedata.normalize("NFKD", text)
-            .encode("ASCII", "ignore")
-            .decode("ASCII")
-        )
-        text = text.lower()
-        text = re.sub(r"[^a-z0-9]", "", text)
-        return text.strip()
-    except Exception:
-        return str(text).lower().strip().replace(" ", "")
-
-
-def find_column_flexible(df_columns, concept_keywords, concept_name, required=True):
-    """Encontra coluna de forma flexível."""
-    normalized_input_cols = {normalize_text_for_match(col): col for col in df_columns}
-    print(
-        f"  Buscando '{concept_name}': Keywords={concept_keywords}. Colunas Norm.: {list(normalized_input_cols.keys())}"
-    )
-    found_col_name = None
-    for keyword in concept_keywords:
-        norm_keyword = normalize_text_for_match(keyword)
-        if norm_keyword in normalized_input_cols:
-            found_col_name = normalized_input_cols[norm_keyword]
-            print(
-                f"    -> Match exato norm. '{norm_keyword}' para '{concept_name}'. Col original: '{found_col_name}'"
-            )
-            return found_col_name
-    potential_matches = []
-    for keyword in concept_keywords:
-        norm_keyword = normalize_text_for_match(keyword)
-        if not norm_keyword:
-            continue
-        for norm_col, orig_col in normalized_input_cols.items():
-            if not norm_col:
-                continue
-            if norm_keyword in norm_col:
-                priority = 0 if norm_col.startswith(norm_keyword) else 1
-                potential_matches.append((priority, orig_col))
-    if potential_matches:
-        potential_matches.sort()
-        found_col_name = potential_matches[0][1]
-        print(
-            f"    -> Melhor match parcial para '{concept_name}'. Col original: '{found_col_name}'"
-        )
-        return found_col_name
-    if required:
-        raise ValueError(
-            f"Coluna obrigatória '{concept_name}' não encontrada. Keywords: {concept_keywords}. Colunas: {list(df_columns)}"
-        )
-    else:
-        print(f"    -> Coluna opcional '{concept_name}' não encontrada.")
-        return None
+from formatadores.colunas import resolver_colunas
+from formatadores.logs import obter_logger
+from formatadores.metricas import cronometrar, marcar_etapa
+from formatadores.normalizacao import (
+    normalizar_para_busca as normalize_text_for_match,
+    normalizar_para_busca_serie,
+)
+from formatadores.vetorizacao import (
+    extrair_primeiro_numero,
+    formatar_numero_dois_digitos,
+    verificar_vaga_serie,
+)
+
+logger = obter_logger(__name__)
 
 
 def format_decimal_br(value, precision):
@@ -155,69 +109,7 @@ def extract_and_format_number(value_str, default_if_error="XX"):
     return default_if_error
 
 
-def verificar_vaga(g, num_mode):
-    if pd.isna(g) or str(g).strip() == "":
-        return "01 VAGA"
-
-    if num_mode:
-        s = str(g).strip()
-        n = 0
-        if s:
-            # Check for multiple vagas separated by "e" or ","
-            for sep in [" e ", ","]:
-                if sep in s:
-                    n = len([v for v in s.split(sep) if v.strip()])
-                    break
-            else:
-                # If no separator, try to extract the first number from the string
-                match = re.search(r"(\d+)", s)
-                if match:
-                    try:
-                        n = int(match.group(1))
-                    except ValueError:
-                        n = 1  # Fallback if parsing fails
-                else:
-                    n = 1  # Fallback if no digits found at all
-
-        if n >= 4:
-            return "04 VAGAS"
-        elif n == 3:
-            return "03 VAGAS"
-        elif n == 2:
-            return "02 VAGAS"
-        else:  # Handles n=1, n=0, and any other case
-            return "01 VAGA"
-    else:  # "Smart" mode
-        try:
-            # Try to parse as a number. This handles "2", "2.0", "15.5", "15,5"
-            # It will fail for "2 VAGAS" or "1 e 2"
-            gn = float(str(g).replace(",", ".").strip())
-
-            # Check if it's likely an area (metragem) because it has decimals
-            if abs(gn - int(gn)) > 0.001:
-                if gn > 35:
-                    return "04 VAGAS"
-                elif gn > 25:
-                    return "03 VAGAS"
-                elif gn > 15:
-                    return "02 VAGAS"
-                else:
-                    return "01 VAGA"
-            else:
-                gi = int(gn)
-                if gi >= 4:
-                    return "04 VAGAS"
-                elif gi == 3:
-                    return "03 VAGAS"
-                elif gi == 2:
-                    return "02 VAGAS"
-                else:
-                    return "01 VAGA"
-        except (ValueError, TypeError):
-            # If it's not a number (e.g., "02 VAGAS", "01 e 02"), use the text-based logic (num_mode=True)
-            return verificar_vaga(g, True)
-
-
+@cronometrar("incorporacao")
 def processar_incorporacao_web(input_filepath_or_stream):
     """
     Processa planilha de incorporação.
@@ -234,6 +126,7 @@ def processar_incorporacao_web(input_filepath_or_stream):
         )
         if df_raw.empty:
             raise ValueError("Arquivo Excel está vazio.")
+        marcar_etapa("leitura", linhas=len(df_raw))
 
         header_row_index = -1
         possible_headers_data = [
@@ -267,8 +160,9 @@ def processar_incorporacao_web(input_filepath_or_stream):
         print(f"Valores do cabeçalho detectado: {df_columns.tolist()}")
 
         col_map = {}
+        # Todas opcionais aqui: TIPO/CASA/APT são exigidas depois, conforme o formato.
         concepts_to_find = {
-            "TIPO": (["tipo", "tipologia"], True),
+            "TIPO": (["tipo", "tipologia"], False),
             "CASA": (["casa"], False),
             "APT_UNID": (["apt", "apto", "apartamento", "unidade"], False),
             "BLOCO": (["bloco", "blk"], False),
@@ -282,15 +176,15 @@ def processar_incorporacao_web(input_filepath_or_stream):
         }
 
         print("--- Mapeando índices numéricos das colunas ---")
-        for concept, (keywords, required) in concepts_to_find.items():
-            col_name = find_column_flexible(
-                df_columns, keywords, concept, required=False
-            )
+        col_names, relatorio_colunas = resolver_colunas(df_columns, concepts_to_find)
+        for correspondencia in relatorio_colunas:
+            print(f"  {correspondencia}")
+        for concept, col_name in col_names.items():
             if col_name:
                 col_index = df_columns[df_columns == col_name].index[0]
                 col_map[concept] = col_index
-                print(
-                    f"    -> Mapeado '{concept}' para o índice de coluna: {col_index} (Nome: '{col_name}')"
+                logger.debug(
+                    "-> Mapeado '%s' para o índice de coluna: %s (Nome: '%s')", concept, col_index, col_name
                 )
             else:
                 col_map[concept] = None
@@ -326,256 +220,187 @@ def processar_incorporacao_web(input_filepath_or_stream):
                     "Colunas obrigatórias para o formato padrão ('TIPO' e 'CASA' ou 'APT') não encontradas."
                 )
         print("----------------------------")
+        marcar_etapa("colunas")
 
-        processed_data = []
-        ultimo_bloco_num_str = None
         header_saida_bloco_quadra = "BLOCO"
         final_header_casa_apt = "UNIDADE"
 
         print(
-            f"Iterando pelas linhas de dados a partir do índice {header_row_index + 1}..."
+            f"Processando as linhas de dados a partir do índice {header_row_index + 1} (por coluna)..."
         )
-        for idx in range(header_row_index + 1, len(df_raw)):
-            row = df_raw.iloc[idx].fillna("")
-
-            if is_composite_unit_format:
-                unit_id_final = ""
-
-                if composite_mode == "FULL":
-                    casa_val_str = str(row[col_map["CASA"]])
-                    if pd.isna(casa_val_str) or casa_val_str.strip() == "":
-                        continue
-                    bloco_val = str(row[col_map["BLOCO"]])
-                    quadra_val = str(row[col_map["QUADRA"]])
-                    quadra_num_fmt = extract_and_format_number(quadra_val)
-                    casa_num_fmt = extract_and_format_number(casa_val_str)
-                    if "us" in normalize_text_for_match(bloco_val):
-                        bloco_id_part = f"US{casa_num_fmt}"
-                    else:
-                        bloco_num_fmt = extract_and_format_number(bloco_val)
-                        bloco_id_part = f"BL{bloco_num_fmt}"
-                    unit_id_final = (
-                        f"{bloco_id_part}-QD{quadra_num_fmt}-CS{casa_num_fmt}"
-                    )
-
-                elif composite_mode == "QD_CS":
-                    q_idx = col_map["QUADRA"] if has_quadra else col_map["BLOCO"]
-                    c_idx = col_map["CASA"]
-                    q_val = str(row[q_idx])
-                    c_val = str(row[c_idx])
-                    if not q_val.strip() or not c_val.strip():
-                        continue
-                    unit_id_final = f"QD{extract_and_format_number(q_val)} - CASA {extract_and_format_number(c_val)}"
-
-                elif composite_mode == "BL_APT":
-                    b_idx = col_map["BLOCO"] if has_bloco else col_map["QUADRA"]
-                    a_idx = col_map["APT_UNID"]
-                    b_val = str(row[b_idx])
-                    a_val = str(row[a_idx])
-                    if not b_val.strip() or not a_val.strip():
-                        continue
-                    unit_id_final = f"BL{extract_and_format_number(b_val)} - APT {extract_and_format_number(a_val)}"
-
-                if not unit_id_final:
-                    continue
+        df_dados = df_raw.iloc[header_row_index + 1 :]
+        vazia = pd.Series("", index=df_dados.index, dtype=object)
+
+        def coluna_ou_vazia(concept):
+            col_idx = col_map.get(concept)
+            return df_dados[col_idx] if col_idx is not None else vazia
+
+        # LÓGICA DE VAGAS DE GARAGEM (VAGAS_QTD tem prioridade sobre a área da GARAGEM)
+        vagas_source = pd.Series(None, index=df_dados.index, dtype=object)
+        for concept in ("GARAGEM", "VAGAS_QTD"):
+            if col_map.get(concept) is not None:
+                valores = df_dados[col_map[concept]]
+                vagas_source = valores.where(valores.str.strip() != "", vagas_source)
+        vagas_final = verificar_vaga_serie(vagas_source)
+
+        colunas_dados = {
+            "ÁREA CONSTRUIDA": coluna_ou_vazia("ÁREA CONSTRUIDA"),
+            "QUINTAL": coluna_ou_vazia("QUINTAL"),
+            "GARAGEM": coluna_ou_vazia("GARAGEM"),
+            "VAGAS DE GARAGEM": vagas_final,
+            "ÁREA PRIVATIVA": coluna_ou_vazia("ÁREA PRIVATIVA"),
+            "FRAÇÃO IDEAL": coluna_ou_vazia("FRAÇÃO IDEAL"),
+            "ETAPA": "01",
+        }
 
-                tipo_val = format_tipo_with_leading_zero(row[col_map["TIPO"]])
-                area_const_val = (
-                    row[col_map["ÁREA CONSTRUIDA"]]
-                    if col_map.get("ÁREA CONSTRUIDA") is not None
-                    else ""
+        if is_composite_unit_format:
+            if composite_mode == "FULL":
+                casa_val = df_dados[col_map["CASA"]]
+                bloco_val = df_dados[col_map["BLOCO"]]
+                linhas_validas = casa_val.str.strip() != ""
+                quadra_num_fmt = formatar_numero_dois_digitos(
+                    extrair_primeiro_numero(df_dados[col_map["QUADRA"]]), padrao="XX"
                 )
-                quintal_val = (
-                    row[col_map["QUINTAL"]]
-                    if col_map.get("QUINTAL") is not None
-                    else ""
+                casa_num_fmt = formatar_numero_dois_digitos(
+                    extrair_primeiro_numero(casa_val), padrao="XX"
                 )
-                garagem_val = (
-                    row[col_map["GARAGEM"]]
-                    if col_map.get("GARAGEM") is not None
-                    else ""
+                bloco_num_fmt = formatar_numero_dois_digitos(
+                    extrair_primeiro_numero(bloco_val), padrao="XX"
                 )
-                area_priv_val = (
-                    row[col_map["ÁREA PRIVATIVA"]]
-                    if col_map.get("ÁREA PRIVATIVA") is not None
-                    else ""
+                bloco_id_part = ("BL" + bloco_num_fmt).mask(
+                    normalizar_para_busca_serie(bloco_val).str.contains(
+                        "us", regex=False
+                    ),
+                    "US" + casa_num_fmt,
                 )
-                fracao_val = (
-                    row[col_map["FRAÇÃO IDEAL"]]
-                    if col_map.get("FRAÇÃO IDEAL") is not None
-                    else ""
+                unit_id_final = (
+                    bloco_id_part + "-QD" + quadra_num_fmt + "-CS" + casa_num_fmt
                 )
 
-                # LÓGICA DE VAGAS DE GARAGEM
-                vagas_final_str = "01 VAGA"  # Padrão
-                vagas_qtd_idx = col_map.get("VAGAS_QTD")
-                garagem_area_idx = col_map.get("GARAGEM")
-
-                vagas_source_val = None
-                if (
-                    vagas_qtd_idx is not None
-                    and str(row.get(vagas_qtd_idx, "")).strip()
-                ):
-                    vagas_source_val = row[vagas_qtd_idx]
-                elif (
-                    garagem_area_idx is not None
-                    and str(row.get(garagem_area_idx, "")).strip()
-                ):
-                    vagas_source_val = row[garagem_area_idx]
-
-                if vagas_source_val is not None:
-                    vagas_final_str = verificar_vaga(vagas_source_val, num_mode=False)
-
-                processed_data.append(
-                    {
-                        "UNIDADE": unit_id_final,
-                        "TIPO": tipo_val,
-                        "ÁREA CONSTRUIDA": area_const_val,
-                        "QUINTAL": quintal_val,
-                        "GARAGEM": garagem_val,
-                        "VAGAS DE GARAGEM": vagas_final_str,
-                        "ÁREA PRIVATIVA": area_priv_val,
-                        "FRAÇÃO IDEAL": fracao_val,
-                        "ETAPA": "01",
-                    }
+            elif composite_mode == "QD_CS":
+                q_val = df_dados[col_map["QUADRA"] if has_quadra else col_map["BLOCO"]]
+                c_val = df_dados[col_map["CASA"]]
+                linhas_validas = (q_val.str.strip() != "") & (c_val.str.strip() != "")
+                unit_id_final = (
+                    "QD"
+                    + formatar_numero_dois_digitos(extrair_primeiro_numero(q_val), padrao="XX")
+                    + " - CASA "
+                    + formatar_numero_dois_digitos(extrair_primeiro_numero(c_val), padrao="XX")
                 )
-            else:
-                # Lógica de Fallback (sem alterações)
-                cell_val_a = str(row.iloc[0]).strip()
-                is_quadra_title = cell_val_a.lower().startswith("quadra")
-                is_bloco_title = cell_val_a.lower().startswith("bloco")
-
-                if is_quadra_title or is_bloco_title:
-                    header_saida_bloco_quadra = "QUADRA" if is_quadra_title else "BLOCO"
-                    ultimo_bloco_num_str = extract_and_format_number(cell_val_a, "??")
-                    print(
-                        f"  Linha {idx}: Título de Seção '{cell_val_a}'. Número = {ultimo_bloco_num_str}."
-                    )
-                    continue
 
-                casa_apt_col_idx = (
-                    col_map.get("CASA")
-                    if col_map.get("CASA") is not None
-                    else col_map.get("APT_UNID")
-                )
-                if (
-                    casa_apt_col_idx is None
-                    or pd.isna(row[casa_apt_col_idx])
-                    or str(row[casa_apt_col_idx]).strip() == ""
-                ):
-                    continue
-
-                bloco_quadra_col_idx = (
-                    col_map.get("BLOCO")
-                    if col_map.get("BLOCO") is not None
-                    else col_map.get("QUADRA")
+            elif composite_mode == "BL_APT":
+                b_val = df_dados[col_map["BLOCO"] if has_bloco else col_map["QUADRA"]]
+                a_val = df_dados[col_map["APT_UNID"]]
+                linhas_validas = (b_val.str.strip() != "") & (a_val.str.strip() != "")
+                unit_id_final = (
+                    "BL"
+                    + formatar_numero_dois_digitos(extrair_primeiro_numero(b_val), padrao="XX")
+                    + " - APT "
+                    + formatar_numero_dois_digitos(extrair_primeiro_numero(a_val), padrao="XX")
                 )
-                if (
-                    bloco_quadra_col_idx is not None
-                    and str(row[bloco_quadra_col_idx]).strip()
-                ):
-                    ultimo_bloco_num_str = extract_and_format_number(
-                        row[bloco_quadra_col_idx], "??"
-                    )
 
-                if ultimo_bloco_num_str is None:
-                    continue
-
-                tipo_val_original = str(row[col_map["TIPO"]])
-                casa_apt_val_original = str(row[casa_apt_col_idx]).strip()
-                formatted_tipo_output_val = format_tipo_with_leading_zero(
-                    tipo_val_original
+            df_final = pd.DataFrame(
+                {
+                    "UNIDADE": unit_id_final,
+                    "TIPO": df_dados[col_map["TIPO"]].map(format_tipo_with_leading_zero),
+                    **colunas_dados,
+                }
+            )
+        else:
+            # Lógica de Fallback: títulos de seção 'QUADRA'/'BLOCO' na primeira coluna
+            cell_val_a = df_dados[0].str.strip()
+            is_quadra_title = cell_val_a.str.lower().str.startswith("quadra")
+            is_bloco_title = cell_val_a.str.lower().str.startswith("bloco")
+            is_section_title = is_quadra_title | is_bloco_title
+
+            casa_apt_col_idx = (
+                col_map.get("CASA")
+                if col_map.get("CASA") is not None
+                else col_map.get("APT_UNID")
+            )
+            casa_apt_val_original = df_dados[casa_apt_col_idx].str.strip()
+            linhas_validas = ~is_section_title & (casa_apt_val_original != "")
+
+            # Contexto (número do bloco/quadra) vem do último título de seção ou,
+            # se houver coluna BLOCO/QUADRA preenchida, da própria linha de dados
+            contexto_bloco = pd.Series(None, index=df_dados.index, dtype=object)
+            contexto_bloco[is_section_title] = formatar_numero_dois_digitos(
+                extrair_primeiro_numero(cell_val_a[is_section_title]), padrao="??"
+            )
+            bloco_quadra_col_idx = (
+                col_map.get("BLOCO")
+                if col_map.get("BLOCO") is not None
+                else col_map.get("QUADRA")
+            )
+            if bloco_quadra_col_idx is not None:
+                bloco_quadra_val = df_dados[bloco_quadra_col_idx]
+                tem_bloco_na_linha = linhas_validas & (bloco_quadra_val.str.strip() != "")
+                contexto_bloco[tem_bloco_na_linha] = formatar_numero_dois_digitos(
+                    extrair_primeiro_numero(bloco_quadra_val[tem_bloco_na_linha]),
+                    padrao="??",
                 )
-
-                is_special_unit = (
-                    "pcd" in normalize_text_for_match(tipo_val_original)
-                    or "pne" in normalize_text_for_match(tipo_val_original)
-                    or "pcd" in normalize_text_for_match(casa_apt_val_original)
-                    or "pne" in normalize_text_for_match(casa_apt_val_original)
+            contexto_bloco = contexto_bloco.ffill()
+            linhas_validas &= contexto_bloco.notna()
+
+            # Nome da coluna de saída (QUADRA/BLOCO) segue o último título de seção visto
+            header_por_linha = pd.Series(None, index=df_dados.index, dtype=object)
+            header_por_linha[is_bloco_title] = "BLOCO"
+            header_por_linha[is_quadra_title] = "QUADRA"
+            header_por_linha = header_por_linha.ffill().fillna("BLOCO")
+            for idx in df_dados.index[is_section_title]:
+                logger.debug(
+                    "Linha %s: Título de Seção '%s'. Número = %s.", idx, cell_val_a[idx], contexto_bloco[idx]
                 )
+            if not header_por_linha.empty:
+                header_saida_bloco_quadra = header_por_linha.iloc[-1]
+
+            tipo_val_original = df_dados[col_map["TIPO"]]
+            tipo_norm = normalizar_para_busca_serie(tipo_val_original)
+            casa_apt_norm = normalizar_para_busca_serie(casa_apt_val_original)
+            is_special_unit = (
+                tipo_norm.str.contains("pcd", regex=False)
+                | tipo_norm.str.contains("pne", regex=False)
+                | casa_apt_norm.str.contains("pcd", regex=False)
+                | casa_apt_norm.str.contains("pne", regex=False)
+            )
+            unit_number_part = formatar_numero_dois_digitos(
+                extrair_primeiro_numero(casa_apt_val_original)
+            ).fillna(casa_apt_val_original)
+            formatted_unit_number_with_pcd = unit_number_part.mask(
+                is_special_unit, unit_number_part + " (PCD)"
+            )
 
-                unit_number_part = extract_and_format_number(
-                    casa_apt_val_original, casa_apt_val_original
-                )
-                formatted_unit_number_with_pcd = (
-                    f"{unit_number_part} (PCD)" if is_special_unit else unit_number_part
-                )
+            norm_header = normalize_text_for_match(str(df_columns[casa_apt_col_idx]))
+            if "casa" in norm_header:
+                final_header_casa_apt = "CASA"
+            elif "apt" in norm_header or "apartamento" in norm_header:
+                final_header_casa_apt = "APT"
+            else:
+                final_header_casa_apt = "UNIDADE"
 
-                header_casa_apt_orig_val = df_columns[casa_apt_col_idx]
-                norm_header = normalize_text_for_match(str(header_casa_apt_orig_val))
-                if "casa" in norm_header:
-                    final_header_casa_apt = "CASA"
-                elif "apt" in norm_header or "apartamento" in norm_header:
-                    final_header_casa_apt = "APT"
-                else:
-                    final_header_casa_apt = "UNIDADE"
-
-                area_const_val = (
-                    row[col_map["ÁREA CONSTRUIDA"]]
-                    if col_map.get("ÁREA CONSTRUIDA") is not None
-                    else ""
-                )
-                quintal_val = (
-                    row[col_map["QUINTAL"]]
-                    if col_map.get("QUINTAL") is not None
-                    else ""
-                )
-                garagem_val = (
-                    row[col_map["GARAGEM"]]
-                    if col_map.get("GARAGEM") is not None
-                    else ""
-                )
-                area_priv_val = (
-                    row[col_map["ÁREA PRIVATIVA"]]
-                    if col_map.get("ÁREA PRIVATIVA") is not None
-                    else ""
-                )
-                fracao_val = (
-                    row[col_map["FRAÇÃO IDEAL"]]
-                    if col_map.get("FRAÇÃO IDEAL") is not None
-                    else ""
-                )
+            # A coluna de bloco/quadra de cada linha usa o nome do título vigente;
+            # se houver os dois tipos de título, o segundo nome vira coluna extra.
+            headers_usados = header_por_linha[linhas_validas].unique().tolist()
+            colunas_bloco = {
+                h: contexto_bloco.where(header_por_linha == h) for h in headers_usados
+            }
+            primeiro_header = headers_usados[0] if headers_usados else header_saida_bloco_quadra
+            df_final = pd.DataFrame(
+                {
+                    primeiro_header: colunas_bloco.get(primeiro_header, contexto_bloco),
+                    "TIPO": tipo_val_original.map(format_tipo_with_leading_zero),
+                    final_header_casa_apt: formatted_unit_number_with_pcd,
+                    **colunas_dados,
+                    **{h: c for h, c in colunas_bloco.items() if h != primeiro_header},
+                }
+            )
 
-                # LÓGICA DE VAGAS DE GARAGEM
-                vagas_final_str = "01 VAGA"  # Padrão
-                vagas_qtd_idx = col_map.get("VAGAS_QTD")
-                garagem_area_idx = col_map.get("GARAGEM")
-
-                vagas_source_val = None
-                if (
-                    vagas_qtd_idx is not None
-                    and str(row.get(vagas_qtd_idx, "")).strip()
-                ):
-                    vagas_source_val = row[vagas_qtd_idx]
-                elif (
-                    garagem_area_idx is not None
-                    and str(row.get(garagem_area_idx, "")).strip()
-                ):
-                    vagas_source_val = row[garagem_area_idx]
-
-                if vagas_source_val is not None:
-                    vagas_final_str = verificar_vaga(vagas_source_val, num_mode=False)
-
-                processed_data.append(
-                    {
-                        header_saida_bloco_quadra: ultimo_bloco_num_str,
-                        "TIPO": formatted_tipo_output_val,
-                        final_header_casa_apt: formatted_unit_number_with_pcd,
-                        "ÁREA CONSTRUIDA": area_const_val,
-                        "QUINTAL": quintal_val,
-                        "GARAGEM": garagem_val,
-                        "VAGAS DE GARAGEM": vagas_final_str,
-                        "ÁREA PRIVATIVA": area_priv_val,
-                        "FRAÇÃO IDEAL": fracao_val,
-                        "ETAPA": "01",
-                    }
-                )
+        df_final = df_final[linhas_validas].reset_index(drop=True)
 
         # O restante do código (DataFrame, formatação, Excel) não precisa de alterações
-        print(f"Iteração concluída. {len(processed_data)} linhas de dados extraídas.")
-        if not processed_data:
+        print(f"Processamento concluído. {len(df_final)} linhas de dados extraídas.")
+        if df_final.empty:
             raise ValueError("Nenhum dado válido extraído.")
-        df_final = pd.DataFrame(processed_data)
         print("--- Formatando Colunas Numéricas ---")
         cols_to_format_final = {
             "ÁREA CONSTRUIDA": 2,
@@ -619,6 +444,7 @@ def processar_incorporacao_web(input_filepath_or_stream):
                 colunas_finais_real.append(col)
         df_final = df_final[colunas_finais_real]
         print(f"Ordem final das colunas: {df_final.columns.tolist()}")
+        marcar_etapa("transformacao", linhas=len(df_final))
         print("Gerando arquivo Excel e aplicando conversão/formatação numérica...")
         output = io.BytesIO()
         with pd.ExcelWriter(output, engine="openpyxl") as writer:
@@ -675,6 +501,7 @@ def processar_incorporacao_web(input_filepath_or_stream):
                     )
                     worksheet.column_dimensions[column_letter].width = 15
         output.seek(0)
+        marcar_etapa("escrita", bytes_saida=output.getbuffer().nbytes)
         print("(Formatador Incorporação - v12.5) Arquivo Excel processado gerado.")
         return output
 
@@ -0,0 +1,113 @@
+# formatadores/logs.py
+"""
+Logs dos formatadores (e dos servicos do app web): um logger por módulo
+(obter_logger(__name__)), nível global por FORMATADORES_LOG_NIVEL (padrão
+INFO) e avisos repetitivos agregados.
+
+Avisos por linha/valor (avisar()) dentro de agrupar_avisos() só são
+contados; ao sair do bloco sai uma linha por aviso, com o total e alguns
+exemplos ("137 linhas sem valor de Casa/Apto (ex.: 3, 7, 12)"). Com nível
+DEBUG cada ocorrência também é registrada. A saída vai para o sys.stdout
+do momento, junto com os print() das ferramentas (e some com eles quando o
+CLI ou o modo de múltiplos arquivos redirecionam stdout).
+"""
+
+import contextlib
+import contextvars
+import logging
+import os
+import sys
+
+EXEMPLOS_POR_AVISO = 5
+
+_avisos = contextvars.ContextVar("avisos_agrupados", default=None)
+_configurados = set()
+
+
+class _HandlerStdoutAtual(logging.StreamHandler):
+    """StreamHandler que sempre escreve no sys.stdout atual (respeita redirect_stdout)."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, valor):
+        pass
+
+
+def _configurar(pacote):
+    if pacote in _configurados:
+        return
+    _configurados.add(pacote)
+    raiz = logging.getLogger(pacote)
+    nivel = os.environ.get("FORMATADORES_LOG_NIVEL", "INFO").upper()
+    raiz.setLevel(getattr(logging, nivel, logging.INFO))
+    handler = _HandlerStdoutAtual()
+    handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+    raiz.addHandler(handler)
+    raiz.propagate = False
+
+
+def obter_logger(nome):
+    """
+    Logger do módulo (use __name__); na primeira chamada de cada pacote
+    ('formatadores', 'servicos'...) configura o logger do pacote.
+    """
+    _configurar(nome.split(".")[0])
+    return logging.getLogger(nome)
+
+
+def avisar(logger, mensagem, *args, exemplo=None):
+    """
+    Aviso que pode se repetir a cada linha. mensagem usa formatação %
+    (avaliada só ao emitir) e descreve as ocorrências no plural, pois dentro
+    de agrupar_avisos() o total vai na frente. exemplo identifica a
+    ocorrência (linha, valor...). Fora de agrupar_avisos() é um
+    logger.warning comum.
+    """
+    agrupados = _avisos.get()
+    if agrupados is None:
+        if exemplo is None:
+            logger.warning(mensagem, *args)
+        else:
+            logger.warning(mensagem + " (%s)", *args, exemplo)
+        return
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(mensagem + " (%s)", *args, exemplo)
+    chave = (logger.name, mensagem, args)
+    item = agrupados.get(chave)
+    if item is None:
+        item = agrupados[chave] = [0, []]
+    item[0] += 1
+    if exemplo is not None and len(item[1]) < EXEMPLOS_POR_AVISO:
+        item[1].append(exemplo)
+
+
+def _emitir(agrupados):
+    for (nome, mensagem, args), (total, exemplos) in agrupados.items():
+        logger = logging.getLogger(nome)
+        if exemplos:
+            mais = ", ..." if total > len(exemplos) else ""
+            logger.warning("%d " + mensagem + " (ex.: %s%s)", total, *args,
+                           ", ".join(map(str, exemplos)), mais)
+        else:
+            logger.warning("%d " + mensagem, total, *args)
+
+
+@contextlib.contextmanager
+def agrupar_avisos():
+    """
+    Bloco (ou decorator, @agrupar_avisos()) em que avisar() só conta; os
+    totais são emitidos ao sair, mesmo se o bloco terminar em exceção.
+    """
+    agrupados = {}
+    token = _avisos.set(agrupados)
+    try:
+        yield agrupados
+    finally:
+        _avisos.reset(token)
+        _emitir(agrupados)
@@ -0,0 +1,322 @@
+# formatadores/lote_formatador.py
+
+import io
+import re
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from formatadores.logs import agrupar_avisos, avisar, obter_logger
+from formatadores.metricas import cronometrar, marcar_etapa
+from formatadores.vetorizacao import mapear_valores_unicos
+
+logger = obter_logger(__name__)
+
+
+# --- Funções Auxiliares Formatador Lote ---
+def add_lt_prefix_if_needed_fmt_lote(v_str):
+    if not isinstance(v_str, str):
+        v_str = str(v_str)
+    cleaned_value = v_str.strip()  # Corrigido para usar cleaned_value
+    if not cleaned_value:
+        return ""
+    if cleaned_value.isdigit():
+        return f"LT {cleaned_value}"
+    elif cleaned_value.lower().startswith("lt"):
+        if len(cleaned_value) > 2 and cleaned_value[2].isspace():
+            return cleaned_value
+        elif len(cleaned_value) > 2 and cleaned_value[2].isdigit():
+            return f"{cleaned_value[:2]} {cleaned_value[2:].strip()}"
+        else:
+            return cleaned_value
+    else:
+        return cleaned_value
+
+
+def format_measurement_fmt_lote(value_str, unit="m"):
+    if not isinstance(value_str, str):
+        value_str = str(value_str)
+    cleaned_orig = value_str.strip()  # Corrigido para usar cleaned_orig
+    cleaned_float_attempt = (
+        cleaned_orig.lower()
+        .replace("m²", "")
+        .replace("m2", "")
+        .replace("m", "")
+        .strip()
+    )
+    if not cleaned_float_attempt:
+        return "N/A"
+    try:
+        numeric = float(cleaned_float_attempt.replace(",", "."))
+        formatted = f"{numeric:.2f}".replace(".", ",")
+        return f"{formatted}{unit}"
+    except (ValueError, TypeError):
+        avisar(logger, "medidas não convertidas; mantido o original (Fmt Lote)",
+               exemplo=repr(cleaned_orig))
+        if cleaned_orig.lower().endswith(unit.lower()):
+            return cleaned_orig
+        else:
+            return f"{cleaned_orig}{unit}"  # Adiciona unidade se não tinha
+
+
+def get_numeric_area_fmt_lote(a_str):
+    if not isinstance(a_str, str):
+        a_str = str(a_str)
+    clean = (
+        a_str.strip()
+        .lower()
+        .replace("m²", "")
+        .replace("m2", "")
+        .replace("m", "")
+        .strip()
+    )
+    if not clean:
+        return 0.0
+    try:
+        return float(clean.replace(",", "."))
+    except:
+        avisar(logger, "áreas não numéricas tratadas como 0.0 (Fmt Lote)", exemplo=repr(a_str))
+        return 0.0
+
+
+def mapear_cabecalho_fmt_lote(cabecalho, cols_esp):
+    """Mapa conceito -> nome da coluna no cabeçalho 'lote' de uma quadra."""
+    map_hdr_rev = {}
+    fundo_map = {}
+    for i, hdr in enumerate(cabecalho):
+        hl = hdr.lower()
+        for el, ek in cols_esp.items():
+            if (
+                hl == el
+                or (el == "lat. direita(n" and hl == "lat. direita(m)")
+                or (el == "lat. direita(m)" and hl == "lat. direita(n)")
+            ):
+                if hl == "fundo":
+                    if ek == "FUNDO_M":
+                        fundo_map["FUNDO_M"] = hdr
+                    elif ek == "FUNDO_DESC_CONFRONTANTE":
+                        fundo_map["FUNDO_DESC_CONFRONTANTE"] = hdr
+                else:
+                    map_hdr_rev[ek] = hdr
+                    break
+    if fundo_map.get("FUNDO_M") == fundo_map.get("FUNDO_DESC_CONFRONTANTE"):
+        if "FUNDO_DESC_CONFRONTANTE" in fundo_map:
+            map_hdr_rev["FUNDO_DESC_CONFRONTANTE"] = fundo_map["FUNDO_DESC_CONFRONTANTE"]
+    else:
+        if "FUNDO_M" in fundo_map:
+            map_hdr_rev["FUNDO_M"] = fundo_map["FUNDO_M"]
+        if "FUNDO_DESC_CONFRONTANTE" in fundo_map:
+            map_hdr_rev["FUNDO_DESC_CONFRONTANTE"] = fundo_map["FUNDO_DESC_CONFRONTANTE"]
+    return map_hdr_rev
+
+
+def montar_segmento_fmt_lote(
+    linhas, cabecalho, quadra_vals, map_hdr_rev, cols_medida, cols_lt
+):
+    """
+    Monta as linhas de dados de um mesmo cabeçalho de uma vez (equivale a
+    dict(zip(cabecalho, linha)) por linha: em nomes repetidos vale a última
+    coluna). Medidas e prefixos LT são formatados por coluna, avaliando só
+    os valores únicos; CONFRONTANTES é montado com máscaras.
+    """
+    ultima_coluna = {h: i for i, h in enumerate(cabecalho)}
+    seg = pd.DataFrame(
+        {h: linhas.iloc[:, i].to_numpy() for h, i in ultima_coluna.items()},
+        index=linhas.index,
+    )
+    seg["QUADRA"] = quadra_vals
+    a_col = map_hdr_rev.get("AREA_M2")
+    seg["_area_numerica"] = (
+        mapear_valores_unicos(seg[a_col], get_numeric_area_fmt_lote).astype(float)
+        if a_col
+        else get_numeric_area_fmt_lote("")
+    )
+    for ek, u in cols_medida.items():
+        cr = map_hdr_rev.get(ek)
+        if cr and cr in seg:
+            seg[cr] = mapear_valores_unicos(
+                seg[cr], lambda v: format_measurement_fmt_lote(v, u)
+            )
+    for ek in cols_lt:
+        cr = map_hdr_rev.get(ek)
+        if cr and cr in seg:
+            seg[cr] = mapear_valores_unicos(seg[cr], add_lt_prefix_if_needed_fmt_lote)
+
+    confrontantes = pd.Series("", index=seg.index, dtype=object)
+    lados = [
+        ("Frente", "TESTADA_M", "FRENTE_DESC"),
+        ("Fundo", "FUNDO_M", "FUNDO_DESC_CONFRONTANTE"),
+        ("Lado Direito", "LAT_DIREITA_M", "DIREITA_DESC"),
+        ("Lado Esquerdo", "LAT_ESQUERDA_M", "ESQUERDA_DESC"),
+    ]
+    for rotulo, ek_medida, ek_desc in lados:
+        col_medida, col_desc = map_hdr_rev.get(ek_medida), map_hdr_rev.get(ek_desc)
+        if not (col_medida and col_desc):
+            continue
+        medida = seg[col_medida]
+        desc = seg[col_desc].str.strip() if ek_desc == "FRENTE_DESC" else seg[col_desc]
+        inclui = (medida != "N/A") & (desc != "") & (desc != "-")
+        parte = rotulo + ": " + medida + " - Confrontante: " + desc
+        confrontantes = confrontantes.mask(
+            inclui,
+            np.where(confrontantes == "", parte, confrontantes + " <br>" + parte),
+        )
+    seg["CONFRONTANTES"] = confrontantes
+    return seg
+
+
+@cronometrar("formatador_lote")
+@agrupar_avisos()
+def processar_formatador_lote_web(input_filepath):
+    print(f"(Fmt Lote) Processando: {input_filepath}")
+    try:
+        df_raw = pd.read_excel(
+            input_filepath, header=None, engine="openpyxl", dtype=str
+        )
+        df_raw.fillna("", inplace=True)
+        marcar_etapa("leitura", linhas=len(df_raw))
+        cols_esp = {
+            "lote": "LOTE",
+            "tipo": "TIPO",
+            "área(m²)": "AREA_M2",
+            "testada(m)": "TESTADA_M",
+            "fundo(m)": "FUNDO_M",
+            "lat. direita(n": "LAT_DIREITA_M",
+            "lat. direita(m)": "LAT_DIREITA_M",
+            "lat. esquerda(m)": "LAT_ESQUERDA_M",
+            "frente": "FRENTE_DESC",
+            "fundo": "FUNDO_DESC_CONFRONTANTE",
+            "direita": "DIREITA_DESC",
+            "esquerda": "ESQUERDA_DESC",
+        }
+        cols_medida = {
+            "AREA_M2": "m²",
+            "TESTADA_M": "m",
+            "FUNDO_M": "m",
+            "LAT_DIREITA_M": "m",
+            "LAT_ESQUERDA_M": "m",
+        }
+        cols_lt = ["LOTE", "FUNDO_DESC_CONFRONTANTE", "DIREITA_DESC", "ESQUERDA_DESC"]
+        if df_raw.empty:
+            raise ValueError("Nenhum dado de lote encontrado.")
+
+        # 1. Classificação das linhas por máscaras (mesma máquina de estados
+        #    da varredura linha a linha: QUADRA/BLOCO -> cabeçalho 'lote' -> dados)
+        print("(Fmt Lote) Varrendo...")
+        cel1 = df_raw[0].str.strip()
+        cel1_lower = cel1.str.lower()
+        is_titulo = cel1_lower.str.startswith(("quadra", "bloco"))
+        id_quadra = is_titulo.cumsum()
+        is_lote = (cel1_lower == "lote") & (id_quadra > 0)
+        # Só o primeiro 'lote' depois do título vira cabeçalho; os seguintes são ignorados
+        is_cabecalho = is_lote & (is_lote.astype(int).groupby(id_quadra).cumsum() == 1)
+        apos_cabecalho = is_cabecalho.astype(int).groupby(id_quadra).cumsum() > 0
+        preenchida = np.logical_or.reduce(
+            [df_raw[c].str.strip() != "" for c in df_raw.columns]
+        )
+        is_dados = apos_cabecalho & ~is_lote & preenchida
+        is_antes_cabecalho = (id_quadra > 0) & ~is_titulo & ~apos_cabecalho & preenchida
+
+        # 2. Valor da QUADRA de cada segmento (id_quadra 0 = antes do primeiro título)
+        q_val_por_quadra = [None]
+        for idx in df_raw.index[is_titulo]:
+            q_atual = cel1[idx]
+            m = re.search(r"\d+", q_atual)
+            try:
+                q_val_num = int(m.group(0)) if m else q_atual
+            except:
+                q_val_num = q_atual
+            logger.debug("L%d: QUADRA/BLOCO '%s' (Val:%s)", idx + 1, q_atual, q_val_num)
+            q_val_por_quadra.append(q_val_num)
+        for idx in df_raw.index[is_antes_cabecalho]:
+            avisar(logger, "linhas ignoradas antes do header (Fmt Lote)",
+                   exemplo=f"L{idx + 1} '{cel1[idx]}'")
+
+        quadra_por_linha = pd.Series(
+            np.array(q_val_por_quadra, dtype=object)[id_quadra], index=df_raw.index
+        )
+
+        # 3. Cabeçalhos: mapeados uma vez por cabeçalho distinto
+        cabecalhos_unicos = {}  # cabeçalho -> (id, mapa)
+        id_cabecalho_por_quadra = {}
+        for idx in df_raw.index[is_cabecalho]:
+            cabecalho = tuple(h.strip() for h in df_raw.loc[idx])
+            logger.debug("L%d: HEADER %s", idx + 1, cabecalho)
+            if cabecalho not in cabecalhos_unicos:
+                cabecalhos_unicos[cabecalho] = (
+                    len(cabecalhos_unicos),
+                    mapear_cabecalho_fmt_lote(cabecalho, cols_esp),
+                )
+            logger.debug("Mapa Hdr Rev: %s", cabecalhos_unicos[cabecalho][1])
+            id_cabecalho_por_quadra[id_quadra[idx]] = cabecalhos_unicos[cabecalho][0]
+        cabecalho_por_id = {i: c for c, (i, _) in cabecalhos_unicos.items()}
+        marcar_etapa("colunas")
+
+        # 4. Dados: formatação em bloco por cabeçalho distinto
+        dados = df_raw[is_dados]
+        id_cabecalho = id_quadra[is_dados].map(id_cabecalho_por_quadra)
+        segmentos = []
+        for id_cab, linhas in dados.groupby(id_cabecalho, sort=False):
+            cabecalho = cabecalho_por_id[id_cab]
+            segmentos.append(
+                montar_segmento_fmt_lote(
+                    linhas,
+                    list(cabecalho),
+                    quadra_por_linha[linhas.index].to_numpy(),
+                    cabecalhos_unicos[cabecalho][1],
+                    cols_medida,
+                    cols_lt,
+                )
+            )
+        print(f"(Fmt Lote) Varredura FIM. {len(dados)} linhas.")
+        if not segmentos:
+            raise ValueError("Nenhum dado de lote encontrado.")
+        df_final = pd.concat(segmentos).sort_index(kind="stable")
+        df_final = df_final.reset_index(drop=True)
+        # Como na varredura, a reordenação usa o cabeçalho da última quadra
+        id_ultimo = id_cabecalho_por_quadra.get(id_quadra.iloc[-1])
+        cabecalho = list(cabecalho_por_id[id_ultimo]) if id_ultimo is not None else None
+        df_final["ETAPA"] = 1
+        total_a = df_final["_area_numerica"].sum()
+        if total_a > 0:
+            fracao_calculada = df_final["_area_numerica"] / total_a
+            df_final["FRAÇÃO IDEAL"] = fracao_calculada.round(6)
+        else:
+            df_final["FRAÇÃO IDEAL"] = 0.0
+        df_final = df_final.drop(columns=["_area_numerica"])
+        if cabecalho:
+            orig_ord = [
+                h
+                for h in cabecalho
+                if h in df_final.columns
+                and h not in ["QUADRA", "ETAPA", "CONFRONTANTES", "FRAÇÃO IDEAL"]
+            ]
+            final_ord = (
+                ["QUADRA", "ETAPA"] + orig_ord + ["FRAÇÃO IDEAL", "CONFRONTANTES"]
+            )
+            final_ex = [c for c in final_ord if c in df_final.columns]
+            df_final = df_final[final_ex]
+        else:
+            print("(Fmt Lote) Warn: Header não detectado, não reordenado.")
+        for c in ["QUADRA", "ETAPA"]:
+            if c in df_final.columns:
+                df_final[c] = pd.to_numeric(df_final[c], errors="coerce").astype(
+                    "Int64"
+                )
+        if "FRAÇÃO IDEAL" in df_final.columns:
+            df_final["FRAÇÃO IDEAL"] = pd.to_numeric(
+                df_final["FRAÇÃO IDEAL"], errors="coerce"
+            )
+        print("(Fmt Lote) DF final pronto.")
+        marcar_etapa("transformacao", linhas=len(df_final))
+        output = io.BytesIO()
+        df_final.to_excel(output, index=False, header=True, engine="openpyxl")
+        output.seek(0)
+        marcar_etapa("escrita", bytes_saida=output.getbuffer().nbytes)
+        print("(Fmt Lote) Excel em memória.")
+        return output
+    except Exception as e:
+        print(f"(Fmt Lote) ERRO GERAL: {e}")
+        traceback.print_exc()
+        raise e
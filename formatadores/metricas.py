@@ -0,0 +1,345 @@
+# formatadores/metricas.py
+"""
+Tempo por etapa dos processamentos (leitura, colunas, transformação, API,
+escrita), com linhas e bytes de entrada/saída.
+
+- @cronometrar("ferramenta") mede a função processar_* inteira;
+- marcar_etapa("leitura", linhas=...) fecha uma etapa dentro dela: o tempo
+  desde a marca anterior (ou do início da função) vira "ferramenta.leitura";
+- with etapa("api"): mede um bloco avulso (ex.: cada chamada à API); o
+  tempo dele também conta na marca que o contém.
+
+Cada medição vai para o registro do processo (contadores e histogramas,
+exportados em texto Prometheus por texto_prometheus()) e, se houver uma
+coleta ativa (coletar_etapas(), por requisição ou por job), para a lista
+dessa coleta, de onde sai o cabeçalho X-Stage-Timings.
+"""
+
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+import time
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_coleta = contextvars.ContextVar("coleta_etapas", default=None)
+_medicao = contextvars.ContextVar("medicao_etapas", default=None)
+
+
+# --- Registro do processo (contadores e histogramas) ---
+class _Registro:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores = {}  # (métrica, labels) -> valor
+        self._histogramas = {}  # (métrica, labels) -> [contagens por bucket, soma, total]
+
+    def somar(self, metrica, labels, valor=1):
+        chave = (metrica, labels)
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, metrica, labels, segundos):
+        chave = (metrica, labels)
+        with self._lock:
+            hist = self._histogramas.get(chave)
+            if hist is None:
+                hist = self._histogramas[chave] = [[0] * len(BUCKETS_SEGUNDOS), 0.0, 0]
+            for i, limite in enumerate(BUCKETS_SEGUNDOS):
+                if segundos <= limite:
+                    hist[0][i] += 1
+            hist[1] += segundos
+            hist[2] += 1
+
+    def copia(self):
+        with self._lock:
+            contadores = dict(self._contadores)
+            histogramas = {k: (list(v[0]), v[1], v[2]) for k, v in self._histogramas.items()}
+        return contadores, histogramas
+
+    def limpar(self):
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+
+_registro = _Registro()
+
+# Nome -> (tipo, ajuda), na ordem em que aparecem em /metrics
+METRICAS = {
+    "formatadores_etapa_duracao_segundos": ("histogram", "Duração de cada etapa do processamento."),
+    "formatadores_etapa_execucoes_total": ("counter", "Execuções de cada etapa."),
+    "formatadores_etapa_erros_total": ("counter", "Execuções de cada etapa que terminaram em exceção."),
+    "formatadores_etapa_linhas_total": ("counter", "Linhas processadas por etapa."),
+    "formatadores_etapa_bytes_entrada_total": ("counter", "Bytes lidos por etapa."),
+    "formatadores_etapa_bytes_saida_total": ("counter", "Bytes gerados por etapa."),
+    "http_requisicao_duracao_segundos": ("histogram", "Duração das requisições HTTP por endpoint."),
+    "http_requisicoes_total": ("counter", "Requisições HTTP por endpoint, método e status."),
+    "http_requisicao_bytes_entrada_total": ("counter", "Bytes recebidos (corpo da requisição) por endpoint."),
+    "http_resposta_bytes_saida_total": ("counter", "Bytes enviados (corpo da resposta) por endpoint."),
+}
+
+
+def registrar_etapas(etapas):
+    """
+    Soma medições (dicts de etapa) ao registro do processo e à coleta
+    ativa. Usado para as medições que voltam dos processos do pool.
+    """
+    for medida in etapas:
+        _registrar(medida)
+
+
+def _registrar(medida):
+    labels = (("etapa", medida["etapa"]),)
+    _registro.observar("formatadores_etapa_duracao_segundos", labels, medida["segundos"])
+    _registro.somar("formatadores_etapa_execucoes_total", labels)
+    if medida.get("erro"):
+        _registro.somar("formatadores_etapa_erros_total", labels)
+    for campo in ("linhas", "bytes_entrada", "bytes_saida"):
+        if medida.get(campo) is not None:
+            _registro.somar(f"formatadores_etapa_{campo}_total", labels, medida[campo])
+    coleta = _coleta.get()
+    if coleta is not None:
+        coleta.append(medida)
+
+
+def registrar_requisicao(endpoint, metodo, status, segundos, bytes_entrada=None, bytes_saida=None):
+    labels = (("endpoint", endpoint),)
+    _registro.observar("http_requisicao_duracao_segundos", labels, segundos)
+    _registro.somar("http_requisicoes_total", labels + (("metodo", metodo), ("status", str(status))))
+    if bytes_entrada:
+        _registro.somar("http_requisicao_bytes_entrada_total", labels, bytes_entrada)
+    if bytes_saida:
+        _registro.somar("http_resposta_bytes_saida_total", labels, bytes_saida)
+
+
+def limpar_registro():
+    _registro.limpar()
+
+
+# --- Coleta (por requisição ou por job) ---
+def iniciar_coleta():
+    """Começa a guardar as medições do contexto atual; retorna (token, lista)."""
+    etapas = []
+    return _coleta.set(etapas), etapas
+
+
+def encerrar_coleta(token):
+    _coleta.reset(token)
+
+
+@contextlib.contextmanager
+def coletar_etapas():
+    """with coletar_etapas() as etapas: ... -> lista das medições feitas no bloco."""
+    token, etapas = iniciar_coleta()
+    try:
+        yield etapas
+    finally:
+        encerrar_coleta(token)
+
+
+def resumir_etapas(etapas):
+    """Agrega as medições por nome de etapa, na ordem da primeira ocorrência."""
+    resumo = {}
+    for medida in etapas:
+        item = resumo.setdefault(
+            medida["etapa"],
+            {"etapa": medida["etapa"], "segundos": 0.0, "execucoes": 0,
+             "linhas": None, "bytes_entrada": None, "bytes_saida": None},
+        )
+        item["segundos"] += medida["segundos"]
+        item["execucoes"] += 1
+        for campo in ("linhas", "bytes_entrada", "bytes_saida"):
+            if medida.get(campo) is not None:
+                item[campo] = (item[campo] or 0) + medida[campo]
+    return list(resumo.values())
+
+
+def cabecalho_etapas(etapas):
+    """Valor do X-Stage-Timings: "etapa;dur=ms[;n=..][;linhas=..][;bytes_entrada=..][;bytes_saida=..], ..."."""
+    partes = []
+    for item in resumir_etapas(etapas):
+        campos = [item["etapa"], f"dur={item['segundos'] * 1000:.1f}"]
+        if item["execucoes"] > 1:
+            campos.append(f"n={item['execucoes']}")
+        for campo in ("linhas", "bytes_entrada", "bytes_saida"):
+            if item[campo] is not None:
+                campos.append(f"{campo}={item[campo]}")
+        partes.append(";".join(campos))
+    return ", ".join(partes)
+
+
+# --- Medição ---
+class _Medicao:
+    """Estado de uma função @cronometrar em andamento (marcas e totais)."""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.inicio = self.ultima_marca = time.perf_counter()
+        self.linhas = None
+        self.bytes_entrada = None
+
+
+def _nome_etapa(nome):
+    medicao = _medicao.get()
+    return f"{medicao.nome}.{nome}" if medicao is not None else nome
+
+
+def marcar_etapa(nome, linhas=None, bytes_entrada=None, bytes_saida=None):
+    """
+    Encerra a etapa `nome` da função @cronometrar atual: o tempo desde a
+    marca anterior (ou do início da função). Fora de uma função
+    @cronometrar não faz nada.
+    """
+    medicao = _medicao.get()
+    if medicao is None:
+        return
+    agora = time.perf_counter()
+    if linhas is not None and medicao.linhas is None:
+        medicao.linhas = linhas
+    if bytes_entrada is not None and medicao.bytes_entrada is None:
+        medicao.bytes_entrada = bytes_entrada
+    _registrar({
+        "etapa": f"{medicao.nome}.{nome}",
+        "segundos": agora - medicao.ultima_marca,
+        "linhas": linhas,
+        "bytes_entrada": bytes_entrada,
+        "bytes_saida": bytes_saida,
+        "erro": False,
+    })
+    medicao.ultima_marca = agora
+
+
+class _Etapa:
+    """Resultado de `with etapa(...) as e`: e.linhas/e.bytes_* podem ser preenchidos no bloco."""
+
+    def __init__(self, linhas, bytes_entrada, bytes_saida):
+        self.linhas = linhas
+        self.bytes_entrada = bytes_entrada
+        self.bytes_saida = bytes_saida
+
+
+@contextlib.contextmanager
+def etapa(nome, linhas=None, bytes_entrada=None, bytes_saida=None):
+    """Mede o bloco como a etapa `nome` (prefixada pela função @cronometrar atual)."""
+    nome_completo = _nome_etapa(nome)
+    medida = _Etapa(linhas, bytes_entrada, bytes_saida)
+    inicio = time.perf_counter()
+    erro = False
+    try:
+        yield medida
+    except BaseException:
+        erro = True
+        raise
+    finally:
+        _registrar({
+            "etapa": nome_completo,
+            "segundos": time.perf_counter() - inicio,
+            "linhas": medida.linhas,
+            "bytes_entrada": medida.bytes_entrada,
+            "bytes_saida": medida.bytes_saida,
+            "erro": erro,
+        })
+
+
+def tamanho_bytes(obj):
+    """Tamanho de um caminho, buffer (BytesIO/StringIO/bytes) ou None se não der para saber."""
+    try:
+        if isinstance(obj, (str, os.PathLike)):
+            return os.path.getsize(obj) if os.path.isfile(obj) else None
+        if isinstance(obj, (bytes, bytearray)):
+            return len(obj)
+        if hasattr(obj, "getbuffer"):
+            return obj.getbuffer().nbytes
+        if hasattr(obj, "getvalue"):
+            return len(obj.getvalue().encode("utf-8"))
+    except (OSError, ValueError, TypeError):
+        pass
+    return None
+
+
+def _medir_entrada(obj):
+    """(bytes, linhas) do primeiro argumento: arquivo/buffer -> bytes, DataFrame -> linhas."""
+    if hasattr(obj, "shape") and hasattr(obj, "columns"):
+        return None, len(obj)
+    return tamanho_bytes(obj), None
+
+
+def cronometrar(nome):
+    """
+    Decorator: mede a função como a etapa `nome`, com os bytes do primeiro
+    argumento (caminho/buffer) ou as linhas (DataFrame) e os bytes do
+    resultado (buffer, ou o primeiro item se for tupla). As marcas de
+    marcar_etapa() feitas dentro dela viram "nome.etapa".
+    """
+
+    def decorator(funcao):
+        @functools.wraps(funcao)
+        def wrapper(*args, **kwargs):
+            medicao = _Medicao(nome)
+            if args:
+                medicao.bytes_entrada, medicao.linhas = _medir_entrada(args[0])
+            token = _medicao.set(medicao)
+            resultado = None
+            erro = False
+            try:
+                resultado = funcao(*args, **kwargs)
+                return resultado
+            except BaseException:
+                erro = True
+                raise
+            finally:
+                _medicao.reset(token)
+                saida = resultado[0] if isinstance(resultado, tuple) and resultado else resultado
+                _registrar({
+                    "etapa": nome,
+                    "segundos": time.perf_counter() - medicao.inicio,
+                    "linhas": medicao.linhas,
+                    "bytes_entrada": medicao.bytes_entrada,
+                    "bytes_saida": tamanho_bytes(saida) if saida is not None else None,
+                    "erro": erro,
+                })
+
+        return wrapper
+
+    return decorator
+
+
+# --- Exportação ---
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _texto_labels(labels, extra=()):
+    pares = list(labels) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{chave}="{_escapar(valor)}"' for chave, valor in pares) + "}"
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def texto_prometheus():
+    """Registro do processo no formato texto do Prometheus (text/plain; version=0.0.4)."""
+    contadores, histogramas = _registro.copia()
+    linhas = []
+    for metrica, (tipo, ajuda) in METRICAS.items():
+        linhas.append(f"# HELP {metrica} {ajuda}")
+        linhas.append(f"# TYPE {metrica} {tipo}")
+        if tipo == "counter":
+            for (nome, labels), valor in sorted(contadores.items()):
+                if nome == metrica:
+                    linhas.append(f"{metrica}{_texto_labels(labels)} {_numero(valor)}")
+        else:
+            for (nome, labels), (contagens, soma, total) in sorted(histogramas.items()):
+                if nome != metrica:
+                    continue
+                for limite, contagem in zip(BUCKETS_SEGUNDOS, contagens):
+                    linhas.append(f"{metrica}_bucket{_texto_labels(labels, [('le', limite)])} {contagem}")
+                linhas.append(f"{metrica}_bucket{_texto_labels(labels, [('le', '+Inf')])} {total}")
+                linhas.append(f"{metrica}_sum{_texto_labels(labels)} {_numero(soma)}")
+                linhas.append(f"{metrica}_count{_texto_labels(labels)} {total}")
+    return "\n".join(linhas) + "\n"
@@ -0,0 +1,101 @@
+# formatadores/normalizacao.py
+"""
+Normalização de texto para comparação (nomes de colunas, cabeçalhos, TIPO,
+BLOCO, nomes de unidades). Todas tiram os acentos com NFKD + ASCII:
+  - normalizar_texto (normalize_text): maiúsculo, sem espaços nas pontas;
+  - normalizar_texto_lote (normalize_text_lote): idem, vazio para NaN;
+  - normalizar_texto_simples (normalize_text_simple): minúsculo, vazio para NaN;
+  - normalizar_para_busca (normalize_text_for_match): minúsculo e só [a-z0-9].
+
+Os mesmos poucos valores se repetem em milhares de linhas, então o caminho
+escalar guarda os resultados num cache LRU limitado (TAMANHO_CACHE textos por
+função) e as versões *_serie normalizam só os valores distintos da Series,
+distribuindo o resultado às linhas: o custo acompanha a cardinalidade, não o
+número de linhas.
+"""
+
+import functools
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+TAMANHO_CACHE = 4096
+
+_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9]")
+_NAO_ALFANUMERICO_NEM_ESPACO = re.compile(r"[^a-z0-9\s]")
+
+
+def _sem_acentos(texto):
+    return unicodedata.normalize("NFKD", texto).encode("ASCII", "ignore").decode("ASCII")
+
+
+@functools.lru_cache(maxsize=TAMANHO_CACHE)
+def _normalizar_texto(texto):
+    return _sem_acentos(texto).upper().strip()
+
+
+@functools.lru_cache(maxsize=TAMANHO_CACHE)
+def _normalizar_para_busca(texto, manter_espacos):
+    padrao = _NAO_ALFANUMERICO_NEM_ESPACO if manter_espacos else _NAO_ALFANUMERICO
+    return padrao.sub("", _sem_acentos(texto).lower()).strip()
+
+
+@functools.lru_cache(maxsize=TAMANHO_CACHE)
+def _normalizar_texto_simples(texto):
+    return _sem_acentos(texto.strip().lower())
+
+
+def normalizar_texto(texto):
+    """normalize_text: str() do valor, sem acentos, maiúsculo e sem espaços nas pontas."""
+    if not isinstance(texto, str):
+        texto = str(texto)
+    return _normalizar_texto(texto)
+
+
+def normalizar_texto_lote(texto):
+    """normalize_text_lote: como normalizar_texto, mas vazio para NaN/None."""
+    if pd.isna(texto):
+        return ""
+    return normalizar_texto(texto)
+
+
+def normalizar_texto_simples(texto):
+    """
+    normalize_text_simple: vazio para NaN/None; senão sem espaços nas pontas,
+    minúsculo e sem acentos (espaços internos e pontuação ficam).
+    """
+    if pd.isna(texto):
+        return ""
+    return _normalizar_texto_simples(str(texto))
+
+
+def normalizar_para_busca(texto, manter_espacos=False):
+    """
+    normalize_text_for_match: str() do valor, sem acentos, minúsculo e só
+    [a-z0-9]. Com manter_espacos=True os espaços internos são mantidos e só
+    as pontas são removidas (variante de unidades bloqueadas).
+    """
+    if not isinstance(texto, str):
+        texto = str(texto)
+    return _normalizar_para_busca(texto, manter_espacos)
+
+
+def _por_valores_distintos(serie, func):
+    """Aplica func aos valores distintos de serie.astype(str) e distribui às linhas."""
+    codigos, distintos = pd.factorize(serie.astype(str))
+    normalizados = np.array([func(v) for v in distintos], dtype=object)
+    return pd.Series(normalizados[codigos], index=serie.index, dtype=object)
+
+
+def normalizar_texto_serie(serie):
+    """normalizar_texto de cada valor (NaN vira 'NAN', como str(NaN) na versão escalar)."""
+    return _por_valores_distintos(serie, _normalizar_texto)
+
+
+def normalizar_para_busca_serie(serie, manter_espacos=False):
+    """normalizar_para_busca de cada valor (NaN vira 'nan', como na versão escalar)."""
+    return _por_valores_distintos(
+        serie, lambda texto: _normalizar_para_busca(texto, manter_espacos)
+    )
@@ -0,0 +1,22 @@
+# formatadores/progresso.py
+"""
+Ponto único para os loops longos dos formatadores reportarem progresso.
+Sem callback registrado (processamento síncrono, dentro da requisição)
+reportar_progresso não faz nada; o executor de jobs em background registra
+um callback em cada processo worker.
+"""
+
+_callback_progresso = None
+
+
+def definir_callback_progresso(callback):
+    """Registra callback(fracao, mensagem) para o processo atual (None desliga)."""
+    global _callback_progresso
+    _callback_progresso = callback
+
+
+def reportar_progresso(concluidos, total, mensagem=None):
+    """Informa que `concluidos` de `total` passos do processamento terminaram."""
+    if _callback_progresso is None or not total:
+        return
+    _callback_progresso(min(concluidos / total, 1.0), mensagem)
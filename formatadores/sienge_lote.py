@@ -0,0 +1,161 @@
+# formatadores/sienge_lote.py
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from formatadores.exportacao_sienge import gerar_saida_sienge, mapear_empreendimento
+from formatadores.metricas import cronometrar, marcar_etapa
+from formatadores.vetorizacao import extrair_primeiro_numero, formatar_numero_dois_digitos
+
+
+# --- Conversão numérica (compartilhada com a Importação CV Lote) ---
+def limpar_converter_numerico_lote(v):
+    if pd.isna(v):
+        return 0.0
+    try:
+        s = str(v)
+        s = re.sub(r"M2|M²", "", s, flags=re.IGNORECASE).strip()
+        sep = "."
+        if s.rfind(",") > s.rfind("."):
+            sep = ","
+        elif s.rfind(".") == -1 and s.rfind(",") != -1:
+            sep = ","
+        s = s.replace(".", "") if sep == "," else s.replace(",", "")
+        s = s.replace(sep, ".")
+        s = "".join(s.split())
+        return float(s) if re.fullmatch(r"-?\d+(\.\d+)?", s) else 0.0
+    except:
+        return 0.0
+
+
+# --- Funções Auxiliares SIENGE Lote ---
+def normalize_column_name_sienge_lote(c):
+    if pd.isna(c):
+        return ""
+    n = str(c).upper().strip()
+    n = n.replace("(M²)", "(M2)").replace(" (M2)", "(M2)")
+    n = n.replace("AREA(M2)", "ÁREA(M2)")
+    return n
+
+
+def extrair_numero_sienge_lote(t, pref=None):
+    if pd.isna(t):
+        return None
+    s = str(t).strip()
+    if pref:
+        s = re.sub(f"^{re.escape(pref)}\s*", "", s, flags=re.IGNORECASE)
+    m = re.search(r"\d+", s)
+    try:
+        return int(m.group(0)) if m else None
+    except:
+        return None
+
+
+def formatar_unidade_sienge_lote(row, col_q, col_l):
+    try:
+        qv = row.get(col_q)
+        qn = extrair_numero_sienge_lote(qv)
+        pb = f"QD{qn:02d}" if qn is not None else ""
+        lv = row.get(col_l)
+        ln = extrair_numero_sienge_lote(lv, "LT") or extrair_numero_sienge_lote(
+            lv, "LOTE"
+        )
+        pa = f"LOTE {ln:02d}" if ln is not None else ""
+        if pb and pa:
+            return f"{pb} - {pa}"
+        elif pb:
+            return pb
+        elif pa:
+            return pa
+        else:
+            return "LOCALIZACAO_INVALIDA"
+    except:
+        return "ERRO_FORMATACAO"
+
+
+def formatar_unidade_sienge_lote_colunar(df, col_q, col_l):
+    """
+    Versão colunar de formatar_unidade_sienge_lote: primeiro número de QUADRA
+    e LOTE por str.extract, formatado com 2 dígitos e combinado por fillna
+    ('QDxx - LOTE yy', só uma das partes ou LOCALIZACAO_INVALIDA).
+    Os prefixos 'LT'/'LOTE' não têm dígitos, então não mudam o número extraído.
+    Linhas com caracteres não-ASCII usam a função por linha (dígitos Unicode).
+    """
+    linha_a_linha = pd.Series(False, index=df.index)
+    partes = []
+    for col, prefixo in ((col_q, "QD"), (col_l, "LOTE ")):
+        if col not in df.columns:
+            partes.append(pd.Series(np.nan, index=df.index, dtype=object))
+            continue
+        texto = df[col].astype(str)
+        linha_a_linha |= df[col].notna() & texto.str.contains(
+            r"[^\x00-\x7f]", regex=True
+        )
+        partes.append(
+            prefixo + formatar_numero_dois_digitos(extrair_primeiro_numero(texto))
+        )
+    pb, pa = partes
+
+    unidade = (pb + " - " + pa).fillna(pb).fillna(pa).fillna("LOCALIZACAO_INVALIDA")
+    if linha_a_linha.any():
+        unidade[linha_a_linha] = df[linha_a_linha].apply(
+            lambda r: formatar_unidade_sienge_lote(r, col_q, col_l), axis=1
+        )
+    return unidade
+
+
+def limpar_converter_numerico_sienge_lote(v):
+    return limpar_converter_numerico_lote(v)  # Reutiliza
+
+
+COLUNAS_SIENGE_LOTE = ["ETAPA", "QUADRA", "LOTE", "ÁREA(M2)", "FRAÇÃO IDEAL"]
+
+
+@cronometrar("sienge_lote_leitura")
+def ler_planilha_sienge_lote(caminho):
+    """Lê a planilha do SIENGE Lote com as colunas normalizadas e validadas."""
+    df = pd.read_excel(caminho, engine="openpyxl")
+    marcar_etapa("leitura", linhas=len(df))
+    orig_cols = df.columns.tolist()
+    df.columns = [normalize_column_name_sienge_lote(c) for c in df.columns]
+    print(f"(S Lote) Cols Orig: {orig_cols}")
+    print(f"(S Lote) Cols Norm: {df.columns.tolist()}")
+    missing = [c for c in COLUNAS_SIENGE_LOTE if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colunas S Lote faltando: {', '.join(missing)}")
+    marcar_etapa("colunas")
+    return df
+
+
+@cronometrar("sienge_lote")
+def gerar_importacao_sienge_lote(df, etapas_map, formato_saida="xls"):
+    """
+    Monta a importação SIENGE Lote a partir da planilha já normalizada
+    (ler_planilha_sienge_lote). etapas_map: dígitos da etapa -> código do
+    empreendimento. Retorna (BytesIO, mimetype, extensão).
+    """
+    col_e, col_q, col_l, col_a, col_f = COLUNAS_SIENGE_LOTE
+    missing = [c for c in COLUNAS_SIENGE_LOTE if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colunas S Lote faltando no proc: {', '.join(missing)}")
+
+    df_out = pd.DataFrame()
+    df_out["EMPREENDIMENTO"] = mapear_empreendimento(df[col_e], etapas_map)
+    df_out["UNIDADE"] = formatar_unidade_sienge_lote_colunar(df, col_q, col_l)
+    df_out["ÁREA PRIVATIVA"] = df[col_a].apply(limpar_converter_numerico_sienge_lote)
+    df_out["ÁREA COMUM"] = 0
+    df_out["FRAÇÃO IDEAL"] = (
+        df[col_f].apply(limpar_converter_numerico_sienge_lote).round(6)
+    )
+    df_out["TIPO DE IMÓVEL"] = "LOTE"
+    df_out["ESTOQUE COMERCIAL"] = "D"
+    df_out["ESTOQUE LEGAL"] = "L"
+    df_out["ESTOQUE DE OBRA"] = "C"
+    marcar_etapa("transformacao", linhas=len(df_out))
+    print(f"(S Lote) Escrevendo {len(df_out)} linhas ({formato_saida})...")
+    output, mimetype_saida, ext_saida = gerar_saida_sienge(df_out, formato_saida)
+    marcar_etapa("escrita")
+    print(f"(S Lote) Arquivo .{ext_saida} gerado.")
+    return output, mimetype_saida, ext_saida
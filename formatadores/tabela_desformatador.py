@@ -4,20 +4,15 @@ import pandas as pd
 import io
 import traceback
 import re
-import unicodedata
-import csv # Importa o módulo csv (boa prática, embora não usado diretamente aqui)
+import csv
 
-# --- Funções Auxiliares ---
+from formatadores.logs import obter_logger
+from formatadores.metricas import cronometrar, marcar_etapa
+from formatadores.normalizacao import normalizar_texto_simples as normalize_text_simple
 
-def normalize_text_simple(text):
-    """Normaliza texto removendo acentos, espaços e convertendo para minúsculas."""
-    if pd.isna(text): return ""
-    try:
-        text = str(text).strip().lower()
-        text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
-        return text
-    except:
-        return str(text).strip().lower()
+logger = obter_logger(__name__)
+
+# --- Funções Auxiliares ---
 
 def format_brl(value):
     """
@@ -79,6 +74,42 @@ def format_brl(value):
     except (ValueError, TypeError):
         return str(value).strip() # Retorna original se falhar
 
+def format_brl_serie(serie):
+    """
+    Versão vetorizada de format_brl para uma coluna inteira.
+    Valores que o float() aceita mas o pd.to_numeric não (raros) caem no format_brl por valor.
+    """
+    texto = serie.astype(str).str.strip()
+    vazio = serie.isna() | (texto == '') | (texto == '--')
+    s_val = texto.str.replace('R$', '', regex=False).str.strip()
+
+    # Letras: 'valor' (cabeçalho repetido) vira vazio, o resto volta como texto original
+    com_letras = ~vazio & s_val.str.contains(r'[a-zA-Z]', regex=True)
+    texto_letras = s_val[com_letras]
+    eh_palavra_valor = texto_letras.str.lower().str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii') == 'valor'
+
+    # O último separador encontrado é o decimal
+    candidatos = ~vazio & ~com_letras
+    s_cand = s_val[candidatos]
+    last_dot = s_cand.str.rfind('.')
+    last_comma = s_cand.str.rfind(',')
+    s_val_num = s_cand.str.replace(',', '.', regex=False)
+    s_val_num = s_val_num.mask(last_comma > last_dot, s_cand.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    s_val_num = s_val_num.mask(last_dot > last_comma, s_cand.str.replace(',', '', regex=False))
+    numeros = pd.to_numeric(s_val_num, errors='coerce')
+    convertido = numeros.notna().reindex(serie.index, fill_value=False)
+
+    resultado = texto.copy()
+    resultado[vazio] = ''
+    resultado[eh_palavra_valor.index[eh_palavra_valor]] = ''
+    if convertido.any():
+        formatado = numeros[numeros.notna()].map(lambda n: "{:,.2f}".format(round(n, 2)))
+        resultado[formatado.index] = "R$ " + formatado.str.translate(str.maketrans({',': '.', '.': ','}))
+    fallback = candidatos & ~convertido
+    if fallback.any():
+        resultado[fallback] = serie[fallback].map(format_brl)
+    return resultado
+
 def extract_number_from_string(text):
     """Extrai o primeiro número de uma string e retorna como int, ou None se não encontrar."""
     if pd.isna(text): return None
@@ -99,14 +130,39 @@ def parse_brl_to_float(value):
     except:
         return 0.0
 
+def parse_brl_to_float_serie(serie):
+    """Versão vetorizada de parse_brl_to_float (vazios e inválidos viram 0.0)."""
+    s_val = serie.astype(str).str.replace('R$', '', regex=False).str.strip()
+    s_val = s_val.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    valores = pd.to_numeric(s_val, errors='coerce')
+    valores[serie.isna()] = 0.0
+    return valores.fillna(0.0).astype(float)
+
+# Níveis de agregação do VGV (equivalente a GROUPING SETS): nome do nível -> colunas agrupadas.
+# Blocos/quadras recomeçam a numeração em cada etapa, então o nível BLOCO é por etapa.
+NIVEIS_VGV = [
+    ('ETAPA', ['ETAPA']),
+    ('BLOCO', ['ETAPA', 'BLOCO']),
+    ('TIPOLOGIA', ['TIPOLOGIA']),
+    ('ETAPA x TIPOLOGIA', ['ETAPA', 'TIPOLOGIA']),
+    ('TOTAL', []),
+]
+COLUNAS_RESUMO_VGV = ['NÍVEL', 'ETAPA', 'BLOCO', 'TIPOLOGIA', 'UNIDADES', 'VGV']
+
+@cronometrar("desformatador_vgv")
 def calcular_vgv(df):
-    """Calcula VGV por tipologia e VGV total, adicionando ao final do DataFrame"""
+    """
+    Calcula o VGV em um único agrupamento (ETAPA x BLOCO x TIPOLOGIA) e, a partir dele,
+    os subtotais por ETAPA, BLOCO (dentro da etapa), TIPOLOGIA, ETAPA x TIPOLOGIA e o TOTAL.
+    Retorna (df, df_resumo): os dados sem alteração e a tabela de resumo separada.
+    """
     print(f"(calcular_vgv) Iniciando cálculo. DataFrame tem {len(df)} linhas e colunas: {df.columns.tolist()}")
-    
+    df_resumo_vazio = pd.DataFrame(columns=COLUNAS_RESUMO_VGV)
+
     # Identifica coluna de tipologia e valor
     col_tipologia = None
     col_valor = None
-    
+
     for col in df.columns:
         col_norm = normalize_text_simple(col)
         if 'tipologia' in col_norm:
@@ -115,48 +171,49 @@ def calcular_vgv(df):
         if 'valor' in col_norm and 'imovel' in col_norm:
             col_valor = col
             print(f"(calcular_vgv) Coluna valor encontrada: '{col}'")
-    
+
     if not col_tipologia or not col_valor:
         print(f"(calcular_vgv) AVISO: Colunas não encontradas. Tipologia={col_tipologia}, Valor={col_valor}")
-        return df
-    
-    # Calcula VGV por tipologia
-    df['_valor_num'] = df[col_valor].apply(parse_brl_to_float)
-    vgv_por_tipo = df.groupby(col_tipologia)['_valor_num'].sum()
-    vgv_total = df['_valor_num'].sum()
-    print(f"(calcular_vgv) VGV Total calculado: {vgv_total}")
-    print(f"(calcular_vgv) VGV por tipo: {vgv_por_tipo.to_dict()}")
-    
-    # Remove coluna auxiliar
-    df = df.drop('_valor_num', axis=1)
-    
-    # Adiciona linhas vazias e VGV
-    linhas_vgv = []
-    linhas_vgv.append({col: '' for col in df.columns})  # Linha vazia
-    linhas_vgv.append({col: '' for col in df.columns})  # Linha vazia
-    
-    # VGV por tipologia
-    for tipo, valor in vgv_por_tipo.items():
-        linhas_vgv.append({
-            col_tipologia: f'VGV {tipo}',
-            col_valor: format_brl(valor),
-            **{col: '' for col in df.columns if col not in [col_tipologia, col_valor]}
-        })
-    
-    # VGV Total
-    linhas_vgv.append({
-        col_tipologia: 'VGV TOTAL',
-        col_valor: format_brl(vgv_total),
-        **{col: '' for col in df.columns if col not in [col_tipologia, col_valor]}
-    })
-    
-    print(f"(calcular_vgv) Adicionando {len(linhas_vgv)} linhas de VGV")
-    df_vgv = pd.DataFrame(linhas_vgv)
-    resultado = pd.concat([df, df_vgv], ignore_index=True)
-    print(f"(calcular_vgv) DataFrame final tem {len(resultado)} linhas")
-    return resultado
+        return df, df_resumo_vazio
+
+    # 1. Agrupamento único no nível mais detalhado (ETAPA/BLOCO podem não existir)
+    chaves = pd.DataFrame({
+        'ETAPA': df['ETAPA'] if 'ETAPA' in df.columns else '',
+        'BLOCO': df['BLOCO'] if 'BLOCO' in df.columns else '',
+        'TIPOLOGIA': df[col_tipologia],
+    }, index=df.index).fillna('').astype(str)
+    chaves['_valor_num'] = parse_brl_to_float_serie(df[col_valor])
+    base = chaves.groupby(['ETAPA', 'BLOCO', 'TIPOLOGIA'], sort=False).agg(
+        UNIDADES=('_valor_num', 'size'), VGV=('_valor_num', 'sum')
+    ).reset_index()
+
+    # 2. Subtotais (rollup) calculados sobre o agrupamento base, não sobre os dados
+    niveis = []
+    agrupamentos_feitos = set()
+    for nivel, colunas in NIVEIS_VGV:
+        # Sem ETAPA/BLOCO na tabela a coluna fica vazia na base; pula os níveis
+        # que ficariam sem agrupamento ou repetiriam um anterior (ex.: sem ETAPA,
+        # BLOCO ainda vale, mas ETAPA x TIPOLOGIA seria igual a TIPOLOGIA)
+        presentes = tuple(c for c in colunas if c == 'TIPOLOGIA' or c in df.columns)
+        if colunas and (not presentes or presentes in agrupamentos_feitos):
+            continue
+        agrupamentos_feitos.add(presentes)
+        if colunas:
+            agregado = base.groupby(colunas, sort=True)[['UNIDADES', 'VGV']].sum().reset_index()
+        else:
+            agregado = pd.DataFrame({'UNIDADES': [base['UNIDADES'].sum()], 'VGV': [base['VGV'].sum()]})
+        agregado.insert(0, 'NÍVEL', nivel)
+        niveis.append(agregado)
+
+    df_resumo = pd.concat(niveis, ignore_index=True).reindex(columns=COLUNAS_RESUMO_VGV).fillna({'ETAPA': '', 'BLOCO': '', 'TIPOLOGIA': ''})
+    print(f"(calcular_vgv) VGV Total calculado: {base['VGV'].sum()}")
+    df_resumo['VGV'] = df_resumo['VGV'].apply(format_brl)
+    df_resumo['UNIDADES'] = df_resumo['UNIDADES'].astype(int)
+    print(f"(calcular_vgv) Resumo com {len(df_resumo)} linhas em {len(niveis)} níveis")
+    return df, df_resumo
 
 # --- Função Principal do Desformatador (MODIFICADA PARA FORMATAR MOEDA) ---
+@cronometrar("desformatador")
 def desformatar_tabela_precos(input_file_object):
     """
     Lê uma planilha Excel formatada e extrai os dados, reformatando
@@ -167,58 +224,66 @@ def desformatar_tabela_precos(input_file_object):
         df_raw = pd.read_excel(input_file_object, engine='openpyxl', header=None, dtype=str).fillna('')
         if df_raw.empty: raise ValueError("Arquivo Excel está vazio.")
         print(f"(Desformatador) Lidas {len(df_raw)} linhas brutas.")
+        marcar_etapa("leitura", linhas=len(df_raw))
+
+        # 1. Classificação das linhas pela primeira célula (por coluna)
+        primeira_celula = df_raw[0].astype(str).str.strip()
+        primeira_celula_norm = primeira_celula.str.lower().str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+        is_etapa = primeira_celula_norm.str.startswith('etapa')
+        is_bloco = ~is_etapa & primeira_celula_norm.str.startswith(('bloco', 'quadra'))
+        is_cabecalho = ~is_etapa & ~is_bloco & primeira_celula_norm.str.startswith('unidade')
+        is_dados = ~is_etapa & ~is_bloco & ~is_cabecalho & (primeira_celula != '')
+
+        # 2. Contexto de ETAPA/BLOCO por forward-fill (None antes do primeiro título)
+        etapa_atual = primeira_celula.where(is_etapa).ffill().astype(object)
+        etapa_atual = etapa_atual.where(etapa_atual.notna(), None)
+        bloco_atual = primeira_celula.where(is_bloco).ffill().astype(object)
+        bloco_atual = bloco_atual.where(bloco_atual.notna(), None)
+        logger.debug("Linhas de ETAPA: %d, BLOCO/QUADRA: %d, CABEÇALHO: %d",
+                     is_etapa.sum(), is_bloco.sum(), is_cabecalho.sum())
+
+        # 3. Cabeçalho vigente de cada linha (um título de bloco/quadra reseta o cabeçalho)
+        linha_cabecalho = pd.Series(df_raw.index, index=df_raw.index).where(is_cabecalho).mask(is_bloco, -1).ffill()
+        is_dados &= linha_cabecalho >= 0
+
+        # Cabeçalhos iguais (repetidos a cada bloco) viram uma única projeção
+        ids_cabecalho = {}
+        cabecalhos_unicos = []
+        id_por_linha_cabecalho = {}
+        for index in df_raw.index[is_cabecalho]:
+            cabecalho_dados = tuple(str(h).strip() for h in df_raw.loc[index] if str(h).strip())
+            if cabecalho_dados not in ids_cabecalho:
+                ids_cabecalho[cabecalho_dados] = len(cabecalhos_unicos)
+                cabecalhos_unicos.append(cabecalho_dados)
+                logger.debug("Linha %d: CABEÇALHO -> %s", index + 1, cabecalho_dados)
+            id_por_linha_cabecalho[index] = ids_cabecalho[cabecalho_dados]
+        id_cabecalho = linha_cabecalho[is_dados].map(id_por_linha_cabecalho)
 
-        processed_data = []
-        etapa_atual = None
-        bloco_atual = None
-        cabecalho_dados = None
-
-        print("Iniciando varredura das linhas...")
-        for index, row in df_raw.iterrows():
-            primeira_celula = str(row.iloc[0]).strip()
-            primeira_celula_norm = normalize_text_simple(primeira_celula)
-
-            # Identificar Tipo de Linha
-            if primeira_celula_norm.startswith('etapa'):
-                etapa_atual = primeira_celula
-                print(f"  Linha {index+1}: ETAPA -> '{etapa_atual}'")
-                continue
-            elif primeira_celula_norm.startswith(('bloco', 'quadra')):
-                bloco_atual = primeira_celula
-                cabecalho_dados = None # Reseta o cabeçalho para o novo bloco
-                print(f"  Linha {index+1}: BLOCO/QUADRA -> '{bloco_atual}'")
-                continue
-            elif primeira_celula_norm.startswith('unidade'):
-                cabecalho_dados = [str(h).strip() for h in row if str(h).strip()]
-                print(f"  Linha {index+1}: CABEÇALHO -> {cabecalho_dados}")
-                continue
-
-            # Processar Linha de Dados Reais
-            if cabecalho_dados and primeira_celula:
-                linha_dict = {'ETAPA': etapa_atual, 'BLOCO': bloco_atual}
-                for i, nome_coluna in enumerate(cabecalho_dados):
-                    if i < len(row):
-                        valor_celula = row.iloc[i]
-                        nome_coluna_norm = normalize_text_simple(nome_coluna)
-                        
-                        # Aplica formatação BRL se for coluna de valor, incluindo desconto
-                        if 'valor' in nome_coluna_norm or 'sinal' in nome_coluna_norm or 'mensal' in nome_coluna_norm or 'entrada' in nome_coluna_norm or 'desconto' in nome_coluna_norm:
-                            linha_dict[nome_coluna] = format_brl(valor_celula)
-                        else:
-                            linha_dict[nome_coluna] = valor_celula
-                    else:
-                        linha_dict[nome_coluna] = ''
-                processed_data.append(linha_dict)
-
-        print(f"Varredura concluída. {len(processed_data)} linhas de dados extraídas.")
-        if not processed_data:
+        colunas_moeda = ('valor', 'sinal', 'mensal', 'entrada', 'desconto')
+        partes = []
+        for id_cab, dados_cabecalho in df_raw[is_dados].groupby(id_cabecalho, sort=False):
+            cabecalho_dados = cabecalhos_unicos[id_cab]
+            parte = {'ETAPA': etapa_atual[dados_cabecalho.index], 'BLOCO': bloco_atual[dados_cabecalho.index]}
+            for i, nome_coluna in enumerate(cabecalho_dados):
+                # Formatação BRL decidida uma vez por coluna do cabeçalho (inclui desconto)
+                nome_coluna_norm = normalize_text_simple(nome_coluna)
+                if any(chave in nome_coluna_norm for chave in colunas_moeda):
+                    parte[nome_coluna] = format_brl_serie(dados_cabecalho[i])
+                else:
+                    parte[nome_coluna] = dados_cabecalho[i]
+            partes.append(pd.DataFrame(parte))
+
+        print(f"Varredura concluída. {int(is_dados.sum())} linhas de dados extraídas.")
+        if not partes:
             raise ValueError("Nenhum dado de unidade foi extraído. Verifique o formato do arquivo.")
 
-        df_final = pd.DataFrame(processed_data)
+        # Volta para a ordem original das linhas (grupos saem na ordem do primeiro aparecimento)
+        df_final = pd.concat(partes).sort_index(kind='stable').reset_index(drop=True)
         # Limpa colunas que podem ter sido criadas mas ficaram totalmente vazias
         df_final.dropna(axis=1, how='all', inplace=True)
         
         print("DataFrame final criado com sucesso.")
+        marcar_etapa("transformacao", linhas=len(df_final))
         return df_final
 
     except ValueError as ve:
@@ -227,4 +292,19 @@ def desformatar_tabela_precos(input_file_object):
     except Exception as e:
         print(f"(Desformatador) ERRO INESPERADO: {e}")
         traceback.print_exc()
-        raise RuntimeError(f"Erro inesperado no desformatador: {e}") from e
\ No newline at end of file
+        raise RuntimeError(f"Erro inesperado no desformatador: {e}") from e
+
+
+@cronometrar("desformatador_csv")
+def exportar_csv_desformatado(df_limpo, df_resumo_vgv):
+    """
+    CSV da ferramenta (separador ';'): os dados extraídos, duas linhas em branco
+    e, se houver, a tabela de resumo do VGV. Retorna um StringIO.
+    """
+    output_csv = io.StringIO()
+    df_limpo.to_csv(output_csv, sep=';', encoding='utf-8-sig', index=False, quoting=csv.QUOTE_MINIMAL)
+    if not df_resumo_vgv.empty:
+        output_csv.write('\n\n')
+        df_resumo_vgv.to_csv(output_csv, sep=';', encoding='utf-8-sig', index=False, quoting=csv.QUOTE_MINIMAL)
+    output_csv.seek(0)
+    return output_csv
@@ -8,69 +8,22 @@ import openpyxl
 from openpyxl.styles import PatternFill, Font, Border, Side, Alignment, Color
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.table import Table, TableStyleInfo
-import unicodedata
 import re
 from collections import defaultdict
 from openpyxl.utils.cell import range_boundaries
 
+from formatadores.colunas import find_column_flexible, resolver_colunas  # noqa: F401
+from formatadores.logs import agrupar_avisos, avisar, obter_logger
+from formatadores.metricas import cronometrar, marcar_etapa
+from formatadores.normalizacao import normalizar_para_busca as normalize_text_for_match  # noqa: F401
+from formatadores.progresso import reportar_progresso
 
-# --- Funções Auxiliares (sem alterações significativas, apenas a adição de .strip() em map_etapa abaixo) ---
-def normalize_text_for_match(text):
-    """Normaliza texto para busca: minúsculo, sem acentos, sem não-alfanuméricos."""
-    if not isinstance(text, str):
-        text = str(text)
-    try:
-        text = (
-            unicodedata.normalize("NFKD", text)
-            .encode("ASCII", "ignore")
-            .decode("ASCII")
-        )
-        text = text.lower()
-        text = re.sub(r"[^a-z0-9]", "", text)
-        return text.strip()
-    except Exception:
-        # Fallback para casos onde a normalização ASCII falha
-        text = str(text).lower()
-        text = re.sub(r"\s+", "", text)  # Remove espaços
-        text = re.sub(r"[^a-z0-9]", "", text)  # Remove não alfanuméricos restantes
-        return text.strip()
-
-
-def find_column_flexible(df_columns, concept_keywords, concept_name, required=True):
-    """Encontra a coluna de forma flexível por keywords."""
-    normalized_input_cols = {normalize_text_for_match(col): col for col in df_columns}
-    # print(f"  Buscando '{concept_name}': Keywords={concept_keywords}. Colunas Norm.: {list(normalized_input_cols.keys())}") # Debug
-    found_col_name = None
-    # 1. Match exato normalizado
-    for keyword in concept_keywords:
-        norm_keyword = normalize_text_for_match(keyword)
-        if norm_keyword in normalized_input_cols:
-            found_col_name = normalized_input_cols[norm_keyword]
-            # print(f"    -> Match exato norm. '{norm_keyword}' para '{concept_name}'. Col original: '{found_col_name}'") # Debug
-            return found_col_name
-    # 2. Match parcial normalizado (prioriza início)
-    potential_matches = []
-    for keyword in concept_keywords:
-        norm_keyword = normalize_text_for_match(keyword)
-        for norm_col, orig_col in normalized_input_cols.items():
-            if norm_keyword in norm_col:
-                priority = 0 if norm_col.startswith(norm_keyword) else 1
-                potential_matches.append((priority, orig_col))
-                # print(f"    -> Match parcial candidato: '{keyword}' em '{orig_col}' (Norm: '{norm_keyword}' em '{norm_col}') Prio:{priority}") # Debug
-    if potential_matches:
-        potential_matches.sort()
-        found_col_name = potential_matches[0][1]
-        # print(f"    -> Melhor match parcial para '{concept_name}'. Col original: '{found_col_name}'") # Debug
-        return found_col_name
-    if required:
-        raise ValueError(
-            f"Coluna obrigatória '{concept_name}' não encontrada. Keywords usadas: {concept_keywords}. Colunas disponíveis: {df_columns.tolist()}"
-        )
-    else:
-        # print(f"    -> Coluna opcional '{concept_name}' não encontrada.") # Debug
-        return None
+logger = obter_logger(__name__)
 
 
+# --- Funções Auxiliares (sem alterações significativas, apenas a adição de .strip() em map_etapa abaixo) ---
+# find_column_flexible e normalize_text_for_match continuam importáveis daqui;
+# a implementação está em formatadores.colunas e formatadores.normalizacao.
 def extract_block_number_safe(block_value_str):
     """Extrai o primeiro número de uma string de bloco/quadra."""
     if not isinstance(block_value_str, str):
@@ -163,7 +116,8 @@ def format_garagem_vagas(original_value_str, numeric_value):
                 return f"{count:02d} VAGAS"
 
         except Exception as e:
-            print(f"AVISO: Erro ao formatar vagas com valor {numeric_value}: {e}")
+            avisar(logger, "vagas não formatadas; mantido o original (%s)", type(e).__name__,
+                   exemplo=repr(numeric_value))
             return original_clean_str
     else:
         # Se não conseguiu converter para número, retorna o texto original
@@ -195,9 +149,7 @@ def format_area_m2(numeric_value):
         # Usa formatação de string f para garantir duas casas decimais e substitui ponto por vírgula
         return f"{val:.2f}".replace(".", ",") + " m²"
     except (ValueError, TypeError):
-        print(
-            f"AVISO: Erro ao formatar valor de área {numeric_value}. Retornando '--'."
-        )
+        avisar(logger, "áreas não formatadas; retornado '--'", exemplo=repr(numeric_value))
         return "--"
 
 
@@ -229,7 +181,7 @@ def format_composite_unit_name(row):
         return f"{prefixo_str}-{quadra_str}-{casa_str}"
 
     except Exception as e:
-        print(f"AVISO: Erro ao gerar nome de unidade composto: {e}")
+        avisar(logger, "unidades compostas com erro (ERRO_UNIDADE)", exemplo=e)
         return "ERRO_UNIDADE"
 
 
@@ -245,6 +197,8 @@ def format_brl(numeric_value):
         return str(numeric_value)
 
 
+@cronometrar("tabela_precos")
+@agrupar_avisos()
 def processar_tabela_precos_web(
     input_filepath,
     block_etapa_mapping,
@@ -306,17 +260,22 @@ def processar_tabela_precos_web(
         df_input.dropna(how="all", inplace=True)
         if df_input.empty:
             raise ValueError("Arquivo vazio.")
+        marcar_etapa("leitura", linhas=len(df_input))
 
         # --- Identificação de Colunas para Formatação (Apenas para aplicar R$ ou m²) ---
-        # Não filtra colunas, apenas identifica para saber como formatar VALUES
-        # --- Identificação de Colunas para Formatação (Apenas para aplicar R$ ou m²) ---
-        # Não filtra colunas, apenas identifica para saber como formatar VALUES
-        col_valor_detected = find_column_flexible(
+        # Não filtra colunas, apenas identifica para saber como formatar VALUES.
+        # Bloco/Quadra é o agrupador das etapas; quadra/pavimento/andar recebem ffill.
+        colunas_detectadas, _ = resolver_colunas(
             df_input.columns,
-            ["valor", "preco", "preço", "total"],
-            "VALOR",
-            required=False,
+            {
+                "VALOR": (["valor", "preco", "preço", "total"], False),
+                "AGRUPADOR": (["bloco", "blk", "quadra", "pavimento"], False),
+                "quadra": (["quadra"], False),
+                "pavimento": (["pavimento"], False),
+                "andar": (["andar"], False),
+            },
         )
+        col_valor_detected = colunas_detectadas["VALOR"]
 
         # <<< AMPLIAÇÃO: Detectar múltiplas colunas de Área >>>
         area_keywords = [
@@ -336,12 +295,7 @@ def processar_tabela_precos_web(
                 detected_area_columns.append(col)
 
         # Também precisamos identificar Bloco/Quadra para o Agrupamento de Etapas
-        col_bloco_agrupamento = find_column_flexible(
-            df_input.columns,
-            ["bloco", "blk", "quadra", "pavimento"],
-            "AGRUPADOR",
-            required=False,
-        )
+        col_bloco_agrupamento = colunas_detectadas["AGRUPADOR"]
         if not col_bloco_agrupamento:
             # Se não achar, não conseguiremos agrupar etapas corretamente, mas seguimos
             print(
@@ -355,9 +309,7 @@ def processar_tabela_precos_web(
 
         # Tenta achar outras comuns para ffill mesmo que não escolhidas explicitamente, para garantir dados
         for c_key in ["quadra", "pavimento", "andar"]:
-            c_found = find_column_flexible(
-                df_input.columns, [c_key], c_key, required=False
-            )
+            c_found = colunas_detectadas[c_key]
             if c_found and c_found not in cols_to_ffill:
                 cols_to_ffill.append(c_found)
 
@@ -441,6 +393,7 @@ def processar_tabela_precos_web(
                     continue
 
         print(f"  Colunas selecionadas para saída: {valid_output_cols}")
+        marcar_etapa("colunas")
 
         # --- Processamento dos Dados ---
         df_output = pd.DataFrame()
@@ -530,7 +483,8 @@ def processar_tabela_precos_web(
         # Pega lista única de etapas na ordem ordenada
         unique_etapas = df_output["ETAPA"].unique()
 
-        for etapa in unique_etapas:
+        for n_etapa, etapa in enumerate(unique_etapas):
+            reportar_progresso(n_etapa, len(unique_etapas), f"Etapa {etapa}")
             # Linha de Cabeçalho da Etapa
             etapa_header_row = current_excel_row
             row_map["etapas"][str(etapa)] = {
@@ -630,6 +584,7 @@ def processar_tabela_precos_web(
         # Remove empty rows at the end caused by our logic (if any)
         while final_sheet_data and all(x is None for x in final_sheet_data[-1]):
             final_sheet_data.pop()
+        marcar_etapa("transformacao", linhas=len(df_output))
 
         # 6. Criar Workbook e Worksheet
         wb = openpyxl.Workbook()
@@ -782,6 +737,7 @@ def processar_tabela_precos_web(
         output = io.BytesIO()
         wb.save(output)
         output.seek(0)
+        marcar_etapa("escrita", bytes_saida=output.getbuffer().nbytes)
 
         print("(Tabela Preços Formatador) Processamento concluído com sucesso.")
         return output
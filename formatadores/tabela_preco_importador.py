@@ -4,8 +4,24 @@ import pandas as pd
 import io
 import traceback
 import re
-import unicodedata
 import csv
+import logging
+import openpyxl
+from formatadores.colunas import resolver_colunas
+from formatadores.logs import agrupar_avisos, avisar, obter_logger
+from formatadores.metricas import cronometrar, marcar_etapa
+from formatadores.normalizacao import (
+    normalizar_para_busca as normalize_text_for_match,
+    normalizar_texto as normalize_text,
+    normalizar_texto_serie,
+)
+from formatadores.vetorizacao import (
+    extrair_primeiro_numero,
+    formatar_numero_dois_digitos,
+    format_brl_serie,
+)
+
+logger = obter_logger(__name__)
 
 # --- Funções Auxiliares para Busca de Coluna (Robustas) ---
 
@@ -24,68 +40,105 @@ def parse_numeric(value):
     except (ValueError, TypeError):
         return pd.NA
 
-def normalize_text_for_match(text):
-    """Normaliza texto para busca: minúsculo, sem acentos, sem não-alfanuméricos."""
-    if not isinstance(text, str): text = str(text)
+# --- Sondagem do Cabeçalho (leitura parcial do Excel) ---
+
+def _valor_celula_texto(valor):
+    """Converte valor de célula openpyxl para texto como o pandas faria com dtype=str (None = vazio)."""
+    if valor is None or (isinstance(valor, str) and valor == ''):
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+def sondar_cabecalho_excel(input_file_object, possible_headers, min_matches, keyword_coluna='quadra', max_linhas=10):
+    """
+    Lê apenas as primeiras `max_linhas` linhas do Excel (openpyxl read_only) e localiza:
+      - a linha do cabeçalho (>= `min_matches` keywords de `possible_headers`);
+      - a coluna que contém `keyword_coluna` (na linha do cabeçalho ou na anterior).
+    Retorna dict com 'header_row_index' e 'coluna_index' (-1 se não encontrados),
+    'nomes_colunas' (linha do cabeçalho como str, após ffill da coluna encontrada),
+    'valor_inicial_coluna' (último valor da coluna até o cabeçalho, para o ffill
+    dos dados) e 'linhas_lidas'. O stream volta para a posição inicial.
+    """
+    posicao_inicial = input_file_object.tell() if hasattr(input_file_object, 'tell') else None
+    wb = openpyxl.load_workbook(input_file_object, read_only=True, data_only=True, keep_links=False)
     try:
-        text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
-        text = text.lower()
-        text = re.sub(r'[^a-z0-9]', '', text)
-        return text.strip()
-    except Exception:
-        return str(text).lower().strip().replace(' ', '')
-
-def find_column_flexible(df_columns, concept_keywords, concept_name, required=True):
+        ws = wb.active
+        ws.reset_dimensions() # Mesma enumeração de linhas usada pelo pandas (inclui linhas vazias no topo)
+        linhas = []
+        for row in ws.iter_rows(max_row=max_linhas, values_only=True):
+            linhas.append([_valor_celula_texto(v) for v in row])
+    finally:
+        wb.close()
+        if posicao_inicial is not None:
+            input_file_object.seek(posicao_inicial)
+
+    sondagem = {'header_row_index': -1, 'coluna_index': -1, 'nomes_colunas': [],
+                'valor_inicial_coluna': None, 'linhas_lidas': len(linhas)}
+
+    # 1. Linha do cabeçalho
+    for idx, row in enumerate(linhas):
+        row_values_norm = [normalize_text_for_match(v) for v in row if v is not None]
+        if sum(h in row_values_norm for h in possible_headers) >= min_matches:
+            sondagem['header_row_index'] = idx
+            break
+    header_row_index = sondagem['header_row_index']
+    if header_row_index == -1:
+        return sondagem
+
+    # 2. Coluna da keyword (linha anterior ao cabeçalho ou o próprio cabeçalho)
+    keyword_norm = normalize_text_for_match(keyword_coluna)
+    search_rows = [header_row_index] if header_row_index == 0 else [header_row_index-1, header_row_index]
+    for r_idx in search_rows:
+        for c_idx, val in enumerate(linhas[r_idx]):
+            if val is not None and keyword_norm in normalize_text_for_match(val):
+                sondagem['coluna_index'] = c_idx
+                break
+        if sondagem['coluna_index'] != -1: break
+
+    # 3. Nomes das colunas (equivalente a df_raw.iloc[header].astype(str).str.strip() após ffill)
+    nomes = list(linhas[header_row_index])
+    coluna_index = sondagem['coluna_index']
+    if coluna_index != -1:
+        valores_coluna = [r[coluna_index] for r in linhas[:header_row_index + 1] if coluna_index < len(r) and r[coluna_index] is not None]
+        sondagem['valor_inicial_coluna'] = valores_coluna[-1] if valores_coluna else None
+        if nomes[coluna_index] is None:
+            nomes[coluna_index] = sondagem['valor_inicial_coluna']
+    sondagem['nomes_colunas'] = ['nan' if n is None else n.strip() for n in nomes]
+    return sondagem
+
+def ler_dados_apos_cabecalho(input_file_object, sondagem, colunas_usadas):
     """
-    Encontra coluna de forma flexível (case-insensitive, accent-insensitive,
-    space-insensitive, partial match).
+    Lê do Excel apenas as linhas após o cabeçalho e as colunas em `colunas_usadas`
+    (nomes de sondagem['nomes_colunas']). Aplica o ffill da coluna sondada usando o
+    valor que vinha de cima do cabeçalho. Retorna DataFrame com os nomes do cabeçalho.
     """
-    normalized_input_cols = {normalize_text_for_match(col): col for col in df_columns}
-    print(f"  Buscando '{concept_name}': Keywords={concept_keywords}. Colunas Norm.: {list(normalized_input_cols.keys())}")
-    found_col_name = None
-
-    # 1. Match exato normalizado
-    for keyword in concept_keywords:
-        norm_keyword = normalize_text_for_match(keyword)
-        if norm_keyword in normalized_input_cols:
-            found_col_name = normalized_input_cols[norm_keyword]
-            print(f"    -> Match exato norm. '{norm_keyword}' para '{concept_name}'. Col original: '{found_col_name}'")
-            return found_col_name
-
-    # 2. Match parcial normalizado
-    potential_matches = []
-    for keyword in concept_keywords:
-        norm_keyword = normalize_text_for_match(keyword)
-        if not norm_keyword: continue
-        for norm_col, orig_col in normalized_input_cols.items():
-            if not norm_col: continue
-            if norm_keyword in norm_col:
-                 priority = 0 if norm_col.startswith(norm_keyword) else 1
-                 potential_matches.append((priority, orig_col))
-    if potential_matches:
-        potential_matches.sort()
-        found_col_name = potential_matches[0][1]
-        print(f"    -> Melhor match parcial para '{concept_name}'. Col original: '{found_col_name}'")
-        return found_col_name
-
-    # 3. Erro se obrigatório e não encontrado
-    if required:
-        raise ValueError(f"Coluna obrigatória '{concept_name}' não encontrada. Keywords usadas: {concept_keywords}. Colunas originais: {list(df_columns)}")
-    else:
-        print(f"    -> Coluna opcional '{concept_name}' não encontrada.")
-        return None
+    nomes_colunas = sondagem['nomes_colunas']
+    coluna_index = sondagem['coluna_index']
+    posicoes = {}
+    for col in colunas_usadas:
+        if col in posicoes.values(): continue
+        usa_coluna_sondada = coluna_index != -1 and col == nomes_colunas[coluna_index]
+        pos = coluna_index if usa_coluna_sondada else nomes_colunas.index(col)
+        posicoes[pos] = col
+    usecols = sorted(posicoes)
+    try:
+        df_input = pd.read_excel(input_file_object, engine='openpyxl', header=None, dtype=str,
+                                 skiprows=sondagem['header_row_index'] + 1, usecols=usecols)
+    except pd.errors.EmptyDataError:
+        df_input = pd.DataFrame(columns=usecols, dtype=str)
+    df_input = df_input.reindex(columns=usecols)
+    df_input.columns = [posicoes[pos] for pos in usecols]
+
+    if coluna_index in posicoes:
+        col_ffill = posicoes[coluna_index]
+        df_input[col_ffill] = df_input[col_ffill].ffill()
+        if sondagem['valor_inicial_coluna'] is not None:
+            df_input[col_ffill] = df_input[col_ffill].fillna(sondagem['valor_inicial_coluna'])
+    return df_input
 
 # --- Funções Auxiliares para Formatação ---
-
-def normalize_text(text):
-    """Normaliza texto removendo acentos e convertendo para maiúsculas."""
-    if not isinstance(text, str): text = str(text)
-    try:
-        text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
-        return text.upper().strip()
-    except Exception as e:
-        print(f"Aviso: Falha ao normalizar texto '{text}'. Erro: {e}")
-        return str(text).upper().strip()
+# (normalize_text vem de formatadores.normalizacao)
 
 # <<< ADICIONADO >>>
 # Funções auxiliares portadas do tabela_precos_formatador.py para dar suporte ao modo composto.
@@ -124,7 +177,7 @@ def formatar_nome_unidade_composto(row, col_bloco_name, col_quadra_name, col_cas
         
         return f"{prefixo_str}-{quadra_str}-{casa_str}"
     except Exception as e:
-        print(f"AVISO: Erro ao gerar nome de unidade composto: {e}")
+        avisar(logger, "unidades compostas com erro (ERRO_UNIDADE_COMPOSTA)", exemplo=e)
         return "ERRO_UNIDADE_COMPOSTA"
 # <<< FIM ADIÇÃO >>>
 
@@ -150,7 +203,8 @@ def formatar_nome_unidade_generico(row, col_ident_1_name, col_ident_2_name, col_
             ident_2_str_cleaned = re.sub(r'\s?\(PCD\)', '', ident_2_str, flags=re.IGNORECASE).strip()
             return f"{ident_1_str} - {ident_2_str_cleaned}{pcd_suffix}"
         except Exception as e:
-            print(f"Erro formatar_nome_unidade_generico: {e} para {col_ident_1_name}='{ident_1_val}', {col_ident_2_name}='{ident_2_val}'")
+            avisar(logger, "unidades com erro em formatar_nome_unidade_generico (%s)", type(e).__name__,
+                   exemplo=f"{col_ident_1_name}='{ident_1_val}', {col_ident_2_name}='{ident_2_val}'")
             ident_1_s = str(ident_1_val).strip(); ident_2_s = str(ident_2_val).strip()
             ident_2_s_cleaned = re.sub(r'\s?\(PCD\)', '', ident_2_s, flags=re.IGNORECASE).strip()
             return f"{prefixo_1}{ident_1_s} - {prefixo_2} {ident_2_s_cleaned}{pcd_suffix}"
@@ -210,7 +264,7 @@ def format_area(value):
         return f'="{formatted_area}"'
     except (ValueError, TypeError):
         # Se a conversão falhar, retorna vazio
-        print(f"Aviso format_area: Não converteu valor limpo '{s_val}' (original: '{original_value_str}') para float. Retornando vazio.")
+        avisar(logger, "áreas não convertidas para float; retornado vazio (format_area)", exemplo=repr(original_value_str))
         return ''
     
     # <<< ADICIONADO >>>
@@ -241,7 +295,54 @@ def formatar_nome_bloco_saida(bloco_original_valor, prefixo_completo):
             # Fallback em caso de erro na conversão
             return f'="{prefixo_completo} ERRO"'
 
+# --- Versões Vetorizadas (usadas por processar_preco_incorporacao) ---
+# Mesma saída das funções por linha acima, calculada por coluna com
+# str.extract + zero à esquerda + concatenação.
+
+def formatar_nome_bloco_saida_serie(serie_bloco, prefixo_completo):
+    """Versão vetorizada de formatar_nome_bloco_saida."""
+    texto = serie_bloco.astype(str)
+    num_str = formatar_numero_dois_digitos(extrair_primeiro_numero(texto), padrao="00")
+    resultado = '="' + prefixo_completo + ' ' + num_str + '"'
+    return resultado.mask(texto.str.strip().str.upper() == 'US', '="UNID. SOLTAS"')
+
+def formatar_nome_unidade_composto_serie(df, col_bloco_name, col_quadra_name, col_casa_name):
+    """Versão vetorizada de formatar_nome_unidade_composto (BL/US-QD-CS)."""
+    bloco_val = df[col_bloco_name].astype(str)
+    quadra_num = formatar_numero_dois_digitos(extrair_primeiro_numero(df[col_quadra_name]))
+    bloco_num = formatar_numero_dois_digitos(extrair_primeiro_numero(bloco_val))
+    casa_num = formatar_numero_dois_digitos(extrair_primeiro_numero(df[col_casa_name]))
+
+    quadra_str = ('QD' + quadra_num).fillna('QD??')
+    casa_str = ('CS' + casa_num).fillna('CS??')
+    # Regra especial: se o valor do bloco for 'US', o prefixo usa o número da casa
+    prefixo_str = ('BL' + bloco_num).fillna('BL??')
+    prefixo_str = prefixo_str.mask(bloco_val.str.strip().str.upper() == 'US', ('US' + casa_num).fillna('US??'))
+    return prefixo_str + '-' + quadra_str + '-' + casa_str
+
+def formatar_nome_unidade_generico_serie(df, col_ident_1_name, col_ident_2_name, col_tipologia_name, prefixo_1, prefixo_2):
+    """Versão vetorizada de formatar_nome_unidade_generico."""
+    ident_1 = df[col_ident_1_name]
+    ident_2 = df[col_ident_2_name]
+    tipologia = df[col_tipologia_name]
+    is_pcd = (tipologia.notna() & normalizar_texto_serie(tipologia).str.contains('PCD', regex=False)) | \
+             (ident_2.notna() & normalizar_texto_serie(ident_2).str.contains('PCD', regex=False))
+    pcd_suffix = pd.Series('', index=df.index, dtype=object).mask(is_pcd, ' (PCD)')
+
+    ident_1_s = ident_1.astype(str)
+    ident_2_s = ident_2.astype(str)
+    # Sem número, usa o valor original (strip) no lugar do número formatado
+    ident_1_num = formatar_numero_dois_digitos(extrair_primeiro_numero(ident_1_s)).fillna(ident_1_s.str.strip())
+    ident_2_num = formatar_numero_dois_digitos(extrair_primeiro_numero(ident_2_s)).fillna(ident_2_s.str.strip())
+    ident_2_str = (prefixo_2 + ' ' + ident_2_num).str.replace(r'\s?\(PCD\)', '', flags=re.IGNORECASE, regex=True).str.strip()
+    resultado = prefixo_1 + ident_1_num + ' - ' + ident_2_str + pcd_suffix
+
+    valido = ident_1.notna() & (ident_1_s.str.strip() != '') & ident_2.notna() & (ident_2_s.str.strip() != '')
+    return resultado.where(valido, 'UNIDADE_ERRO')
+
 # --- Função Principal para Tabela Incorporação (MODIFICADA) ---
+@cronometrar("preco_incorporacao")
+@agrupar_avisos()
 def processar_preco_incorporacao(input_filepath, selected_valor_column_name):
     """
     Lê Excel incorporação, processa, e retorna StringIO CSV.
@@ -260,6 +361,7 @@ def processar_preco_incorporacao(input_filepath, selected_valor_column_name):
 
         if df_input.empty: raise ValueError("Arquivo vazio ou sem dados após leitura inicial.")
         print(f"(Preço Incorporação) Lidas {len(df_input)} linhas válidas.")
+        marcar_etapa("leitura", linhas=len(df_input))
         df_input.columns = df_input.columns.str.strip(); print(f"Colunas: {df_input.columns.tolist()}")
         # 2. Busca Flexível se a coluna selecionada não for encontrada
         if selected_valor_column_name not in df_input.columns:
@@ -283,11 +385,15 @@ def processar_preco_incorporacao(input_filepath, selected_valor_column_name):
 
         # 2. DETECÇÃO DE MODO: Padrão vs. Composto
         print("--- Verificando modo de operação (Padrão vs. Composto) ---")
-        col_bloco_comp = find_column_flexible(df_input.columns, ['bloco'], 'BLOCO (modo composto)', required=False)
-        col_quadra_comp = find_column_flexible(df_input.columns, ['quadra'], 'QUADRA (modo composto)', required=False)
-        col_casa_comp = find_column_flexible(df_input.columns, ['casa'], 'CASA (modo composto)', required=False)
+        colunas_compostas, _ = resolver_colunas(df_input.columns, {
+            'BLOCO (modo composto)': (['bloco'], False),
+            'QUADRA (modo composto)': (['quadra'], False),
+            'CASA (modo composto)': (['casa'], False),
+        })
+        col_bloco_comp, col_quadra_comp, col_casa_comp = colunas_compostas.values()
         
         is_composite_mode = all([col_bloco_comp, col_quadra_comp, col_casa_comp])
+        marcar_etapa("colunas")
 
         if is_composite_mode:
             print(">>> MODO COMPOSTO DETECTADO (BL-QD-CS).")
@@ -306,23 +412,25 @@ def processar_preco_incorporacao(input_filepath, selected_valor_column_name):
 
             # <<< MODIFICADO >>>
             # Usa a nova função para formatar a coluna BLOCO
-            df_output['BLOCO'] = df_input[col_bloco_comp].apply(
-                formatar_nome_bloco_saida,
+            df_output['BLOCO'] = formatar_nome_bloco_saida_serie(
+                df_input[col_bloco_comp],
                 prefixo_completo="BLOCO" # No modo composto, o prefixo padrão é sempre BLOCO
             )
             # <<< FIM DA MODIFICAÇÃO >>>
 
-            df_output['UNIDADE'] = df_input.apply(
-                formatar_nome_unidade_composto,
-                axis=1,
-                args=(col_bloco_comp, col_quadra_comp, col_casa_comp)
+            df_output['UNIDADE'] = formatar_nome_unidade_composto_serie(
+                df_input, col_bloco_comp, col_quadra_comp, col_casa_comp
             )
 
         else: # MODO PADRÃO
             print(">>> MODO PADRÃO DETECTADO.")
-            col_ident_1 = find_column_flexible(df_input.columns, ['bloco', 'quadra'], 'IDENTIFICADOR 1 (Bloco/Quadra)', required=True)
-            col_ident_2 = find_column_flexible(df_input.columns, ['apt', 'apto', 'apartamento', 'unidade', 'casa'], 'IDENTIFICADOR 2 (Apto/Casa/Unidade)', required=True)
-            col_tipologia = find_column_flexible(df_input.columns, ['tipologia', 'tipo da unidade', 'descricao', 'descrição'], 'TIPOLOGIA', required=True)
+            colunas_padrao, relatorio_colunas = resolver_colunas(df_input.columns, {
+                'IDENTIFICADOR 1 (Bloco/Quadra)': (['bloco', 'quadra'], True),
+                'IDENTIFICADOR 2 (Apto/Casa/Unidade)': (['apt', 'apto', 'apartamento', 'unidade', 'casa'], True),
+                'TIPOLOGIA': (['tipologia', 'tipo da unidade', 'descricao', 'descrição'], True),
+            })
+            for correspondencia in relatorio_colunas: print(f"  {correspondencia}")
+            col_ident_1, col_ident_2, col_tipologia = colunas_padrao.values()
 
             norm_col_ident_1 = normalize_text_for_match(col_ident_1)
             norm_col_ident_2 = normalize_text_for_match(col_ident_2)
@@ -351,20 +459,18 @@ def processar_preco_incorporacao(input_filepath, selected_valor_column_name):
 
             # <<< MODIFICADO >>>
             # Usa a nova função para formatar a coluna BLOCO
-            df_output['BLOCO'] = df_input[col_ident_1].apply(
-                formatar_nome_bloco_saida,
+            df_output['BLOCO'] = formatar_nome_bloco_saida_serie(
+                df_input[col_ident_1],
                 prefixo_completo=prefixo_coluna_bloco_completo
             )
             # <<< FIM DA MODIFICAÇÃO >>>
 
-            df_output['UNIDADE'] = df_input.apply(
-                formatar_nome_unidade_generico,
-                axis=1,
-                args=(col_ident_1, col_ident_2, col_tipologia, prefixo_unidade_ident_1, prefixo_unidade_ident_2)
+            df_output['UNIDADE'] = formatar_nome_unidade_generico_serie(
+                df_input, col_ident_1, col_ident_2, col_tipologia, prefixo_unidade_ident_1, prefixo_unidade_ident_2
             )
 
         # Processamento Comum para Ambos os Modos
-        df_output['VALOR DO IMOVEL'] = df_input[selected_valor_column_name].apply(format_brl)
+        df_output['VALOR DO IMOVEL'] = format_brl_serie(df_input[selected_valor_column_name])
         df_output['ETAPA'] = 'ETAPA 01'
         df_output = df_output[['ETAPA', 'BLOCO', 'UNIDADE', 'VALOR DO IMOVEL']]
 
@@ -372,10 +478,12 @@ def processar_preco_incorporacao(input_filepath, selected_valor_column_name):
         df_output = df_output[~df_output['UNIDADE'].str.contains("ERRO", na=False)]
         print(f"Linhas após filtrar erros de unidade: {len(df_output)}")
         if df_output.empty: raise ValueError("Nenhuma unidade pôde ser formatada corretamente.")
-        
+        marcar_etapa("transformacao", linhas=len(df_output))
+
         output_csv = io.StringIO()
         df_output.to_csv(output_csv, sep=';', encoding='utf-8-sig', index=False, decimal=',', quoting=csv.QUOTE_MINIMAL)
         output_csv.seek(0)
+        marcar_etapa("escrita")
         print("(Preço Incorporação) Processamento concluído.")
         return output_csv
 
@@ -390,6 +498,8 @@ def processar_preco_incorporacao(input_filepath, selected_valor_column_name):
 
 
 # --- Função para Tabela Lote à Vista (COM DEBUG E pd.to_numeric na Quadra) ---
+@cronometrar("preco_lote_avista")
+@agrupar_avisos()
 def processar_preco_lote_avista(input_file_object):
     """
     Lê Excel lote à vista lidando com célula de Quadra mesclada,
@@ -397,99 +507,82 @@ def processar_preco_lote_avista(input_file_object):
     """
     print(f"(Preço Lote Avista) Iniciando processamento com leitura revisada.")
     try:
-        # 1. Leitura Inicial SEM Cabeçalho/Skip
+        # 1. Sondagem do Cabeçalho (lê só as primeiras linhas, procurando por 'LOTE' ou 'Tipo')
+        possible_headers = ['lote', 'tipo', 'area', 'valor'] # Keywords para identificar header
         try:
-            # Lê tudo, sem assumir cabeçalho, convertendo para string
-            df_raw = pd.read_excel(input_file_object, engine='openpyxl', header=None, dtype=str)
-            print(f"(Preço Lote Avista) Lidas {len(df_raw)} linhas brutas.")
+            # Exige pelo menos 2 matches nas primeiras 10 linhas
+            sondagem = sondar_cabecalho_excel(input_file_object, possible_headers, min_matches=2)
         except Exception as e_read:
             raise ValueError(f"Falha ao ler o stream/objeto Excel inicial.") from e_read
 
-        if df_raw.empty:
+        if sondagem['linhas_lidas'] == 0:
              raise ValueError("Arquivo Excel parece estar vazio.")
 
-        # 2. Encontrar Linha do Cabeçalho Real (procurando por 'LOTE' ou 'Tipo')
-        header_row_index = -1
-        possible_headers = ['lote', 'tipo', 'area', 'valor'] # Keywords para identificar header
-        for idx, row in df_raw.head(10).iterrows(): # Procura nas primeiras 10 linhas
-            row_values_norm = [normalize_text_for_match(str(v)) for v in row.values if pd.notna(v)]
-            # Verifica se a maioria das keywords do header estão na linha
-            if sum(h in row_values_norm for h in possible_headers) >= 2: # Exige pelo menos 2 matches
-                header_row_index = idx
-                print(f"Cabeçalho real encontrado na linha índice: {header_row_index}")
-                break
+        header_row_index = sondagem['header_row_index']
         if header_row_index == -1:
             raise ValueError("Não foi possível encontrar a linha do cabeçalho (procurando por LOTE, Tipo, Area, Valor).")
+        print(f"Cabeçalho real encontrado na linha índice: {header_row_index}")
 
-        # 3. Encontrar Coluna da Quadra nos dados brutos (procurando por 'QUADRA')
-        quadra_col_index = -1
-        keyword_quadra = normalize_text_for_match('quadra')
-        # Procura na linha ANTES do cabeçalho ou na linha do cabeçalho por 'QUADRA'
-        search_rows = [header_row_index] if header_row_index == 0 else [header_row_index-1, header_row_index]
-        for r_idx in search_rows:
-             if r_idx < 0: continue
-             for c_idx, val in df_raw.iloc[r_idx].items():
-                 if pd.notna(val) and keyword_quadra in normalize_text_for_match(str(val)):
-                     quadra_col_index = c_idx
-                     print(f"Coluna da Quadra encontrada no índice: {quadra_col_index}")
-                     break
-             if quadra_col_index != -1: break
+        # 2. Coluna da Quadra (na linha ANTES do cabeçalho ou na linha do cabeçalho)
+        quadra_col_index = sondagem['coluna_index']
         if quadra_col_index == -1:
              raise ValueError("Não foi possível encontrar a coluna que contém 'QUADRA'.")
+        print(f"Coluna da Quadra encontrada no índice: {quadra_col_index}")
+        marcar_etapa("sondagem")
 
-        # 4. Aplicar ffill na Coluna da Quadra nos Dados Brutos
-        print(f"Aplicando ffill na coluna bruta índice {quadra_col_index}")
-        df_raw[quadra_col_index] = df_raw[quadra_col_index].ffill()
-        # --- DEBUG ---
-        print("Valores da coluna Quadra BRUTA após ffill (linhas prox. ao header):")
-        print(df_raw[[quadra_col_index]].iloc[header_row_index+1 : header_row_index+6].to_string())
-        # --- FIM DEBUG ---
-
-        # 5. Criar DataFrame Limpo (df_input)
-        # Pega os nomes das colunas da linha do cabeçalho encontrada
-        new_columns = df_raw.iloc[header_row_index].astype(str).str.strip()
-        # Cria o novo DataFrame começando da linha APÓS o cabeçalho
-        df_input = df_raw.iloc[header_row_index + 1:].copy()
-        df_input.columns = new_columns # Define os nomes corretos das colunas
-        df_input = df_input.reset_index(drop=True) # Reseta o índice
-
-        # 6. Identificar Colunas Essenciais (AGORA no df_input limpo)
-        print("--- Buscando Colunas no DF Limpo ---")
-        # Usa o nome da coluna encontrado na etapa 3 como a coluna da quadra
+        # 3. Identificar Colunas Essenciais (pelos nomes do cabeçalho sondado)
+        print("--- Buscando Colunas no Cabeçalho ---")
+        new_columns = sondagem['nomes_colunas']
         col_quadra = new_columns[quadra_col_index] # Pega o NOME da coluna Quadra
-        col_lote = find_column_flexible(df_input.columns, ['lote', 'lt', 'unidade'], 'LOTE', required=True)
-        col_area = find_column_flexible(df_input.columns, ['area', 'área', 'area privativa', 'área privativa', 'metragem'], 'ÁREA', required=True)
-        col_valor = find_column_flexible(df_input.columns, ['valor a vista', 'valor à vista', 'preco a vista', 'preço à vista', 'valor avista', 'valor com registro', 'valor'], 'VALOR À VISTA', required=True)
+        colunas_lote, relatorio_colunas = resolver_colunas(new_columns, {
+            'LOTE': (['lote', 'lt', 'unidade'], True),
+            'ÁREA': (['area', 'área', 'area privativa', 'área privativa', 'metragem'], True),
+            'VALOR À VISTA': (['valor a vista', 'valor à vista', 'preco a vista', 'preço à vista', 'valor avista', 'valor com registro', 'valor'], True),
+        })
+        for correspondencia in relatorio_colunas: print(f"  {correspondencia}")
+        col_lote, col_area, col_valor = colunas_lote.values()
         print("--- Fim da Busca ---")
+        marcar_etapa("colunas")
+
+        # 4. Leitura dos Dados (só linhas após o cabeçalho e colunas usadas; ffill da Quadra incluso)
+        try:
+            df_input = ler_dados_apos_cabecalho(input_file_object, sondagem, [col_quadra, col_lote, col_area, col_valor])
+            print(f"(Preço Lote Avista) Lidas {len(df_input)} linhas de dados.")
+        except Exception as e_read:
+            raise ValueError(f"Falha ao ler o stream/objeto Excel inicial.") from e_read
+        marcar_etapa("leitura", linhas=len(df_input))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Valores da coluna Quadra após ffill (primeiras linhas):\n%s",
+                         df_input[[col_quadra]].head(5).to_string())
 
-        # 7. Remover Linhas Inválidas (onde Lote é NaN/vazio) - APÓS ffill da Quadra
+        # 5. Remover Linhas Inválidas (onde Lote é NaN/vazio) - APÓS ffill da Quadra
         print(f"Linhas antes de dropna(subset=[{col_lote}]): {len(df_input)}")
         df_input = df_input.dropna(subset=[col_lote]).reset_index(drop=True)
         print(f"Linhas após dropna(subset=[{col_lote}]): {len(df_input)}")
         if df_input.empty:
             raise ValueError("Nenhuma linha com valor na coluna Lote encontrada.")
 
-        # 8. Construir DataFrame de Saída
+        # 6. Construir DataFrame de Saída
         df_output = pd.DataFrame(index=df_input.index)
 
-        # 8.1. Coluna BLOCO (formatada "QUADRA XX" e proteção CSV)
+        # 6.1. Coluna BLOCO (formatada "QUADRA XX" e proteção CSV)
         quadra_num_extraido = df_input[col_quadra].fillna('').astype(str).str.extract(r'(\d+)', expand=False)
         quadra_int = pd.to_numeric(quadra_num_extraido, errors='coerce').fillna(0).astype(int)
         quadra_formatada_num = quadra_int.apply(lambda x: f"{x:02d}")
         df_output['BLOCO'] = quadra_formatada_num.apply(lambda x: f'="QUADRA {x}"')
 
-        # 8.2. Coluna UNIDADE (formatada "QDXX - LOTE YY")
+        # 6.2. Coluna UNIDADE (formatada "QDXX - LOTE YY")
         lote_formatado_num = df_input[col_lote].fillna('').astype(str).str.extract(r'(\d+)', expand=False).fillna('0').astype(int).apply(lambda x: f"{x:02d}")
         df_output['UNIDADE'] = "QD" + quadra_formatada_num + " - LOTE " + lote_formatado_num
 
-        # 8.3. Coluna VALOR À VISTA (formatada como moeda BRL) e ÁREA PRIVATIVA
+        # 6.3. Coluna VALOR À VISTA (formatada como moeda BRL) e ÁREA PRIVATIVA
         df_output['ÁREA PRIVATIVA'] = df_input[col_area].apply(format_area)
         df_output['VALOR À VISTA'] = df_input[col_valor].apply(format_brl)
 
-        # 8.4. Coluna ETAPA (fixa)
+        # 6.4. Coluna ETAPA (fixa)
         df_output['ETAPA'] = 'ETAPA 01'
 
-        # 9. FILTRAGEM FINAL: Remover linhas com Lote '00' E Valor Vazio
+        # 7. FILTRAGEM FINAL: Remover linhas com Lote '00' E Valor Vazio
         print(f"Linhas antes da filtragem final: {len(df_output)}")
         is_lote_00 = lote_formatado_num == "00"
         is_valor_vazio = df_output['VALOR À VISTA'] == ''
@@ -497,17 +590,19 @@ def processar_preco_lote_avista(input_file_object):
         df_output_filtrado = df_output[~condicao_excluir].copy()
         print(f"Linhas após a filtragem final: {len(df_output_filtrado)}")
 
-        # 10. Selecionar e Reordenar Colunas Finais
+        # 8. Selecionar e Reordenar Colunas Finais
         colunas_finais = ['ETAPA', 'BLOCO', 'UNIDADE', 'ÁREA PRIVATIVA', 'VALOR À VISTA']
         df_output_final = df_output_filtrado[colunas_finais]
         print(f"Colunas finais selecionadas: {df_output_final.columns.tolist()}")
+        marcar_etapa("transformacao", linhas=len(df_output_final))
 
-        # 11. Gerar CSV em memória
+        # 9. Gerar CSV em memória
         output_csv = io.StringIO()
         # --- MODIFICADO: Voltar para QUOTE_MINIMAL, pois format_area agora força texto com ="..." ---
         df_output_final.to_csv(output_csv, sep=';', encoding='utf-8-sig', index=False, decimal=',', quoting=csv.QUOTE_MINIMAL)
         # --- FIM MODIFICADO ---
         output_csv.seek(0)
+        marcar_etapa("escrita")
 
         print("(Preço Lote Avista) Processamento concluído. CSV gerado.")
         return output_csv
@@ -516,6 +611,8 @@ def processar_preco_lote_avista(input_file_object):
     except Exception as e: print(f"(Preço Lote Avista) ERRO INESPERADO: {e}"); traceback.print_exc(); raise RuntimeError(f"Erro inesperado (Lote Avista): {e}") from e
 
 # --- Função Placeholder para Tabela Lote Parcelado ---
+@cronometrar("preco_lote_parcelado")
+@agrupar_avisos()
 def processar_preco_lote_parcelado(input_file_object, num_meses, juros_anual_perc, num_anos_parcelas): # <<< Assinatura Atualizada
     """
     Lê Excel lote parcelado, calcula parcelas até o ano especificado pelo usuário,
@@ -534,52 +631,47 @@ def processar_preco_lote_parcelado(input_file_object, num_meses, juros_anual_per
         juros_multiplier = 1.0 + (juros_anual_perc / 100.0)
         print(f"Multiplicador de juros anual calculado: {juros_multiplier:.4f}")
 
-        # 1. Leitura do Excel (leitura revisada para merged cells)
-        linhas_para_ignorar = 2
+        # 1. Sondagem do Cabeçalho e Coluna Quadra (só as primeiras linhas do Excel)
+        possible_headers = ['lote', 'tipo', 'area', 'valor', 'entrada'] # Keywords para header
         try:
-            df_raw = pd.read_excel(input_file_object, engine='openpyxl', header=None, dtype=str)
-            if df_raw.empty: raise ValueError("Arquivo Excel parece estar vazio.")
-            print(f"(Preço Lote Parcelado) Lidas {len(df_raw)} linhas brutas.")
+            sondagem = sondar_cabecalho_excel(input_file_object, possible_headers, min_matches=3)
         except Exception as e_read:
             raise ValueError(f"Falha ao ler o stream/objeto Excel inicial (Lote Parcelado).") from e_read
+        if sondagem['linhas_lidas'] == 0: raise ValueError("Arquivo Excel parece estar vazio.")
 
-        # 2. Encontrar Linha do Cabeçalho e Coluna Quadra
-        header_row_index = -1
-        possible_headers = ['lote', 'tipo', 'area', 'valor', 'entrada'] # Keywords para header
-        for idx, row in df_raw.head(10).iterrows():
-            row_values_norm = [normalize_text_for_match(str(v)) for v in row.values if pd.notna(v)]
-            if sum(h in row_values_norm for h in possible_headers) >= 3: header_row_index = idx; break
+        header_row_index = sondagem['header_row_index']
         if header_row_index == -1: raise ValueError("Não foi possível encontrar a linha do cabeçalho.")
         print(f"Cabeçalho encontrado índice: {header_row_index}")
 
-        quadra_col_index = -1; keyword_quadra = normalize_text_for_match('quadra')
-        search_rows = [header_row_index] if header_row_index == 0 else [header_row_index-1, header_row_index]
-        for r_idx in search_rows:
-             if r_idx < 0: continue
-             for c_idx, val in df_raw.iloc[r_idx].items():
-                 if pd.notna(val) and keyword_quadra in normalize_text_for_match(str(val)): quadra_col_index = c_idx; break
-             if quadra_col_index != -1: break
+        quadra_col_index = sondagem['coluna_index']
         if quadra_col_index == -1: raise ValueError("Não foi possível encontrar a coluna 'QUADRA'.")
         print(f"Coluna Quadra índice: {quadra_col_index}")
+        marcar_etapa("sondagem")
 
-        # 3. Aplicar ffill na Quadra nos Dados Brutos
-        print(f"Aplicando ffill na coluna bruta índice {quadra_col_index}")
-        df_raw[quadra_col_index] = df_raw[quadra_col_index].ffill()
-
-        # 4. Criar DataFrame Limpo (df_input)
-        new_columns = df_raw.iloc[header_row_index].astype(str).str.strip(); df_input = df_raw.iloc[header_row_index + 1:].copy(); df_input.columns = new_columns; df_input = df_input.reset_index(drop=True)
-        print(f"Colunas limpas: {df_input.columns.tolist()}")
-
-        # 5. Identificar Colunas Essenciais no DF Limpo
+        # 2. Identificar Colunas Essenciais no Cabeçalho
+        new_columns = sondagem['nomes_colunas']
+        print(f"Colunas limpas: {new_columns}")
         print("--- Buscando Colunas (Lote Parcelado) ---")
         col_quadra = new_columns[quadra_col_index] # Pega o nome da coluna Quadra
-        col_lote = find_column_flexible(df_input.columns, ['lote', 'lt', 'unidade'], 'LOTE', required=True)
-        # Busca coluna de VALOR (total) - pode ser só "Valor"
-        col_valor_total = find_column_flexible(df_input.columns, ['valor'], 'VALOR (Total)', required=True)
-        col_entrada = find_column_flexible(df_input.columns, ['entrada', 'sinal'], 'ENTRADA', required=True)
+        colunas_lote, relatorio_colunas = resolver_colunas(new_columns, {
+            'LOTE': (['lote', 'lt', 'unidade'], True),
+            'VALOR (Total)': (['valor'], True), # Coluna de VALOR (total) - pode ser só "Valor"
+            'ENTRADA': (['entrada', 'sinal'], True),
+        })
+        for correspondencia in relatorio_colunas: print(f"  {correspondencia}")
+        col_lote, col_valor_total, col_entrada = colunas_lote.values()
         print("--- Fim da Busca ---")
+        marcar_etapa("colunas")
+
+        # 3. Leitura dos Dados (só linhas após o cabeçalho e colunas usadas; ffill da Quadra incluso)
+        try:
+            df_input = ler_dados_apos_cabecalho(input_file_object, sondagem, [col_quadra, col_lote, col_valor_total, col_entrada])
+            print(f"(Preço Lote Parcelado) Lidas {len(df_input)} linhas de dados.")
+        except Exception as e_read:
+            raise ValueError(f"Falha ao ler o stream/objeto Excel inicial (Lote Parcelado).") from e_read
+        marcar_etapa("leitura", linhas=len(df_input))
 
-        # 6. Remover Linhas Inválidas (sem Lote)
+        # 4. Remover Linhas Inválidas (sem Lote)
         print(f"Linhas antes dropna(lote): {len(df_input)}")
         df_input = df_input.dropna(subset=[col_lote]).reset_index(drop=True)
         print(f"Linhas após dropna(lote): {len(df_input)}")
@@ -589,10 +681,10 @@ def processar_preco_lote_parcelado(input_file_object, num_meses, juros_anual_per
             print(f"AVISO: Preenchendo NaNs restantes em '{col_quadra}'")
             df_input[col_quadra] = df_input[col_quadra].fillna('QUADRA_DESCONHECIDA')
 
-        # 7. Construir DataFrame de Saída e Calcular Parcelas
+        # 5. Construir DataFrame de Saída e Calcular Parcelas
         df_output = pd.DataFrame(index=df_input.index)
 
-        # 7.1 Colunas Fixas/Formatadas
+        # 5.1 Colunas Fixas/Formatadas
         df_output['ETAPA'] = 'ETAPA 01'
         quadra_num_extraido = df_input[col_quadra].fillna('').astype(str).str.extract(r'(\d+)', expand=False)
         quadra_int = pd.to_numeric(quadra_num_extraido, errors='coerce').fillna(0).astype(int); quadra_formatada_num = quadra_int.apply(lambda x: f"{x:02d}")
@@ -602,15 +694,16 @@ def processar_preco_lote_parcelado(input_file_object, num_meses, juros_anual_per
         df_output['VALOR DO IMOVEL'] = df_input[col_valor_total].apply(format_brl) # Usa format_brl corrigido
         df_output['SINAL 1'] = df_input[col_entrada].apply(format_brl) # Usa format_brl corrigido
 
-        # 7.2 Cálculos de Parcelas
+        # 5.2 Cálculos de Parcelas
         # Obter valores NUMÉRICOS para cálculo
         valor_numeric = df_input[col_valor_total].apply(parse_numeric)
         entrada_numeric = df_input[col_entrada].apply(parse_numeric)
         # Tratar casos onde valor ou entrada não puderam ser convertidos (pd.NA)
         valor_numeric = valor_numeric.fillna(0)
         entrada_numeric = entrada_numeric.fillna(0)
-        print("Valores numéricos para cálculo (primeiras linhas):")
-        print(pd.DataFrame({'Valor': valor_numeric, 'Entrada': entrada_numeric}).head().to_string())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Valores numéricos para cálculo (primeiras linhas):\n%s",
+                         pd.DataFrame({'Valor': valor_numeric, 'Entrada': entrada_numeric}).head().to_string())
 
         # Calcular Mensal Ano 01
         saldo_devedor = valor_numeric - entrada_numeric
@@ -629,7 +722,7 @@ def processar_preco_lote_parcelado(input_file_object, num_meses, juros_anual_per
             mensal_anterior_numeric = mensal_atual_numeric # Atualiza para o próximo cálculo
         # --- FIM LOOP MODIFICADO ---
 
-        # 8. FILTRAGEM FINAL: Remover linhas com Lote '00' E VALOR TOTAL vazio/inválido
+        # 6. FILTRAGEM FINAL: Remover linhas com Lote '00' E VALOR TOTAL vazio/inválido
         print(f"Linhas antes da filtragem final: {len(df_output)}")
         is_lote_00 = lote_formatado_num == "00"
         # Checa se VALOR DO IMOVEL (formatado) é vazio
@@ -638,7 +731,7 @@ def processar_preco_lote_parcelado(input_file_object, num_meses, juros_anual_per
         df_output_filtrado = df_output[~condicao_excluir].copy()
         print(f"Linhas após a filtragem final: {len(df_output_filtrado)}")
 
-        # 9. Selecionar e Reordenar Colunas Finais (MODIFICADO)
+        # 7. Selecionar e Reordenar Colunas Finais (MODIFICADO)
         # Gera a lista de colunas MENSAL ANO dinamicamente até o ano especificado
         colunas_mensais = [f'MENSAL ANO {i:02d}' for i in range(1, num_anos_parcelas + 1)]
         colunas_finais_desejadas = [
@@ -649,11 +742,13 @@ def processar_preco_lote_parcelado(input_file_object, num_meses, juros_anual_per
         colunas_existentes = [col for col in colunas_finais_desejadas if col in df_output_filtrado.columns]
         df_output_final = df_output_filtrado[colunas_existentes]
         print(f"Colunas finais selecionadas: {df_output_final.columns.tolist()}")
+        marcar_etapa("transformacao", linhas=len(df_output_final))
 
-        # 10. Gerar CSV em memória
+        # 8. Gerar CSV em memória
         output_csv = io.StringIO()
         df_output_final.to_csv(output_csv, sep=';', encoding='utf-8-sig', index=False, decimal=',', quoting=csv.QUOTE_MINIMAL)
         output_csv.seek(0)
+        marcar_etapa("escrita")
 
         print("(Preço Lote Parcelado) Processamento concluído. CSV gerado.")
         return output_csv # Retorna StringIO para a rota tratar
@@ -4,7 +4,6 @@ import pandas as pd
 import io
 import traceback
 import re
-import unicodedata
 import requests
 
 # Imports para estilização com openpyxl
@@ -17,6 +16,14 @@ from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.table import Table, TableStyleInfo  # Para Tabelas do Excel
 from openpyxl import Workbook  # Para criar Excel de mensagem de erro
 
+from formatadores.colunas import resolver_colunas
+from formatadores.logs import agrupar_avisos, avisar, obter_logger
+from formatadores.metricas import cronometrar, etapa, marcar_etapa
+from formatadores.normalizacao import normalizar_para_busca
+from formatadores.progresso import reportar_progresso
+
+logger = obter_logger(__name__)
+
 # Configurações de API por base
 API_CONFIGS = {
     "VCA": {
@@ -50,76 +57,14 @@ def set_base(base_name):
         raise ValueError(f"Base '{base_name}' não configurada")
 
 
-# --- Funções Auxiliares (find_column_flexible, normalize_text_for_match) ---
+# --- Funções Auxiliares (busca de colunas, normalize_text_for_match) ---
+# Aqui a normalização mantém os espaços internos e, entre matches parciais, o
+# nome de coluna mais curto ganha (ver formatadores.colunas).
+OPCOES_BUSCA_COLUNAS = {"manter_espacos": True, "desempate_por_tamanho": True}
+
+
 def normalize_text_for_match(text):
-    if not isinstance(text, str):
-        text = str(text)
-    try:
-        text = (
-            unicodedata.normalize("NFKD", text)
-            .encode("ASCII", "ignore")
-            .decode("ASCII")
-        )
-        text = text.lower()
-        # Mantém espaços para melhor correspondência, remove outros caracteres não alfanuméricos
-        text = re.sub(r"[^a-z0-9\s]", "", text)
-        return text.strip()
-    except Exception:
-        # Fallback muito básico se a normalização falhar
-        return str(text).lower().strip().replace(" ", "")
-
-
-def find_column_flexible(df_columns, concept_keywords, concept_name, required=True):
-    normalized_input_cols = {normalize_text_for_match(col): col for col in df_columns}
-    # print(f"  Buscando '{concept_name}': Keywords={concept_keywords}. Colunas Norm.: {list(normalized_input_cols.keys())}") # Debug
-    found_col_name = None
-
-    # 1. Match exato normalizado
-    for keyword in concept_keywords:
-        norm_keyword = normalize_text_for_match(keyword)
-        if norm_keyword in normalized_input_cols:
-            found_col_name = normalized_input_cols[norm_keyword]
-            # print(f"    -> Match exato norm. '{norm_keyword}' para '{concept_name}'. Col original: '{found_col_name}'")
-            return found_col_name
-
-    # 2. Match parcial normalizado (se não houve exato)
-    # Prioriza keywords que estão no início do nome da coluna normalizada,
-    # depois keywords que estão contidas, e por fim, considera o comprimento da coluna.
-    potential_matches = []
-    for keyword in concept_keywords:
-        norm_keyword = normalize_text_for_match(keyword)
-        if not norm_keyword:
-            continue  # Pula keywords vazias após normalização
-
-        for norm_col, orig_col in normalized_input_cols.items():
-            if not norm_col:
-                continue  # Pula colunas vazias após normalização
-
-            if norm_keyword in norm_col:
-                # Prioridade: 0 se começa, 1 se contém.
-                priority = 0 if norm_col.startswith(norm_keyword) else 1
-                potential_matches.append(
-                    (priority, len(norm_col), orig_col)
-                )  # (prioridade, comprimento da coluna, nome original)
-                # Debug: mostra candidatos
-                # print(f"    -> Match parcial candidato: '{keyword}' em '{orig_col}' (Norm: '{norm_keyword}' em '{norm_col}') Prio:{priority}, Len:{len(norm_col)}")
-
-    if potential_matches:
-        potential_matches.sort()  # Ordena por prioridade (0 vem primeiro), depois por comprimento (menor vem primeiro)
-        found_col_name = potential_matches[0][
-            2
-        ]  # Pega o nome original da melhor correspondência
-        # print(f"    -> Melhor match parcial para '{concept_name}'. Col original: '{found_col_name}'")
-        return found_col_name
-
-    if required:
-        raise ValueError(
-            f"Coluna obrigatória '{concept_name}' não encontrada. Keywords usadas: {concept_keywords}. Colunas originais: {list(df_columns)}"
-        )
-    else:
-        # Se não for obrigatório, apenas informa e retorna None
-        # print(f"    -> Coluna opcional '{concept_name}' não encontrada.")
-        return None
+    return normalizar_para_busca(text, manter_espacos=True)
 
 
 # --- Fim Funções Auxiliares ---
@@ -129,7 +74,9 @@ def buscar_empreendimentos_api():
     """Busca todos os empreendimentos da API e retorna um dicionário {nome: id}"""
     url = f"{get_base_url()}/api/v1/cvbot/empreendimentos"
     try:
-        response = requests.get(url, headers=get_api_headers())
+        with etapa("api") as medida:
+            response = requests.get(url, headers=get_api_headers())
+            medida.bytes_entrada = len(response.content)
         response.raise_for_status()
         empreendimentos = response.json()
         return {emp["nome"].strip(): emp["idempreendimento"] for emp in empreendimentos}
@@ -153,7 +100,9 @@ def buscar_dados_empreendimento(id_empreendimento):
         
         # Passo 1: Busca lista de tabelas ativas
         url_tabelas = f"{base_url}/api/v1/cadastros/empreendimentos/{id_empreendimento}/tabelasdepreco"
-        response = requests.get(url_tabelas, headers=headers, timeout=10)
+        with etapa("api") as medida:
+            response = requests.get(url_tabelas, headers=headers, timeout=10)
+            medida.bytes_entrada = len(response.content)
 
         if response.status_code != 200 or not response.text.strip():
             _cache_empreendimentos[id_empreendimento] = []
@@ -169,7 +118,9 @@ def buscar_dados_empreendimento(id_empreendimento):
         for tabela in tabelas:
             id_tabela = tabela.get("idtabela")
             url_precos = f"{base_url}/api/v1/cv/tabelasdepreco?idempreendimento={id_empreendimento}&idtabela={id_tabela}"
-            response_precos = requests.get(url_precos, headers=headers, timeout=10)
+            with etapa("api") as medida:
+                response_precos = requests.get(url_precos, headers=headers, timeout=10)
+                medida.bytes_entrada = len(response_precos.content)
 
             if response_precos.status_code == 200 and response_precos.text.strip():
                 dados_precos = response_precos.json()
@@ -177,11 +128,11 @@ def buscar_dados_empreendimento(id_empreendimento):
                     todas_tabelas_dados.append(dados_precos[0])
 
         _cache_empreendimentos[id_empreendimento] = todas_tabelas_dados
-        print(f"  {len(todas_tabelas_dados)} tabela(s) carregada(s)")
+        logger.debug("%d tabela(s) carregada(s) para o empreendimento %s", len(todas_tabelas_dados), id_empreendimento)
         return todas_tabelas_dados
 
     except Exception as e:
-        print(f"  Erro ao buscar dados do empreendimento {id_empreendimento}: {e}")
+        logger.warning("Erro ao buscar dados do empreendimento %s: %s", id_empreendimento, e)
         _cache_empreendimentos[id_empreendimento] = []
         return []
 
@@ -205,9 +156,8 @@ def buscar_valor_e_vigencia_tabela_preco(id_empreendimento, unidade):
             reverse=True,
         )
     except Exception as e:
-        print(
-            f"AVISO: Falha ao ordenar tabelas por data de vigência para empreendimento {id_empreendimento}. Erro: {e}"
-        )
+        avisar(logger, "falhas ao ordenar tabelas por data de vigência do empreendimento %s (%s)",
+               id_empreendimento, type(e).__name__, exemplo=unidade)
     # --- FIM DA MODIFICAÇÃO ---
 
     unidade_normalizada = normalize_text_for_match(str(unidade))
@@ -229,6 +179,7 @@ def buscar_valor_e_vigencia_tabela_preco(id_empreendimento, unidade):
     return None, None
 
 
+@cronometrar("unidades_bloqueadas_leitura")
 def ler_csv_e_extrair_filtros(input_filepath):
     """
     Lê o CSV, identifica colunas de empreendimento e motivo,
@@ -266,19 +217,24 @@ def ler_csv_e_extrair_filtros(input_filepath):
             raise ValueError(
                 "O arquivo CSV está vazio ou não pôde ser lido corretamente."
             )
+        marcar_etapa("leitura", linhas=len(df_input))
 
-        col_empreendimento_nome = find_column_flexible(
+        colunas_entrada, _ = resolver_colunas(
             df_input.columns,
-            ["empreendimento", "projeto", "nome do empreendimento"],
-            "Empreendimento",
-            required=True,
-        )
-        col_motivo_bloqueio_nome = find_column_flexible(
-            df_input.columns,
-            ["motivo do bloqueio", "motivo bloqueio", "motivo"],
-            "Motivo do Bloqueio",
-            required=True,
+            {
+                "Empreendimento": (
+                    ["empreendimento", "projeto", "nome do empreendimento"],
+                    True,
+                ),
+                "Motivo do Bloqueio": (
+                    ["motivo do bloqueio", "motivo bloqueio", "motivo"],
+                    True,
+                ),
+            },
+            **OPCOES_BUSCA_COLUNAS,
         )
+        col_empreendimento_nome = colunas_entrada["Empreendimento"]
+        col_motivo_bloqueio_nome = colunas_entrada["Motivo do Bloqueio"]
 
         placeholder_vazio = "<VAZIO>"
 
@@ -303,6 +259,7 @@ def ler_csv_e_extrair_filtros(input_filepath):
             )
         )
         motivos_unicos = sorted(list(df_input[col_motivo_bloqueio_nome].unique()))
+        marcar_etapa("filtros")
 
         empreendimentos_unicos = [
             emp for emp in empreendimentos_unicos if emp
@@ -330,6 +287,14 @@ def ler_csv_e_extrair_filtros(input_filepath):
         raise
 
 
+def processar_unidades_bloqueadas_na_base(base_name, *args, **kwargs):
+    """processar_unidades_bloqueadas_csv após set_base(base_name); para jobs em outro processo."""
+    set_base(base_name)
+    return processar_unidades_bloqueadas_csv(*args, **kwargs)
+
+
+@cronometrar("unidades_bloqueadas")
+@agrupar_avisos()
 def processar_unidades_bloqueadas_csv(
     df_input,
     col_empreendimento_input,
@@ -358,30 +323,30 @@ def processar_unidades_bloqueadas_csv(
         print(f"  {len(empreendimentos_map)} empreendimentos encontrados na API")
 
     try:
-        col_etapa_input = find_column_flexible(
-            df_input.columns, ["etapa"], "Etapa", required=False
-        )
-        col_bloco_input = find_column_flexible(
-            df_input.columns, ["bloco", "quadra"], "Bloco/Quadra", required=True
-        )
-        col_unidade_input = find_column_flexible(
+        colunas_entrada, relatorio_colunas = resolver_colunas(
             df_input.columns,
-            ["unidade", "lote", "identificacao da unidade", "identificação da unidade"],
-            "Unidade/Lote",
-            required=True,
-        )
-        col_descricao_input = find_column_flexible(
-            df_input.columns,
-            ["descrição", "descricao", "detalhes"],
-            "Descrição",
-            required=False,
-        )
-        col_data_bloqueio_input = find_column_flexible(
-            df_input.columns,
-            ["data do bloqueio", "data bloqueio", "data"],
-            "Data do Bloqueio",
-            required=False,
+            {
+                "Etapa": (["etapa"], False),
+                "Bloco/Quadra": (["bloco", "quadra"], True),
+                "Unidade/Lote": (
+                    ["unidade", "lote", "identificacao da unidade", "identificação da unidade"],
+                    True,
+                ),
+                "Descrição": (["descrição", "descricao", "detalhes"], False),
+                "Data do Bloqueio": (["data do bloqueio", "data bloqueio", "data"], False),
+            },
+            **OPCOES_BUSCA_COLUNAS,
         )
+        for correspondencia in relatorio_colunas:
+            print(f"  {correspondencia}")
+        (
+            col_etapa_input,
+            col_bloco_input,
+            col_unidade_input,
+            col_descricao_input,
+            col_data_bloqueio_input,
+        ) = colunas_entrada.values()
+        marcar_etapa("colunas")
 
         df_filtrado = df_input.copy()
         if empreendimentos_a_ignorar:
@@ -463,7 +428,9 @@ def processar_unidades_bloqueadas_csv(
             sheet_name_output = "Unidades Bloqueadas"
             empreendimento_style_info = []
 
+            total_emps = len(empreendimentos_no_df_filtrado)
             for i, nome_emp in enumerate(empreendimentos_no_df_filtrado):
+                reportar_progresso(i, total_emps, f"Empreendimento {nome_emp}")
                 df_emp_data_original = df_filtrado[
                     df_filtrado[col_empreendimento_input] == nome_emp
                 ].copy()
@@ -491,13 +458,21 @@ def processar_unidades_bloqueadas_csv(
                 ):
                     id_emp = empreendimentos_map.get(nome_emp.strip())
                     if id_emp:
-                        print(f"  Buscando preços para {nome_emp} (ID: {id_emp})...")
+                        logger.debug("Buscando preços para %s (ID: %s)...", nome_emp, id_emp)
                         # Busca dados do empreendimento uma única vez
                         dados_emp = buscar_dados_empreendimento(id_emp)
                         if dados_emp:
                             valores = []
                             vigencias = []
-                            for idx, row in df_emp_data_original.iterrows():
+                            total_unids = len(df_emp_data_original)
+                            for n_unid, (idx, row) in enumerate(
+                                df_emp_data_original.iterrows()
+                            ):
+                                reportar_progresso(
+                                    i + n_unid / total_unids,
+                                    total_emps,
+                                    f"Empreendimento {nome_emp}: preços",
+                                )
                                 unidade = row.get(col_unidade_input, "")
                                 valor, vigencia = buscar_valor_e_vigencia_tabela_preco(
                                     id_emp, unidade
@@ -509,7 +484,7 @@ def processar_unidades_bloqueadas_csv(
                             df_output_emp["Valor Tabela Atual"] = valores
                             df_output_emp["DATA VIGÊNCIA"] = vigencias
                         else:
-                            print(f"  Dados não disponíveis para {nome_emp}")
+                            avisar(logger, "empreendimentos sem dados de preço na API", exemplo=nome_emp)
                             df_output_emp["Valor Tabela Atual"] = [""] * len(
                                 df_emp_data_original
                             )
@@ -517,7 +492,7 @@ def processar_unidades_bloqueadas_csv(
                                 df_emp_data_original
                             )
                     else:
-                        print(f"  Empreendimento '{nome_emp}' não encontrado na API")
+                        avisar(logger, "empreendimentos não encontrados na API", exemplo=repr(nome_emp))
                         df_output_emp["Valor Tabela Atual"] = [""] * len(
                             df_emp_data_original
                         )
@@ -749,6 +724,7 @@ def processar_unidades_bloqueadas_csv(
                     worksheet.column_dimensions[column_letter].width = adjusted_width
 
         output_excel_stream.seek(0)
+        marcar_etapa("planilha", bytes_saida=output_excel_stream.getbuffer().nbytes)
         print("(Unidades Bloqueadas - Processamento CSV com Tabelas Excel) Concluído.")
         return output_excel_stream
 
@@ -0,0 +1,183 @@
+# formatadores/vetorizacao.py
+
+import numpy as np
+import pandas as pd
+
+from formatadores.normalizacao import (  # noqa: F401
+    normalizar_para_busca_serie as normalizar_texto_busca_serie,
+    normalizar_texto_serie,
+)
+
+# --- Operações Vetorizadas (Series) ---
+# Equivalentes colunares das funções auxiliares aplicadas linha a linha
+# (extract_block_number_safe, f"{int(n):02d}", format_brl). As normalizações
+# de texto em Series (normalize_text, normalize_text_for_match) estão em
+# formatadores.normalizacao e continuam importáveis daqui.
+
+
+def extrair_primeiro_numero(serie):
+    """
+    Extrai o primeiro grupo de dígitos de cada valor (como texto).
+    Valores são convertidos com str() antes, como nas versões por linha
+    (NaN vira 'nan'). Retorna NaN onde não houver dígitos.
+    """
+    return serie.astype(str).str.extract(r"(\d+)", expand=False)
+
+
+def formatar_numero_dois_digitos(digitos, padrao=None):
+    r"""
+    Equivalente vetorizado de f"{int(d):02d}" para uma Series de dígitos
+    (resultado de extrair_primeiro_numero). Remove zeros à esquerda sem
+    converter para int, então não há limite de tamanho.
+    Dígitos Unicode (\d também casa '٣', '３') passam por int(), como na
+    versão por linha.
+    Onde não houver número, usa `padrao` (ou mantém NaN se padrao=None).
+    """
+    sem_zeros = digitos.str.lstrip("0")
+    sem_zeros = sem_zeros.mask(sem_zeros == "", "0")
+    formatado = sem_zeros.str.zfill(2)
+    nao_ascii = digitos.str.contains(r"[^0-9]", regex=True, na=False)
+    if nao_ascii.any():
+        formatado[nao_ascii] = digitos[nao_ascii].map(lambda d: f"{int(d):02d}")
+    if padrao is not None:
+        formatado = formatado.fillna(padrao)
+    return formatado
+
+
+def mapear_valores_unicos(serie, func):
+    """
+    Aplica uma função escalar só aos valores únicos da Series (factorize) e
+    distribui o resultado para as linhas. Vazios (NaN) recebem func(NaN).
+    """
+    codigos, unicos = pd.factorize(serie)
+    resultados = [func(v) for v in unicos]
+    if (codigos == -1).any():
+        resultados.append(func(np.nan))
+    else:
+        resultados.append(None)
+    return pd.Series(
+        np.array(resultados, dtype=object)[codigos], index=serie.index, dtype=object
+    )
+
+
+def format_brl_serie(serie):
+    """
+    Equivalente vetorizado de format_brl (tabela_preco_importador):
+    'R$ #.###,##' ou '' para vazios, textos e valores não numéricos.
+    """
+    texto = serie.astype(str).str.strip()
+    vazio = serie.isna() | (serie == "")
+    com_letras = texto.str.contains(r"[a-gi-qs-zA-GI-QS-Z]", regex=True)
+
+    limpo = texto.str.replace(r"[^\d,.-]", "", regex=True)
+    tem_virgula = limpo.str.contains(",", regex=False)
+    tem_ponto = limpo.str.contains(".", regex=False)
+    limpo = limpo.mask(
+        tem_virgula & tem_ponto,
+        limpo.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+    )
+    limpo = limpo.mask(
+        tem_virgula & ~tem_ponto, limpo.str.replace(",", ".", regex=False)
+    )
+    numeros = pd.to_numeric(limpo, errors="coerce")
+
+    invalido = vazio | com_letras | numeros.isna()
+    formatado = (
+        numeros[~invalido]
+        .map("{:,.2f}".format)
+        .str.translate(str.maketrans({",": ".", ".": ","}))
+    )
+    resultado = pd.Series("", index=serie.index, dtype=object)
+    resultado[~invalido] = "R$ " + formatado
+    return resultado
+
+
+def verificar_vaga_serie(serie, num_mode=False):
+    """
+    Quantidade de vagas ('01 VAGA' ... '04 VAGAS') de cada célula, classificando
+    a coluna inteira de uma vez:
+    - vazio -> 01 VAGA;
+    - número com decimais -> área (>15, >25, >35 m² = 2, 3, 4 vagas);
+    - número inteiro -> quantidade;
+    - texto com ' e ' ou ',' -> quantidade de itens da lista;
+    - outro texto -> primeiro número encontrado (1 se não houver).
+    Com num_mode=True números também seguem as regras de texto.
+    Valores não finitos ('inf', 'nan') seguem as regras de texto.
+    A classificação é feita sobre os valores únicos e distribuída às linhas.
+    """
+    codigos, unicos = pd.factorize(serie)
+    vagas = _classificar_vagas(pd.Series(unicos, dtype=object), num_mode)
+    vagas = np.append(vagas.astype(object), "01 VAGA")  # código -1 (vazio)
+    return pd.Series(vagas[codigos], index=serie.index, dtype=object)
+
+
+def _classificar_vagas(serie, num_mode):
+    """Regras de verificar_vaga_serie aplicadas por máscaras; retorna array de textos."""
+    texto = serie.astype(str).str.strip()
+    vazio = serie.isna() | (texto == "")
+
+    # Números: '2', '2.0', '15,5'
+    texto_numero = texto.str.replace(",", ".", regex=False)
+    numero = pd.to_numeric(texto_numero, errors="coerce")
+    nao_convertido = numero.isna() & ~vazio
+    if nao_convertido.any():  # float() aceita formas que to_numeric recusa ('1_0', '٣')
+        numero[nao_convertido] = pd.to_numeric(
+            mapear_valores_unicos(texto_numero[nao_convertido], _float_ou_nan)
+        )
+    numerico = np.isfinite(numero) & ~vazio & (not num_mode)
+    inteiro = np.trunc(numero)
+    area = numerico & ((numero - inteiro).abs() > 0.001)
+
+    # Textos: itens separados por ' e ' (ou ','), senão o primeiro número
+    n_vagas = inteiro.where(numerico)
+    eh_texto = ~numerico & ~vazio
+    sep_e = eh_texto & texto.str.contains(" e ", regex=False)
+    sep_virgula = eh_texto & ~sep_e & texto.str.contains(",", regex=False)
+    for sep, mascara in ((" e ", sep_e), (",", sep_virgula)):
+        if mascara.any():
+            itens = texto[mascara].reset_index(drop=True).str.split(sep, regex=False)
+            itens = itens.explode()
+            n_vagas[mascara] = (itens.str.strip() != "").groupby(level=0).sum().to_numpy()
+    sem_sep = eh_texto & ~sep_e & ~sep_virgula
+    primeiro = extrair_primeiro_numero(texto[sem_sep])
+    n_primeiro = pd.to_numeric(primeiro, errors="coerce").astype(float)
+    digitos_unicode = primeiro.notna() & n_primeiro.isna()
+    if digitos_unicode.any():  # dígitos Unicode ou grandes demais para to_numeric
+        n_primeiro[digitos_unicode] = primeiro[digitos_unicode].map(_int_como_float)
+    n_vagas[sem_sep] = n_primeiro.fillna(1).to_numpy()
+
+    vagas = np.select(
+        [
+            vazio,
+            area & (numero > 35),
+            area & (numero > 25),
+            area & (numero > 15),
+            area,
+            n_vagas >= 4,
+            n_vagas == 3,
+            n_vagas == 2,
+        ],
+        ["01 VAGA", "04 VAGAS", "03 VAGAS", "02 VAGAS", "01 VAGA", "04 VAGAS", "03 VAGAS", "02 VAGAS"],
+        default="01 VAGA",
+    )
+    return vagas
+
+
+def _int_como_float(digitos):
+    """
+    int() dos dígitos como float: inf se passar do limite do float, 1.0 se
+    int() recusar (limite de dígitos), como o fallback da versão por linha.
+    """
+    try:
+        return float(int(digitos))
+    except OverflowError:
+        return np.inf
+    except ValueError:
+        return 1.0
+
+
+def _float_ou_nan(texto):
+    try:
+        return float(texto)
+    except (ValueError, TypeError):
+        return np.nan
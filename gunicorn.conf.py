@@ -0,0 +1,51 @@
+# gunicorn.conf.py
+# Lido automaticamente pelo gunicorn (Procfile: gunicorn app:app).
+#
+# Por padrão cada worker importa o app sozinho e as rotas carregam pandas,
+# openpyxl e os formatadores só quando uma ferramenta é usada. Com
+# PRELOAD_FORMATADORES=1 o app e todos os formatadores são carregados uma vez
+# no master, antes do fork: workers novos sobem sem reimportar nada e dividem
+# essas páginas de memória (copy-on-write).
+#
+# Jobs (estado das ferramentas de vários passos e processamento em
+# background): o armazenamento padrão é em memória, local a cada worker. Com
+# mais de um worker, /jobs/<id>/status, /jobs/<id>/resultado e os passos de
+# mapeamento só funcionariam quando a requisição caísse no worker que criou o
+# job, então o SQLite compartilhado (JOBS_SQLITE_PATH) passa a ser usado
+# automaticamente, em JOBS_SQLITE_PADRAO se a variável não estiver definida.
+import gc
+import os
+
+JOBS_SQLITE_PADRAO = os.path.join("instance", "jobs.sqlite3")
+
+preload_app = os.environ.get("PRELOAD_FORMATADORES") == "1"
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+
+def _usar_jobs_compartilhados(quantidade_workers):
+    if quantidade_workers > 1 and not os.environ.get("JOBS_SQLITE_PATH"):
+        os.environ["JOBS_SQLITE_PATH"] = JOBS_SQLITE_PADRAO
+
+
+# Com preload o app (e o armazenamento de jobs) é criado no master antes dos
+# hooks, então a escolha precisa acontecer já aqui
+_usar_jobs_compartilhados(workers)
+_jobs_em_memoria = not os.environ.get("JOBS_SQLITE_PATH")
+
+
+def on_starting(server):
+    # Quantidade efetiva (-w/--workers na linha de comando tem precedência)
+    _usar_jobs_compartilhados(server.cfg.workers)
+    if server.cfg.workers > 1 and server.cfg.preload_app and _jobs_em_memoria:
+        server.log.warning(
+            "%d workers com preload: o app já foi carregado com jobs em memória; "
+            "defina JOBS_SQLITE_PATH ou WEB_CONCURRENCY.",
+            server.cfg.workers,
+        )
+
+
+def when_ready(server):
+    if preload_app:
+        # Tira os objetos já carregados da coleta de lixo: o GC do worker não
+        # toca nessas páginas e elas continuam compartilhadas com o master
+        gc.freeze()
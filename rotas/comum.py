@@ -0,0 +1,71 @@
+# rotas/comum.py
+"""
+Estado e helpers compartilhados pelos blueprints. workspaces,
+armazenamento_jobs e executor_jobs são criados em create_app() e guardados
+em app.extensions; aqui ficam proxies para o app da requisição atual.
+"""
+
+import os
+
+from flask import current_app, jsonify, request, session, url_for
+from werkzeug.local import LocalProxy
+
+workspaces = LocalProxy(lambda: current_app.extensions["workspaces"])
+armazenamento_jobs = LocalProxy(lambda: current_app.extensions["armazenamento_jobs"])
+executor_jobs = LocalProxy(lambda: current_app.extensions["executor_jobs"])
+
+ALLOWED_EXTENSIONS = {"xlsx", "xls"}  # Exibido nas páginas de upload
+
+
+def allowed_file(filename):
+    # .csv também é aceito: as ferramentas de tabela de preços leem CSV
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in {"xlsx", "xls", "csv"}
+
+
+# --- Estado das ferramentas de vários passos (server-side) ---
+# O cookie guarda só f"{tool_prefix}job_id"; os dados ficam no armazenamento
+# (memória por padrão, SQLite compartilhado se JOBS_SQLITE_PATH estiver definido).
+def iniciar_job(tool_prefix, dados):
+    """
+    Cria um job com os dados da ferramenta e guarda seu id na sessão. Os
+    uploads referenciados nos dados (caminhos em workspaces) ficam vinculados
+    ao job, e a faxina não os remove enquanto ele existir.
+    """
+    encerrar_job(tool_prefix)
+    armazenamento_jobs.limpar_expirados()
+    job_id = armazenamento_jobs.criar(dados)
+    session[f"{tool_prefix}job_id"] = job_id
+    for valor in dados.values():
+        if isinstance(valor, str) and os.path.isfile(valor):
+            workspaces.vincular_job(valor, job_id)
+    return job_id
+
+
+def dados_job(tool_prefix):
+    """Dados do job atual da ferramenta, ou None se não houver/expirou."""
+    return armazenamento_jobs.obter(session.get(f"{tool_prefix}job_id"))
+
+
+def encerrar_job(tool_prefix):
+    """Remove o job atual da ferramenta (armazenamento e sessão)."""
+    job_id = session.pop(f"{tool_prefix}job_id", None)
+    if job_id:
+        armazenamento_jobs.remover(job_id)
+
+
+# --- Processamento em background (pool de processos local) ---
+# Rotas que aceitam `assincrono=1` (form ou query) respondem 202 com o job_id e
+# as URLs de status/download, em vez de processar dentro da requisição.
+def quer_processamento_assincrono():
+    return request.values.get("assincrono", "").strip().lower() in ("1", "true", "on")
+
+
+def resposta_job_assincrono(job_id):
+    return (
+        jsonify(
+            job_id=job_id,
+            status_url=url_for("jobs.status_job_route", job_id=job_id),
+            resultado_url=url_for("jobs.resultado_job_route", job_id=job_id),
+        ),
+        202,
+    )
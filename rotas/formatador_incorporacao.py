@@ -0,0 +1,94 @@
+# rotas/formatador_incorporacao.py
+"""
+Formatador Incorporação.
+"""
+
+import io
+import traceback
+
+from flask import (
+    Blueprint,
+    flash,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
+from werkzeug.utils import secure_filename
+
+bp = Blueprint("formatador_incorporacao", __name__)
+
+
+# === ROTA PARA FORMATADOR INCORPORAÇÃO ===
+@bp.route("/formatador-incorporacao", methods=["GET", "POST"])
+def formatador_incorporacao_tool():
+    tool_prefix = "incorp_"
+    temp_filepath = None  # Definir fora do try para garantir acesso no finally
+    output_stream = None
+
+    if request.method == "POST":
+        from formatadores.incorporacao_formatador import processar_incorporacao_web
+
+        if "arquivo_entrada" not in request.files:
+            flash("Nenhum arquivo!", "error")
+            return redirect(url_for(".formatador_incorporacao_tool"))
+        file = request.files["arquivo_entrada"]
+        if file.filename == "":
+            flash("Nenhum arquivo!", "error")
+            return redirect(url_for(".formatador_incorporacao_tool"))
+        # Valida extensão (somente Excel)
+        if not file or file.filename.rsplit(".", 1)[1].lower() not in {"xlsx", "xls"}:
+            flash("Tipo de arquivo inválido. Use .xlsx ou .xls.", "error")
+            return redirect(url_for(".formatador_incorporacao_tool"))
+
+        filename = secure_filename(f"{tool_prefix}{file.filename}")
+        file_stream = io.BytesIO(file.read())  # Lê o arquivo em memória
+        file.close()
+
+        try:
+            print(
+                f"(Formatador Incorporação Rota) Chamando processar_incorporacao_web..."
+            )
+            # *** CHAMA A FUNÇÃO CORRETA ***
+            output_stream = processar_incorporacao_web(
+                file_stream
+            )  # <<< CHAMA A FUNÇÃO QUE REMOVE LINHAS
+
+            input_basename = filename.replace(f"{tool_prefix}", "").rsplit(".", 1)[0]
+            # Nome do arquivo de saída pode ser o mesmo
+            output_filename = f"planilha_processada_{input_basename}.xlsx"
+            print(f"(Formatador Incorporação Rota) Enviando: {output_filename}")
+
+            return send_file(
+                output_stream,
+                mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                as_attachment=True,
+                download_name=output_filename,
+            )
+        except ValueError as ve:
+            flash(f"Erro ao processar: {ve}", "error")
+            print(f"(Formatador Incorporação Rota) Erro Validação: {ve}")
+            if file_stream and not file_stream.closed:
+                file_stream.close()
+            if output_stream and not output_stream.closed:
+                output_stream.close()
+            return redirect(url_for(".formatador_incorporacao_tool"))
+        except Exception as e:
+            flash(f"Erro inesperado: {e}", "error")
+            print(f"(Formatador Incorporação Rota) Erro Inesperado: {e}")
+            traceback.print_exc()
+            if file_stream and not file_stream.closed:
+                file_stream.close()
+            if output_stream and not output_stream.closed:
+                output_stream.close()
+            return redirect(url_for(".formatador_incorporacao_tool"))
+        # Finally não é estritamente necessário aqui pois fechamos os streams no try/except
+
+    else:  # GET
+        active_page = "formatador_incorporacao"
+        return render_template(
+            "formatador_incorporacao.html",
+            active_page=active_page,
+            ALLOWED_EXTENSIONS={"xlsx", "xls"},
+        )
@@ -0,0 +1,86 @@
+# rotas/formatador_lote.py
+"""
+Formatador Lote.
+"""
+
+import os
+import traceback
+
+from flask import (
+    Blueprint,
+    flash,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
+from werkzeug.utils import secure_filename
+
+from rotas.comum import allowed_file, workspaces
+
+bp = Blueprint("formatador_lote", __name__)
+
+
+# === ROTA PARA FORMATADOR LOTE ===
+@bp.route("/formatador-lote", methods=["GET", "POST"])
+def formatador_lote_tool():
+    tool_prefix = "fmt_lote_"
+    temp_filepath = None  # Definir fora do try
+    output_stream = None
+
+    if request.method == "POST":
+        from formatadores.lote_formatador import processar_formatador_lote_web
+
+        if "arquivo_entrada" not in request.files:
+            flash("Nenhum arquivo selecionado!", "error")
+            return redirect(url_for(".formatador_lote_tool"))
+        file = request.files["arquivo_entrada"]
+        if file.filename == "":
+            flash("Nenhum arquivo selecionado!", "error")
+            return redirect(url_for(".formatador_lote_tool"))
+        if not file or not allowed_file(file.filename):
+            flash("Tipo de arquivo inválido.", "error")
+            return redirect(url_for(".formatador_lote_tool"))
+        filename = secure_filename(f"{tool_prefix}{file.filename}")
+        temp_filepath = workspaces.novo_arquivo(tool_prefix, filename)
+        try:
+            file.save(temp_filepath)
+            print(f"(Fmt Lote) Arquivo salvo: {temp_filepath}")
+            output_stream = processar_formatador_lote_web(
+                temp_filepath
+            )  # Chama a função de processamento
+            input_basename = file.filename.rsplit(".", 1)[0]
+            output_filename = f"{input_basename}_PROCESSADO.xlsx"
+            print(f"(Fmt Lote) Enviando: {output_filename}")
+            return send_file(
+                output_stream,
+                mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                as_attachment=True,
+                download_name=output_filename,
+            )
+        except Exception as e:
+            flash(f"Erro Fmt Lote: {e}", "error")
+            print(f"(Fmt Lote) Erro: {e}")
+            traceback.print_exc()
+            # Limpeza em caso de erro ANTES do send_file
+            if os.path.exists(temp_filepath):
+                try:
+                    workspaces.remover(temp_filepath)
+                except OSError:
+                    pass
+            if output_stream:
+                output_stream.close()  # Fecha o stream se deu erro ANTES do send_file
+            return redirect(url_for(".formatador_lote_tool"))
+        finally:
+            # Limpeza do ARQUIVO temporário SEMPRE
+            if temp_filepath and os.path.exists(temp_filepath):
+                try:
+                    workspaces.remover(temp_filepath)
+                    print(f"(Fmt Lote) Temp removido: {temp_filepath}")
+                except OSError as oe:
+                    print(f"(Fmt Lote) Erro remover temp: {oe}")
+        # NÃO FECHA output_stream aqui
+
+    else:  # GET
+        return render_template("formatador_lote.html", active_page="formatador_lote")
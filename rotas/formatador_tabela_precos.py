@@ -0,0 +1,472 @@
+# rotas/formatador_tabela_precos.py
+"""
+Formatador Tabela de Preços (upload -> mapeamento de blocos e etapas) e o
+desformatador da tabela já formatada.
+"""
+
+import io
+import os
+import traceback
+
+from flask import (
+    Blueprint,
+    flash,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
+from werkzeug.utils import secure_filename
+
+from rotas.comum import (
+    dados_job,
+    encerrar_job,
+    executor_jobs,
+    iniciar_job,
+    quer_processamento_assincrono,
+    resposta_job_assincrono,
+    workspaces,
+)
+
+bp = Blueprint("formatador_tabela_precos", __name__)
+
+
+# === ROTA PARA FORMATADOR TABELA DE PREÇOS ===
+@bp.route("/formatador-tabela-precos", methods=["GET", "POST"])
+def formatador_tabela_precos_upload():
+    tool_prefix = "tab_precos_"
+    print(
+        f"DEBUG: Entrando em {url_for('.formatador_tabela_precos_upload')}, Método: {request.method}"
+    )
+
+    # Dentro da função formatador_tabela_precos_upload em app.py
+
+    if request.method == "POST":
+        import numpy as np
+        import pandas as pd
+        from formatadores.colunas import find_column_flexible
+        from formatadores.tabela_preco_formatador import extract_block_number_safe
+
+        print("DEBUG: Processando POST")
+        # --- Validações Iniciais ---
+        if "arquivo_entrada" not in request.files:
+            flash("Nenhum arquivo selecionado!", "error")
+            print("DEBUG: Saindo - Nenhum arquivo_entrada")
+            return redirect(url_for(".formatador_tabela_precos_upload"))
+        file = request.files["arquivo_entrada"]
+        if file.filename == "":
+            flash("Nenhum arquivo selecionado!", "error")
+            print("DEBUG: Saindo - Nome de arquivo vazio")
+            return redirect(url_for(".formatador_tabela_precos_upload"))
+        # Verifica extensão
+        file_ext = "." in file.filename and file.filename.rsplit(".", 1)[1].lower()
+        if not file or file_ext not in {"xlsx", "xls", "csv"}:
+            flash("Tipo de arquivo inválido. Use .xlsx, .xls ou .csv.", "error")
+            print(f"DEBUG: Saindo - Extensão inválida: {file_ext}")
+            return redirect(url_for(".formatador_tabela_precos_upload"))
+
+        filename = secure_filename(f"{tool_prefix}{file.filename}")
+        temp_filepath = workspaces.novo_arquivo(tool_prefix, filename)
+        is_csv = file_ext == "csv"
+
+        # <<< INÍCIO DAS MODIFICAÇÕES PARA LEITURA CONDICIONAL >>>
+        # --- Bloco Try/Except para Leitura e Processamento Inicial ---
+        df_check = None
+        try:
+            file.save(temp_filepath)
+            print(f"(Tabela Preços Upload) Arquivo temporário salvo: {temp_filepath}")
+
+            # --- Obter parâmetros CSV do formulário ---
+            csv_sep = request.form.get("csv_separator", ";")
+            csv_decimal = request.form.get("csv_decimal", ",")
+            csv_encoding = request.form.get("csv_encoding", "utf-8")
+
+            # --- Leitura Condicional ---
+            print(f"DEBUG: Tentando ler {'CSV' if is_csv else 'Excel'}")
+            if is_csv:
+                print(
+                    f"DEBUG: CSV Params - Sep: '{csv_sep}', Decimal: '{csv_decimal}', Encoding: '{csv_encoding}'"
+                )
+                try:
+                    df_check = pd.read_csv(
+                        temp_filepath,
+                        sep=csv_sep,
+                        decimal=csv_decimal,
+                        encoding=csv_encoding,
+                        header=0,
+                        dtype=str,
+                        skipinitialspace=True,
+                    )
+                except UnicodeDecodeError:
+                    print(f"DEBUG: Falha com {csv_encoding}, tentando latin-1...")
+                    try:
+                        df_check = pd.read_csv(
+                            temp_filepath,
+                            sep=csv_sep,
+                            decimal=csv_decimal,
+                            encoding="latin-1",
+                            header=0,
+                            dtype=str,
+                            skipinitialspace=True,
+                        )
+                        print("DEBUG: Leitura com latin-1 ok.")
+                    except Exception as e_fallback:
+                        raise ValueError(
+                            f"Não foi possível ler o CSV (Encoding/Separador/Decimal?). Erro: {e_fallback}"
+                        )
+                except Exception as e_csv:
+                    raise ValueError(f"Erro ao ler CSV: {e_csv}")
+            else:  # Excel
+                print("DEBUG: Lendo Excel...")
+                NUMERO_DA_LINHA_DO_CABECALHO_NO_EXCEL = 3
+                linhas_para_pular = NUMERO_DA_LINHA_DO_CABECALHO_NO_EXCEL - 1
+                df_check = pd.read_excel(
+                    temp_filepath,
+                    engine="openpyxl",
+                    skiprows=linhas_para_pular,
+                    header=0,
+                    dtype=str,
+                )
+
+            df_check = df_check.fillna("")
+            df_check.columns = df_check.columns.str.strip()
+
+            # --- Lógica para encontrar blocos ---
+            if df_check.empty:
+                raise ValueError("Arquivo vazio ou sem dados após cabeçalho.")
+
+            # Certifique-se que find_column_flexible e extract_block_number_safe estão disponíveis/importadas
+            bloco_col_name = find_column_flexible(
+                df_check.columns,
+                ["bloco", "blk", "quadra", "pavimento"],
+                "BLOCO",
+                required=True,
+            )
+            unique_blocks_raw = (
+                df_check[bloco_col_name]
+                .replace("", np.nan)
+                .ffill()
+                .dropna()
+                .unique()
+                .tolist()
+            )
+            if not unique_blocks_raw:
+                raise ValueError("Nenhum valor de Bloco/Quadra encontrado.")
+            unique_blocks = sorted(
+                list(set(str(b).strip() for b in unique_blocks_raw if str(b).strip())),
+                key=lambda b: (
+                    extract_block_number_safe(b)
+                    if extract_block_number_safe(b) is not None
+                    else float("inf")
+                ),
+            )
+
+            print(f"(Tabela Preços Upload) Blocos únicos: {unique_blocks}")
+
+            # --- Extrair todas as colunas para permitir seleção do usuário ---
+            all_columns = df_check.columns.tolist()
+            # Identificação prévia para UI (Opcional, apenas para feedback visual se quisermos)
+            # Vamos passar apenas a lista crua e deixar o usuário decidir.
+
+            # --- Armazena na sessão e redireciona ---
+            session_data = {
+                "filename": filename,
+                "filepath": temp_filepath,
+                "unique_blocks": unique_blocks,
+                "all_columns": all_columns # <<< Nova info na sessão
+            }
+            iniciar_job(tool_prefix, session_data)
+            print(f"DEBUG: Saindo - Sucesso POST, redirecionando para map_etapas. Colunas: {len(all_columns)}")
+            return redirect(url_for(".formatador_tabela_precos_map_etapas"))
+
+        except ValueError as ve:
+            flash(f"Erro ao ler/processar arquivo: {ve}", "error")
+            print(f"(Tabela Preços Upload) Erro (ValueError): {ve}")
+            # Limpeza
+            if os.path.exists(temp_filepath):
+                workspaces.remover(temp_filepath)
+            encerrar_job(tool_prefix)
+            print("DEBUG: Saindo - Erro (ValueError), redirecionando para upload")
+            return redirect(url_for(".formatador_tabela_precos_upload"))
+        except Exception as e:
+            flash(f"Erro inesperado: {e}", "error")
+            print(f"(Tabela Preços Upload) Erro Inesperado (Exception): {e}")
+            traceback.print_exc()
+            # Limpeza
+            if "temp_filepath" in locals() and os.path.exists(temp_filepath):
+                workspaces.remover(temp_filepath)
+            encerrar_job(tool_prefix)
+            print("DEBUG: Saindo - Erro (Exception), redirecionando para upload")
+            return redirect(url_for(".formatador_tabela_precos_upload"))
+        # Não deve chegar aqui no POST
+        # print("!!!!! ALERTA: Fim do bloco POST sem return alcançado !!!!!")
+
+    else:  # Método GET
+        print("DEBUG: Processando GET")
+        print(f"DEBUG: Limpando job '{tool_prefix}' (GET)")
+        encerrar_job(tool_prefix)  # Limpa o job ao carregar a página inicial
+        print("DEBUG: Saindo - Renderizando template inicial (GET)")
+        return render_template(
+            "formatador_tabela_precos.html", active_page="formatador_tabela_precos"
+        )
+
+
+# --- NOVA ROTA para Mapeamento de Blocos e Etapas ---
+@bp.route("/formatador-tabela-precos/map-etapas", methods=["GET", "POST"])
+def formatador_tabela_precos_map_etapas():
+    tool_prefix = "tab_precos_"
+
+    # --- Bloco de verificação do job e arquivo ---
+    session_data = dados_job(tool_prefix)
+    if (
+        session_data is None
+        or "filename" not in session_data
+        or "unique_blocks" not in session_data
+    ):
+        flash(
+            "Sessão expirada ou inválida. Por favor, faça o upload novamente.",
+            "warning",
+        )
+        return redirect(
+            url_for(".formatador_tabela_precos_upload")
+        )  # Redireciona para a função de upload
+
+    temp_filename = session_data["filename"]
+    unique_blocks = session_data["unique_blocks"]  # Usado no GET e para pegar names no POST
+    all_columns = session_data.get("all_columns", []) # <<< Recupera colunas
+    temp_filepath = session_data["filepath"]
+
+    if not os.path.exists(temp_filepath):
+        flash(
+            "Arquivo temporário não encontrado. Por favor, faça o upload novamente.",
+            "error",
+        )
+        encerrar_job(tool_prefix)
+        return redirect(url_for(".formatador_tabela_precos_upload"))
+    # --- Fim do bloco de verificação ---
+
+    if request.method == "POST":
+        from formatadores.tabela_preco_formatador import processar_tabela_precos_web
+
+        # --- Processamento Final após Mapeamento ---
+
+        block_mapping = {}  # Inicializa para evitar UnboundLocalError
+        output_stream = None  # Inicializa para o finally
+
+        # --- Recria o mapeamento a partir dos dados enviados ---
+        print(
+            f"(Tabela Preços Mapeamento) Montando mapeamento a partir do form POST..."
+        )
+        
+        # <<< Recupera colunas selecionadas >>>
+        # O frontend deve enviar uma lista ordenada de inputs com name="selected_columns"
+        selected_columns_order = request.form.getlist("selected_columns")
+        print(f"(Tabela Preços Mapeamento) Colunas selecionadas pelo usuário: {selected_columns_order}")
+        
+        # <<< Recupera formatações manuais do usuário >>>
+        column_format_map = {}
+        for col in selected_columns_order:
+            format_value = request.form.get(f"format_{col}", "none")
+            if format_value and format_value != "none":
+                column_format_map[col] = format_value
+        print(f"(Tabela Preços Mapeamento) Formatações manuais: {column_format_map}")
+
+        for block_name_original in unique_blocks:
+            stage_assigned = (
+                request.form.get(f"stage_for_{block_name_original}", "").strip().upper()
+            )
+            if stage_assigned:
+                block_mapping[block_name_original] = stage_assigned
+            else:
+                # Tratamento se etapa estiver vazia (não deveria acontecer com validação JS)
+                print(
+                    f"AVISO BACKEND: Etapa VAZIA para o bloco '{block_name_original}' recebida no POST final."
+                )
+                flash(
+                    f"Aviso: O bloco '{block_name_original}' foi enviado sem etapa definida. Verifique o resultado.",
+                    "warning",
+                )
+                # Considere impedir o processamento se isso for crítico:
+                # flash(f"Erro Crítico: O bloco '{block_name_original}' foi enviado sem etapa. Tente novamente.", "error")
+                # return redirect(url_for('.formatador_tabela_precos_map_etapas'))
+
+        print(f"(Tabela Preços Mapeamento) Mapeamento final montado: {block_mapping}")
+
+        # --- Bloco try para processamento e envio ---
+        try:
+            # Validação extra (opcional, mas recomendada)
+            if len(block_mapping) != len(unique_blocks):
+                raise ValueError(
+                    f"Inconsistência no mapeamento recebido. Esperados {len(unique_blocks)} blocos, recebidos {len(block_mapping)}. Tente novamente."
+                )
+
+            # Define o nome do arquivo de saída
+            input_basename = temp_filename.replace(f"{tool_prefix}", "").rsplit(".", 1)[
+                0
+            ]
+            output_filename = f"{input_basename}_PRECOS_ETAPAS_FORMATADO.xlsx"
+
+            if quer_processamento_assincrono():
+                # O executor remove o arquivo temporário quando o job terminar
+                job_id = executor_jobs.submeter(
+                    processar_tabela_precos_web,
+                    temp_filepath,
+                    block_mapping,
+                    selected_columns_order,
+                    column_format_map,
+                    nome_arquivo=output_filename,
+                    mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    arquivos_temporarios=[temp_filepath],
+                )
+                temp_filepath = None  # Não remover no finally
+                encerrar_job(tool_prefix)
+                return resposta_job_assincrono(job_id)
+
+            # Chama a função de processamento
+            print(f"(Tabela Preços Mapeamento) Chamando processar_tabela_precos_web...")
+            # MODIFICADO: Passa selected_columns_order e column_format_map
+            output_stream = processar_tabela_precos_web(temp_filepath, block_mapping, selected_columns_order, column_format_map)
+            print(
+                f"(Tabela Preços Mapeamento) Processamento concluído. Preparando envio..."
+            )
+            print(
+                f"(Tabela Preços Processo Final) Enviando arquivo processado: {output_filename}"
+            )
+
+            # Envia o arquivo processado para download
+            response = send_file(
+                output_stream,
+                mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                as_attachment=True,
+                download_name=output_filename,
+            )
+            encerrar_job(tool_prefix)  # Limpa sessão APÓS SUCESSO
+            print(f"(Tabela Preços Processo Final) Arquivo enviado, sessão limpa.")
+            return response  # Retorna a resposta com o arquivo
+
+        except ValueError as ve:  # Erro de validação ou processamento esperado
+            flash(f"Erro ao processar: {ve}", "error")
+            print(f"(Tabela Preços Processo Final) Erro de validação: {ve}")
+            # Não limpa sessão, permite tentar corrigir no mapeamento
+            return redirect(
+                url_for(".formatador_tabela_precos_map_etapas")
+            )  # Redireciona de volta para o mapeamento
+        except Exception as e:  # Erro inesperado
+            flash(f"Erro inesperado ao processar Tabela de Preços: {e}", "error")
+            print(f"(Tabela Preços Processo Final) Erro inesperado: {e}")
+            traceback.print_exc()
+            encerrar_job(tool_prefix)  # Limpa sessão em erro grave
+            return redirect(
+                url_for(".formatador_tabela_precos_upload")
+            )  # Redireciona para o início
+        finally:
+            # --- Bloco finally para limpar arquivo temporário e stream em caso de erro pré-envio ---
+            if temp_filepath and os.path.exists(temp_filepath):
+                try:
+                    workspaces.remover(temp_filepath)
+                    print(
+                        f"(Tabela Preços Processo Final - Finally) Temp removido: {temp_filepath}"
+                    )
+                except OSError as oe:
+                    print(
+                        f"(Tabela Preços Processo Final - Finally) Erro remover temp: {oe}"
+                    )
+            # Fecha o stream SOMENTE se ocorreu erro ANTES do send_file ter sido retornado
+            # Verifica se 'response' existe E se é um stream (para evitar fechar em erros que não geram stream)
+            if output_stream and not (
+                "response" in locals()
+                and hasattr(response, "is_streamed")
+                and response.is_streamed
+            ):
+                try:
+                    output_stream.close()
+                    print(
+                        f"(Tabela Preços Processo Final - Finally) Output stream fechado devido a erro prévio."
+                    )
+                except Exception as close_err:
+                    print(
+                        f"(Tabela Preços Processo Final - Finally) Erro ao fechar output stream: {close_err}"
+                    )
+            # --- Fim do bloco finally ---
+
+    else:  # Método GET para /map-etapas (ESSENCIAL!)
+        # Renderiza a página de mapeamento, passando a lista de blocos da sessão
+        print(
+            f"(Tabela Preços Mapeamento - GET) Renderizando página de mapeamento com blocos: {unique_blocks}"
+        )
+        return render_template(
+            "map_etapas_blocos.html",
+            active_page="formatador_tabela_precos",
+            unique_blocks=unique_blocks,  # Passa a lista para o template renderizar os blocos pendentes
+            all_columns=all_columns, # <<< Passa as colunas para o template
+        )
+
+
+@bp.route("/desformatar-tabela-precos", methods=["POST"])
+def desformatador_tabela_precos_tool():
+    from formatadores.tabela_desformatador import (
+        calcular_vgv,
+        desformatar_tabela_precos,
+        exportar_csv_desformatado,
+    )
+
+    # Apenas POST é necessário para esta ferramenta simples
+    if "arquivo_formatado" not in request.files:
+        flash("Nenhum arquivo selecionado para desformatar!", "error")
+        return redirect(
+            url_for(".formatador_tabela_precos_upload")
+        )  # Volta para a página anterior
+
+    file = request.files["arquivo_formatado"]
+
+    if file.filename == "":
+        flash("Nenhum arquivo selecionado!", "error")
+        return redirect(url_for(".formatador_tabela_precos_upload"))
+
+    if not file.filename.lower().endswith(".xlsx"):
+        flash(
+            "Arquivo inválido. Apenas planilhas .xlsx formatadas são aceitas.", "error"
+        )
+        return redirect(url_for(".formatador_tabela_precos_upload"))
+
+    try:
+        # Passa o objeto de arquivo diretamente para a função de processamento
+        file_stream = io.BytesIO(file.read())
+        print(f"(Desformatador Rota) Lendo o arquivo '{file.filename}' em memória.")
+
+        # A função retorna um DataFrame do pandas
+        df_limpo = desformatar_tabela_precos(file_stream)
+        print(f"(Desformatador Rota) DataFrame limpo tem {len(df_limpo)} linhas")
+
+        print("(Desformatador Rota) Calculando VGV...")
+        df_limpo, df_resumo_vgv = calcular_vgv(df_limpo)
+        print(
+            f"(Desformatador Rota) Resumo de VGV tem {len(df_resumo_vgv)} linhas"
+        )
+
+        # Saída CSV: dados, duas linhas em branco e a tabela de VGV
+        output_csv = exportar_csv_desformatado(df_limpo, df_resumo_vgv)
+
+        # Define nome do arquivo de saída
+        input_basename = file.filename.rsplit(".", 1)[0]
+        output_filename = f"{input_basename}_DADOS_EXTRAIDOS.csv"
+        print(f"(Desformatador Rota) Enviando arquivo: {output_filename}")
+
+        # Envia o arquivo CSV para download
+        return send_file(
+            io.BytesIO(output_csv.getvalue().encode("utf-8-sig")),
+            mimetype="text/csv",
+            as_attachment=True,
+            download_name=output_filename,
+        )
+
+    except (ValueError, RuntimeError) as ve:
+        flash(f"Erro ao desformatar: {ve}", "error")
+        print(f"(Desformatador Rota) Erro de processamento: {ve}")
+        return redirect(url_for(".formatador_tabela_precos_upload"))
+    except Exception as e:
+        flash(f"Ocorreu um erro inesperado: {e}", "error")
+        print(f"(Desformatador Rota) Erro inesperado: {e}")
+        traceback.print_exc()
+        return redirect(url_for(".formatador_tabela_precos_upload"))
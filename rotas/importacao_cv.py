@@ -0,0 +1,183 @@
+# rotas/importacao_cv.py
+"""
+Importação CV: upload -> mapeamento de tipologias -> planilha de importação.
+"""
+
+import os
+import traceback
+
+from flask import (
+    Blueprint,
+    flash,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
+from werkzeug.utils import secure_filename
+
+from rotas.comum import allowed_file, dados_job, encerrar_job, iniciar_job, workspaces
+
+bp = Blueprint("importacao_cv", __name__)
+
+
+# === ROTAS IMPORTAÇÃO CV ===
+@bp.route("/importacao-cv")
+def importacao_cv_index():
+    encerrar_job("cv_")
+    return render_template("importacao_cv.html", active_page="importacao_cv")
+
+
+@bp.route("/upload-cv", methods=["POST"])
+def upload_file_cv():
+    import pandas as pd
+    from formatadores.importacao_cv import normalize_text
+
+    tool_prefix = "cv_"
+    if "arquivo_entrada" not in request.files:
+        flash("Nenhum arquivo!", "error")
+        return redirect(url_for(".importacao_cv_index"))
+    file = request.files["arquivo_entrada"]
+    if file.filename == "":
+        flash("Nenhum arquivo!", "error")
+        return redirect(url_for(".importacao_cv_index"))
+    if file and allowed_file(file.filename):
+        filename = secure_filename(f"{tool_prefix}{file.filename}")
+        temp_filepath = workspaces.novo_arquivo(tool_prefix, filename)
+        try:
+            file.save(temp_filepath)
+            df_chk = pd.read_excel(temp_filepath, engine="openpyxl")
+            df_chk.columns = df_chk.columns.str.strip()
+            is_casa = "CASA" in df_chk.columns or "Quadra" in df_chk.columns
+            n_cols = {normalize_text(c): c for c in df_chk.columns}
+            t_col_orig = n_cols.get("TIPO")
+            if t_col_orig:
+                if t_col_orig.upper() != "TIPO":
+                    df_chk.rename(columns={t_col_orig: "TIPO"}, inplace=True)
+            else:
+                found_alternative = False
+                alternatives = ["Tipologia", "Tipo da Unidade"]
+                for alt in alternatives:
+                    t_col_alt_orig = n_cols.get(normalize_text(alt))
+                    if t_col_alt_orig:
+                        df_chk.rename(columns={t_col_alt_orig: "TIPO"}, inplace=True)
+                        found_alternative = True
+                        break
+                if not found_alternative:
+                    raise ValueError(
+                        f"Coluna 'TIPO' (ou alt: {', '.join(alternatives)}) não encontrada!"
+                    )
+            if "TIPO" not in df_chk.columns:
+                raise ValueError("Erro TIPO.")
+            tipos = sorted(df_chk["TIPO"].dropna().astype(str).str.strip().unique())
+            if not tipos:
+                flash("Aviso: Coluna 'TIPO' vazia.", "warning")
+            iniciar_job(
+                tool_prefix,
+                {
+                    "uploaded_filename": filename,
+                    "upload_path": temp_filepath,
+                    "basic_info": request.form.to_dict(),
+                    "tipos_unicos": tipos,
+                    "is_casa_project": is_casa,
+                },
+            )
+            return redirect(url_for(".map_tipologias_cv_route"))
+        except Exception as e:
+            if "temp_filepath" in locals() and os.path.exists(temp_filepath):
+                workspaces.remover(temp_filepath)
+            flash(f"Erro CV Upload: {e}", "error")
+            print(f"Err CV Up: {e}")
+            traceback.print_exc()
+            return redirect(url_for(".importacao_cv_index"))
+    else:
+        flash("Arquivo inválido.", "error")
+        return redirect(url_for(".importacao_cv_index"))
+
+
+@bp.route("/map-tipologias-cv")
+def map_tipologias_cv_route():
+    from formatadores.importacao_cv import (
+        TIPOLOGIAS_PADRAO,
+        TIPOLOGIAS_PCD,
+        TIPOLOGIAS_SUPERIOR,
+    )
+
+    tool_prefix = "cv_"
+    job = dados_job(tool_prefix)
+    if job is None:
+        flash("Upload CV primeiro.", "warning")
+        return redirect(url_for(".importacao_cv_index"))
+    tipos = job.get("tipos_unicos", [])
+    is_casa = job.get("is_casa_project", False)
+    return render_template(
+        "map_tipologias_cv.html",
+        active_page="importacao_cv",
+        tipos_unicos=tipos,
+        is_casa_project=is_casa,
+        tipologias_padrao=TIPOLOGIAS_PADRAO,
+        tipologias_superior=TIPOLOGIAS_SUPERIOR,
+        tipologias_pcd=TIPOLOGIAS_PCD,
+    )
+
+
+@bp.route("/process-cv", methods=["POST"])
+def process_file_cv():
+    from formatadores.importacao_cv import (
+        gerar_importacao_cv,
+        ler_planilha_cv,
+        mapear_escolhas_tipologias_cv,
+    )
+
+    tool_prefix = "cv_"
+    job = dados_job(tool_prefix)
+    if job is None:
+        flash("Sessão expirada CV.", "error")
+        return redirect(url_for(".importacao_cv_index"))
+    fname = job["uploaded_filename"]
+    basic = job["basic_info"]
+    tipos_orig = job.get("tipos_unicos", [])
+    fpath = job["upload_path"]
+    if not os.path.exists(fpath):
+        flash("Arquivo temp sumiu.", "error")
+        return redirect(url_for(".importacao_cv_index"))
+
+    try:
+        is_casa_session = job.get("is_casa_project", False)
+        escolhas = {
+            t: {
+                "padrao": request.form.get(f"tipo_{t}_padrao", ""),
+                "pcd": request.form.get(f"tipo_{t}_pcd", ""),
+                "superior": (
+                    request.form.get(f"tipo_{t}_superior", "")
+                    if not is_casa_session
+                    else None
+                ),
+            }
+            for t in tipos_orig
+        }
+        tip_map = mapear_escolhas_tipologias_cv(escolhas)
+
+        df = ler_planilha_cv(fpath)
+        output = gerar_importacao_cv(df, tip_map, basic)
+
+        if os.path.exists(fpath):
+            workspaces.remover(fpath)
+        encerrar_job(tool_prefix)
+        out_fname = f"importacao_cv_{basic.get('Sigla','output')}.csv"
+        return send_file(
+            output,
+            mimetype="text/csv",
+            as_attachment=True,
+            download_name=out_fname,
+        )
+
+    except Exception as e:
+        flash(f"Erro CV Process: {e}", "error")
+        print(f"Err CV Proc: {e}")
+        traceback.print_exc()
+        if "fpath" in locals() and os.path.exists(fpath):
+            workspaces.remover(fpath)
+        encerrar_job(tool_prefix)
+        return redirect(url_for(".importacao_cv_index"))
@@ -0,0 +1,72 @@
+# rotas/importacao_cv_lote.py
+"""
+Importação CV Lote: upload e geração da planilha de importação num passo.
+"""
+
+import os
+import traceback
+
+from flask import (
+    Blueprint,
+    flash,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
+from werkzeug.utils import secure_filename
+
+from rotas.comum import allowed_file, workspaces
+
+bp = Blueprint("importacao_cv_lote", __name__)
+
+
+# === ROTAS IMPORTAÇÃO CV LOTE ===
+@bp.route("/importacao-cv-lote", methods=["GET", "POST"])
+def importacao_cv_lote_tool():
+    tool_prefix = "cv_lote_"
+    if request.method == "POST":
+        from formatadores.importacao_cv_lote import (
+            gerar_importacao_cv_lote,
+            ler_planilha_cv_lote,
+        )
+
+        if "arquivo_entrada" not in request.files:
+            flash("Nenhum arquivo Lote!", "error")
+            return redirect(url_for(".importacao_cv_lote_tool"))
+        file = request.files["arquivo_entrada"]
+        if file.filename == "":
+            flash("Nenhum arquivo Lote!", "error")
+            return redirect(url_for(".importacao_cv_lote_tool"))
+        if not file or not allowed_file(file.filename):
+            flash("Tipo inválido Lote.", "error")
+            return redirect(url_for(".importacao_cv_lote_tool"))
+        basic = request.form.to_dict()
+        fname = secure_filename(f"{tool_prefix}{file.filename}")
+        fpath = workspaces.novo_arquivo(tool_prefix, fname)
+        try:
+            file.save(fpath)
+            print(f"(Lote) Salvo: {fpath}")
+            df = ler_planilha_cv_lote(fpath)
+            output = gerar_importacao_cv_lote(df, basic)
+            if os.path.exists(fpath):
+                workspaces.remover(fpath)
+            out_fname = f"importacao_cv_lote_{basic.get('Sigla','output')}.csv"
+            return send_file(
+                output,
+                mimetype="text/csv",
+                as_attachment=True,
+                download_name=out_fname,
+            )
+        except Exception as e:
+            flash(f"Erro Lote: {e}", "error")
+            print(f"(Lote) Err: {e}")
+            traceback.print_exc()
+            if "fpath" in locals() and os.path.exists(fpath):
+                workspaces.remover(fpath)
+            return redirect(url_for(".importacao_cv_lote_tool"))
+    else:  # GET
+        return render_template(
+            "importacao_cv_lote.html", active_page="importacao_cv_lote"
+        )
@@ -0,0 +1,158 @@
+# rotas/importacao_sienge.py
+"""
+Importação SIENGE: upload -> mapeamento de etapas -> arquivo de importação.
+"""
+
+import os
+import traceback
+
+from flask import (
+    Blueprint,
+    flash,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
+from werkzeug.utils import secure_filename
+
+from rotas.comum import allowed_file, dados_job, encerrar_job, iniciar_job, workspaces
+
+bp = Blueprint("importacao_sienge", __name__)
+
+
+# === ROTAS IMPORTAÇÃO SIENGE ===
+@bp.route("/importacao-sienge")
+def importacao_sienge_index():
+    encerrar_job("sienge_")
+    return render_template("importacao_sienge.html", active_page="importacao_sienge")
+
+
+@bp.route("/upload-sienge", methods=["POST"])
+def upload_file_sienge():
+    from formatadores.exportacao_sienge import listar_etapas_unicas
+    from formatadores.importacao_sienge import ler_planilha_sienge
+
+    tool_prefix = "sienge_"
+    if "arquivo_entrada" not in request.files:
+        flash("Nenhum arquivo SIENGE!", "error")
+        return redirect(url_for(".importacao_sienge_index"))
+    file = request.files["arquivo_entrada"]
+    if file.filename == "":
+        flash("Nenhum arquivo SIENGE!", "error")
+        return redirect(url_for(".importacao_sienge_index"))
+    if not file or not allowed_file(file.filename):
+        flash("Tipo inválido SIENGE.", "error")
+        return redirect(url_for(".importacao_sienge_index"))
+    filename = secure_filename(f"{tool_prefix}{file.filename}")
+    temp_filepath = workspaces.novo_arquivo(tool_prefix, filename)
+    try:
+        file.save(temp_filepath)
+        print(f"(SIENGE) Arquivo salvo: {temp_filepath}")
+        df = ler_planilha_sienge(temp_filepath)
+        try:
+            etapas_u = listar_etapas_unicas(df["ETAPA"])
+        except Exception as e:
+            raise ValueError(f"Erro ao processar coluna 'ETAPA': {e}")
+        if not etapas_u:
+            flash("Nenhuma etapa encontrada.", "warning")  # Permite continuar
+        iniciar_job(
+            tool_prefix,
+            {
+                "uploaded_filename": filename,
+                "upload_path": temp_filepath,
+                "etapas_unicas": etapas_u,
+                "df_entrada": df,
+            },
+        )
+        print(f"(SIENGE) Etapas encontradas: {etapas_u}")
+        return redirect(url_for(".map_etapas_sienge_route"))
+    except Exception as e:
+        flash(f"Erro SIENGE: {e}", "error")
+        print(f"(SIENGE) Erro upload: {e}")
+        traceback.print_exc()
+        if "temp_filepath" in locals() and os.path.exists(temp_filepath):
+            workspaces.remover(temp_filepath)
+        return redirect(url_for(".importacao_sienge_index"))
+
+
+@bp.route("/map-etapas-sienge")
+def map_etapas_sienge_route():
+    tool_prefix = "sienge_"
+    job = dados_job(tool_prefix)
+    if job is None:
+        flash("Faça upload SIENGE primeiro.", "warning")
+        return redirect(url_for(".importacao_sienge_index"))
+    etapas = job.get("etapas_unicas", [])
+    return render_template(
+        "map_etapas_sienge.html",
+        active_page="importacao_sienge",
+        etapas_unicas=etapas,
+        tool_name="SIENGE",
+        process_url=url_for(".process_file_sienge"),
+        cancel_url=url_for(".importacao_sienge_index"),
+    )
+
+
+@bp.route("/process-sienge", methods=["POST"])
+def process_file_sienge():
+    from formatadores.exportacao_sienge import extrair_digitos_etapa
+    from formatadores.importacao_sienge import gerar_importacao_sienge, ler_planilha_sienge
+
+    tool_prefix = "sienge_"
+    job = dados_job(tool_prefix)
+    if job is None:
+        flash("Sessão expirada SIENGE.", "error")
+        return redirect(url_for(".importacao_sienge_index"))
+    fname = job["uploaded_filename"]
+    fpath = job["upload_path"]
+    etapas_orig = job.get("etapas_unicas", [])
+    if not os.path.exists(fpath):
+        flash("Arquivo temp SIENGE sumiu.", "error")
+        return redirect(url_for(".importacao_sienge_index"))
+    try:
+        etapas_map = {}
+        any_map = False
+        print("(SIENGE) Coletando mapeamento:")
+        for et_o, et_dig in zip(etapas_orig, extrair_digitos_etapa(etapas_orig)):
+            val = request.form.get(f"etapa_{et_o}", "").strip()
+            if et_dig and val:
+                etapas_map[et_dig] = val
+                any_map = True
+                print(f" '{et_dig}' -> '{val}'")
+            elif et_dig:
+                print(f" Aviso: Etapa '{et_o}' não mapeada.")
+        if not any_map and etapas_orig:
+            print(" Nenhum mapeamento.")
+        print("-" * 30)
+        df = job.get("df_entrada")
+        if df is None:
+            df = ler_planilha_sienge(fpath)
+        formato_saida = request.form.get("formato_saida", "xls")
+        output, mimetype_saida, ext_saida = gerar_importacao_sienge(
+            df, etapas_map, formato_saida
+        )
+        if os.path.exists(fpath):
+            workspaces.remover(fpath)
+        encerrar_job(tool_prefix)
+        out_fname = (
+            f"importacao_sienge_{fname.replace(tool_prefix,'').rsplit('.',1)[0]}.{ext_saida}"
+        )
+        return send_file(
+            output,
+            mimetype=mimetype_saida,
+            as_attachment=True,
+            download_name=out_fname,
+        )
+    except Exception as e:
+        flash(f"Erro SIENGE: {e}", "error")
+        print(f"(SIENGE) Err: {e}")
+        traceback.print_exc()
+        if "fpath" in locals() and os.path.exists(fpath):
+            workspaces.remover(fpath)
+        encerrar_job(tool_prefix)
+        if dados_job(tool_prefix) is not None:
+            return redirect(url_for(".map_etapas_sienge_route"))
+        else:
+            return redirect(url_for(".importacao_sienge_index"))
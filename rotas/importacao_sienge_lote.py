@@ -0,0 +1,158 @@
+# rotas/importacao_sienge_lote.py
+"""
+Importação SIENGE Lote: upload -> mapeamento de etapas -> arquivo de importação.
+"""
+
+import os
+import traceback
+
+from flask import (
+    Blueprint,
+    flash,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
+from werkzeug.utils import secure_filename
+
+from rotas.comum import allowed_file, dados_job, encerrar_job, iniciar_job, workspaces
+
+bp = Blueprint("importacao_sienge_lote", __name__)
+
+
+# === ROTAS IMPORTAÇÃO SIENGE LOTE ===
+@bp.route("/importacao-sienge-lote")
+def importacao_sienge_lote_index():
+    encerrar_job("sienge_lote_")
+    return render_template(
+        "importacao_sienge_lote.html", active_page="importacao_sienge_lote"
+    )
+
+
+@bp.route("/upload-sienge-lote", methods=["POST"])
+def upload_file_sienge_lote():
+    from formatadores.exportacao_sienge import listar_etapas_unicas
+    from formatadores.sienge_lote import ler_planilha_sienge_lote
+
+    tool_prefix = "sienge_lote_"
+    if "arquivo_entrada" not in request.files:
+        flash("Nenhum arquivo S Lote!", "error")
+        return redirect(url_for(".importacao_sienge_lote_index"))
+    file = request.files["arquivo_entrada"]
+    if file.filename == "":
+        flash("Nenhum arquivo S Lote!", "error")
+        return redirect(url_for(".importacao_sienge_lote_index"))
+    if not file or not allowed_file(file.filename):
+        flash("Tipo inválido S Lote.", "error")
+        return redirect(url_for(".importacao_sienge_lote_index"))
+    filename = secure_filename(f"{tool_prefix}{file.filename}")
+    temp_filepath = workspaces.novo_arquivo(tool_prefix, filename)
+    try:
+        file.save(temp_filepath)
+        print(f"(S Lote) Salvo: {temp_filepath}")
+        df = ler_planilha_sienge_lote(temp_filepath)
+        etapas_u = listar_etapas_unicas(df["ETAPA"])
+        if not etapas_u:
+            flash("Nenhuma etapa encontrada.", "warning")
+        iniciar_job(
+            tool_prefix,
+            {
+                "uploaded_filename": filename,
+                "upload_path": temp_filepath,
+                "etapas_unicas": etapas_u,
+                "df_entrada": df,
+            },
+        )
+        print(f"(S Lote) Etapas: {etapas_u}")
+        return redirect(url_for(".map_etapas_sienge_lote_route"))
+    except Exception as e:
+        flash(f"Erro S Lote: {e}", "error")
+        print(f"(S Lote) Err Upload: {e}")
+        traceback.print_exc()
+        if "temp_filepath" in locals() and os.path.exists(temp_filepath):
+            workspaces.remover(temp_filepath)
+        return redirect(url_for(".importacao_sienge_lote_index"))
+
+
+@bp.route("/map-etapas-sienge-lote")
+def map_etapas_sienge_lote_route():
+    tool_prefix = "sienge_lote_"
+    job = dados_job(tool_prefix)
+    if job is None:
+        flash("Upload S Lote primeiro.", "warning")
+        return redirect(url_for(".importacao_sienge_lote_index"))
+    etapas = job.get("etapas_unicas", [])
+    return render_template(
+        "map_etapas_sienge.html",
+        active_page="importacao_sienge_lote",
+        etapas_unicas=etapas,
+        tool_name="SIENGE Lote",
+        process_url=url_for(".process_file_sienge_lote"),
+        cancel_url=url_for(".importacao_sienge_lote_index"),
+    )
+
+
+@bp.route("/process-sienge-lote", methods=["POST"])
+def process_file_sienge_lote():
+    from formatadores.exportacao_sienge import extrair_digitos_etapa
+    from formatadores.sienge_lote import (
+        gerar_importacao_sienge_lote,
+        ler_planilha_sienge_lote,
+    )
+
+    tool_prefix = "sienge_lote_"
+    job = dados_job(tool_prefix)
+    if job is None:
+        flash("Sessão expirada S Lote.", "error")
+        return redirect(url_for(".importacao_sienge_lote_index"))
+    fname = job["uploaded_filename"]
+    fpath = job["upload_path"]
+    etapas_orig = job.get("etapas_unicas", [])
+    if not os.path.exists(fpath):
+        flash("Arquivo temp S Lote sumiu.", "error")
+        return redirect(url_for(".importacao_sienge_lote_index"))
+    try:
+        etapas_map = {}
+        any_map = False
+        print("(S Lote) Coletando mapeamento:")
+        for et_o, et_dig in zip(etapas_orig, extrair_digitos_etapa(etapas_orig)):
+            val = request.form.get(f"etapa_{et_o}", "").strip()
+            if et_dig and val:
+                etapas_map[et_dig] = val
+                any_map = True
+                print(f" '{et_dig}' -> '{val}'")
+            elif et_dig:
+                print(f" Aviso S Lote: Etapa '{et_o}' não mapeada.")
+        if not any_map and etapas_orig:
+            print(" Nenhum mapeamento S Lote.")
+        print("-" * 30)
+        df = job.get("df_entrada")
+        if df is None:
+            df = ler_planilha_sienge_lote(fpath)
+        formato_saida = request.form.get("formato_saida", "xls")
+        output, mimetype_saida, ext_saida = gerar_importacao_sienge_lote(
+            df, etapas_map, formato_saida
+        )
+        if os.path.exists(fpath):
+            workspaces.remover(fpath)
+        encerrar_job(tool_prefix)
+        out_fname = f"importacao_sienge_lote_{fname.replace(tool_prefix,'').rsplit('.',1)[0]}.{ext_saida}"
+        return send_file(
+            output,
+            mimetype=mimetype_saida,
+            as_attachment=True,
+            download_name=out_fname,
+        )
+    except Exception as e:
+        flash(f"Erro S Lote: {e}", "error")
+        print(f"(S Lote) Err: {e}")
+        traceback.print_exc()
+        if "fpath" in locals() and os.path.exists(fpath):
+            workspaces.remover(fpath)
+        encerrar_job(tool_prefix)
+        if dados_job(tool_prefix) is not None:
+            return redirect(url_for(".map_etapas_sienge_lote_route"))
+        else:
+            return redirect(url_for(".importacao_sienge_lote_index"))
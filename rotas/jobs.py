@@ -0,0 +1,41 @@
+# rotas/jobs.py
+"""
+Status e download dos jobs processados em background (ver servicos.executor_jobs).
+"""
+
+import io
+
+from flask import Blueprint, jsonify, send_file, url_for
+
+from rotas.comum import executor_jobs
+from servicos.executor_jobs import ESTADO_CONCLUIDO
+
+bp = Blueprint("jobs", __name__)
+
+
+# === ROTAS DE JOBS EM BACKGROUND ===
+@bp.route("/jobs/<job_id>/status")
+def status_job_route(job_id):
+    status = executor_jobs.status(job_id)
+    if status is None:
+        return jsonify(erro="Job não encontrado ou expirado."), 404
+    if status["estado"] == ESTADO_CONCLUIDO:
+        status["resultado_url"] = url_for(".resultado_job_route", job_id=job_id)
+    return jsonify(job_id=job_id, **status)
+
+
+@bp.route("/jobs/<job_id>/resultado")
+def resultado_job_route(job_id):
+    resultado = executor_jobs.resultado(job_id)
+    if resultado is None:
+        status = executor_jobs.status(job_id)
+        if status is None:
+            return jsonify(erro="Job não encontrado ou expirado."), 404
+        return jsonify(job_id=job_id, **status), 409
+    conteudo, nome_arquivo, mimetype = resultado
+    return send_file(
+        io.BytesIO(conteudo),
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=nome_arquivo,
+    )
@@ -0,0 +1,60 @@
+# rotas/metricas.py
+"""
+/metrics (texto Prometheus) e o cabeçalho X-Stage-Timings: cada requisição
+abre uma coleta de etapas (formatadores.metricas) e a resposta leva o
+resumo das etapas medidas durante ela.
+
+O registro é por processo: com vários workers gunicorn cada um expõe os
+próprios números, e o Prometheus soma as séries dos alvos.
+"""
+
+import time
+
+from flask import Blueprint, Response, g, request
+
+from formatadores.metricas import (
+    cabecalho_etapas,
+    encerrar_coleta,
+    iniciar_coleta,
+    registrar_requisicao,
+    texto_prometheus,
+)
+
+bp = Blueprint("metricas", __name__)
+
+
+@bp.before_app_request
+def iniciar_medicao_requisicao():
+    g.metricas_inicio = time.perf_counter()
+    g.metricas_token, g.metricas_etapas = iniciar_coleta()
+
+
+@bp.after_app_request
+def registrar_medicao_requisicao(response):
+    inicio = g.pop("metricas_inicio", None)
+    if inicio is None:
+        return response
+    etapas = g.get("metricas_etapas")
+    if etapas:
+        response.headers["X-Stage-Timings"] = cabecalho_etapas(etapas)
+    registrar_requisicao(
+        request.endpoint or "desconhecido",
+        request.method,
+        response.status_code,
+        time.perf_counter() - inicio,
+        bytes_entrada=request.content_length,
+        bytes_saida=response.content_length,
+    )
+    return response
+
+
+@bp.teardown_app_request
+def encerrar_medicao_requisicao(exc):
+    token = g.pop("metricas_token", None)
+    if token is not None:
+        encerrar_coleta(token)
+
+
+@bp.route("/metrics")
+def metrics_route():
+    return Response(texto_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
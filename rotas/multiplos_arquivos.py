@@ -0,0 +1,63 @@
+# rotas/multiplos_arquivos.py
+"""
+Modo de múltiplos arquivos pela web: ZIP de planilhas -> ZIP com as saídas
+e o manifesto (ver servicos.multiplos_arquivos).
+
+O lote sempre roda no executor de jobs: a rota valida e extrai o ZIP e
+responde 202 com o job_id e as URLs de status/download, como as outras
+ferramentas demoradas com assincrono=1.
+"""
+
+import json
+import os
+import zipfile
+
+from flask import Blueprint, jsonify, request
+
+from rotas.comum import executor_jobs, resposta_job_assincrono, workspaces
+from servicos.multiplos_arquivos import FERRAMENTAS, extrair_zip, processar_arquivos_job
+
+bp = Blueprint("multiplos_arquivos", __name__)
+
+
+# === ROTA MÚLTIPLOS ARQUIVOS (ZIP) ===
+@bp.route("/multiplos-arquivos", methods=["POST"])
+def processar_multiplos_arquivos_route():
+    """
+    Recebe um ZIP de planilhas (arquivo_entrada), a ferramenta e os parâmetros
+    em JSON; agenda o processamento e responde 202. O resultado do job é um
+    ZIP com as saídas e o manifesto.json.
+    """
+    ferramenta = request.form.get("ferramenta", "")
+    file = request.files.get("arquivo_entrada")
+    if file is None or not file.filename.lower().endswith(".zip"):
+        return jsonify(erro="Envie um arquivo .zip em 'arquivo_entrada'."), 400
+    if ferramenta not in FERRAMENTAS:
+        return jsonify(erro=f"Ferramenta inválida: '{ferramenta}'. Use: {', '.join(FERRAMENTAS)}."), 400
+    temp_filepath = workspaces.novo_arquivo("multiplos_", "entrada.zip")
+    try:
+        parametros = json.loads(request.form.get("parametros") or "{}")
+        file.save(temp_filepath)
+        caminhos, nomes = extrair_zip(temp_filepath, os.path.dirname(temp_filepath))
+        if not caminhos:
+            raise ValueError("Nenhuma planilha encontrada na entrada.")
+        # O workspace (ZIP e planilhas extraídas) é removido quando o job termina
+        job_id = executor_jobs.submeter(
+            processar_arquivos_job,
+            ferramenta,
+            caminhos,
+            parametros,
+            nomes,
+            nome_arquivo=f"multiplos_{ferramenta}.zip",
+            mimetype="application/zip",
+            arquivos_temporarios=[temp_filepath],
+        )
+    except (ValueError, zipfile.BadZipFile) as e:
+        print(f"(Múltiplos) Erro: {e}")
+        workspaces.remover(temp_filepath)
+        return jsonify(erro=str(e)), 400
+    except Exception:
+        workspaces.remover(temp_filepath)
+        raise
+    print(f"(Múltiplos) {ferramenta}: {len(caminhos)} arquivos agendados no job {job_id}.")
+    return resposta_job_assincrono(job_id)
@@ -0,0 +1,301 @@
+# rotas/unidades_bloqueadas.py
+"""
+Unidades Bloqueadas: upload do CSV -> filtros -> planilha com os preços da API.
+"""
+
+import os
+import re
+import traceback
+
+from flask import (
+    Blueprint,
+    flash,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
+from werkzeug.utils import secure_filename
+
+from rotas.comum import (
+    dados_job,
+    encerrar_job,
+    executor_jobs,
+    iniciar_job,
+    quer_processamento_assincrono,
+    resposta_job_assincrono,
+    workspaces,
+)
+
+bp = Blueprint("unidades_bloqueadas", __name__)
+
+
+ALLOWED_EXTENSIONS_CSV = {"csv"}  # Específico para esta ferramenta
+
+
+def allowed_file_csv(filename):
+    return (
+        "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS_CSV
+    )
+
+
+@bp.route("/formatacao/unidades-bloqueadas", methods=["GET", "POST"])
+def formatador_unidades_bloqueadas_tool():
+    tool_prefix = "unid_bloq_"
+    active_page = "formatador_unidades_bloqueadas"  # Para destacar no menu
+
+    if request.method == "POST":
+        from formatadores.tabela_unidades_bloqueadas import ler_csv_e_extrair_filtros
+
+        if "arquivo_entrada" not in request.files:
+            flash("Nenhum arquivo selecionado!", "error")
+            return redirect(request.url)
+
+        file = request.files["arquivo_entrada"]
+        if file.filename == "":
+            flash("Nenhum arquivo selecionado!", "error")
+            return redirect(request.url)
+
+        if file and allowed_file_csv(file.filename):
+            original_filename = file.filename
+            # Cria um nome de arquivo temporário mais seguro/único
+            temp_filename_base = secure_filename(os.path.splitext(original_filename)[0])
+            temp_filename = (
+                f"temp_unid_bloq_{temp_filename_base}_{os.urandom(4).hex()}.csv"
+            )
+            temp_filepath = workspaces.novo_arquivo(tool_prefix, temp_filename)
+
+            try:
+                file.save(temp_filepath)
+                print(f"Arquivo CSV salvo temporariamente: {temp_filepath}")
+
+                # Lê o CSV e extrai opções de filtro
+                (
+                    df_input,
+                    empreendimentos_unicos,
+                    motivos_unicos,
+                    col_emp,
+                    col_mot,
+                    placeholder_vazio,
+                ) = ler_csv_e_extrair_filtros(temp_filepath)
+
+                # Dados do upload ficam no job (server-side); o DataFrame já lido
+                # é reaproveitado no processamento, sem re-ler o CSV.
+                iniciar_job(
+                    tool_prefix,
+                    {
+                        "temp_filepath": temp_filepath,
+                        "df_input": df_input,
+                        "original_filename": original_filename,
+                        "empreendimentos_unicos": empreendimentos_unicos,
+                        "motivos_unicos": motivos_unicos,
+                        "col_empreendimento_input": col_emp,  # Guardar nome da coluna identificada
+                        "col_motivo_input": col_mot,  # Guardar nome da coluna identificada
+                        "placeholder_vazio": placeholder_vazio,
+                    },
+                )
+
+                return redirect(
+                    url_for(".formatador_unidades_bloqueadas_tool_processar")
+                )
+
+            except ValueError as ve:  # Erros de validação da leitura do CSV
+                flash(f"Erro ao ler o arquivo CSV: {ve}", "error")
+                print(f"Erro de Validação na leitura (Unid. Bloq.): {ve}")
+                traceback.print_exc()
+            except Exception as e:
+                flash(
+                    f"Ocorreu um erro inesperado ao preparar os filtros: {e}", "error"
+                )
+                print(f"Erro Inesperado na preparação (Unid. Bloq.): {e}")
+                traceback.print_exc()
+            finally:
+                # Se o job não foi criado (erro antes do redirect), remove o arquivo temporário
+                if dados_job(tool_prefix) is None and os.path.exists(temp_filepath):
+                    try:
+                        workspaces.remover(temp_filepath)
+                        print(
+                            f"Arquivo temporário de upload {temp_filepath} removido devido a erro na preparação."
+                        )
+                    except OSError as ose:
+                        print(
+                            f"Erro ao remover arquivo temporário {temp_filepath} após erro: {ose}"
+                        )
+
+            return redirect(
+                request.url
+            )  # Em caso de erro, recarrega a página de upload
+
+        else:
+            flash(f"Tipo de arquivo inválido. Apenas .csv é permitido.", "error")
+            return redirect(request.url)
+
+    # Método GET - Limpa sessão e mostra formulário de upload
+    # Limpa dados da sessão específica desta ferramenta
+    encerrar_job(tool_prefix)
+    return render_template(
+        "unidades_bloqueadas.html",
+        active_page=active_page,
+        # Você pode querer passar ALLOWED_EXTENSIONS_CSV para o template se o exibir
+        # ALLOWED_EXTENSIONS_STR = ", ".join([f".{ext}" for ext in ALLOWED_EXTENSIONS_CSV])
+    )
+
+
+# Rota para mostrar filtros e processar com base neles
+@bp.route("/formatacao/unidades-bloqueadas/processar", methods=["GET", "POST"])
+def formatador_unidades_bloqueadas_tool_processar():
+    tool_prefix = "unid_bloq_"
+    active_page = "formatador_unidades_bloqueadas_filtros"  # Nova active_page para a etapa de filtro
+
+    session_data = dados_job(tool_prefix)
+    if not session_data or "temp_filepath" not in session_data:
+        flash(
+            "Sessão expirada ou arquivo não encontrado. Por favor, faça o upload novamente.",
+            "warning",
+        )
+        return redirect(url_for(".formatador_unidades_bloqueadas_tool"))
+
+    temp_filepath = session_data["temp_filepath"]
+    original_filename = session_data["original_filename"]
+    empreendimentos_unicos = session_data.get("empreendimentos_unicos", [])
+    motivos_unicos = session_data.get("motivos_unicos", [])
+    col_empreendimento_input = session_data.get("col_empreendimento_input")
+    col_motivo_input = session_data.get("col_motivo_input")
+    placeholder_vazio = session_data.get("placeholder_vazio", "<VAZIO>")
+
+    if not os.path.exists(temp_filepath):
+        flash(
+            f"Arquivo temporário ({os.path.basename(temp_filepath)}) não encontrado no servidor. Por favor, faça o upload novamente.",
+            "error",
+        )
+        encerrar_job(tool_prefix)
+        return redirect(url_for(".formatador_unidades_bloqueadas_tool"))
+
+    if request.method == "POST":
+        from formatadores.tabela_unidades_bloqueadas import (
+            ler_csv_e_extrair_filtros,
+            processar_unidades_bloqueadas_csv,
+            processar_unidades_bloqueadas_na_base,
+        )
+
+        empreendimentos_a_ignorar = request.form.getlist("ignorar_empreendimento")
+        motivos_a_ignorar = request.form.getlist("ignorar_motivo")
+
+        # É crucial re-ler o DataFrame do arquivo salvo para garantir que temos os dados corretos
+        # e que a coluna de motivo ainda está com o placeholder antes da filtragem.
+        try:
+            # DataFrame lido no upload (já com o placeholder nos vazios); só re-lê o
+            # arquivo salvo se o job não o tiver.
+            df_input_reloaded = session_data.get("df_input")
+            if df_input_reloaded is None:
+                df_input_reloaded, _, _, _, _, _ = ler_csv_e_extrair_filtros(
+                    temp_filepath
+                )
+
+            if not col_empreendimento_input or not col_motivo_input:
+                # Isso não deveria acontecer se a sessão foi salva corretamente
+                raise ValueError(
+                    "Nomes das colunas de empreendimento ou motivo não encontrados na sessão."
+                )
+
+            # Configura a base selecionada
+            base_selecionada = request.form.get("base_api", "VCA")
+            from formatadores.tabela_unidades_bloqueadas import set_base
+
+            set_base(base_selecionada)
+
+            output_filename = f"filtrado_unidades_bloqueadas_{os.path.splitext(original_filename)[0]}.xlsx"
+
+            if quer_processamento_assincrono():
+                # Busca de preços na API é lenta: roda no pool e responde com o job_id
+                job_id = executor_jobs.submeter(
+                    processar_unidades_bloqueadas_na_base,
+                    base_selecionada,
+                    df_input_reloaded,
+                    col_empreendimento_input,
+                    col_motivo_input,
+                    placeholder_vazio,
+                    empreendimentos_a_ignorar,
+                    motivos_a_ignorar,
+                    buscar_precos=True,
+                    nome_arquivo=output_filename,
+                    mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                )
+                encerrar_job(tool_prefix)
+                return resposta_job_assincrono(job_id)
+
+            output_excel_stream = processar_unidades_bloqueadas_csv(
+                df_input_reloaded,  # DataFrame com placeholders aplicados
+                col_empreendimento_input,
+                col_motivo_input,
+                placeholder_vazio,
+                empreendimentos_a_ignorar,
+                motivos_a_ignorar,
+                buscar_precos=True,  # Habilita busca de preços da API
+            )
+
+            # Limpa a sessão principal ANTES de enviar o arquivo
+            encerrar_job(tool_prefix)
+
+            # Remove o arquivo temporário após o processamento bem-sucedido
+            if os.path.exists(temp_filepath):
+                try:
+                    workspaces.remover(temp_filepath)
+                    print(
+                        f"Arquivo CSV temporário {temp_filepath} removido após processamento."
+                    )
+                except OSError as ose:
+                    print(
+                        f"Erro ao remover arquivo CSV temporário {temp_filepath}: {ose}"
+                    )
+
+            return send_file(
+                output_excel_stream,
+                as_attachment=True,
+                download_name=output_filename,
+                mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+
+        except ValueError as ve:  # Erros de validação (ex: coluna não encontrada)
+            flash(f"Erro de validação ao processar o arquivo: {ve}", "error")
+            print(f"Erro de Validação no processamento (Unid. Bloq.): {ve}")
+            traceback.print_exc()
+        except RuntimeError as re:  # Erros de execução do processamento
+            flash(f"Erro de execução ao processar o arquivo: {re}", "error")
+            print(f"Erro de Execução no processamento (Unid. Bloq.): {re}")
+            traceback.print_exc()
+        except Exception as e:
+            flash(
+                f"Ocorreu um erro inesperado durante o processamento final: {e}",
+                "error",
+            )
+            print(f"Erro Inesperado no processamento final (Unid. Bloq.): {e}")
+            traceback.print_exc()
+        finally:
+            # Garante limpeza do arquivo temporário em caso de erro no processamento
+            # e que a sessão seja limpa.
+            if os.path.exists(temp_filepath):
+                try:
+                    workspaces.remover(temp_filepath)
+                    print(
+                        f"Arquivo CSV temporário {temp_filepath} removido após tentativa de processamento (com erro ou não)."
+                    )
+                except OSError as ose:
+                    print(
+                        f"Erro ao remover arquivo CSV temporário {temp_filepath} após erro no processamento: {ose}"
+                    )
+            encerrar_job(tool_prefix)  # Limpa sessão em caso de erro também
+
+        # Se erro, redireciona para a própria página de filtros para que o usuário veja a mensagem
+        # ou para a página de upload se a sessão for completamente invalidada.
+        return redirect(url_for(".formatador_unidades_bloqueadas_tool_processar"))
+
+    # Método GET para a página de filtros
+    return render_template(
+        "unidades_bloqueadas_filtros.html",
+        active_page=active_page,
+        empreendimentos_unicos=empreendimentos_unicos,
+        motivos_unicos=motivos_unicos,
+        original_filename=original_filename,
+    )
@@ -0,0 +1,233 @@
+# servicos/armazenamento_jobs.py
+"""
+Armazenamento server-side do estado das ferramentas de vários passos
+(upload -> mapeamento -> processamento). O cookie da sessão guarda só o
+job_id; metadados do upload, DataFrames já lidos e opções descobertas
+(tipologias, etapas, blocos, colunas...) ficam aqui.
+
+Dois backends com a mesma interface:
+- ArmazenamentoJobsMemoria: dicionário LRU com TTL, local ao processo.
+- ArmazenamentoJobsSQLite: arquivo SQLite (pickle dos dados), compartilhado
+  entre workers da mesma máquina.
+"""
+
+import contextlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+TTL_PADRAO_SEGUNDOS = 2 * 60 * 60  # 2 horas sem acesso
+MAX_JOBS_PADRAO = 200
+
+
+def _novo_job_id():
+    return uuid.uuid4().hex
+
+
+class ArmazenamentoJobsMemoria:
+    """
+    Jobs em memória, com despejo do menos recentemente usado acima de
+    max_jobs e expiração após ttl_segundos sem acesso.
+    """
+
+    def __init__(self, max_jobs=MAX_JOBS_PADRAO, ttl_segundos=TTL_PADRAO_SEGUNDOS):
+        self.max_jobs = max_jobs
+        self.ttl_segundos = ttl_segundos
+        self._jobs = OrderedDict()  # job_id -> (acessado_em, dados)
+        self._lock = threading.Lock()
+
+    def _expirado(self, acessado_em, agora):
+        return self.ttl_segundos is not None and agora - acessado_em > self.ttl_segundos
+
+    def criar(self, dados):
+        job_id = _novo_job_id()
+        self.salvar(job_id, dados)
+        return job_id
+
+    def salvar(self, job_id, dados):
+        agora = time.monotonic()
+        with self._lock:
+            self._jobs[job_id] = (agora, dict(dados))
+            self._jobs.move_to_end(job_id)
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+    def obter(self, job_id):
+        """Dados do job (dict) ou None se não existir/expirou."""
+        if not job_id:
+            return None
+        agora = time.monotonic()
+        with self._lock:
+            item = self._jobs.get(job_id)
+            if item is None:
+                return None
+            acessado_em, dados = item
+            if self._expirado(acessado_em, agora):
+                del self._jobs[job_id]
+                return None
+            self._jobs[job_id] = (agora, dados)
+            self._jobs.move_to_end(job_id)
+            # Cópia: alterações de quem chamou não mexem no estado compartilhado
+            return dict(dados)
+
+    def existe(self, job_id):
+        """Se o job existe e não expirou, sem contar como acesso."""
+        with self._lock:
+            item = self._jobs.get(job_id)
+            return item is not None and not self._expirado(item[0], time.monotonic())
+
+    def atualizar(self, job_id, **campos):
+        """Atualiza campos de um job existente. Retorna False se ele não existe."""
+        if self.obter(job_id) is None:
+            return False
+        with self._lock:
+            item = self._jobs.get(job_id)
+            if item is None:
+                return False
+            item[1].update(campos)
+        return True
+
+    def remover(self, job_id):
+        with self._lock:
+            return self._jobs.pop(job_id, None) is not None
+
+    def limpar_expirados(self):
+        """Remove jobs expirados. Retorna quantos foram removidos."""
+        agora = time.monotonic()
+        with self._lock:
+            expirados = [j for j, (acessado_em, _) in self._jobs.items() if self._expirado(acessado_em, agora)]
+            for job_id in expirados:
+                del self._jobs[job_id]
+        return len(expirados)
+
+    def __len__(self):
+        return len(self._jobs)
+
+
+class ArmazenamentoJobsSQLite:
+    """
+    Jobs num arquivo SQLite (modo WAL), para vários workers gunicorn na mesma
+    máquina enxergarem o mesmo estado. Os dados são gravados com pickle; a
+    expiração usa o horário do último acesso e o excesso sobre max_jobs é
+    removido do menos recente para o mais recente.
+    """
+
+    def __init__(self, caminho, max_jobs=MAX_JOBS_PADRAO, ttl_segundos=TTL_PADRAO_SEGUNDOS):
+        self.caminho = caminho
+        self.max_jobs = max_jobs
+        self.ttl_segundos = ttl_segundos
+        pasta = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(pasta, exist_ok=True)
+        with self._conectar() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " job_id TEXT PRIMARY KEY,"
+                " dados BLOB NOT NULL,"
+                " criado_em REAL NOT NULL,"
+                " acessado_em REAL NOT NULL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS idx_jobs_acessado ON jobs (acessado_em)")
+
+    @contextlib.contextmanager
+    def _conectar(self):
+        """Conexão numa transação (commit/rollback ao sair), fechada em seguida."""
+        con = sqlite3.connect(self.caminho, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def criar(self, dados):
+        job_id = _novo_job_id()
+        self.salvar(job_id, dados)
+        return job_id
+
+    def salvar(self, job_id, dados):
+        agora = time.time()
+        blob = pickle.dumps(dict(dados), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._conectar() as con:
+            con.execute(
+                "INSERT INTO jobs (job_id, dados, criado_em, acessado_em) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(job_id) DO UPDATE SET dados = excluded.dados, acessado_em = excluded.acessado_em",
+                (job_id, blob, agora, agora),
+            )
+            con.execute(
+                "DELETE FROM jobs WHERE job_id NOT IN"
+                " (SELECT job_id FROM jobs ORDER BY acessado_em DESC LIMIT ?)",
+                (self.max_jobs,),
+            )
+
+    def obter(self, job_id):
+        """Dados do job (dict) ou None se não existir/expirou."""
+        if not job_id:
+            return None
+        agora = time.time()
+        with self._conectar() as con:
+            linha = con.execute(
+                "SELECT dados, acessado_em FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if linha is None:
+                return None
+            blob, acessado_em = linha
+            if self.ttl_segundos is not None and agora - acessado_em > self.ttl_segundos:
+                con.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+                return None
+            con.execute("UPDATE jobs SET acessado_em = ? WHERE job_id = ?", (agora, job_id))
+        return pickle.loads(blob)
+
+    def existe(self, job_id):
+        """Se o job existe e não expirou, sem contar como acesso."""
+        with self._conectar() as con:
+            linha = con.execute(
+                "SELECT acessado_em FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if linha is None:
+            return False
+        return self.ttl_segundos is None or time.time() - linha[0] <= self.ttl_segundos
+
+    def atualizar(self, job_id, **campos):
+        """Atualiza campos de um job existente. Retorna False se ele não existe."""
+        dados = self.obter(job_id)
+        if dados is None:
+            return False
+        dados.update(campos)
+        self.salvar(job_id, dados)
+        return True
+
+    def remover(self, job_id):
+        with self._conectar() as con:
+            return con.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,)).rowcount > 0
+
+    def limpar_expirados(self):
+        """Remove jobs expirados. Retorna quantos foram removidos."""
+        if self.ttl_segundos is None:
+            return 0
+        limite = time.time() - self.ttl_segundos
+        with self._conectar() as con:
+            return con.execute("DELETE FROM jobs WHERE acessado_em < ?", (limite,)).rowcount
+
+    def __len__(self):
+        with self._conectar() as con:
+            return con.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+def criar_armazenamento_jobs(caminho_sqlite=None, max_jobs=None, ttl_segundos=None):
+    """
+    Cria o armazenamento de jobs. Sem caminho_sqlite usa a variável de ambiente
+    JOBS_SQLITE_PATH; se nenhuma for definida, fica em memória (só serve para
+    um processo: o gunicorn.conf.py define JOBS_SQLITE_PATH quando há mais de
+    um worker). JOBS_MAX e JOBS_TTL_SEGUNDOS ajustam os limites padrão.
+    """
+    caminho_sqlite = caminho_sqlite or os.environ.get("JOBS_SQLITE_PATH")
+    max_jobs = max_jobs or int(os.environ.get("JOBS_MAX", MAX_JOBS_PADRAO))
+    if ttl_segundos is None:
+        ttl_segundos = int(os.environ.get("JOBS_TTL_SEGUNDOS", TTL_PADRAO_SEGUNDOS))
+    if caminho_sqlite:
+        return ArmazenamentoJobsSQLite(caminho_sqlite, max_jobs=max_jobs, ttl_segundos=ttl_segundos)
+    return ArmazenamentoJobsMemoria(max_jobs=max_jobs, ttl_segundos=ttl_segundos)
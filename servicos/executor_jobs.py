@@ -0,0 +1,197 @@
+# servicos/executor_jobs.py
+"""
+Execução em background das funções processar_* (pool de processos local, sem
+broker externo). submeter() devolve o job_id na hora; estado, progresso e o
+arquivo gerado ficam no armazenamento de jobs (ver armazenamento_jobs), de
+onde as rotas de status e download os leem.
+
+Os workers enviam o progresso (formatadores.progresso) por uma fila
+multiprocessing; uma thread do processo web consome a fila e atualiza o job.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from formatadores.logs import obter_logger
+from formatadores.metricas import coletar_etapas, registrar_etapas, resumir_etapas
+from formatadores.progresso import definir_callback_progresso
+
+logger = obter_logger(__name__)
+
+ESTADO_NA_FILA = "na_fila"
+ESTADO_EXECUTANDO = "executando"
+ESTADO_CONCLUIDO = "concluido"
+ESTADO_ERRO = "erro"
+ESTADOS_FINAIS = (ESTADO_CONCLUIDO, ESTADO_ERRO)
+
+INTERVALO_MINIMO_PROGRESSO = 0.5  # segundos entre envios de progresso por job
+
+# --- Lado do worker ---
+_fila_worker = None
+_job_worker = None
+_ultimo_envio = 0.0
+
+
+def _iniciar_worker(fila):
+    global _fila_worker
+    _fila_worker = fila
+    definir_callback_progresso(_enviar_progresso)
+
+
+def _enviar_progresso(fracao, mensagem=None):
+    global _ultimo_envio
+    agora = time.monotonic()
+    if _job_worker is None or (fracao < 1.0 and agora - _ultimo_envio < INTERVALO_MINIMO_PROGRESSO):
+        return
+    _ultimo_envio = agora
+    _fila_worker.put((_job_worker, {"progresso": round(fracao, 4), "mensagem": mensagem}))
+
+
+def _executar_no_worker(job_id, funcao, args, kwargs):
+    global _job_worker, _ultimo_envio
+    _job_worker, _ultimo_envio = job_id, 0.0
+    _fila_worker.put((job_id, {"estado": ESTADO_EXECUTANDO, "iniciado_em": time.time()}))
+    try:
+        with coletar_etapas() as etapas:
+            resultado = funcao(*args, **kwargs)
+    finally:
+        _job_worker = None
+    # BytesIO/StringIO -> bytes, para o resultado ir pelo pickle do pool
+    if hasattr(resultado, "getvalue"):
+        resultado = resultado.getvalue()
+    if isinstance(resultado, str):
+        resultado = resultado.encode("utf-8-sig")
+    # As medições do worker voltam junto; o registro exportado é o do processo web
+    return resultado, etapas
+
+
+# --- Lado do processo web ---
+class ExecutorJobs:
+    """
+    Pool de processos criado sob demanda (no primeiro submeter), para que
+    importar o app não crie processos. max_workers limita os jobs em
+    paralelo; os demais aguardam na fila local do pool.
+    """
+
+    def __init__(self, armazenamento, max_workers=None, remover_arquivo=os.remove,
+                 vincular_arquivo=None):
+        self.armazenamento = armazenamento
+        self.remover_arquivo = remover_arquivo
+        self.vincular_arquivo = vincular_arquivo
+        self.max_workers = max_workers or int(os.environ.get("JOBS_WORKERS", 2))
+        self._pool = None
+        self._fila = None
+        self._lock = threading.Lock()
+
+    def _garantir_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: o processo web tem threads (servidor, consumo da fila),
+                # e fork com threads ativas pode herdar locks travados
+                contexto = multiprocessing.get_context("spawn")
+                self._fila = contexto.Queue()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=contexto,
+                    initializer=_iniciar_worker,
+                    initargs=(self._fila,),
+                )
+                threading.Thread(
+                    target=self._consumir_fila, name="progresso-jobs", daemon=True
+                ).start()
+            return self._pool
+
+    def _atualizar(self, job_id, campos):
+        with self._lock:
+            dados = self.armazenamento.obter(job_id)
+            if dados is None or dados.get("estado") in ESTADOS_FINAIS:
+                return  # Job removido/expirado ou mensagem atrasada de job já encerrado
+            self.armazenamento.atualizar(job_id, **campos)
+
+    def _consumir_fila(self):
+        while True:
+            try:
+                job_id, campos = self._fila.get()
+                self._atualizar(job_id, campos)
+            except Exception:
+                logger.exception("Erro ao atualizar progresso do job")
+
+    def _finalizar(self, job_id, future, arquivos_temporarios):
+        for caminho in arquivos_temporarios:
+            try:
+                if os.path.exists(caminho):
+                    self.remover_arquivo(caminho)
+            except OSError:
+                logger.exception("Erro ao remover temp %s", caminho)
+        try:
+            resultado, etapas = future.result()
+            registrar_etapas(etapas)
+            campos = {
+                "estado": ESTADO_CONCLUIDO,
+                "progresso": 1.0,
+                "mensagem": None,
+                "resultado": resultado,
+                "etapas": resumir_etapas(etapas),
+            }
+        except Exception as e:
+            logger.exception("Job %s falhou", job_id)
+            campos = {"estado": ESTADO_ERRO, "erro": str(e)}
+        campos["finalizado_em"] = time.time()
+        self._atualizar(job_id, campos)
+
+    def submeter(
+        self,
+        funcao,
+        *args,
+        nome_arquivo="resultado",
+        mimetype="application/octet-stream",
+        arquivos_temporarios=(),
+        **kwargs,
+    ):
+        """
+        Agenda funcao(*args, **kwargs) no pool e retorna o job_id. funcao e
+        argumentos precisam ser serializáveis (funções de módulo, DataFrames,
+        caminhos...); o retorno (BytesIO/bytes/str) vira o arquivo do job.
+        arquivos_temporarios são removidos quando o job termina (sucesso ou erro)
+        e, até lá, ficam vinculados ao job (vincular_arquivo(caminho, job_id)).
+        """
+        job_id = self.armazenamento.criar(
+            {
+                "estado": ESTADO_NA_FILA,
+                "progresso": 0.0,
+                "mensagem": None,
+                "nome_arquivo": nome_arquivo,
+                "mimetype": mimetype,
+                "criado_em": time.time(),
+            }
+        )
+        arquivos_temporarios = list(arquivos_temporarios)
+        if self.vincular_arquivo is not None:
+            for caminho in arquivos_temporarios:
+                self.vincular_arquivo(caminho, job_id)
+        future = self._garantir_pool().submit(_executar_no_worker, job_id, funcao, args, kwargs)
+        future.add_done_callback(lambda f: self._finalizar(job_id, f, arquivos_temporarios))
+        return job_id
+
+    def status(self, job_id):
+        """Estado do job sem o arquivo gerado, ou None se não existe."""
+        dados = self.armazenamento.obter(job_id)
+        if dados is None or "estado" not in dados:
+            return None
+        return {k: v for k, v in dados.items() if k != "resultado"}
+
+    def resultado(self, job_id):
+        """(bytes, nome_arquivo, mimetype) do job concluído, ou None."""
+        dados = self.armazenamento.obter(job_id)
+        if not dados or dados.get("estado") != ESTADO_CONCLUIDO:
+            return None
+        return dados["resultado"], dados["nome_arquivo"], dados["mimetype"]
+
+    def encerrar(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
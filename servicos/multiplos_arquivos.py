@@ -0,0 +1,281 @@
+# servicos/multiplos_arquivos.py
+"""
+Modo de múltiplos arquivos: a mesma ferramenta sobre várias planilhas (um
+ZIP ou um diretório), uma chamada processar_* por arquivo distribuída num
+ProcessPoolExecutor (ou em sequência, com max_workers=1, como na web, onde o
+lote inteiro já roda num worker do executor de jobs). O resultado é um ZIP
+com as saídas e um manifesto.json com tempo e erro de cada arquivo.
+
+ZIPs são extraídos com limites de quantidade de planilhas e de tamanho
+descompactado (por arquivo e total), contra ZIPs que se expandem sem fim.
+
+Uso pela linha de comando (na raiz do repositório):
+    python -m servicos.multiplos_arquivos sienge-lote entradas.zip -o saida.zip \\
+        --parametros '{"etapas": {"01": "101", "02": "102"}}'
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from formatadores.metricas import coletar_etapas, registrar_etapas
+from formatadores.progresso import reportar_progresso
+
+EXTENSOES_PLANILHA = (".xlsx", ".xls", ".csv")
+
+# Limites da extração de ZIP (o upload tem no máximo 16 MB, mas compactado)
+MAX_ARQUIVOS_ZIP = int(os.environ.get("MULTIPLOS_MAX_ARQUIVOS", 200))
+MAX_BYTES_ARQUIVO_ZIP = int(os.environ.get("MULTIPLOS_MAX_BYTES_ARQUIVO", 50 * 1024 * 1024))
+MAX_BYTES_TOTAL_ZIP = int(os.environ.get("MULTIPLOS_MAX_BYTES_TOTAL", 200 * 1024 * 1024))
+
+
+# --- Ferramentas: (caminho, parametros) -> (bytes, nome_saida) ---
+# Os imports ficam dentro das funções: cada worker só carrega o que usa.
+def _nome_base(caminho):
+    return os.path.splitext(os.path.basename(caminho))[0]
+
+
+def _formatador_lote(caminho, parametros):
+    from formatadores.lote_formatador import processar_formatador_lote_web
+
+    saida = processar_formatador_lote_web(caminho)
+    return saida.getvalue(), f"{_nome_base(caminho)}_PROCESSADO.xlsx"
+
+
+def _formatador_incorporacao(caminho, parametros):
+    from formatadores.incorporacao_formatador import processar_incorporacao_web
+
+    saida = processar_incorporacao_web(caminho)
+    return saida.getvalue(), f"planilha_processada_{_nome_base(caminho)}.xlsx"
+
+
+def _sienge_lote(caminho, parametros):
+    from formatadores.sienge_lote import gerar_importacao_sienge_lote, ler_planilha_sienge_lote
+
+    df = ler_planilha_sienge_lote(caminho)
+    saida, _, ext = gerar_importacao_sienge_lote(
+        df, parametros.get("etapas", {}), parametros.get("formato_saida", "xls")
+    )
+    return saida.getvalue(), f"importacao_sienge_lote_{_nome_base(caminho)}.{ext}"
+
+
+def _preco_lote_avista(caminho, parametros):
+    from formatadores.tabela_preco_importador import processar_preco_lote_avista
+
+    with open(caminho, "rb") as f:
+        saida = processar_preco_lote_avista(io.BytesIO(f.read()))
+    return saida.getvalue().encode("utf-8-sig"), f"{_nome_base(caminho)}_PREC_LOTE_AV_PROCESSADO.csv"
+
+
+def _preco_lote_parcelado(caminho, parametros):
+    from formatadores.tabela_preco_importador import processar_preco_lote_parcelado
+
+    num_anos = int(parametros["num_anos_parcelas"])
+    with open(caminho, "rb") as f:
+        saida = processar_preco_lote_parcelado(
+            io.BytesIO(f.read()),
+            int(parametros["num_meses"]),
+            float(parametros["juros_anual_perc"]),
+            num_anos,
+        )
+    nome = f"{_nome_base(caminho)}_PREC_LOTE_PARC_{num_anos}anos_PROCESSADO.csv"
+    return saida.getvalue().encode("utf-8-sig"), nome
+
+
+FERRAMENTAS = {
+    "formatador-lote": _formatador_lote,
+    "formatador-incorporacao": _formatador_incorporacao,
+    "sienge-lote": _sienge_lote,
+    "preco-lote-avista": _preco_lote_avista,
+    "preco-lote-parcelado": _preco_lote_parcelado,
+}
+
+
+# --- Entradas ---
+def listar_planilhas(pasta):
+    """Planilhas de um diretório (recursivo), em ordem de caminho."""
+    encontrados = []
+    for raiz, _, arquivos in os.walk(pasta):
+        for nome in arquivos:
+            if nome.lower().endswith(EXTENSOES_PLANILHA) and not nome.startswith((".", "~$")):
+                encontrados.append(os.path.join(raiz, nome))
+    return sorted(encontrados)
+
+
+def extrair_zip(arquivo_zip, destino, max_arquivos=None, max_bytes_arquivo=None,
+                max_bytes_total=None):
+    """
+    Extrai as planilhas do ZIP em destino, cada uma numa subpasta numerada
+    (nomes iguais em pastas diferentes do ZIP não colidem). Retorna
+    (caminhos, nomes no ZIP). ValueError se o ZIP passar dos limites de
+    quantidade de planilhas ou de tamanho descompactado (por arquivo ou
+    total); os tamanhos são conferidos antes de extrair, pelo cabeçalho, e o
+    zipfile não lê além do tamanho declarado.
+    """
+    max_arquivos = max_arquivos or MAX_ARQUIVOS_ZIP
+    max_bytes_arquivo = max_bytes_arquivo or MAX_BYTES_ARQUIVO_ZIP
+    max_bytes_total = max_bytes_total or MAX_BYTES_TOTAL_ZIP
+    with zipfile.ZipFile(arquivo_zip) as zf:
+        planilhas = []
+        total = 0
+        for info in zf.infolist():
+            nome = os.path.basename(info.filename)
+            if info.is_dir() or info.filename.startswith("__MACOSX/"):
+                continue
+            if not nome.lower().endswith(EXTENSOES_PLANILHA) or nome.startswith((".", "~$")):
+                continue
+            if len(planilhas) >= max_arquivos:
+                raise ValueError(f"O ZIP tem mais de {max_arquivos} planilhas.")
+            if info.file_size > max_bytes_arquivo:
+                raise ValueError(
+                    f"'{info.filename}' tem {info.file_size / 1024 / 1024:.1f} MB descompactado "
+                    f"(limite: {max_bytes_arquivo / 1024 / 1024:.0f} MB por arquivo)."
+                )
+            total += info.file_size
+            if total > max_bytes_total:
+                raise ValueError(
+                    f"As planilhas do ZIP passam de {max_bytes_total / 1024 / 1024:.0f} MB descompactadas."
+                )
+            planilhas.append((info, nome))
+
+        caminhos, nomes = [], []
+        for info, nome in planilhas:
+            pasta = os.path.join(destino, f"{len(caminhos):04d}")
+            os.makedirs(pasta)
+            caminho = os.path.join(pasta, nome)
+            with zf.open(info) as origem, open(caminho, "wb") as f:
+                shutil.copyfileobj(origem, f)
+            caminhos.append(caminho)
+            nomes.append(info.filename)
+    return caminhos, nomes
+
+
+# --- Execução ---
+def _processar_um(ferramenta, caminho, parametros):
+    inicio = time.perf_counter()
+    with coletar_etapas() as etapas:
+        try:
+            # Logs e tracebacks das ferramentas ficam fora da saída; o erro vai ao manifesto
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                conteudo, nome_saida = FERRAMENTAS[ferramenta](caminho, parametros)
+            return {"nome_saida": nome_saida, "conteudo": conteudo, "erro": None,
+                    "segundos": time.perf_counter() - inicio, "etapas": etapas}
+        except Exception as e:
+            return {"nome_saida": None, "conteudo": None, "erro": f"{type(e).__name__}: {e}",
+                    "segundos": time.perf_counter() - inicio, "etapas": etapas}
+
+
+def processar_arquivos(ferramenta, caminhos, parametros=None, max_workers=None, nomes_originais=None):
+    """
+    Roda a ferramenta em cada arquivo num pool de processos (em sequência,
+    reportando o progresso, com max_workers=1). Retorna
+    (zip_bytes, manifesto): o ZIP tem as saídas e manifesto.json; o manifesto
+    lista, por arquivo, saída, status, tempo e erro.
+    """
+    if ferramenta not in FERRAMENTAS:
+        raise ValueError(f"Ferramenta inválida: '{ferramenta}'. Use: {', '.join(FERRAMENTAS)}.")
+    if not caminhos:
+        raise ValueError("Nenhuma planilha encontrada na entrada.")
+    parametros = parametros or {}
+    nomes_originais = nomes_originais or [os.path.basename(c) for c in caminhos]
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(caminhos)))
+
+    inicio = time.perf_counter()
+    if max_workers == 1:
+        resultados = []
+        for caminho in caminhos:
+            resultados.append(_processar_um(ferramenta, caminho, parametros))
+            reportar_progresso(len(resultados), len(caminhos), os.path.basename(caminho))
+    else:
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=contexto) as pool:
+            resultados = list(pool.map(_processar_um, [ferramenta] * len(caminhos), caminhos,
+                                       [parametros] * len(caminhos)))
+    for resultado in resultados:
+        registrar_etapas(resultado["etapas"])
+
+    output = io.BytesIO()
+    arquivos_manifesto = []
+    nomes_usados = set()
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for nome_original, resultado in zip(nomes_originais, resultados):
+            nome_saida = resultado["nome_saida"]
+            if nome_saida is not None:
+                # Arquivos de entrada com mesmo nome em pastas diferentes
+                base, ext = os.path.splitext(nome_saida)
+                n = 2
+                while nome_saida in nomes_usados:
+                    nome_saida = f"{base}_{n}{ext}"
+                    n += 1
+                nomes_usados.add(nome_saida)
+                zf.writestr(nome_saida, resultado["conteudo"])
+            arquivos_manifesto.append({
+                "arquivo": nome_original,
+                "saida": nome_saida,
+                "status": "ok" if resultado["erro"] is None else "erro",
+                "segundos": round(resultado["segundos"], 3),
+                "erro": resultado["erro"],
+            })
+        manifesto = {
+            "ferramenta": ferramenta,
+            "parametros": parametros,
+            "workers": max_workers,
+            "total_segundos": round(time.perf_counter() - inicio, 3),
+            "arquivos": arquivos_manifesto,
+        }
+        zf.writestr("manifesto.json", json.dumps(manifesto, ensure_ascii=False, indent=2))
+    output.seek(0)
+    return output.getvalue(), manifesto
+
+
+def processar_arquivos_job(ferramenta, caminhos, parametros=None, nomes_originais=None):
+    """
+    Versão para o executor de jobs: processa em sequência (o job já ocupa um
+    worker do pool) e retorna só o ZIP.
+    """
+    conteudo, _ = processar_arquivos(
+        ferramenta, caminhos, parametros, max_workers=1, nomes_originais=nomes_originais
+    )
+    return conteudo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Processa várias planilhas (ZIP ou diretório) com uma ferramenta.")
+    parser.add_argument("ferramenta", choices=sorted(FERRAMENTAS))
+    parser.add_argument("entrada", help="Arquivo .zip ou diretório com as planilhas")
+    parser.add_argument("-o", "--saida", required=True, help="ZIP de saída")
+    parser.add_argument("--parametros", default="{}", help="Parâmetros da ferramenta em JSON")
+    parser.add_argument("--workers", type=int, default=None, help="Processos em paralelo (padrão: núcleos)")
+    args = parser.parse_args(argv)
+
+    parametros = json.loads(args.parametros)
+    with tempfile.TemporaryDirectory() as tmp:
+        if os.path.isdir(args.entrada):
+            caminhos = listar_planilhas(args.entrada)
+            nomes = [os.path.relpath(c, args.entrada) for c in caminhos]
+        else:
+            caminhos, nomes = extrair_zip(args.entrada, tmp)
+        conteudo, manifesto = processar_arquivos(args.ferramenta, caminhos, parametros, args.workers, nomes)
+    with open(args.saida, "wb") as f:
+        f.write(conteudo)
+
+    for item in manifesto["arquivos"]:
+        detalhe = item["saida"] if item["status"] == "ok" else item["erro"]
+        print(f"  {item['status']:<4} {item['segundos']:8.2f}s  {item['arquivo']} -> {detalhe}")
+    erros = sum(item["status"] == "erro" for item in manifesto["arquivos"])
+    print(f"{len(manifesto['arquivos'])} arquivos em {manifesto['total_segundos']:.2f}s "
+          f"({manifesto['workers']} workers), {erros} com erro. Saída: {args.saida}")
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# servicos/workspaces.py
+"""
+Workspaces de upload: cada job recebe um diretório próprio em
+UPLOAD_FOLDER (<tool_prefix><id>/), então dois usuários com arquivos de mesmo
+nome não se sobrescrevem e a limpeza de um job não apaga a entrada de outro.
+
+Um faxineiro em background remove workspaces abandonados (redirect no meio
+do fluxo, sessão expirada...) por idade e, acima da cota de disco, do mais
+antigo para o mais novo. Só entram na faxina diretórios com .workspace.json
+e os arquivos soltos do formato antigo (<tool_prefix><arquivo>); o resto da
+pasta (um SQLite de jobs, por exemplo) nunca é apagado. Workspaces ligados
+a um job ainda existente (vincular_job) são mantidos, e a cota não remove
+nada com atividade mais recente que idade_minima_cota_segundos.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+ARQUIVO_REGISTRO = ".workspace.json"
+IDADE_MAXIMA_PADRAO = 6 * 60 * 60  # 6 horas sem atividade
+COTA_PADRAO_BYTES = 1024 * 1024 * 1024  # 1 GB
+IDADE_MINIMA_COTA_PADRAO = 15 * 60  # a cota não remove nada mais novo que isso
+INTERVALO_FAXINA_PADRAO = 10 * 60  # 10 minutos
+
+# Prefixos dos arquivos de upload soltos na raiz, de antes dos workspaces
+PREFIXOS_LEGADOS = (
+    "cv_",
+    "cv_lote_",
+    "fmt_lote_",
+    "incorp_",
+    "multiplos_",
+    "preco_incorp_",
+    "preco_lote_av_",
+    "preco_lote_parc_",
+    "sienge_",
+    "sienge_lote_",
+    "tab_precos_",
+    "unid_bloq_",
+)
+
+
+class GerenciadorWorkspaces:
+    """
+    job_vivo(job_id) -> bool diz se um job vinculado a um workspace ainda
+    existe (armazenamento_jobs.existe); sem ele, vínculos são ignorados.
+    """
+
+    def __init__(self, raiz, idade_maxima_segundos=None, cota_bytes=None,
+                 idade_minima_cota_segundos=None, job_vivo=None):
+        self.raiz = raiz
+        self.idade_maxima_segundos = idade_maxima_segundos or int(
+            os.environ.get("UPLOADS_IDADE_MAXIMA_SEGUNDOS", IDADE_MAXIMA_PADRAO)
+        )
+        self.cota_bytes = cota_bytes or int(os.environ.get("UPLOADS_COTA_BYTES", COTA_PADRAO_BYTES))
+        if idade_minima_cota_segundos is None:
+            idade_minima_cota_segundos = int(
+                os.environ.get("UPLOADS_IDADE_MINIMA_COTA_SEGUNDOS", IDADE_MINIMA_COTA_PADRAO)
+            )
+        self.idade_minima_cota_segundos = idade_minima_cota_segundos
+        self.job_vivo = job_vivo
+        self._faxineiro = None
+        self._lock = threading.Lock()
+        os.makedirs(raiz, exist_ok=True)
+
+    # --- Ciclo de vida de um workspace ---
+    def novo_arquivo(self, tool_prefix, filename):
+        """
+        Cria um workspace para o job e retorna o caminho onde salvar `filename`
+        (já passado por secure_filename) dentro dele.
+        """
+        pasta = os.path.join(self.raiz, f"{tool_prefix}{uuid.uuid4().hex}")
+        os.makedirs(pasta)
+        self._registrar(pasta, ferramenta=tool_prefix, arquivo=filename)
+        return os.path.join(pasta, filename)
+
+    def _eh_workspace(self, pasta):
+        return os.path.isfile(os.path.join(pasta, ARQUIVO_REGISTRO))
+
+    def _registrar(self, pasta, **campos):
+        campos["criado_em"] = time.time()
+        self._gravar_registro(pasta, campos)
+
+    def _gravar_registro(self, pasta, registro):
+        caminho = os.path.join(pasta, ARQUIVO_REGISTRO)
+        temporario = f"{caminho}.{uuid.uuid4().hex}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(registro, f)
+        os.replace(temporario, caminho)
+
+    def _ler_registro(self, pasta):
+        try:
+            with open(os.path.join(pasta, ARQUIVO_REGISTRO), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def vincular_job(self, caminho, job_id):
+        """
+        Liga o workspace do arquivo `caminho` a um job: enquanto o job existir
+        a faxina não remove o workspace. Retorna False (sem fazer nada) se o
+        caminho não estiver num workspace.
+        """
+        pasta = os.path.dirname(os.path.abspath(caminho))
+        if os.path.abspath(pasta) == os.path.abspath(self.raiz) or not self._eh_workspace(pasta):
+            return False
+        with self._lock:
+            registro = self._ler_registro(pasta)
+            jobs = registro.setdefault("jobs", [])
+            if job_id not in jobs:
+                jobs.append(job_id)
+                self._gravar_registro(pasta, registro)
+        return True
+
+    def remover(self, caminho):
+        """
+        Remove um arquivo de upload e, se ele estiver num workspace, o workspace
+        inteiro. Caminhos que não existem são ignorados.
+        """
+        pasta = os.path.dirname(os.path.abspath(caminho))
+        if os.path.abspath(pasta) != os.path.abspath(self.raiz) and self._eh_workspace(pasta):
+            shutil.rmtree(pasta, ignore_errors=True)
+        elif os.path.exists(caminho):
+            os.remove(caminho)
+
+    # --- Faxina ---
+    def _itens(self):
+        """
+        (caminho, ultima_atividade, tamanho_bytes, jobs) de cada workspace e
+        arquivo solto do formato antigo na raiz; outras entradas são ignoradas.
+        """
+        itens = []
+        for entrada in os.scandir(self.raiz):
+            try:
+                if entrada.is_dir(follow_symlinks=False):
+                    if not self._eh_workspace(entrada.path):
+                        continue
+                    jobs = self._ler_registro(entrada.path).get("jobs", [])
+                    ultima, tamanho = entrada.stat().st_mtime, 0
+                    for pasta, _, arquivos in os.walk(entrada.path):
+                        for nome in arquivos:
+                            st = os.stat(os.path.join(pasta, nome))
+                            ultima = max(ultima, st.st_mtime)
+                            tamanho += st.st_size
+                elif entrada.is_file(follow_symlinks=False) and entrada.name.startswith(PREFIXOS_LEGADOS):
+                    jobs = []
+                    st = entrada.stat(follow_symlinks=False)
+                    ultima, tamanho = st.st_mtime, st.st_size
+                else:
+                    continue
+            except FileNotFoundError:
+                continue  # Removido durante a varredura
+            itens.append((entrada.path, ultima, tamanho, jobs))
+        return itens
+
+    def _em_uso(self, jobs):
+        return self.job_vivo is not None and any(self.job_vivo(job_id) for job_id in jobs)
+
+    def _apagar(self, caminho):
+        if os.path.isdir(caminho):
+            shutil.rmtree(caminho, ignore_errors=True)
+        else:
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+
+    def limpar(self, agora=None):
+        """
+        Remove workspaces (e arquivos soltos do formato antigo) sem atividade há
+        mais de idade_maxima_segundos; depois, se o total ainda passar da cota,
+        remove os mais antigos até caber, sem tocar nos que tiveram atividade
+        nos últimos idade_minima_cota_segundos. Workspaces de jobs ainda
+        existentes nunca são removidos. Retorna (removidos, bytes_liberados).
+        """
+        agora = agora or time.time()
+        with self._lock:
+            itens = sorted(self._itens(), key=lambda item: item[1])
+            total = sum(item[2] for item in itens)
+            removidos, liberados = 0, 0
+            for caminho, ultima, tamanho, jobs in itens:
+                idade = agora - ultima
+                if idade <= self.idade_maxima_segundos and (
+                    total <= self.cota_bytes or idade <= self.idade_minima_cota_segundos
+                ):
+                    break  # Ordenado por atividade: o restante é mais novo (e cabe na cota ou é recente)
+                if self._em_uso(jobs):
+                    continue
+                self._apagar(caminho)
+                total -= tamanho
+                removidos += 1
+                liberados += tamanho
+        if removidos:
+            print(f"(Workspaces) Faxina: {removidos} itens removidos, {liberados / 1024 / 1024:.1f} MB liberados.")
+        return removidos, liberados
+
+    def iniciar_faxineiro(self, intervalo_segundos=None):
+        """Inicia (uma vez por processo) a thread que roda limpar() periodicamente."""
+        intervalo_segundos = intervalo_segundos or int(
+            os.environ.get("UPLOADS_INTERVALO_FAXINA_SEGUNDOS", INTERVALO_FAXINA_PADRAO)
+        )
+        with self._lock:
+            if self._faxineiro is not None:
+                return
+            self._faxineiro = threading.Thread(
+                target=self._loop_faxina, args=(intervalo_segundos,), name="faxina-uploads", daemon=True
+            )
+        self._faxineiro.start()
+
+    def _loop_faxina(self, intervalo_segundos):
+        while True:
+            try:
+                self.limpar()
+            except Exception as e:
+                print(f"(Workspaces) Erro na faxina: {e}")
+            time.sleep(intervalo_segundos)
@@ -0,0 +1,182 @@
+# tests/test_colunas.py
+"""
+Fixa os resultados de find_column_flexible / resolver_colunas com as
+palavras-chave de cada formatador que tinha a sua própria cópia da busca
+(tabela_preco_formatador, tabela_preco_importador, incorporacao_formatador e
+tabela_unidades_bloqueadas), incluindo os casos de borda em que as cópias
+podiam divergir: nomes normalizados repetidos, desempates do match parcial e
+as opções manter_espacos / desempate_por_tamanho.
+"""
+
+import pandas as pd
+import pytest
+
+from formatadores.colunas import Correspondencia, find_column_flexible, resolver_colunas
+from formatadores.tabela_unidades_bloqueadas import OPCOES_BUSCA_COLUNAS
+
+VALOR = ["valor", "preco", "preço", "total"]
+AGRUPADOR = ["bloco", "blk", "quadra", "pavimento"]
+IDENTIFICADOR_1 = ["bloco", "quadra"]
+IDENTIFICADOR_2 = ["apt", "apto", "apartamento", "unidade", "casa"]
+TIPOLOGIA = ["tipologia", "tipo da unidade", "descricao", "descrição"]
+LOTE = ["lote", "lt", "unidade"]
+AREA_LOTE = ["area", "área", "area privativa", "área privativa", "metragem"]
+VALOR_A_VISTA = ["valor a vista", "valor à vista", "preco a vista", "preço à vista",
+                 "valor avista", "valor com registro", "valor"]
+ENTRADA = ["entrada", "sinal"]
+EMPREENDIMENTO = ["empreendimento", "projeto", "nome do empreendimento"]
+MOTIVO = ["motivo do bloqueio", "motivo bloqueio", "motivo"]
+UNIDADE_BLOQUEADA = ["unidade", "lote", "identificacao da unidade", "identificação da unidade"]
+DATA_BLOQUEIO = ["data do bloqueio", "data bloqueio", "data"]
+
+COLUNAS_INCORPORACAO = ["TIPO", "CASA", "ÁREA CONSTRUÍDA", "QUINTAL", "GARAGEM E FRONTAL",
+                        "VAGAS DE GARAGEM", "ÁREA PRIVATIVA", "FRAÇÃO IDEAL"]
+COLUNAS_LOTE_AVISTA = ["QUADRA", "LOTE", "ÁREA (m²)", "VALOR À VISTA", "VALOR ENTRADA"]
+
+
+@pytest.mark.parametrize(
+    "colunas, palavras, esperada",
+    [
+        # tabela_preco_formatador
+        (["Bloco", "Apto", "Valor à Vista", "Área Privativa (m²)"], VALOR, "Valor à Vista"),
+        (["Preço Total", "Valor Parcela"], VALOR, "Preço Total"),
+        (["Quadra", "Lote", "Valor"], AGRUPADOR, "Quadra"),
+        (["BLOCO", "APTO"], ["quadra"], None),
+        # tabela_preco_importador, modo padrão
+        (["BLOCO", "APTO", "TIPOLOGIA", "VALOR"], IDENTIFICADOR_1, "BLOCO"),
+        (["BLOCO", "APTO", "TIPOLOGIA", "VALOR"], IDENTIFICADOR_2, "APTO"),
+        (["Bloco", "Nº Apartamento", "Tipo da Unidade"], TIPOLOGIA, "Tipo da Unidade"),
+        # tabela_preco_importador, lote à vista e parcelado
+        (COLUNAS_LOTE_AVISTA, LOTE, "LOTE"),
+        (COLUNAS_LOTE_AVISTA, AREA_LOTE, "ÁREA (m²)"),
+        (COLUNAS_LOTE_AVISTA, VALOR_A_VISTA, "VALOR À VISTA"),
+        (["QUADRA", "LOTE", "VALOR TOTAL", "ENTRADA (SINAL)"], ["valor"], "VALOR TOTAL"),
+        (["QUADRA", "LOTE", "VALOR TOTAL", "ENTRADA (SINAL)"], ENTRADA, "ENTRADA (SINAL)"),
+        # incorporacao_formatador
+        (COLUNAS_INCORPORACAO, ["garagem", "garagem e frontal"], "GARAGEM E FRONTAL"),
+        (COLUNAS_INCORPORACAO, ["vagas de garagem", "vagas"], "VAGAS DE GARAGEM"),
+        (COLUNAS_INCORPORACAO, ["areaconstruida", "área construída"], "ÁREA CONSTRUÍDA"),
+        (COLUNAS_INCORPORACAO, ["fracaoideal", "fração ideal"], "FRAÇÃO IDEAL"),
+        (["TIPOLOGIA", "APTO", "BLOCO"], ["tipo", "tipologia"], "TIPOLOGIA"),
+        (["Quadra", "Qd. Anterior"], ["quadra", "qd"], "Quadra"),
+    ],
+)
+def test_palavras_dos_formatadores(colunas, palavras, esperada):
+    assert find_column_flexible(pd.Index(colunas), palavras, "C", required=False) == esperada
+
+
+@pytest.mark.parametrize(
+    "colunas, palavras, esperada",
+    [
+        (["Nome do Empreendimento", "Motivo do Bloqueio", "Bloco", "Unidade"],
+         EMPREENDIMENTO, "Nome do Empreendimento"),
+        (["Nome do Empreendimento", "Motivo do Bloqueio", "Bloco", "Unidade"],
+         MOTIVO, "Motivo do Bloqueio"),
+        (["Empreendimento", "Data do Bloqueio", "Data"], DATA_BLOQUEIO, "Data do Bloqueio"),
+        (["Identificação da Unidade", "Unidade Anterior"], UNIDADE_BLOQUEADA,
+         "Identificação da Unidade"),
+        (["Etapa", "Bloco/Quadra", "Unidade"], ["bloco", "quadra"], "Bloco/Quadra"),
+    ],
+)
+def test_palavras_de_unidades_bloqueadas(colunas, palavras, esperada):
+    assert find_column_flexible(
+        pd.Index(colunas), palavras, "C", required=False, **OPCOES_BUSCA_COLUNAS
+    ) == esperada
+
+
+def test_nome_normalizado_repetido_fica_com_a_ultima_coluna():
+    assert find_column_flexible(["Valor", "VALOR", "valor "], ["valor"], "C") == "valor "
+    assert find_column_flexible(["Área", "Area"], ["area"], "C") == "Area"
+
+
+def test_match_exato_segue_a_ordem_das_palavras():
+    colunas = ["Data", "Data do Bloqueio"]
+    assert find_column_flexible(colunas, ["data do bloqueio", "data"], "C") == "Data do Bloqueio"
+    assert find_column_flexible(colunas, ["data", "data do bloqueio"], "C") == "Data"
+
+
+def test_parcial_prefere_nome_que_comeca_com_a_palavra():
+    assert find_column_flexible(["Sub Bloco", "Bloco A"], ["bloco"], "C") == "Bloco A"
+
+
+def test_parcial_empata_pelo_nome_original():
+    assert find_column_flexible(["Z Valor", "A Valor"], ["valor"], "C") == "A Valor"
+    assert find_column_flexible(["Data do Bloqueio", "Data de Cadastro"], ["data"], "C") == (
+        "Data de Cadastro"
+    )
+
+
+def test_desempate_por_tamanho_prefere_nome_mais_curto():
+    colunas = ["Quadra Antiga Referência", "Quadra B"]
+    assert find_column_flexible(colunas, ["quadra"], "C") == "Quadra Antiga Referência"
+    assert find_column_flexible(colunas, ["quadra"], "C", desempate_por_tamanho=True) == "Quadra B"
+
+
+def test_manter_espacos():
+    # Sem manter_espacos os espaços somem dos dois lados e o match é exato;
+    # mantendo-os, 'motivobloqueio' não está em 'motivo bloqueio'.
+    assert find_column_flexible(["Motivo Bloqueio"], ["motivobloqueio"], "C") == "Motivo Bloqueio"
+    assert find_column_flexible(
+        ["Motivo Bloqueio"], ["motivobloqueio"], "C", required=False, manter_espacos=True
+    ) is None
+    # E a palavra com espaço só acha o nome se a sequência for a mesma
+    assert find_column_flexible(
+        ["Motivo do Bloqueio"], ["motivo bloqueio"], "C", required=False, **OPCOES_BUSCA_COLUNAS
+    ) is None
+
+
+def test_nomes_e_palavras_vazios_depois_de_normalizar():
+    # '#' e '-' normalizam para '': casam exatamente entre si, mas uma
+    # palavra vazia não vale como match parcial de qualquer nome
+    assert find_column_flexible(["#", "Valor"], ["-"], "C") == "#"
+    assert find_column_flexible(["Valor"], ["-"], "C", required=False) is None
+    assert find_column_flexible(["#", "Valor"], ["val"], "C") == "Valor"
+
+
+def test_obrigatoria_ausente_levanta_value_error():
+    with pytest.raises(ValueError, match="Coluna obrigatória 'QUADRA' não encontrada"):
+        find_column_flexible(["BLOCO", "APTO"], ["quadra"], "QUADRA")
+    assert find_column_flexible(["BLOCO", "APTO"], ["quadra"], "QUADRA", required=False) is None
+
+
+def test_resolver_colunas_mapa_e_relatorio():
+    mapa, relatorio = resolver_colunas(
+        pd.Index(["BLOCO", "APTO", "Tipo da Unidade", "VALOR"]),
+        {
+            "IDENTIFICADOR 1": (IDENTIFICADOR_1, True),
+            "IDENTIFICADOR 2": (IDENTIFICADOR_2, True),
+            "TIPOLOGIA": (TIPOLOGIA, True),
+            "ANDAR": (["andar"], False),
+        },
+    )
+    assert mapa == {
+        "IDENTIFICADOR 1": "BLOCO",
+        "IDENTIFICADOR 2": "APTO",
+        "TIPOLOGIA": "Tipo da Unidade",
+        "ANDAR": None,
+    }
+    assert relatorio == [
+        Correspondencia("IDENTIFICADOR 1", "BLOCO", "exato", "bloco"),
+        Correspondencia("IDENTIFICADOR 2", "APTO", "exato", "apto"),
+        Correspondencia("TIPOLOGIA", "Tipo da Unidade", "exato", "tipo da unidade"),
+        Correspondencia("ANDAR", None, None, None),
+    ]
+
+
+def test_resolver_colunas_para_no_primeiro_obrigatorio_ausente():
+    with pytest.raises(ValueError, match="'ENTRADA'"):
+        resolver_colunas(
+            ["QUADRA", "LOTE", "VALOR TOTAL"],
+            {"LOTE": (LOTE, True), "ENTRADA": (ENTRADA, True), "VALOR": (["valor"], True)},
+        )
+
+
+def test_resolver_colunas_relata_match_parcial():
+    _, relatorio = resolver_colunas(
+        ["QUADRA", "LOTE", "VALOR TOTAL", "ENTRADA (SINAL)"],
+        {"VALOR (Total)": (["valor"], True), "ENTRADA": (ENTRADA, True)},
+    )
+    assert relatorio == [
+        Correspondencia("VALOR (Total)", "VALOR TOTAL", "parcial", "valor"),
+        Correspondencia("ENTRADA", "ENTRADA (SINAL)", "parcial", "entrada"),
+    ]